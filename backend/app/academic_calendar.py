@@ -0,0 +1,345 @@
+"""Academic calendar: state in the DB, the in-process class-day service and the academicCalendar.json mirror."""
+
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from threading import Event, RLock, Thread
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from app import metrics, settings
+from app.database import session_scope
+from app.models import AcademicCalendarBankHour, AcademicCalendarEvent, AcademicCalendarState
+from app.normalize import _month_bounds
+from app.storage import ACADEMIC_CALENDAR_FILE_LOCK
+
+ACADEMIC_CALENDAR_MIRROR_INTERVAL_SECONDS = float(os.getenv("ACADEMIC_CALENDAR_MIRROR_INTERVAL", "5") or 5)
+
+
+def _academic_calendar_file() -> str:
+    return os.path.join(settings.DATA_DIR, "academicCalendar.json")
+
+
+def _empty_academic_calendar_state() -> Dict[str, Any]:
+    return {"settings": None, "events": [], "bankHours": []}
+
+
+def _normalize_academic_calendar_state(payload: Any) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        return _empty_academic_calendar_state()
+    settings = payload.get("settings") if isinstance(payload.get("settings"), dict) else None
+    events = payload.get("events") if isinstance(payload.get("events"), list) else []
+    bank_hours = payload.get("bankHours") if isinstance(payload.get("bankHours"), list) else []
+    return {"settings": settings, "events": events, "bankHours": bank_hours}
+
+
+def _academic_event_as_dict(row: AcademicCalendarEvent) -> Dict[str, Any]:
+    return {
+        "id": row.event_uid,
+        "date": row.date,
+        "type": row.type,
+        "allDay": bool(row.all_day),
+        "startTime": row.start_time,
+        "endTime": row.end_time,
+        "description": row.description,
+        "teacher": row.teacher,
+        "created_at": row.created_at,
+    }
+
+
+def _academic_bank_hour_as_dict(row: AcademicCalendarBankHour) -> Dict[str, Any]:
+    return {
+        "id": row.entry_uid,
+        "eventId": row.event_uid,
+        "date": row.date,
+        "teacher": row.teacher,
+        "description": row.description,
+        "startTime": row.start_time,
+        "endTime": row.end_time,
+        "hours": row.hours,
+        "created_at": row.created_at,
+    }
+
+
+def _academic_event_row(item: Dict[str, Any]) -> AcademicCalendarEvent:
+    return AcademicCalendarEvent(
+        event_uid=str(item.get("id") or uuid.uuid4()),
+        date=str(item.get("date") or ""),
+        type=str(item.get("type") or ""),
+        all_day=bool(item.get("allDay")),
+        start_time=str(item.get("startTime") or ""),
+        end_time=str(item.get("endTime") or ""),
+        description=str(item.get("description") or ""),
+        teacher=str(item.get("teacher") or ""),
+        created_at=str(item.get("created_at") or ""),
+    )
+
+
+def _academic_bank_hour_row(item: Dict[str, Any]) -> AcademicCalendarBankHour:
+    try:
+        hours = float(item.get("hours") or 0)
+    except (TypeError, ValueError):
+        hours = 0.0
+    return AcademicCalendarBankHour(
+        entry_uid=str(item.get("id") or uuid.uuid4()),
+        event_uid=str(item.get("eventId") or ""),
+        date=str(item.get("date") or ""),
+        teacher=str(item.get("teacher") or ""),
+        description=str(item.get("description") or ""),
+        start_time=str(item.get("startTime") or ""),
+        end_time=str(item.get("endTime") or ""),
+        hours=hours,
+        created_at=str(item.get("created_at") or ""),
+    )
+
+
+def _load_academic_calendar_settings(db: Session) -> Optional[Dict[str, Any]]:
+    row = db.get(AcademicCalendarState, 1)
+    if not row or not str(row.state_json or "").strip():
+        return None
+    try:
+        return _normalize_academic_calendar_state(json.loads(row.state_json)).get("settings")
+    except Exception:
+        return None
+
+
+def _save_academic_calendar_settings(db: Session, settings: Optional[Dict[str, Any]]) -> None:
+    # A linha única guarda só as configurações; eventos e banco de horas ficam nas tabelas próprias.
+    row = db.get(AcademicCalendarState, 1) or AcademicCalendarState(id=1)
+    row.state_json = json.dumps({"settings": settings}, ensure_ascii=False)
+    row.updated_at = datetime.utcnow().isoformat()
+    db.add(row)
+
+
+def _load_academic_calendar_state_from_db(db: Session, month: Optional[str] = None) -> Dict[str, Any]:
+    events_stmt = select(AcademicCalendarEvent)
+    bank_hours_stmt = select(AcademicCalendarBankHour)
+    if month:
+        month_start, month_end = _month_bounds(month)
+        events_stmt = events_stmt.where(AcademicCalendarEvent.date >= month_start, AcademicCalendarEvent.date <= month_end)
+        bank_hours_stmt = bank_hours_stmt.where(
+            AcademicCalendarBankHour.date >= month_start,
+            AcademicCalendarBankHour.date <= month_end,
+        )
+    return {
+        "settings": _load_academic_calendar_settings(db),
+        "events": [_academic_event_as_dict(row) for row in db.exec(events_stmt.order_by(AcademicCalendarEvent.id)).all()],
+        "bankHours": [
+            _academic_bank_hour_as_dict(row)
+            for row in db.exec(bank_hours_stmt.order_by(AcademicCalendarBankHour.id)).all()
+        ],
+    }
+
+
+def _migrate_academic_calendar_state() -> bool:
+    """Move events/bankHours from the legacy state blob (or academicCalendar.json) into their tables."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as db:
+        row = db.get(AcademicCalendarState, 1)
+        legacy: Optional[Dict[str, Any]] = None
+        if row and str(row.state_json or "").strip():
+            try:
+                payload = json.loads(row.state_json)
+            except Exception:
+                payload = {}
+            if isinstance(payload, dict) and ("events" in payload or "bankHours" in payload):
+                legacy = _normalize_academic_calendar_state(payload)
+        elif not row and os.path.exists(_academic_calendar_file()):
+            try:
+                with open(_academic_calendar_file(), "r", encoding="utf-8") as f:
+                    legacy = _normalize_academic_calendar_state(json.load(f))
+            except Exception:
+                legacy = None
+        if legacy is None:
+            return False
+
+        known_events = set(db.exec(select(AcademicCalendarEvent.event_uid)).all())
+        for item in legacy["events"]:
+            if isinstance(item, dict) and str(item.get("id") or "") not in known_events:
+                db.add(_academic_event_row(item))
+        known_bank_hours = set(db.exec(select(AcademicCalendarBankHour.entry_uid)).all())
+        for item in legacy["bankHours"]:
+            if isinstance(item, dict) and str(item.get("id") or "") not in known_bank_hours:
+                db.add(_academic_bank_hour_row(item))
+        _save_academic_calendar_settings(db, legacy["settings"])
+        db.commit()
+
+    ACADEMIC_CALENDAR.invalidate()
+    return True
+
+
+SCHEDULE_GROUP_WEEKDAYS = {"tq": {1, 3}, "qs": {2, 4}}  # mon=0 ... sun=6
+
+
+class _ClassDayIndex:
+    """tq/qs class days from inicioAulas to `until` (skipping event dates), with prefix counts."""
+
+    def __init__(self, start: Optional[date], until: date, closed_days: set[str]):
+        self.start = start
+        self.until = until
+        self.days: Dict[str, set[str]] = {group: set() for group in SCHEDULE_GROUP_WEEKDAYS}
+        self._prefix: Dict[str, List[int]] = {group: [0] for group in SCHEDULE_GROUP_WEEKDAYS}
+        if start is None:
+            return
+
+        cursor = start
+        while cursor <= until:
+            key = cursor.isoformat()
+            weekday = cursor.weekday()
+            for group, weekdays in SCHEDULE_GROUP_WEEKDAYS.items():
+                is_class_day = weekday in weekdays and key not in closed_days
+                if is_class_day:
+                    self.days[group].add(key)
+                self._prefix[group].append(self._prefix[group][-1] + int(is_class_day))
+            cursor += timedelta(days=1)
+
+    def count(self, group: str, start_date: date, end_date: date) -> int:
+        prefix = self._prefix.get(group)
+        if self.start is None or prefix is None:
+            return 0
+        first = max(start_date, self.start)
+        last = min(end_date, self.until)
+        if first > last:
+            return 0
+        return prefix[(last - self.start).days + 1] - prefix[(first - self.start).days]
+
+
+class _AcademicCalendarService:
+    """Cached calendar state and class-day index; calendar writes call invalidate()."""
+
+    def __init__(self):
+        self._lock = RLock()
+        self.version = 0
+        self._bind: Any = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._day_index: Optional[_ClassDayIndex] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._state = None
+            self._day_index = None
+
+    def _ensure_bind(self, bind: Any) -> None:
+        if self._bind is not bind:
+            self._bind = bind
+            self._state = None
+            self._day_index = None
+
+    def state(self, session: Optional[Session] = None) -> Dict[str, Any]:
+        from app.database import engine as _db_engine
+
+        with self._lock:
+            self._ensure_bind(_db_engine)
+            metrics.cache_lookup("academic_calendar", hit=self._state is not None)
+            if self._state is None:
+                with session_scope(session) as db:
+                    self._state = _load_academic_calendar_state_from_db(db)
+            return {
+                "settings": dict(self._state["settings"]) if self._state["settings"] else None,
+                "events": [dict(item) for item in self._state["events"]],
+                "bankHours": [dict(item) for item in self._state["bankHours"]],
+            }
+
+    def class_days(self, today: date, session: Optional[Session] = None) -> _ClassDayIndex:
+        from app.database import engine as _db_engine
+
+        with self._lock:
+            self._ensure_bind(_db_engine)
+            if self._day_index is not None and self._day_index.until == today:
+                return self._day_index
+            state = self.state(session)
+            start_date: Optional[date] = None
+            start_raw = str((state.get("settings") or {}).get("inicioAulas") or "").strip()
+            if start_raw:
+                try:
+                    start_date = datetime.strptime(start_raw, "%Y-%m-%d").date()
+                except ValueError:
+                    start_date = None
+            closed_days = {str(item.get("date") or "").strip() for item in state["events"]}
+            closed_days.discard("")
+            self._day_index = _ClassDayIndex(start_date, today, closed_days)
+            return self._day_index
+
+
+ACADEMIC_CALENDAR = _AcademicCalendarService()
+
+
+class _AcademicCalendarJsonMirror:
+    """Background writer for academicCalendar.json; the calendar tables are the source of truth.
+
+    Calendar writes only mark the file stale; the mirror dumps the (cached) state at
+    most once per cycle, so a burst of event/bank-hour writes costs one rewrite. A
+    failed write keeps the file stale and is retried on the next cycle.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.last_error = ""
+        self._stale: set[str] = set()
+        self._stale_lock = RLock()
+        self._wake = Event()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    def mark_stale(self, file_path: str) -> None:
+        with self._stale_lock:
+            self._stale.add(file_path)
+
+    def is_stale(self, file_path: Optional[str] = None) -> bool:
+        with self._stale_lock:
+            return file_path in self._stale if file_path is not None else bool(self._stale)
+
+    def flush(self) -> int:
+        with ACADEMIC_CALENDAR_FILE_LOCK:
+            with self._stale_lock:
+                paths = self._stale
+                self._stale = set()
+            if not paths:
+                return 0
+
+            written = 0
+            for file_path in paths:
+                try:
+                    state = _normalize_academic_calendar_state(ACADEMIC_CALENDAR.state())
+                    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                    with open(file_path, "w", encoding="utf-8") as f:
+                        json.dump(state, f, ensure_ascii=False, indent=2)
+                    written += 1
+                except Exception as exc:
+                    self.last_error = str(exc)
+                    print(f"[WARN] academic calendar JSON mirror failed ({file_path}): {exc}")
+                    self.mark_stale(file_path)
+            return written
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="academic-calendar-json-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.interval_seconds, 1) * 2)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self.is_stale():
+                self.flush()
+
+
+ACADEMIC_CALENDAR_JSON_MIRROR = _AcademicCalendarJsonMirror(ACADEMIC_CALENDAR_MIRROR_INTERVAL_SECONDS)
+
+
+PLANNED_SESSION_CLOSING_EVENTS = {"feriado", "ponte", "reuniao"}
+WEEKDAY_BY_NAME = {"segunda": 0, "terca": 1, "quarta": 2, "quinta": 3, "sexta": 4, "sabado": 5, "domingo": 6}
@@ -0,0 +1,207 @@
+"""Attendance log lookups (latest snapshot per class key) and the justifications table."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app import settings
+from app.models import AttendanceLog, JustificationRecord
+from app.normalize import _normalize_date_key, _normalize_horario_key, _normalize_text, _saved_at_sort_key
+from app.storage import _backup_runtime_json, _load_attendance_journal, _load_json_list
+
+JUSTIFICATION_KEY_COLUMNS = ["aluno_key", "data", "turma_key", "horario", "professor_key"]
+
+
+def _justification_row_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    data = _normalize_date_key(item.get("data") or "")
+    turma_codigo = str(item.get("turmaCodigo") or "").strip()
+    turma_label = str(item.get("turmaLabel") or "").strip()
+    professor = str(item.get("professor") or "").strip()
+    return {
+        "aluno_key": _normalize_text(str(item.get("aluno_nome") or "").strip()),
+        "aluno_nome": str(item.get("aluno_nome") or "").strip(),
+        "data": data,
+        "mes": data[:7],
+        "turma_key": _normalize_text(turma_codigo or turma_label),
+        "turma_codigo": turma_codigo,
+        "turma_label": turma_label,
+        "turma_label_key": _normalize_text(turma_label),
+        "horario": _normalize_horario_key(item.get("horario") or ""),
+        "professor_key": _normalize_text(professor),
+        "professor": professor,
+        "motivo": str(item.get("motivo") or ""),
+        "saved_at": str(item.get("saved_at") or ""),
+    }
+
+
+def _upsert_justifications(session: Session, items: List[Dict[str, Any]]) -> int:
+    """Bulk INSERT ... ON CONFLICT DO UPDATE keyed by (aluno, data, turma, horario, professor)."""
+    by_key: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for item in items:
+        values = _justification_row_values(item)
+        key = tuple(values[column] for column in JUSTIFICATION_KEY_COLUMNS)
+        if not any(key):
+            continue
+        # Último do lote vence (ON CONFLICT não pode tocar a mesma linha duas vezes).
+        by_key[key] = values
+    if not by_key:
+        return 0
+
+    dialect = session.get_bind().dialect.name
+    # O dialeto do banco em uso já está carregado pelo engine; o outro não precisa subir.
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_fn
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_fn
+    stmt = insert_fn(JustificationRecord).values(list(by_key.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=JUSTIFICATION_KEY_COLUMNS,
+        set_={
+            column: stmt.excluded[column]
+            for column in ["aluno_nome", "mes", "turma_codigo", "turma_label", "turma_label_key", "professor", "motivo", "saved_at"]
+        },
+    )
+    session.exec(stmt)
+    return len(by_key)
+
+
+def _migrate_justifications_from_json() -> int:
+    """Import the legacy baseJustificativas.json into justifications (once)."""
+    from app.database import engine as _db_engine
+
+    legacy_path = os.path.join(settings.DATA_DIR, "baseJustificativas.json")
+    if not os.path.exists(legacy_path):
+        return 0
+    migrated = 0
+    with Session(_db_engine) as session:
+        if session.exec(select(JustificationRecord.id).limit(1)).first() is None:
+            legacy = [item for item in _load_json_list(legacy_path) if isinstance(item, dict)]
+            migrated = _upsert_justifications(session, legacy) if legacy else 0
+            session.commit()
+    # Nada mais grava esse JSON; arquivado, ele não repovoa a tabela depois de um purge.
+    _backup_runtime_json(legacy_path)
+    os.remove(legacy_path)
+    return migrated
+
+
+def _backfill_justification_label_keys() -> int:
+    """Fill justifications.turma_label_key for rows written before the column existed."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as db:
+        rows = db.exec(
+            select(JustificationRecord).where(JustificationRecord.turma_label_key == "", JustificationRecord.turma_label != "")
+        ).all()
+        for row in rows:
+            row.turma_label_key = _normalize_text(row.turma_label)
+            db.add(row)
+        if rows:
+            db.commit()
+        return len(rows)
+
+
+def _attendance_log_lookup_keys(item: Dict[str, Any]) -> List[str]:
+    turma_codigo = str(item.get("turmaCodigo") or "").strip()
+    turma_label = str(item.get("turmaLabel") or "").strip()
+    horario = _normalize_horario_key(item.get("horario") or "")
+    professor = str(item.get("professor") or "").strip()
+
+    def _horario_variants(value: str) -> List[str]:
+        raw = str(value or "").strip()
+        digits = "".join(ch for ch in raw if ch.isdigit())
+        variants: List[str] = []
+        for candidate in [raw, digits, f"{digits[:2]}:{digits[2:4]}" if len(digits) >= 4 else ""]:
+            token = str(candidate or "").strip()
+            if token and token not in variants:
+                variants.append(token)
+        return variants or [""]
+
+    def _professor_variants(value: str) -> List[str]:
+        raw = str(value or "").strip()
+        normalized = _normalize_text(raw)
+        variants: List[str] = []
+        for candidate in [raw, normalized]:
+            token = str(candidate or "").strip()
+            if token and token not in variants:
+                variants.append(token)
+        return variants or [""]
+
+    def _turma_variants(value: str) -> List[str]:
+        raw = str(value or "").strip()
+        normalized = _normalize_text(raw)
+        variants: List[str] = []
+        for candidate in [raw, normalized]:
+            token = str(candidate or "").strip()
+            if token and token not in variants:
+                variants.append(token)
+        return variants or [""]
+
+    keys: List[str] = []
+    key_fields: List[List[str]] = [_horario_variants(horario), _professor_variants(professor)]
+
+    for horario_key in key_fields[0]:
+        for professor_key in key_fields[1]:
+            if turma_codigo:
+                keys.append("|".join(["codigo", turma_codigo, horario_key, professor_key]))
+            for turma_key in _turma_variants(turma_label):
+                keys.append("|".join(["label", turma_key, horario_key, professor_key]))
+
+    return keys
+
+def _latest_attendance_logs_from_db(db: Session, month: Optional[str] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Latest snapshot per lookup key from attendance_logs; None when there is nothing for `month`."""
+    stmt = select(AttendanceLog)
+    if month:
+        stmt = stmt.where(AttendanceLog.mes == month)
+    rows = db.exec(stmt).all()
+    if not rows:
+        return None
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        try:
+            registros = json.loads(row.registros_json or "[]")
+        except Exception:
+            registros = []
+        item = {
+            "turmaCodigo": row.turma_codigo,
+            "turmaLabel": row.turma_label,
+            "horario": row.horario,
+            "professor": row.professor,
+            "mes": row.mes,
+            "saved_at": row.saved_at,
+            "source": row.source,
+            "registros": registros,
+        }
+        keys = _attendance_log_lookup_keys(item)
+        saved_at_val = _saved_at_sort_key(row.saved_at)
+        for key in keys:
+            if key not in latest:
+                latest[key] = item
+                continue
+            existing_saved = _saved_at_sort_key(latest[key].get("saved_at"))
+            if saved_at_val > existing_saved:
+                latest[key] = item
+    return latest
+
+
+def _latest_attendance_logs_from_journal(month: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    # Fallback: lê do JSON (dados históricos)
+    items = _load_attendance_journal(month)
+    latest: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        if month and str(item.get("mes") or "") != month:
+            continue
+        keys = _attendance_log_lookup_keys(item)
+        if not keys:
+            continue
+        saved_at = _saved_at_sort_key(item.get("saved_at"))
+        for key in keys:
+            if key not in latest:
+                latest[key] = item
+                continue
+            existing_saved = _saved_at_sort_key(latest[key].get("saved_at"))
+            if saved_at > existing_saved:
+                latest[key] = item
+    return latest
@@ -38,21 +38,30 @@ def authenticate_user(session: Session, username: str, password: str):
         return False
     return user
 
+def user_from_token(session: Session, token: str):
+    """Resolve a bearer token to its User, or None when the token is invalid/expired."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    stmt = select(User).where(User.username == username)
+    return session.exec(stmt).first()
+
 def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    stmt = select(User).where(User.username == username)
-    user = session.exec(stmt).first()
+    user = user_from_token(session, token)
     if user is None:
         raise credentials_exception
     return user
+
+def get_admin_user(user: User = Depends(get_current_user)):
+    if (user.role or "") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return user
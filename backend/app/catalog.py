@@ -0,0 +1,233 @@
+"""Import class catalog (cached import_classes lookups, invalidated by session events) and get_or_create helpers."""
+
+from threading import RLock
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event as sa_event
+from sqlmodel import Session, select
+
+from app import metrics, models
+from app.normalize import (
+    _normalize_horario_key,
+    _normalize_horario_value,
+    _normalize_text,
+    _normalize_text_fold,
+)
+
+
+def _build_import_class_triple_index(
+    classes: List[models.ImportClass],
+) -> Dict[Tuple[str, str, str], models.ImportClass]:
+    """Map (turma, horario, professor) normalizados -> turma; turma casa por código ou label."""
+    index: Dict[Tuple[str, str, str], models.ImportClass] = {}
+    for cls in classes:
+        horario_key = _normalize_horario_value(cls.horario or "")
+        professor_key = _normalize_text(cls.professor or "")
+        for turma_key in (_normalize_text(cls.codigo or ""), _normalize_text(cls.turma_label or cls.codigo or "")):
+            if turma_key:
+                index.setdefault((turma_key, horario_key, professor_key), cls)
+    return index
+
+
+def _build_professor_code(professor: str) -> str:
+    """Extract professor code: 2 first letters, normalized"""
+    if not professor:
+        return "xx"
+    normalized = _normalize_text(professor).lower()
+    # Remove non-alphanumeric and keep only letters
+    clean = "".join(c for c in normalized if c.isalpha())
+    if not clean:
+        return "xx"
+    return clean[:2].ljust(2, "x")
+
+def _build_dias_code(dias_semana: str) -> str:
+    """Extract dias code from dias_semana string"""
+    if not dias_semana:
+        return ""
+    
+    normalized = _normalize_text_fold(dias_semana)
+    
+    # Handle specific combinations first (like "Terça e Quinta" → "tq")
+    if "terca" in normalized and "quinta" in normalized:
+        return "tq"
+    if "quarta" in normalized and "sexta" in normalized:
+        return "qs"
+    
+    # Mapping from Portuguese day names to codes
+    dias_map = {
+        "segunda": "s",
+        "terca": "t",
+        "quarta": "q",
+        "quinta": "q",
+        "sexta": "f",
+        "sabado": "a",
+        "domingo": "d",
+    }
+    
+    # Build code from individual days
+    code = ""
+    for day, code_char in dias_map.items():
+        if day in normalized:
+            # Avoid duplicates (quinta comes after quarta in iteration)
+            if code_char not in code:
+                code += code_char
+    
+    return code if code else ""
+
+
+def get_or_create_import_unit(session: Session, name: str) -> models.ImportUnit:
+    stmt = select(models.ImportUnit).where(models.ImportUnit.name == name)
+    unit = session.exec(stmt).first()
+    if unit:
+        return unit
+    unit = models.ImportUnit(name=name)
+    session.add(unit)
+    session.flush()
+    return unit
+
+def get_or_create_import_class(session: Session, unit_id: int, codigo: str, horario: str) -> models.ImportClass | None:
+    stmt = select(models.ImportClass).where(
+        models.ImportClass.unit_id == unit_id,
+        models.ImportClass.codigo == codigo,
+        models.ImportClass.horario == horario,
+    )
+    return session.exec(stmt).first()
+
+def get_or_create_import_student(session: Session, class_id: Optional[int], nome: str) -> models.ImportStudent | None:
+    if class_id is None:
+        stmt = select(models.ImportStudent).where(
+            models.ImportStudent.class_id.is_(None),
+            models.ImportStudent.nome == nome,
+        )
+    else:
+        stmt = select(models.ImportStudent).where(
+            models.ImportStudent.class_id == class_id,
+            models.ImportStudent.nome == nome,
+        )
+    return session.exec(stmt).first()
+
+class _ImportClassCatalog:
+    """Read-only snapshot of import_classes with pre-normalized lookup indexes.
+
+    Entries are detached copies: callers may read them freely but must load the
+    row through their own session before mutating it.
+    """
+
+    def __init__(self, version: int, classes: List[models.ImportClass]):
+        self.version = version
+        self.classes = classes
+        self.by_id: Dict[int, models.ImportClass] = {}
+        self.by_codigo: Dict[str, models.ImportClass] = {}
+        self.by_codigo_raw: Dict[str, models.ImportClass] = {}
+        self.by_label_fold: Dict[str, models.ImportClass] = {}
+        self.by_label_horario_professor: Dict[Tuple[str, str, str], models.ImportClass] = {}
+        self.by_triple = _build_import_class_triple_index(classes)
+        self.by_triple_fold: Dict[Tuple[str, str, str], List[models.ImportClass]] = {}
+        self.by_unit_professor_dias: Dict[Tuple[int, str, str], List[models.ImportClass]] = {}
+
+        for cls in classes:
+            label = cls.turma_label or cls.codigo or ""
+            if cls.id is not None:
+                self.by_id[int(cls.id)] = cls
+            codigo_key = _normalize_text(cls.codigo or "")
+            if codigo_key:
+                self.by_codigo.setdefault(codigo_key, cls)
+            self.by_codigo_raw[str(cls.codigo or "")] = cls
+            if str(cls.turma_label or "").strip():
+                self.by_label_fold[_normalize_text_fold(cls.turma_label or "")] = cls
+            self.by_label_horario_professor.setdefault(
+                (_normalize_text(label), _normalize_text(cls.horario or ""), _normalize_text(cls.professor or "")),
+                cls,
+            )
+            triple_fold = (
+                _normalize_text_fold(cls.turma_label or ""),
+                _normalize_horario_key(cls.horario or ""),
+                _normalize_text_fold(cls.professor or ""),
+            )
+            if any(triple_fold):
+                self.by_triple_fold.setdefault(triple_fold, []).append(cls)
+            self.by_unit_professor_dias.setdefault(
+                (int(cls.unit_id or 0), _normalize_text_fold(cls.professor or ""), _normalize_text_fold(cls.dias_semana or "")),
+                [],
+            ).append(cls)
+
+
+IMPORT_CLASS_CATALOG_LOCK = RLock()
+_import_class_catalog_version = 0
+_import_class_catalog_slot: Tuple[Any, Optional[_ImportClassCatalog]] = (None, None)
+
+
+def _invalidate_import_class_catalog() -> None:
+    global _import_class_catalog_version, _import_class_catalog_slot
+    with IMPORT_CLASS_CATALOG_LOCK:
+        _import_class_catalog_version += 1
+        _import_class_catalog_slot = (None, None)
+
+
+def _get_import_class_catalog(session: Session) -> _ImportClassCatalog:
+    """Read-through cache: reloads import_classes only after a write bumped the version."""
+    global _import_class_catalog_slot
+    bind = session.get_bind().engine  # a sessão da requisição é ligada a uma Connection
+    with IMPORT_CLASS_CATALOG_LOCK:
+        cached_bind, cached = _import_class_catalog_slot
+        if cached is not None and cached_bind is bind and cached.version == _import_class_catalog_version:
+            metrics.cache_lookup("import_class_catalog", hit=True)
+            return cached
+        version = _import_class_catalog_version
+    metrics.cache_lookup("import_class_catalog", hit=False)
+
+    rows = session.exec(select(models.ImportClass).order_by(models.ImportClass.id)).all()
+    catalog = _ImportClassCatalog(version, [models.ImportClass(**row.model_dump()) for row in rows])
+
+    with IMPORT_CLASS_CATALOG_LOCK:
+        # Uma escrita concorrente pode ter invalidado durante a leitura: não publica snapshot velho.
+        if version == _import_class_catalog_version:
+            _import_class_catalog_slot = (bind, catalog)
+    return catalog
+
+
+def _session_touches_import_classes(session: Session) -> bool:
+    return any(
+        isinstance(obj, models.ImportClass)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    )
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _track_import_class_flush(session, flush_context) -> None:
+    if _session_touches_import_classes(session):
+        session.info["import_class_catalog_dirty"] = True
+        _invalidate_import_class_catalog()
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _track_import_class_bulk_write(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is models.ImportClass:
+        orm_execute_state.session.info["import_class_catalog_dirty"] = True
+        _invalidate_import_class_catalog()
+
+
+@sa_event.listens_for(Session, "after_commit")
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _release_import_class_catalog(session, *args) -> None:
+    # Snapshots montados entre o flush e o commit/rollback podem conter estado não confirmado.
+    if session.info.pop("import_class_catalog_dirty", False):
+        _invalidate_import_class_catalog()
+
+
+def _find_import_class_by_triple(
+    session: Session,
+    turma: str,
+    horario: str,
+    professor: str,
+) -> Optional[models.ImportClass]:
+    turma_norm = _normalize_text(turma)
+    horario_key = _normalize_horario_value(horario)
+    professor_norm = _normalize_text(professor)
+    if not turma_norm or not horario_key or not professor_norm:
+        return None
+
+    return _get_import_class_catalog(session).by_triple.get((turma_norm, horario_key, professor_norm))
@@ -1,5 +1,12 @@
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional, Tuple
+
 from sqlmodel import create_engine, Session
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import NullPool, StaticPool
 import os
+import uuid
 
 
 def _normalize_database_url(raw_url: str) -> str:
@@ -19,9 +26,157 @@ def _normalize_database_url(raw_url: str) -> str:
     return url
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+# "tuned" (padrão) aplica WAL/pragmas no SQLite e pool explícito; "legacy" mantém o create_engine puro.
+DB_ENGINE_PROFILE = (os.getenv("DB_ENGINE_PROFILE") or "tuned").strip().lower()
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+    "cache_size": -_env_int("SQLITE_CACHE_SIZE_KB", 20000),  # negativo = KiB
+    "mmap_size": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "temp_store": "MEMORY",
+}
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+# O pooler do Supabase na porta 6543 é modo transação: statements preparados do asyncpg
+# não sobrevivem entre transações ("prepared statement ... already exists"). 0 desliga os
+# caches; só suba o valor com conexão direta (5432) ou pooler em modo sessão.
+ASYNCPG_STATEMENT_CACHE_SIZE = _env_int("ASYNCPG_STATEMENT_CACHE_SIZE", 0)
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in {"sqlite://", "sqlite:///:memory:"} or "mode=memory" in url
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str, profile: str = DB_ENGINE_PROFILE):
+    """Create the engine for `url`; the tuned profile hooks pragmas/pool settings per connection."""
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if profile != "tuned":
+            return create_engine(url, echo=False, connect_args=connect_args)
+        if _is_memory_sqlite(url):
+            # Banco em memória só existe na conexão que o criou.
+            return create_engine(url, echo=False, connect_args=connect_args, poolclass=StaticPool)
+        connect_args["timeout"] = SQLITE_PRAGMAS["busy_timeout"] / 1000
+        tuned = create_engine(
+            url,
+            echo=False,
+            connect_args=connect_args,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+        event.listen(tuned, "connect", _apply_sqlite_pragmas)
+        return tuned
+
+    if profile != "tuned":
+        return create_engine(url, echo=False)
+    return create_engine(
+        url,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,  # conexões derrubadas pelo pooler do Supabase são refeitas
+    )
+
+
+def _async_database_url(url: URL) -> URL:
+    """Same database through the async driver (aiosqlite / asyncpg)."""
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            query["ssl"] = sslmode  # asyncpg não entende sslmode=
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    return url
+
+
+def _unique_prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def _asyncpg_connect_args(cache_size: int = ASYNCPG_STATEMENT_CACHE_SIZE) -> dict:
+    """connect_args for asyncpg; with caching off, statement names are unique per prepare."""
+    connect_args: dict = {"statement_cache_size": cache_size, "prepared_statement_cache_size": cache_size}
+    if cache_size <= 0:
+        connect_args["prepared_statement_name_func"] = _unique_prepared_statement_name
+    return connect_args
+
+
+def build_async_engine(url: Any, profile: str = DB_ENGINE_PROFILE):
+    """Async twin of build_engine for the polling/save routes (SQLite em memória não é compartilhável)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_url = _async_database_url(make_url(url))
+    if async_url.get_backend_name() == "sqlite":
+        # NullPool: abrir um arquivo SQLite é barato e a conexão não fica presa a um event loop.
+        async_engine = create_async_engine(
+            async_url,
+            echo=False,
+            poolclass=NullPool,
+            connect_args={"timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000},
+        )
+        if profile == "tuned":
+            event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        return async_engine
+    connect_args = _asyncpg_connect_args() if async_url.get_backend_name() == "postgresql" else {}
+    if profile != "tuned":
+        return create_async_engine(async_url, echo=False, connect_args=connect_args)
+    return create_async_engine(
+        async_url,
+        echo=False,
+        connect_args=connect_args,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
 DATABASE_URL = _normalize_database_url(os.getenv("DATABASE_URL", "sqlite:///./dev.db"))
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+engine = build_engine(DATABASE_URL)
+_async_engine_slot: Tuple[Any, Any] = (None, None)
+
+
+def get_async_engine():
+    """Async engine for the current `engine`; rebuilt when `engine` is swapped (os testes trocam)."""
+    global _async_engine_slot
+    sync_engine, async_engine = _async_engine_slot
+    if sync_engine is not engine or async_engine is None:
+        async_engine = build_async_engine(engine.url)
+        _async_engine_slot = (engine, async_engine)
+    return async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections on shutdown; the engine itself stays usable."""
+    _, async_engine = _async_engine_slot
+    if async_engine is not None:
+        await async_engine.dispose()
 
 def create_db_and_tables():
     from app.models import (
@@ -35,15 +190,57 @@ def create_db_and_tables():
         ImportStudent,
         AttendanceLog,
         PoolLog,
+        PoolLogDailySummary,
+        WeatherSnapshot,
+        AcademicCalendarState,
+        AcademicCalendarEvent,
+        AcademicCalendarBankHour,
+        PlannedSessionMonth,
+        PlanningFile,
+        PlanningFileContent,
         ExclusionRecord,
+        JustificationRecord,
+        TransferOverride,
     )
     from sqlmodel import SQLModel
     SQLModel.metadata.create_all(engine)
 
 def get_session():
-    from sqlmodel import Session
-    with Session(engine) as session:
+    """Unit of work da requisição: uma conexão do pool fica presa à sessão até o fim.
+
+    Os helpers recebem esta sessão explicitamente (ver session_scope), então um commit
+    no meio da requisição não devolve a conexão e a próxima leitura não faz novo checkout.
+    """
+    with engine.connect() as connection:
+        with Session(bind=connection) as session:
+            try:
+                yield session
+            except Exception:
+                session.rollback()
+                raise
+
+
+async def get_async_session() -> AsyncIterator[Any]:
+    """Async unit of work, same contract as get_session, for the high-frequency routes."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with get_async_engine().connect() as connection:
+        async with AsyncSession(bind=connection) as session:
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+
+
+@contextmanager
+def session_scope(session: Optional[Session] = None) -> Iterator[Session]:
+    """Reuse the caller's unit of work; open a short-lived session only outside requests."""
+    if session is not None:
         yield session
+        return
+    with Session(engine) as own_session:
+        yield own_session
 
 
 def migrate_db():
@@ -52,6 +249,22 @@ def migrate_db():
         _migrate_sqlite_nullable_class_id()
     elif "postgresql" in DATABASE_URL:
         _migrate_postgresql_nullable_class_id()
+    run_migrations()
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def run_migrations(revision: str = "head") -> None:
+    """`alembic upgrade` on the app engine; env.py reuses this connection instead of building its own."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
 
 
 def _migrate_sqlite_nullable_class_id():
@@ -61,7 +274,7 @@ def _migrate_sqlite_nullable_class_id():
             db_path = db_path[len(prefix):]
             break
     if not os.path.exists(db_path):
-        return  # new DB — create_db_and_tables will build it with Optional already
+        return  # new DB — the baseline revision already builds it with class_id nullable
     import sqlite3
     conn = sqlite3.connect(db_path)
     try:
@@ -0,0 +1,508 @@
+"""Exclusions: matching, the DB-backed state cache with its JSON mirror and the backups listing."""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete as sa_delete
+from sqlmodel import Session, select
+
+from app import metrics, settings
+from app.database import session_scope
+from app.models import ExclusionRecord
+from app.normalize import _extract_month_key, _normalize_horario_key, _normalize_text
+from app.schemas import ExclusionEntry
+from app.storage import (
+    BACKUP_MANIFEST_LOCK,
+    EXCLUSIONS_FILE_LOCK,
+    _load_backup_manifest,
+    _load_json_list,
+    _save_json_list,
+)
+
+
+def _normalize_exclusion_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    normalized = dict(item or {})
+
+    for key in ["id", "student_uid", "studentUid", "nome", "Nome", "turma", "Turma", "turmaLabel", "TurmaLabel", "turmaCodigo", "TurmaCodigo", "professor", "Professor", "dataExclusao", "DataExclusao", "motivo_exclusao", "MotivoExclusao"]:
+        if key in normalized and normalized.get(key) is not None:
+            normalized[key] = str(normalized.get(key)).strip()
+
+    if normalized.get("horario") is not None:
+        normalized["horario"] = _normalize_horario_key(normalized.get("horario"))
+    if normalized.get("Horario") is not None:
+        normalized["Horario"] = _normalize_horario_key(normalized.get("Horario"))
+
+    return normalized
+
+
+def _exclusion_turma_set(item: Dict[str, Any]) -> set[str]:
+    values = {
+        _normalize_text(item.get("turma") or item.get("Turma") or ""),
+        _normalize_text(item.get("turmaLabel") or item.get("TurmaLabel") or ""),
+        _normalize_text(item.get("turmaCodigo") or item.get("TurmaCodigo") or ""),
+    }
+    return {value for value in values if value}
+
+
+def _exclusion_records_match(item: Dict[str, Any], payload_dict: Dict[str, Any]) -> bool:
+    """Match exclusion records prioritizing context to avoid homonímia collisions."""
+    # High-confidence matches (UID or ID)
+    item_uid = str(item.get("student_uid") or item.get("studentUid") or "").strip()
+    payload_uid = str(payload_dict.get("student_uid") or payload_dict.get("studentUid") or "").strip()
+    if item_uid and payload_uid and item_uid == payload_uid:
+        return True
+
+    item_id = str(item.get("id") or "").strip()
+    payload_id = str(payload_dict.get("id") or "").strip()
+    if item_id and payload_id and item_id == payload_id:
+        return True
+
+    # Low-confidence match (name only): ALWAYS require context to avoid homonímia
+    item_nome = _normalize_text(item.get("nome") or item.get("Nome") or "")
+    payload_nome = _normalize_text(payload_dict.get("nome") or payload_dict.get("Nome") or "")
+    if not item_nome or not payload_nome or item_nome != payload_nome:
+        return False  # Names must match as baseline
+
+    # Now check context FIRST before considering name-match valid
+    item_turmas = _exclusion_turma_set(item)
+    payload_turmas = _exclusion_turma_set(payload_dict)
+    has_turma_context = bool(item_turmas) and bool(payload_turmas)
+    turma_matches = not has_turma_context or bool(item_turmas.intersection(payload_turmas))
+
+    item_horario = _normalize_horario_key(item.get("horario") or item.get("Horario") or "")
+    payload_horario = _normalize_horario_key(payload_dict.get("horario") or payload_dict.get("Horario") or "")
+    has_horario_context = bool(item_horario) and bool(payload_horario)
+    horario_matches = not has_horario_context or item_horario == payload_horario
+
+    item_professor = _normalize_text(item.get("professor") or item.get("Professor") or "")
+    payload_professor = _normalize_text(payload_dict.get("professor") or payload_dict.get("Professor") or "")
+    has_professor_context = bool(item_professor) and bool(payload_professor)
+    professor_matches = not has_professor_context or item_professor == payload_professor
+
+    # Accept match only if all provided context matches (no mismatches allowed)
+    context_valid = (not has_turma_context or turma_matches) and \
+                    (not has_horario_context or horario_matches) and \
+                    (not has_professor_context or professor_matches)
+
+    # Require at least ONE context field to be present (avoid bare name matching)
+    has_any_context = has_turma_context or has_horario_context or has_professor_context
+    return context_valid and has_any_context
+
+
+class _ExclusionMatchIndex:
+    """Exclusion list with candidate buckets by uid, id and normalized name.
+
+    _exclusion_records_match only returns True when uid, id or name are equal,
+    so comparing against the union of those buckets (in list order) finds the
+    same first match as a linear scan.
+    """
+
+    def __init__(self, items: Optional[List[Dict[str, Any]]] = None):
+        self.items: List[Dict[str, Any]] = []
+        self._buckets: Dict[Tuple[str, str], List[int]] = {}
+        for item in items or []:
+            self.append(item)
+
+    @staticmethod
+    def _bucket_keys(item: Dict[str, Any]) -> List[Tuple[str, str]]:
+        keys = []
+        uid = str(item.get("student_uid") or item.get("studentUid") or "").strip()
+        if uid:
+            keys.append(("uid", uid))
+        item_id = str(item.get("id") or "").strip()
+        if item_id:
+            keys.append(("id", item_id))
+        nome = _normalize_text(item.get("nome") or item.get("Nome") or "")
+        if nome:
+            keys.append(("nome", nome))
+        return keys
+
+    def _index(self, idx: int) -> None:
+        for key in self._bucket_keys(self.items[idx]):
+            bucket = self._buckets.setdefault(key, [])
+            if not bucket or bucket[-1] != idx:
+                bucket.append(idx)
+
+    def find(self, item: Dict[str, Any]) -> int:
+        candidates = set()
+        for key in self._bucket_keys(item):
+            candidates.update(self._buckets.get(key, ()))
+        for idx in sorted(candidates):
+            # Buckets podem ter índices antigos após merges; a comparação completa decide.
+            if _exclusion_records_match(self.items[idx], item):
+                return idx
+        return -1
+
+    def append(self, item: Dict[str, Any]) -> int:
+        self.items.append(item)
+        idx = len(self.items) - 1
+        self._index(idx)
+        return idx
+
+    def merge(self, idx: int, item: Dict[str, Any]) -> None:
+        self.items[idx] = {**self.items[idx], **item}
+        self._index(idx)
+
+    def upsert(self, item: Dict[str, Any]) -> bool:
+        """Merge into the first matching record or append; returns True when merged."""
+        idx = self.find(item)
+        if idx >= 0:
+            self.merge(idx, item)
+            return True
+        self.append(item)
+        return False
+
+
+def _clean_exclusions_list(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Deduplicate and validate exclusion records. Logs discarded items."""
+    cleaned = _ExclusionMatchIndex()
+    discarded_count = 0
+    
+    for raw in items or []:
+        if not isinstance(raw, dict):
+            continue
+
+        item = _normalize_exclusion_item(raw)
+        uid = str(item.get("student_uid") or item.get("studentUid") or "").strip()
+        item_id = str(item.get("id") or "").strip()
+        nome = _normalize_text(item.get("nome") or item.get("Nome") or "")
+        
+        # Validate: must have at least one identifier
+        if not uid and not item_id and not nome:
+            discarded_count += 1
+            continue
+
+        # Dedup using strict matching; merge preserves existing + overrides with new values
+        cleaned.upsert(item)
+    
+    if discarded_count > 0:
+        import logging
+        logging.warning(f"_clean_exclusions_list: discarded {discarded_count} items (missing all identifiers)")
+
+    return cleaned.items
+
+
+def _exclusions_file_path() -> str:
+    return os.path.join(settings.DATA_DIR, "excludedStudents.json")
+
+
+def _exclusion_item_from_row(row: ExclusionRecord) -> Dict[str, Any]:
+    item: Dict[str, Any] = {**_exclusion_row_payload(row)}
+    if row.exclusion_id and not item.get("id"):
+        item["id"] = row.exclusion_id
+    if row.student_uid and not item.get("student_uid"):
+        item["student_uid"] = row.student_uid
+    if row.nome and not item.get("nome"):
+        item["nome"] = row.nome
+    if row.turma and not item.get("turma"):
+        item["turma"] = row.turma
+    if row.turma_codigo and not item.get("turmaCodigo"):
+        item["turmaCodigo"] = row.turma_codigo
+    if row.horario and not item.get("horario"):
+        item["horario"] = row.horario
+    if row.professor and not item.get("professor"):
+        item["professor"] = row.professor
+    if row.data_exclusao and not item.get("dataExclusao"):
+        item["dataExclusao"] = row.data_exclusao
+    if row.motivo_exclusao and not item.get("motivo_exclusao"):
+        item["motivo_exclusao"] = row.motivo_exclusao
+    return item
+
+
+def _exclusion_row_payload(row: ExclusionRecord) -> Dict[str, Any]:
+    try:
+        parsed = json.loads(row.payload_json or "{}")
+        return parsed if isinstance(parsed, dict) else {}
+    except Exception:
+        return {}
+
+
+def _exclusion_content_key(item: Dict[str, Any]) -> str:
+    return json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _exclusion_month(item: Dict[str, Any]) -> str:
+    for value in [item.get("dataExclusao"), item.get("DataExclusao"), item.get("data"), item.get("saved_at")]:
+        month = _extract_month_key(value)
+        if month:
+            return month
+    return ""
+
+
+def _backfill_exclusion_months() -> int:
+    """Fill exclusion_records.mes for rows written before the column existed."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as db:
+        rows = db.exec(select(ExclusionRecord).where(ExclusionRecord.mes == "")).all()
+        updated = 0
+        for row in rows:
+            try:
+                payload = json.loads(row.payload_json or "{}")
+            except Exception:
+                payload = {}
+            month = _exclusion_month({**(payload if isinstance(payload, dict) else {}), "dataExclusao": row.data_exclusao})
+            if month:
+                row.mes = month
+                db.add(row)
+                updated += 1
+        if updated:
+            db.commit()
+        return updated
+
+
+def _fill_exclusion_record(record: ExclusionRecord, item: Dict[str, Any], now_iso: str) -> ExclusionRecord:
+    record.exclusion_id = str(item.get("id") or "").strip()
+    record.student_uid = str(item.get("student_uid") or item.get("studentUid") or "").strip()
+    record.nome = str(item.get("nome") or item.get("Nome") or "").strip()
+    record.turma = str(item.get("turma") or item.get("Turma") or item.get("turmaLabel") or item.get("TurmaLabel") or "").strip()
+    record.turma_codigo = str(item.get("turmaCodigo") or item.get("TurmaCodigo") or item.get("grupo") or item.get("Grupo") or "").strip()
+    record.horario = _normalize_horario_key(item.get("horario") or item.get("Horario") or "")
+    record.professor = str(item.get("professor") or item.get("Professor") or "").strip()
+    record.data_exclusao = str(item.get("dataExclusao") or item.get("DataExclusao") or "").strip()
+    record.mes = _exclusion_month(item)
+    record.motivo_exclusao = str(item.get("motivo_exclusao") or item.get("MotivoExclusao") or "").strip()
+    record.payload_json = json.dumps(item, ensure_ascii=False)
+    record.saved_at = str(item.get("saved_at") or now_iso)
+    return record
+
+
+def _sync_exclusion_rows(
+    db: Session,
+    current_rows: List[Tuple[int, str]],
+    items: List[Dict[str, Any]],
+) -> List[Tuple[int, str]]:
+    """Bring exclusion_records in line with `items` touching only the rows that differ.
+
+    Unchanged items keep their row; changed ones reuse a freed row (UPDATE) before
+    falling back to INSERT, and leftover rows are DELETEd.
+    """
+    free_by_key: Dict[str, List[int]] = {}
+    for row_id, key in current_rows:
+        free_by_key.setdefault(key, []).append(row_id)
+
+    keys = [_exclusion_content_key(item) for item in items]
+    slots: List[Optional[int]] = []
+    pending: List[int] = []
+    for idx, key in enumerate(keys):
+        bucket = free_by_key.get(key)
+        if bucket:
+            slots.append(bucket.pop(0))
+        else:
+            slots.append(None)
+            pending.append(idx)
+
+    still_free = {row_id for bucket in free_by_key.values() for row_id in bucket}
+    reusable = [row_id for row_id, _ in current_rows if row_id in still_free]
+    now_iso = datetime.utcnow().isoformat()
+
+    reused_ids = reusable[: len(pending)]
+    if reused_ids:
+        records = {
+            record.id: record
+            for record in db.exec(select(ExclusionRecord).where(ExclusionRecord.id.in_(reused_ids))).all()
+        }
+        for idx, row_id in zip(pending, reused_ids):
+            db.add(_fill_exclusion_record(records[row_id], items[idx], now_iso))
+            slots[idx] = row_id
+
+    inserted: List[Tuple[int, ExclusionRecord]] = []
+    for idx in pending[len(reused_ids):]:
+        record = _fill_exclusion_record(ExclusionRecord(), items[idx], now_iso)
+        db.add(record)
+        inserted.append((idx, record))
+
+    stale_ids = reusable[len(pending):]
+    if stale_ids:
+        db.exec(sa_delete(ExclusionRecord).where(ExclusionRecord.id.in_(stale_ids)))
+
+    db.flush()
+    for idx, record in inserted:
+        slots[idx] = int(record.id)
+    return [(int(row_id), key) for row_id, key in zip(slots, keys)]
+
+
+class _ExclusionsState:
+    """Versioned in-memory view of the exclusions (DB rows + JSON mirror signature)."""
+
+    def __init__(
+        self,
+        version: int,
+        bind: Any,
+        file_path: str,
+        file_signature: Optional[Tuple[int, int]],
+        rows: List[Tuple[int, str]],
+        items: List[Dict[str, Any]],
+    ):
+        self.version = version
+        self.bind = bind
+        self.file_path = file_path
+        self.file_signature = file_signature
+        self.rows = rows
+        self.items = items
+        self._cleaned: Optional[List[Dict[str, Any]]] = None
+
+    def cleaned(self) -> List[Dict[str, Any]]:
+        if self._cleaned is None:
+            self._cleaned = _clean_exclusions_list(self.items)
+        return self._cleaned
+
+
+_exclusions_state: Optional[_ExclusionsState] = None
+_exclusions_version = 0
+
+
+def _file_signature(file_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_exclusions_state(bind: Any, file_path: str, session: Optional[Session] = None) -> _ExclusionsState:
+    """Cold load: the JSON file still wins when present (compatibilidade com edição manual)."""
+    global _exclusions_version
+
+    with session_scope(session) as db:
+        db_rows = db.exec(select(ExclusionRecord).order_by(ExclusionRecord.id.asc())).all()
+        rows = [(int(row.id), _exclusion_content_key(_exclusion_row_payload(row))) for row in db_rows]
+
+        file_items = _load_json_list(file_path)
+        if file_items:
+            normalized = [_normalize_exclusion_item(item) for item in file_items if isinstance(item, dict)]
+            if [key for _, key in rows] != [_exclusion_content_key(item) for item in normalized]:
+                rows = _sync_exclusion_rows(db, rows, normalized)
+                db.commit()
+            items = file_items
+        else:
+            items = [_exclusion_item_from_row(row) for row in db_rows]
+            if items:
+                try:
+                    _save_json_list(file_path, _clean_exclusions_list(items))
+                except Exception:
+                    pass
+
+    _exclusions_version += 1
+    return _ExclusionsState(_exclusions_version, bind, file_path, _file_signature(file_path), rows, items)
+
+
+def _exclusions_state_is_current(state: Optional[_ExclusionsState], bind: Any, file_path: str) -> bool:
+    return (
+        state is not None
+        and state.bind is bind
+        and state.file_path == file_path
+        and state.file_signature == _file_signature(file_path)
+    )
+
+
+def _current_exclusions_state(session: Optional[Session] = None) -> _ExclusionsState:
+    global _exclusions_state
+    from app.database import engine as _db_engine
+
+    file_path = _exclusions_file_path()
+    with EXCLUSIONS_FILE_LOCK:
+        state = _exclusions_state
+        current = _exclusions_state_is_current(state, _db_engine, file_path)
+        metrics.cache_lookup("exclusions", hit=current)
+        if not current:
+            state = _load_exclusions_state(_db_engine, file_path, session)
+            _exclusions_state = state
+        return state
+
+
+def _read_exclusions_state(clean: bool = True, session: Optional[Session] = None) -> List[Dict[str, Any]]:
+    """Cached read; never writes unless the JSON mirror was changed outside the API."""
+    try:
+        state = _current_exclusions_state(session)
+    except Exception:
+        items = _load_json_list(_exclusions_file_path())
+        return _clean_exclusions_list(items) if clean else items
+    return list(state.cleaned() if clean else state.items)
+
+
+def _write_exclusions_state(
+    items: List[Dict[str, Any]], clean: bool = True, session: Optional[Session] = None
+) -> List[Dict[str, Any]]:
+    """Write exclusions to DB and file with optional cleaning. Always normalizes."""
+    global _exclusions_state, _exclusions_version
+
+    if clean:
+        # Cleanliness-first: deduplicate before saving
+        payload = _clean_exclusions_list(items or [])
+    else:
+        # Just normalize, no dedup
+        payload = [
+            _normalize_exclusion_item(item) for item in (items or []) if isinstance(item, dict)
+        ]
+
+    with EXCLUSIONS_FILE_LOCK:
+        state = _current_exclusions_state(session)
+        with session_scope(session) as db:
+            rows = _sync_exclusion_rows(db, state.rows, payload)
+            db.commit()
+
+        try:
+            _save_json_list(state.file_path, payload)
+        except Exception as e:
+            import logging
+            logging.error(f"Failed to save exclusions to JSON file: {e}")
+
+        _exclusions_version += 1
+        _exclusions_state = _ExclusionsState(
+            _exclusions_version,
+            state.bind,
+            state.file_path,
+            _file_signature(state.file_path),
+            rows,
+            payload,
+        )
+
+    return payload
+
+
+def _list_exclusions_backups(limit: int = 30) -> List[Dict[str, Any]]:
+    archive_dir = os.path.join(settings.DATA_DIR, "archive")
+    if not os.path.isdir(archive_dir):
+        return []
+
+    with BACKUP_MANIFEST_LOCK:
+        manifest = _load_backup_manifest(archive_dir)
+
+    candidates: List[Dict[str, Any]] = []
+    for file_name, entry in manifest.items():
+        if not file_name.startswith("excludedStudents_") or not file_name.endswith(".json"):
+            continue
+        candidates.append(
+            {
+                "file": file_name,
+                "count": int(entry.get("count") or 0),
+                "size": int(entry.get("size") or 0),
+                "hash": str(entry.get("hash") or ""),
+                "path": os.path.join(archive_dir, file_name),
+                "modified_at": str(entry.get("modified_at") or ""),
+            }
+        )
+
+    candidates.sort(key=lambda item: str(item.get("modified_at") or ""), reverse=True)
+    return candidates[: max(1, int(limit or 30))]
+
+
+def _merge_exclusions(base_items: List[Dict[str, Any]], incoming_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge exclusion lists efficiently: clean once upfront, merge, then finalize clean."""
+    # Clean both inputs once
+    base_cleaned = _clean_exclusions_list(base_items or [])
+    incoming_cleaned = _clean_exclusions_list(incoming_items or [])
+    
+    # Merge incoming into base
+    merged = _ExclusionMatchIndex(base_cleaned)
+    for incoming in incoming_cleaned:
+        merged.upsert(incoming)
+    
+    # Final clean pass to catch any dedup edge cases introduced during merge
+    return _clean_exclusions_list(merged.items)
+
+def _resolve_exclusion_match(item: Dict[str, Any], payload: ExclusionEntry) -> bool:
+    return _exclusion_records_match(_normalize_exclusion_item(item), _normalize_exclusion_item(payload.dict()))
@@ -0,0 +1,318 @@
+"""Per-request accounting: SQL statements, repeated statements (N+1), DATA_DIR file I/O and timed spans.
+
+Everything is keyed on a ContextVar set by RequestStatsMiddleware. Sync routes run in
+the threadpool with a copy of the context, so they still see the same RequestStats;
+background threads (espelho do Excel, clima) have no stats and are ignored.
+"""
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_STATS_ENABLED = (os.getenv("REQUEST_STATS_ENABLED") or "1").strip().lower() not in {"0", "false", "no"}
+REQUEST_STATS_WINDOW = int(os.getenv("REQUEST_STATS_WINDOW", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def _fingerprint(statement: str) -> Tuple[str, str]:
+    """Stable id for a statement shape; IN-lists of any size collapse to one placeholder."""
+    normalized = _IN_LIST.sub("(?)", _SPACES.sub(" ", statement).strip())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:10], normalized
+
+
+class RequestStats:
+    def __init__(self, method: str, path: str, data_dir: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.data_dir = os.path.abspath(data_dir) + os.sep if data_dir else ""
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+        self.status = 0
+        self.statements = 0
+        self.db_ms = 0.0
+        self.fingerprints: Counter = Counter()
+        self.samples: Dict[str, str] = {}
+        self.files_read = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.spans: Dict[str, float] = {}
+        self._writes: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def record_statement(self, statement: str, elapsed_ms: float) -> None:
+        fingerprint, normalized = _fingerprint(statement)
+        with self._lock:
+            self.statements += 1
+            self.db_ms += elapsed_ms
+            self.fingerprints[fingerprint] += 1
+            self.samples.setdefault(fingerprint, normalized[:500])
+
+    def record_span(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + elapsed_ms
+
+    def _tracked(self, path: Any) -> Optional[str]:
+        if not self.data_dir or isinstance(path, int) or path is None:
+            return None
+        full = os.path.abspath(os.fsdecode(path))
+        return full if full.startswith(self.data_dir) else None
+
+    def record_open(self, path: Any, mode: Optional[str], flags: int) -> None:
+        full = self._tracked(path)
+        if full is None:
+            return
+        if mode is None:  # os.open: só há flags
+            writing = bool(flags & (os.O_WRONLY | os.O_RDWR))
+            appending = bool(flags & os.O_APPEND)
+        else:
+            writing = any(ch in mode for ch in "wax+")
+            appending = "a" in mode or "+" in mode
+        try:
+            size = os.stat(full).st_size
+        except OSError:
+            size = 0
+        with self._lock:
+            if writing:
+                self._writes.setdefault(full, size if appending else 0)
+            else:
+                self.files_read += 1
+                self.bytes_read += size
+
+    def record_rename(self, src: Any, dst: Any) -> None:
+        # _save_json_list grava num .tmp e faz os.replace: o tamanho final fica no destino.
+        src_full, dst_full = self._tracked(src), self._tracked(dst)
+        with self._lock:
+            if src_full in self._writes and dst_full:
+                self._writes[dst_full] = self._writes.pop(src_full)
+
+    def _settle_writes(self) -> None:
+        # Tamanho final menos o tamanho na abertura (append) = bytes gravados.
+        with self._lock:
+            for full, base in self._writes.items():
+                try:
+                    self.bytes_written += max(0, os.stat(full).st_size - base)
+                except OSError:
+                    continue
+            self._writes.clear()
+
+    def finish(self, status: int) -> None:
+        self.status = status
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+        self._settle_writes()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(fp, count) for fp, count in self.fingerprints.most_common() if count >= threshold]
+
+    def headers(self) -> List[Tuple[bytes, bytes]]:
+        self._settle_writes()
+        wall_ms = (time.perf_counter() - self.started) * 1000
+        timing = [f"db;dur={self.db_ms:.1f}"]
+        timing += [f"{name};dur={value:.1f}" for name, value in sorted(self.spans.items())]
+        timing.append(f"app;dur={wall_ms:.1f}")
+        values = [
+            ("x-db-statements", str(self.statements)),
+            ("x-db-time-ms", f"{self.db_ms:.1f}"),
+            ("x-io-read-bytes", str(self.bytes_read)),
+            ("x-io-write-bytes", str(self.bytes_written)),
+            ("x-request-time-ms", f"{wall_ms:.1f}"),
+            ("server-timing", ", ".join(timing)),
+        ]
+        repeated = self.repeated()
+        if repeated:
+            values.append(("x-db-repeated", ", ".join(f"{fp}*{count}" for fp, count in repeated[:5])))
+        return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in values]
+
+    def as_record(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "route": self.route,
+            "status": self.status,
+            "wall_ms": round(self.wall_ms, 2),
+            "statements": self.statements,
+            "db_ms": round(self.db_ms, 2),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "spans": {name: round(value, 2) for name, value in self.spans.items()},
+            "repeated": [{"fingerprint": fp, "count": count, "sql": self.samples.get(fp, "")} for fp, count in self.repeated()],
+        }
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+_recent: Deque[Dict[str, Any]] = deque(maxlen=max(1, REQUEST_STATS_WINDOW))
+_recent_lock = Lock()
+_installed = False
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.record_span(name, (time.perf_counter() - started) * 1000)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of span() for helpers that do pandas/openpyxl/reportlab work."""
+
+    def _decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return _wrapper
+
+    return _decorate
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # O início fica no contexto da própria instrução: se ela falhar (IntegrityError do
+    # upsert), after_cursor_execute não roda e nada sobra na conexão do pool.
+    if _current.get() is not None and context is not None:
+        context._request_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    started = getattr(context, "_request_stats_started", None)
+    if stats is None or started is None:
+        return
+    stats.record_statement(statement, (time.perf_counter() - started) * 1000)
+
+
+def _audit_hook(name: str, args: Tuple[Any, ...]) -> None:
+    if name != "open" and name != "os.rename":
+        return
+    stats = _current.get()
+    if stats is None:
+        return
+    try:
+        if name == "open":
+            stats.record_open(args[0], args[1], args[2] or 0)
+        else:
+            stats.record_rename(args[0], args[1])
+    except Exception:
+        pass  # contabilidade nunca derruba a requisição
+
+
+def _remember(record: Dict[str, Any]) -> None:
+    with _recent_lock:
+        _recent.append(record)
+
+
+def summary(route: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+    """Rolling per-route aggregate over the last REQUEST_STATS_WINDOW requests."""
+    with _recent_lock:
+        records = [item for item in _recent if route is None or item["route"] == route]
+
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for item in records:
+        by_route.setdefault(f'{item["method"]} {item["route"]}', []).append(item)
+
+    def _pct(values: List[float], pct: float) -> float:
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2) if ordered else 0.0
+
+    routes = []
+    for key, items in by_route.items():
+        walls = [item["wall_ms"] for item in items]
+        repeated: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            for hit in item["repeated"]:
+                entry = repeated.setdefault(hit["fingerprint"], {"fingerprint": hit["fingerprint"], "sql": hit["sql"], "requests": 0, "max_count": 0})
+                entry["requests"] += 1
+                entry["max_count"] = max(entry["max_count"], hit["count"])
+        routes.append(
+            {
+                "route": key,
+                "count": len(items),
+                "wall_ms_p50": _pct(walls, 0.5),
+                "wall_ms_p95": _pct(walls, 0.95),
+                "statements_avg": round(sum(item["statements"] for item in items) / len(items), 1),
+                "statements_max": max(item["statements"] for item in items),
+                "db_ms_avg": round(sum(item["db_ms"] for item in items) / len(items), 2),
+                "bytes_read_avg": int(sum(item["bytes_read"] for item in items) / len(items)),
+                "bytes_written_avg": int(sum(item["bytes_written"] for item in items) / len(items)),
+                "n_plus_one": sorted(repeated.values(), key=lambda entry: -entry["max_count"]),
+            }
+        )
+    routes.sort(key=lambda entry: -entry["wall_ms_p95"])
+    return {
+        "window": _recent.maxlen,
+        "requests": len(records),
+        "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+        "routes": routes[: max(1, limit)],
+    }
+
+
+def reset() -> None:
+    with _recent_lock:
+        _recent.clear()
+
+
+class RequestStatsMiddleware:
+    """Pure ASGI middleware: opens a RequestStats per HTTP request and adds the accounting headers."""
+
+    def __init__(self, app: Any, data_dir: Callable[[], str]):
+        self.app = app
+        self.data_dir = data_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope.get("method", ""), scope.get("path", ""), self.data_dir())
+        token = _current.set(stats)
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                route = scope.get("route")
+                stats.route = getattr(route, "path", None) or stats.path
+                message = {**message, "headers": [*message.get("headers", []), *stats.headers()]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            stats.finish(status["code"])
+            _remember(stats.as_record())
+
+
+def install(app: Any, data_dir: Callable[[], str]) -> None:
+    """Hook SQLAlchemy (every Engine, sync or async) and the open() audit event, then add the middleware."""
+    global _installed
+    if not REQUEST_STATS_ENABLED:
+        return
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        sys.addaudithook(_audit_hook)  # não há como remover: o hook só age com stats ativos
+        _installed = True
+    app.add_middleware(RequestStatsMiddleware, data_dir=data_dir)
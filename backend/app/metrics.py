@@ -0,0 +1,276 @@
+"""Process-local Prometheus metrics (text exposition format 0.0.4) without extra dependencies.
+
+Counters, gauges and histograms live in a module-level registry; MetricsMiddleware feeds
+the per-route HTTP series and the routes call the domain helpers (attendance saves,
+pool-log, exports, caches, CPTEC). Values are per process: with several workers each
+one exposes its own series, as prometheus_client would without multiprocess mode.
+"""
+import math
+import os
+import time
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+METRICS_ENABLED = (os.getenv("METRICS_ENABLED") or "1").strip().lower() not in {"0", "false", "no"}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            totals[0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), totals[0])) for key, (counts, totals) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric: _Metric) -> Any:
+    _registry.append(metric)
+    return metric
+
+
+HTTP_REQUESTS = _register(Counter("http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"]))
+HTTP_LATENCY = _register(Histogram("http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route"]))
+HTTP_IN_FLIGHT = _register(Gauge("http_requests_in_flight", "HTTP requests currently being served.", ["method"]))
+THREADPOOL_BUSY = _register(Gauge("threadpool_busy_threads", "Worker threads in use by sync routes and run_in_threadpool."))
+THREADPOOL_LIMIT = _register(Gauge("threadpool_max_threads", "Worker thread limit of the default anyio limiter."))
+THREADPOOL_WAITING = _register(Gauge("threadpool_waiting_tasks", "Tasks queued for a worker thread."))
+
+ATTENDANCE_SAVES = _register(Counter("attendance_saves_total", "POST /attendance-log outcomes (created, merged, stale_snapshot, db_error).", ["result"]))
+POOL_LOG_SAVES = _register(Counter("pool_log_saves_total", "POST /pool-log outcomes (created or noop).", ["action"]))
+EXPORT_RENDERS = _register(Counter("export_renders_total", "Rendered report files by kind.", ["kind", "status"]))
+EXPORT_DURATION = _register(Histogram("export_render_duration_seconds", "Time spent building report files.", ["kind"], RENDER_BUCKETS))
+CACHE_REQUESTS = _register(Counter("cache_requests_total", "In-process cache lookups by cache and result (hit/miss).", ["cache", "result"]))
+CPTEC_FETCH_DURATION = _register(Histogram("cptec_fetch_duration_seconds", "CPTEC forecast fetch latency.", [], RENDER_BUCKETS))
+CPTEC_FETCH_FAILURES = _register(Counter("cptec_fetch_failures_total", "CPTEC forecast fetches that raised."))
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def timed_render(kind: str) -> Callable:
+    """Count and time a report builder; failures are counted with status="error"."""
+
+    def _decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = fn(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                if METRICS_ENABLED:
+                    EXPORT_RENDERS.inc(kind=kind, status=status)
+                    EXPORT_DURATION.observe(time.perf_counter() - started, kind=kind)
+
+        return _wrapper
+
+    return _decorate
+
+
+def _sample_threadpool() -> None:
+    try:
+        import anyio.to_thread
+
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+        THREADPOOL_LIMIT.set(limiter.total_tokens)
+        THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+    except Exception:
+        pass  # fora de um event loop não há limiter para amostrar
+
+
+def render() -> str:
+    """Exposition text; threadpool gauges are sampled at scrape time (call from the event loop)."""
+    _sample_threadpool()
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    for metric in _registry:
+        with metric._lock:
+            if isinstance(metric, Histogram):
+                metric._series.clear()
+            else:
+                metric._values.clear()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route counters, latency histogram and in-flight gauge."""
+
+    def __init__(self, app: Any, skip: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip = set(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        started = time.perf_counter()
+        status = {"code": 500}
+        # A rota só é conhecida depois do roteamento: o gauge de em andamento fica só por método.
+        HTTP_IN_FLIGHT.inc(method=method)
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+
+
+def install(app: Any) -> None:
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
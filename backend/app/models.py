@@ -1,7 +1,7 @@
 from typing import Optional
 from datetime import date, datetime
 from sqlmodel import SQLModel, Field
-from sqlalchemy import UniqueConstraint, Column, Text
+from sqlalchemy import UniqueConstraint, Index, Column, Text
 from pydantic import field_validator
 
 def _normalize_horario(value: Optional[str]) -> Optional[str]:
@@ -126,6 +126,7 @@ class ImportStudent(SQLModel, table=True):
     __tablename__ = "import_students"
     __table_args__ = (
         UniqueConstraint("class_id", "nome", name="uq_import_student_class_nome"),
+        Index("ix_import_students_nome", "nome"),
     )
     id: Optional[int] = Field(default=None, primary_key=True)
     class_id: Optional[int] = None
@@ -141,6 +142,9 @@ class ImportStudent(SQLModel, table=True):
 
 class AttendanceLog(SQLModel, table=True):
     __tablename__ = "attendance_logs"
+    __table_args__ = (
+        Index("ix_attendance_logs_class_month", "turma_codigo", "horario", "professor", "mes"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     turma_codigo: str = Field(default="", index=True)
     turma_label: str = Field(default="")
@@ -155,6 +159,9 @@ class AttendanceLog(SQLModel, table=True):
 
 class PoolLog(SQLModel, table=True):
     __tablename__ = "pool_logs"
+    __table_args__ = (
+        Index("ix_pool_logs_data_turma_horario", "data", "turma_codigo", "horario"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     data: str = Field(default="", index=True)
     turma_codigo: str = Field(default="", index=True)
@@ -172,6 +179,41 @@ class PoolLog(SQLModel, table=True):
     saved_at: str = Field(default="")
 
 
+class PoolLogDailySummary(SQLModel, table=True):
+    """Effective (latest) pool-log state per day/turma/horario, kept up to date on insert."""
+    __tablename__ = "pool_log_daily_summary"
+    __table_args__ = (
+        UniqueConstraint("data", "turma_key", "horario", name="uq_pool_log_summary_slot"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    data: str = Field(default="", index=True)
+    mes: str = Field(default="", index=True)
+    turma_key: str = Field(default="", index=True)
+    turma_codigo: str = Field(default="")
+    turma_label: str = Field(default="")
+    turma_label_key: str = Field(default="", index=True)  # filtros só por label (turma_key prefere o código)
+    horario: str = Field(default="", index=True)
+    temp_piscina: Optional[float] = Field(default=None)
+    temp_externa: Optional[float] = Field(default=None)
+    cloro_ppm: Optional[float] = Field(default=None)
+    status_aula: str = Field(default="")
+    nota: str = Field(default="")
+    tipo_ocorrencia: str = Field(default="")
+    motivo: str = Field(default="")
+    log_count: int = Field(default=0)
+    updated_at: str = Field(default="")
+
+
+class WeatherSnapshot(SQLModel, table=True):
+    __tablename__ = "weather_snapshots"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    date: str = Field(default="", index=True, unique=True)
+    temp: str = Field(default="")
+    condition: str = Field(default="")
+    condition_code: str = Field(default="")
+    saved_at: str = Field(default="")
+
+
 class AcademicCalendarState(SQLModel, table=True):
     __tablename__ = "academic_calendar_state"
     id: int = Field(default=1, primary_key=True)
@@ -179,6 +221,111 @@ class AcademicCalendarState(SQLModel, table=True):
     updated_at: str = Field(default="")
 
 
+class AcademicCalendarEvent(SQLModel, table=True):
+    __tablename__ = "academic_calendar_events"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    event_uid: str = Field(default="", index=True, unique=True)
+    date: str = Field(default="", index=True)
+    type: str = Field(default="")
+    all_day: bool = Field(default=False)
+    start_time: str = Field(default="")
+    end_time: str = Field(default="")
+    description: str = Field(default="")
+    teacher: str = Field(default="")
+    created_at: str = Field(default="")
+
+
+class AcademicCalendarBankHour(SQLModel, table=True):
+    __tablename__ = "academic_calendar_bank_hours"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entry_uid: str = Field(default="", index=True, unique=True)
+    event_uid: str = Field(default="", index=True)
+    date: str = Field(default="", index=True)
+    teacher: str = Field(default="")
+    description: str = Field(default="")
+    start_time: str = Field(default="")
+    end_time: str = Field(default="")
+    hours: float = Field(default=0.0)
+    created_at: str = Field(default="")
+
+
+class PlannedSessionMonth(SQLModel, table=True):
+    __tablename__ = "planned_sessions"
+    __table_args__ = (
+        UniqueConstraint("class_id", "mes", name="uq_planned_sessions_class_mes"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    class_id: int = Field(index=True)
+    mes: str = Field(default="", index=True)
+    fingerprint: str = Field(default="")
+    dates: str = Field(default="", sa_column=Column(Text))
+    session_count: int = Field(default=0)
+    updated_at: str = Field(default="")
+
+
+class PlanningFile(SQLModel, table=True):
+    __tablename__ = "planning_files"
+    __table_args__ = (
+        Index("ix_planning_files_position", "position"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    file_uid: str = Field(default="", index=True, unique=True)
+    source_name: str = Field(default="")
+    target: str = Field(default="")
+    year: int = Field(default=0, index=True)
+    author: str = Field(default="")
+    created_at: str = Field(default="")
+    updated_at: str = Field(default="")
+    block_count: int = Field(default=0)
+    position: int = Field(default=0)
+
+
+class PlanningFileContent(SQLModel, table=True):
+    __tablename__ = "planning_file_contents"
+    file_uid: str = Field(primary_key=True)
+    blocks_json: str = Field(default="[]", sa_column=Column(Text))
+
+
+class TransferOverride(SQLModel, table=True):
+    __tablename__ = "transfer_overrides"
+    __table_args__ = (
+        UniqueConstraint("identity_key", name="uq_transfer_override_identity_key"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    identity_key: str = Field(default="")
+    nome: str = Field(default="")
+    data_nascimento: str = Field(default="")
+    whatsapp: str = Field(default="")
+    turma_codigo: str = Field(default="")
+    turma_label: str = Field(default="")
+    horario: str = Field(default="")
+    professor: str = Field(default="")
+    updated_at: str = Field(default="")
+
+
+class JustificationRecord(SQLModel, table=True):
+    __tablename__ = "justifications"
+    __table_args__ = (
+        UniqueConstraint("aluno_key", "data", "turma_key", "horario", "professor_key", name="uq_justification_slot"),
+        Index("ix_justifications_mes_turma", "mes", "turma_key"),
+        Index("ix_justifications_mes_turma_label", "mes", "turma_label_key"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    aluno_key: str = Field(default="")
+    aluno_nome: str = Field(default="")
+    data: str = Field(default="", index=True)
+    mes: str = Field(default="")
+    turma_key: str = Field(default="")
+    turma_codigo: str = Field(default="")
+    turma_label: str = Field(default="")
+    turma_label_key: str = Field(default="")  # turma_key prefere o código; filtros só por label usam esta
+    horario: str = Field(default="")
+    professor_key: str = Field(default="")
+    professor: str = Field(default="")
+    motivo: str = Field(default="")
+    saved_at: str = Field(default="")
+
+
 class ExclusionRecord(SQLModel, table=True):
     __tablename__ = "exclusion_records"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -190,6 +337,7 @@ class ExclusionRecord(SQLModel, table=True):
     horario: str = Field(default="", index=True)
     professor: str = Field(default="", index=True)
     data_exclusao: str = Field(default="")
+    mes: str = Field(default="", index=True)
     motivo_exclusao: str = Field(default="")
     payload_json: str = Field(default="{}", sa_column=Column(Text))
     saved_at: str = Field(default="")
@@ -0,0 +1,286 @@
+"""Text, horário, date and saved_at normalization shared by the storage modules and the routers."""
+
+import math
+import re
+import sys
+import unicodedata
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _month_bounds(month: str) -> tuple[str, str]:
+    year, month_num = month.split("-")
+    start = datetime(int(year), int(month_num), 1)
+    if int(month_num) == 12:
+        next_month = datetime(int(year) + 1, 1, 1)
+    else:
+        next_month = datetime(int(year), int(month_num) + 1, 1)
+    end = next_month - timedelta(days=1)
+    return (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+
+
+def _format_horario(value: str) -> str:
+    raw = str(value or "").strip()
+    if raw == "":
+        return ""
+    if ":" in raw:
+        parts = raw.split(":")
+        if len(parts) >= 2:
+            hh = parts[0].zfill(2)[:2]
+            mm = parts[1].zfill(2)[:2]
+            return f"{hh}:{mm}"
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if len(digits) == 3:
+        digits = "0" + digits
+    if len(digits) >= 4:
+        return f"{digits[:2]}:{digits[2:4]}"
+    return raw
+
+def _horario_to_minutes(value: str) -> Optional[int]:
+    normalized = _format_horario(value)
+    if not normalized or ":" not in normalized:
+        return None
+    try:
+        hh, mm = normalized.split(":", 1)
+        hour = int(hh)
+        minute = int(mm)
+    except Exception:
+        return None
+    if hour < 0 or hour > 23 or minute < 0 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+def _horario_bucket(value: str) -> str:
+    minutes = _horario_to_minutes(value)
+    if minutes is None:
+        return ""
+    if minutes < 12 * 60:
+        return "manha"
+    if minutes < 18 * 60:
+        return "tarde"
+    return "noite"
+
+def _horario_matches(requested: str, stored: str) -> bool:
+    req = _format_horario(requested)
+    saved = _format_horario(stored)
+    if not req:
+        return True
+    if not saved:
+        return False
+    if req == saved:
+        return True
+    # Compatibilidade retroativa: alguns logs antigos usam horário âncora
+    # por período (ex.: 13:00) e não o horário exato da turma (ex.: 16:00).
+    req_bucket = _horario_bucket(req)
+    saved_bucket = _horario_bucket(saved)
+    return bool(req_bucket and saved_bucket and req_bucket == saved_bucket)
+
+def _format_whatsapp(value: Any) -> str:
+    raw = str(value or "").strip()
+    if raw == "":
+        return ""
+    if any(ch.isalpha() for ch in raw):
+        return ""
+
+    digits = re.sub(r"\D", "", raw)
+    if len(digits) == 11:
+        return f"({digits[:2]}) {digits[2:7]}-{digits[7:]}"
+    if len(digits) == 10:
+        return f"({digits[:2]}) {digits[2:6]}-{digits[6:]}"
+    return ""
+
+
+def _coerce_numeric_value(value: Optional[str]) -> str | float:
+    raw = str(value or "").replace(",", ".").strip()
+    if raw == "":
+        return ""
+    try:
+        num = float(raw)
+        if math.isfinite(num):
+            return num
+    except ValueError:
+        pass
+    return raw
+
+
+def _is_missing(value: Any) -> bool:
+    """pd.isna para escalares sem importar o pandas: NaT/NA só existem se ele já foi carregado."""
+    if isinstance(value, float):
+        return math.isnan(value)
+    pd = sys.modules.get("pandas")
+    if pd is None:
+        return False
+    try:
+        return bool(pd.isna(value))
+    except Exception:
+        return False
+
+
+def _normalize_date_key(value: Any) -> str:
+    if value is None:
+        return ""
+
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, pd.Timestamp):
+        if pd.isna(value):
+            return ""
+        return value.date().isoformat()
+
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    raw = str(value).strip()
+    if not raw:
+        return ""
+
+    raw_no_time = raw.replace("T", " ").split(" ")[0]
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", raw_no_time):
+        return raw_no_time
+
+    if re.fullmatch(r"\d{2}/\d{2}/\d{4}", raw_no_time):
+        dd, mm, yyyy = raw_no_time.split("/")
+        return f"{yyyy}-{mm}-{dd}"
+
+    import pandas as pd
+
+    parsed = pd.to_datetime(raw, errors="coerce", dayfirst=True)
+    if pd.notna(parsed):
+        return parsed.date().isoformat()
+
+    return raw_no_time
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    return _repair_mojibake_text(str(value or "")).strip().lower()
+
+
+def _text_corruption_score(value: str) -> int:
+    if not value:
+        return 0
+
+    suspicious_chars = "ÃÂ�├┤┬└┘╜╨║"
+    suspicious = sum(1 for ch in value if ch in suspicious_chars)
+    box_drawing = sum(1 for ch in value if 0x2500 <= ord(ch) <= 0x257F)
+    pipe_between_letters = len(re.findall(r"[A-Za-zÀ-ÖØ-öø-ÿ]\|[A-Za-zÀ-ÖØ-öø-ÿ]", value))
+    return suspicious + box_drawing + (pipe_between_letters * 3)
+
+
+def _repair_mojibake_text(value: Optional[str]) -> str:
+    raw = str(value or "")
+    if not raw:
+        return ""
+
+    best = raw
+    best_score = _text_corruption_score(raw)
+
+    for encoding in ("cp437", "latin-1", "cp1252"):
+        try:
+            candidate = raw.encode(encoding).decode("utf-8")
+        except Exception:
+            continue
+
+        candidate_score = _text_corruption_score(candidate)
+        if candidate_score < best_score:
+            best = candidate
+            best_score = candidate_score
+
+    return best
+
+
+def _normalize_whatsapp_digits(value: Optional[str]) -> str:
+    return re.sub(r"\D", "", str(value or ""))
+
+
+def _normalize_text_fold(value: Optional[str]) -> str:
+    raw = _repair_mojibake_text(value).strip().lower()
+    if not raw:
+        return ""
+    return "".join(ch for ch in unicodedata.normalize("NFD", raw) if unicodedata.category(ch) != "Mn")
+
+
+def _infer_schedule_group(turma_label: str, turma_codigo: str) -> str:
+    label = _normalize_text_fold(turma_label)
+    code = _normalize_text_fold(turma_codigo)
+    if ("terca" in label and "quinta" in label) or "tq" in code:
+        return "tq"
+    if ("quarta" in label and "sexta" in label) or "qs" in code:
+        return "qs"
+    return "other"
+
+
+def _normalize_horario_key(value: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", str(value or ""))
+    if len(digits) == 3:
+        return f"0{digits}"
+    if len(digits) >= 4:
+        return digits[:4]
+    return digits
+
+
+_UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _saved_at_sort_key(value: Any) -> int:
+    raw = str(value or "").strip()
+    if not raw:
+        return -1
+    if re.match(r"\d{4}-\d{2}-\d{2}", raw):
+        # Caminho comum (isoformat gravado pela API): mesmo valor em ns UTC que o pandas devolve.
+        try:
+            parsed_iso = datetime.fromisoformat(raw)
+        except ValueError:
+            parsed_iso = None
+        if parsed_iso is not None:
+            if parsed_iso.tzinfo is None:
+                parsed_iso = parsed_iso.replace(tzinfo=timezone.utc)
+            return (parsed_iso - _UNIX_EPOCH) // timedelta(microseconds=1) * 1000
+    try:
+        import pandas as pd
+
+        parsed = pd.to_datetime(raw, errors="coerce", utc=True, dayfirst=True)
+        if pd.isna(parsed):
+            return -1
+        return int(parsed.value)
+    except Exception:
+        return -1
+
+
+def _extract_month_key(value: Any) -> str:
+    iso = _normalize_date_key(value)
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", iso):
+        return iso[:7]
+    return ""
+
+
+def _map_attendance_value(value: str) -> str:
+    normalized = _normalize_text(value)
+    if normalized == "presente":
+        return "c"
+    if normalized == "falta":
+        return "f"
+    if normalized == "justificado":
+        return "j"
+    return ""
+
+
+def parse_bool(value: str) -> bool:
+    if value is None:
+        return False
+    return str(value).strip().lower() in {"true", "1", "sim", "yes", "y"}
+
+
+def _normalize_horario_value(raw: str) -> str:
+    digits = "".join(ch for ch in str(raw or "") if ch.isdigit())
+    if not digits:
+        return ""
+    if len(digits) == 3:
+        digits = f"0{digits}"
+    if len(digits) > 4:
+        digits = digits[:4]
+    return digits.zfill(4)
@@ -0,0 +1,100 @@
+"""Planning files: row/dict conversion, upsert and the one-time import of the JSON file."""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlmodel import Session, func, select
+
+from app import settings
+from app.models import PlanningFile, PlanningFileContent
+from app.schemas import PlanningFileSummaryOut
+from app.storage import _backup_runtime_json, _load_json_list
+
+
+def _planning_file_summary(row: PlanningFile) -> PlanningFileSummaryOut:
+    return PlanningFileSummaryOut(
+        id=row.file_uid,
+        title=row.target or row.source_name,
+        sourceName=row.source_name,
+        target=row.target,
+        year=int(row.year or 0),
+        author=row.author,
+        date=row.created_at,
+        updatedAt=row.updated_at,
+        blockCount=int(row.block_count or 0),
+    )
+
+
+def _planning_file_as_dict(row: PlanningFile, blocks_json: Optional[str]) -> Dict[str, Any]:
+    try:
+        blocks = json.loads(blocks_json or "[]")
+    except Exception:
+        blocks = []
+    return {
+        "id": row.file_uid,
+        "sourceName": row.source_name,
+        "target": row.target,
+        "year": int(row.year or 0),
+        "author": row.author,
+        "blocks": blocks if isinstance(blocks, list) else [],
+        "createdAt": row.created_at,
+    }
+
+
+def _upsert_planning_file(session: Session, payload: Dict[str, Any], position: Optional[int] = None) -> Dict[str, Any]:
+    file_uid = str(payload.get("id") or "").strip()
+    if position is None:
+        # Arquivo salvo vai para o topo da lista, como no insert(0, ...) do JSON antigo.
+        position = int(session.exec(select(func.max(PlanningFile.position))).one() or 0) + 1
+    blocks = payload.get("blocks") if isinstance(payload.get("blocks"), list) else []
+    row = session.exec(select(PlanningFile).where(PlanningFile.file_uid == file_uid)).first() or PlanningFile(file_uid=file_uid)
+    row.source_name = str(payload.get("sourceName") or "")
+    row.target = str(payload.get("target") or "")
+    try:
+        row.year = int(payload.get("year") or 0)
+    except (TypeError, ValueError):
+        row.year = 0
+    row.author = str(payload.get("author") or "")
+    row.created_at = str(payload.get("createdAt") or "")
+    row.updated_at = datetime.utcnow().isoformat()
+    row.block_count = len(blocks)
+    row.position = position
+    session.add(row)
+
+    content = session.get(PlanningFileContent, file_uid) or PlanningFileContent(file_uid=file_uid)
+    content.blocks_json = json.dumps(blocks, ensure_ascii=False)
+    session.add(content)
+    return _planning_file_as_dict(row, content.blocks_json)
+
+
+def _migrate_planning_files_from_json() -> int:
+    """Import the legacy planningFiles.json into planning_files (once)."""
+    from app.database import engine as _db_engine
+
+    legacy_path = _planning_files_path()
+    if not os.path.exists(legacy_path):
+        return 0
+    migrated = 0
+    with Session(_db_engine) as session:
+        if session.exec(select(PlanningFile.id).limit(1)).first() is None:
+            legacy = [item for item in _load_json_list(legacy_path) if isinstance(item, dict) and item.get("id")]
+            seen: set[str] = set()
+            # O JSON guarda o mais recente primeiro; a maior posição fica com o primeiro item.
+            for index, item in enumerate(legacy):
+                file_uid = str(item.get("id")).strip()
+                if file_uid in seen:
+                    continue
+                seen.add(file_uid)
+                _upsert_planning_file(session, item, position=len(legacy) - index)
+                migrated += 1
+            session.commit()
+    # O arquivo antigo fica só no archive/: com a tabela vazia (tudo apagado) ele não volta no restart.
+    _backup_runtime_json(legacy_path)
+    os.remove(legacy_path)
+    return migrated
+
+
+def _planning_files_path() -> str:
+    return os.path.join(settings.DATA_DIR, "planningFiles.json")
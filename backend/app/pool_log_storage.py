@@ -0,0 +1,476 @@
+"""Pool log storage: pool_logs rows, the logPiscina.xlsx mirror and the daily summary table."""
+
+import math
+import os
+from datetime import datetime, timezone
+from threading import Event, RLock, Thread
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete as sa_delete
+from sqlmodel import Session, select
+
+from app import instrumentation
+from app.database import session_scope
+from app.models import PoolLog, PoolLogDailySummary
+from app.normalize import (
+    _coerce_numeric_value,
+    _format_horario,
+    _horario_matches,
+    _is_missing,
+    _month_bounds,
+    _normalize_date_key,
+    _normalize_horario_key,
+    _normalize_text_fold,
+)
+from app.schemas import PoolLogEntryModel
+from app.storage import POOL_LOG_FILE_LOCK
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+POOL_LOG_MIRROR_INTERVAL_SECONDS = float(os.getenv("POOL_LOG_MIRROR_INTERVAL", "5") or 5)
+POOL_LOG_MIRROR_MAX_FAILURES = int(os.getenv("POOL_LOG_MIRROR_MAX_FAILURES", "60") or 60)
+
+
+POOL_LOG_COLUMNS = [
+    "Data",
+    "TurmaCodigo",
+    "TurmaLabel",
+    "Horario",
+    "Professor",
+    "Clima 1",
+    "Clima 2",
+    "Status_aula",
+    "Nota",
+    "Tipo_ocorrencia",
+    "Temp. (C)",
+    "Piscina (C)",
+    "Cloro (ppm)",
+]
+
+
+@instrumentation.timed("excel")
+def _load_pool_log(file_path: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    if os.path.exists(file_path):
+        df = pd.read_excel(file_path)
+    else:
+        df = pd.DataFrame(columns=POOL_LOG_COLUMNS)
+
+    for col in POOL_LOG_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].astype("object")
+    return df
+
+
+def _pool_log_row_from_entry(entry: PoolLogEntryModel) -> Dict[str, Any]:
+    cloro_value = "-" if entry.nota in {"feriado", "ponte-feriado", "reuniao"} else ("-" if entry.cloroPpm is None else entry.cloroPpm)
+    temp_externa_value = _coerce_numeric_value(entry.tempExterna)
+    temp_piscina_value = _coerce_numeric_value(entry.tempPiscina)
+    return {
+        "Data": _normalize_date_key(entry.data),
+        "TurmaCodigo": entry.turmaCodigo or "",
+        "TurmaLabel": entry.turmaLabel or "",
+        "Horario": _format_horario(entry.horario),
+        "Professor": entry.professor or "",
+        "Clima 1": entry.clima1,
+        "Clima 2": entry.clima2,
+        "Status_aula": entry.statusAula,
+        "Nota": entry.nota,
+        "Tipo_ocorrencia": entry.tipoOcorrencia,
+        "Temp. (C)": temp_externa_value,
+        "Piscina (C)": temp_piscina_value,
+        "Cloro (ppm)": cloro_value,
+    }
+
+
+def _pool_log_row_from_db(row: PoolLog) -> Dict[str, Any]:
+    return {
+        "Data": _normalize_date_key(row.data),
+        "TurmaCodigo": row.turma_codigo or "",
+        "TurmaLabel": row.turma_label or "",
+        "Horario": _format_horario(row.horario),
+        "Professor": row.professor or "",
+        "Clima 1": row.clima1 or "",
+        "Clima 2": row.clima2 or "",
+        "Status_aula": row.status_aula or "",
+        "Nota": row.nota or "",
+        "Tipo_ocorrencia": row.tipo_ocorrencia or "",
+        "Temp. (C)": row.temp_externa or "",
+        "Piscina (C)": row.temp_piscina or "",
+        "Cloro (ppm)": row.cloro_ppm,
+        "saved_at": row.saved_at or "",
+    }
+
+
+def _pool_log_frame_from_rows(payload: List[Dict[str, Any]]) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = pd.DataFrame(payload)
+    for col in [*POOL_LOG_COLUMNS, "saved_at"]:
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].astype("object")
+    return df
+
+
+class _PoolLogExcelMirror:
+    """Background writer for logPiscina.xlsx; pool_logs in the database is the source of truth.
+
+    Rows queued by the request path are coalesced and appended to the workbook in
+    one rewrite per cycle. If the file is locked (aberto no Excel) the batch stays
+    queued and is retried on the next cycle instead of failing the request; after
+    max_failures cycles in a row the queue is dropped and the workbook is flagged for
+    a rebuild from the database.
+    """
+
+    def __init__(self, interval_seconds: float, max_failures: int):
+        self.interval_seconds = interval_seconds
+        self.max_failures = max_failures
+        self.last_error = ""
+        # (pool_logs.id, linha); id None quando a gravação no banco falhou.
+        self._pending: Dict[str, List[Tuple[Optional[int], Dict[str, Any]]]] = {}
+        self._failures: Dict[str, int] = {}
+        self._stale: set[str] = set()
+        self._pending_lock = RLock()
+        self._wake = Event()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    def enqueue(self, file_path: str, row: Dict[str, Any], log_id: Optional[int] = None) -> None:
+        with self._pending_lock:
+            self._pending.setdefault(file_path, []).append((log_id, dict(row)))
+
+    def pending_count(self, file_path: Optional[str] = None) -> int:
+        with self._pending_lock:
+            if file_path is not None:
+                return len(self._pending.get(file_path, []))
+            return sum(len(rows) for rows in self._pending.values())
+
+    def needs_rebuild(self, file_path: str) -> bool:
+        with self._pending_lock:
+            return file_path in self._stale
+
+    def unlogged(self, file_path: str) -> List[Tuple[Optional[int], Dict[str, Any]]]:
+        """Queued rows the database never stored; a rebuild keeps them in the workbook."""
+        with self._pending_lock:
+            return [entry for entry in self._pending.get(file_path, []) if entry[0] is None]
+
+    def settle(
+        self,
+        file_path: str,
+        logged_ids: set[int],
+        written: List[Tuple[Optional[int], Dict[str, Any]]],
+        excluded: Optional[Tuple[str, str]] = None,
+    ) -> int:
+        """Drop what a rebuild already wrote; rows committed after its query stay queued.
+
+        Callers hold POOL_LOG_FILE_LOCK, so no flush runs between the query and this.
+        """
+        written_entries = {id(entry) for entry in written}
+        with self._pending_lock:
+            entries = self._pending.pop(file_path, [])
+            kept = [
+                entry
+                for entry in entries
+                if entry[0] not in logged_ids
+                and id(entry) not in written_entries
+                and not (excluded and excluded[0] <= str(entry[1].get("Data") or "") <= excluded[1])
+            ]
+            if kept:
+                self._pending[file_path] = kept
+            self._failures.pop(file_path, None)
+            self._stale.discard(file_path)
+            return len(entries) - len(kept)
+
+    def flush(self) -> int:
+        with POOL_LOG_FILE_LOCK:
+            with self._pending_lock:
+                batch = self._pending
+                self._pending = {}
+
+            written = 0
+            for file_path, entries in batch.items():
+                rows = [row for _, row in entries]
+                try:
+                    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                    import pandas as pd
+
+                    df = _load_pool_log(file_path)
+                    df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
+                    df.to_excel(file_path, index=False)
+                    written += len(rows)
+                    with self._pending_lock:
+                        self._failures.pop(file_path, None)
+                except Exception as exc:
+                    self.last_error = str(exc)
+                    print(f"[WARN] pool-log Excel mirror failed ({file_path}): {exc}")
+                    with self._pending_lock:
+                        failures = self._failures.get(file_path, 0) + 1
+                        if failures < self.max_failures:
+                            self._failures[file_path] = failures
+                            self._pending[file_path] = entries + self._pending.get(file_path, [])
+                            continue
+                        self._failures.pop(file_path, None)
+                        self._stale.add(file_path)
+                    unlogged = sum(1 for log_id, _ in entries if log_id is None)
+                    print(
+                        f"[WARN] pool-log Excel mirror gave up on {file_path} after {failures} failures: "
+                        f"dropped {len(rows)} queued rows ({unlogged} not in the database); "
+                        "the next export rebuilds the workbook from the database"
+                    )
+            return written
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="pool-log-excel-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.interval_seconds, 1) * 2)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self.pending_count():
+                self.flush()
+
+
+POOL_LOG_EXCEL_MIRROR = _PoolLogExcelMirror(POOL_LOG_MIRROR_INTERVAL_SECONDS, POOL_LOG_MIRROR_MAX_FAILURES)
+
+
+@instrumentation.timed("excel")
+def _rebuild_pool_log_excel_from_db(
+    file_path: str, session: Optional[Session] = None, exclude_month: Optional[str] = None
+) -> int:
+    """Regenerate the whole workbook from pool_logs (on-demand export).
+
+    exclude_month leaves that month out of the workbook only (purge without deleting rows).
+    """
+    excluded = _month_bounds(exclude_month) if exclude_month else None
+    # Query, escrita e descarte da fila sob o mesmo lock do flush: uma linha enfileirada
+    # depois da consulta continua na fila em vez de sumir com o descarte.
+    with POOL_LOG_FILE_LOCK:
+        with session_scope(session) as db:
+            stmt = select(PoolLog).order_by(PoolLog.id)
+            if excluded:
+                stmt = stmt.where(~PoolLog.data.between(*excluded))
+            rows = db.exec(stmt).all()
+            logged_ids = {row.id for row in rows}
+            payload = [_pool_log_row_from_db(row) for row in rows]
+
+        unlogged = [
+            entry
+            for entry in POOL_LOG_EXCEL_MIRROR.unlogged(file_path)
+            if not (excluded and excluded[0] <= str(entry[1].get("Data") or "") <= excluded[1])
+        ]
+        df = _pool_log_frame_from_rows(payload + [row for _, row in unlogged])
+        df = df[POOL_LOG_COLUMNS]
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        df.to_excel(file_path, index=False)
+        POOL_LOG_EXCEL_MIRROR.settle(file_path, logged_ids, unlogged, excluded)
+    return len(payload)
+
+
+def _normalize_pool_log_dates() -> int:
+    """Rewrite legacy non-ISO `data` values so day lookups can use the index."""
+    from app.database import engine as _db_engine
+
+    updated = 0
+    with Session(_db_engine) as session:
+        rows = session.exec(select(PoolLog).where(~PoolLog.data.like("____-__-__"))).all()
+        for row in rows:
+            normalized = _normalize_date_key(row.data)
+            if normalized and normalized != row.data:
+                row.data = normalized
+                session.add(row)
+                updated += 1
+        if updated:
+            session.commit()
+    return updated
+
+def _pool_log_mask(df: "pd.DataFrame", entry: PoolLogEntryModel) -> "pd.Series":
+    def _norm(value: Any) -> str:
+        if value is None:
+            return ""
+        if _is_missing(value):
+            return ""
+        return str(value).strip()
+
+    def _norm_key(value: str) -> str:
+        return _normalize_text_fold(_norm(value))
+
+    data_val = _normalize_date_key(entry.data)
+    turma_codigo = _norm_key(entry.turmaCodigo)
+    turma_label = _norm_key(entry.turmaLabel)
+    horario = _format_horario(entry.horario)
+    professor = _norm_key(entry.professor)
+
+    mask = df["Data"].apply(_normalize_date_key) == data_val
+    if turma_codigo:
+        turma_codigo_col = df["TurmaCodigo"].astype(str).map(_norm_key)
+        if turma_label:
+            # Compatibilidade retroativa: quando o código vier vazio em registros antigos,
+            # permite casar pelo label mantendo os demais critérios.
+            mask = mask & ((turma_codigo_col == turma_codigo) | (turma_codigo_col == ""))
+        else:
+            mask = mask & (turma_codigo_col == turma_codigo)
+    if turma_label:
+        turma_label_col = df["TurmaLabel"].astype(str).map(_norm_key)
+        if turma_codigo:
+            # Compatibilidade retroativa: quando o label vier vazio em registros antigos,
+            # permite casar pelo código mantendo os demais critérios.
+            mask = mask & ((turma_label_col == turma_label) | (turma_label_col == ""))
+        else:
+            mask = mask & (turma_label_col == turma_label)
+    if horario:
+        mask = mask & df["Horario"].astype(str).apply(lambda value: _horario_matches(horario, value))
+    if professor:
+        professor_col = df["Professor"].astype(str).map(_norm_key)
+        # Compatibilidade retroativa: professor vazio no histórico deve casar
+        # com o professor informado na seleção atual.
+        mask = mask & ((professor_col == professor) | (professor_col == ""))
+    return mask
+
+
+def _pool_log_float(value: Any) -> Optional[float]:
+    raw = str(value if value is not None else "").replace(",", ".").strip()
+    if not raw or raw == "-":
+        return None
+    try:
+        parsed = float(raw)
+    except ValueError:
+        return None
+    return parsed if math.isfinite(parsed) else None
+
+
+def _pool_log_summary_key(log: PoolLog) -> Tuple[str, str, str]:
+    turma_key = _normalize_text_fold(log.turma_codigo or "") or _normalize_text_fold(log.turma_label or "")
+    return (_normalize_date_key(log.data), turma_key, _normalize_horario_key(log.horario or ""))
+
+
+def _pool_log_summary_motivo(log: PoolLog) -> str:
+    tipo = str(log.tipo_ocorrencia or "").strip()
+    if tipo and _normalize_text_fold(tipo) != "nenhuma":
+        return tipo
+    return str(log.nota or "").strip()
+
+
+def _fill_pool_log_summary(summary: PoolLogDailySummary, log: PoolLog) -> None:
+    # O último registro do escopo é o estado efetivo da aula no dia.
+    summary.turma_codigo = str(log.turma_codigo or "").strip()
+    summary.turma_label = str(log.turma_label or "").strip()
+    summary.turma_label_key = _normalize_text_fold(summary.turma_label)
+    summary.temp_piscina = _pool_log_float(log.temp_piscina)
+    summary.temp_externa = _pool_log_float(log.temp_externa)
+    summary.cloro_ppm = _pool_log_float(log.cloro_ppm)
+    summary.status_aula = str(log.status_aula or "").strip()
+    summary.nota = str(log.nota or "").strip()
+    summary.tipo_ocorrencia = str(log.tipo_ocorrencia or "").strip()
+    summary.motivo = _pool_log_summary_motivo(log)
+    summary.log_count = int(summary.log_count or 0) + 1
+    summary.updated_at = str(log.saved_at or "")
+
+
+def _apply_pool_log_to_summary(session: Session, log: PoolLog) -> PoolLogDailySummary:
+    data_key, turma_key, horario_key = _pool_log_summary_key(log)
+    summary = session.exec(
+        select(PoolLogDailySummary).where(
+            PoolLogDailySummary.data == data_key,
+            PoolLogDailySummary.turma_key == turma_key,
+            PoolLogDailySummary.horario == horario_key,
+        )
+    ).first()
+    if summary is None:
+        summary = PoolLogDailySummary(data=data_key, mes=data_key[:7], turma_key=turma_key, horario=horario_key)
+    _fill_pool_log_summary(summary, log)
+    session.add(summary)
+    return summary
+
+
+def _rebuild_pool_log_summary(force: bool = False) -> int:
+    """Backfill the summary table from pool_logs (startup, or forced after a purge)."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as session:
+        has_summary = session.exec(select(PoolLogDailySummary.id).limit(1)).first() is not None
+        if has_summary and not force:
+            return 0
+        if has_summary:
+            session.exec(sa_delete(PoolLogDailySummary))
+
+        slots: Dict[Tuple[str, str, str], PoolLogDailySummary] = {}
+        for log in session.exec(select(PoolLog).order_by(PoolLog.id)).all():
+            key = _pool_log_summary_key(log)
+            if not key[0]:
+                continue
+            summary = slots.get(key)
+            if summary is None:
+                summary = PoolLogDailySummary(data=key[0], mes=key[0][:7], turma_key=key[1], horario=key[2])
+                slots[key] = summary
+            _fill_pool_log_summary(summary, log)
+
+        session.add_all(list(slots.values()))
+        session.commit()
+        return len(slots)
+
+
+def _backfill_pool_log_summary_label_keys() -> int:
+    """Fill pool_log_daily_summary.turma_label_key for rows written before the column existed."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as session:
+        rows = session.exec(
+            select(PoolLogDailySummary).where(
+                PoolLogDailySummary.turma_label_key == "", PoolLogDailySummary.turma_label != ""
+            )
+        ).all()
+        for row in rows:
+            row.turma_label_key = _normalize_text_fold(row.turma_label)
+            session.add(row)
+        if rows:
+            session.commit()
+        return len(rows)
+
+
+def _store_pool_log_row(db: Session, row: Dict[str, Any]) -> Optional[int]:
+    cloro_raw = row.get("Cloro (ppm)", None)
+    cloro_value = None
+    if cloro_raw is not None:
+        try:
+            parsed = float(str(cloro_raw).replace(",", ".").strip())
+            if math.isfinite(parsed):
+                cloro_value = parsed
+        except Exception:
+            cloro_value = None
+
+    log = PoolLog(
+        data=_normalize_date_key(row.get("Data", "")),
+        turma_codigo=str(row.get("TurmaCodigo", "") or "").strip(),
+        turma_label=str(row.get("TurmaLabel", "") or "").strip(),
+        horario=_normalize_horario_key(row.get("Horario", "") or ""),
+        professor=str(row.get("Professor", "") or "").strip(),
+        clima1=str(row.get("Clima 1", "") or "").strip(),
+        clima2=str(row.get("Clima 2", "") or "").strip(),
+        status_aula=str(row.get("Status_aula", "") or "").strip(),
+        nota=str(row.get("Nota", "") or "").strip(),
+        tipo_ocorrencia=str(row.get("Tipo_ocorrencia", "") or "").strip(),
+        temp_externa=str(row.get("Temp. (C)", "") or "").strip(),
+        temp_piscina=str(row.get("Piscina (C)", "") or "").strip(),
+        cloro_ppm=cloro_value,
+        saved_at=datetime.now(timezone.utc).isoformat(),
+    )
+    db.add(log)
+    _apply_pool_log_to_summary(db, log)
+    db.commit()
+    return log.id
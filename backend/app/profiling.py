@@ -0,0 +1,282 @@
+"""On-demand request profiling for admins (X-Profile: 1 header or ?profile=1).
+
+A sampling profiler instead of cProfile: on Python 3.11 cProfile only sees the thread
+that enabled it, while sync routes run in the anyio worker threads. The sampler reads
+sys._current_frames() every PROFILE_INTERVAL_MS, but only for the threads of the profiled
+request: the event loop thread that received it and the worker threads running its sync
+code, registered through a ContextVar when anyio.to_thread.run_sync hands them work.
+Other requests and background threads (espelhos, clima) stay out of the profile.
+Only one request is profiled at a time; profiles go to a bounded ring buffer.
+
+With PROFILING_ENABLED=0 (default) the middleware is a pass-through.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from threading import Event, Lock, Thread
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import anyio.to_thread
+
+PROFILING_ENABLED = (os.getenv("PROFILING_ENABLED") or "0").strip().lower() in {"1", "true", "yes"}
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+PROFILE_TOP = 40
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+FrameKey = Tuple[str, int, str]
+
+
+def _frame_label(key: FrameKey) -> str:
+    filename, firstlineno, name = key
+    if filename.startswith(APP_ROOT):
+        filename = filename[len(APP_ROOT):]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{name}:{firstlineno}"
+
+
+class _Sampler(Thread):
+    def __init__(self, interval_s: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # ident -> chamadas em andamento; um worker sai do conjunto ao devolver a tarefa.
+        self.threads: Dict[int, int] = {}
+        self._threads_lock = Lock()
+        # Não pode se chamar _stop: Thread.join() usa o _stop() privado da própria Thread.
+        self._halt = Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._halt.wait(self.interval_s):
+            self._sample(own)
+
+    def track(self, ident: int) -> None:
+        with self._threads_lock:
+            self.threads[ident] = self.threads.get(ident, 0) + 1
+
+    def untrack(self, ident: int) -> None:
+        with self._threads_lock:
+            remaining = self.threads.get(ident, 0) - 1
+            if remaining > 0:
+                self.threads[ident] = remaining
+            else:
+                self.threads.pop(ident, None)
+
+    def tracked(self, func: Callable) -> Callable:
+        """Wraps func so the worker thread that runs it is sampled while it runs."""
+
+        @wraps(func)
+        def _run(*args: Any, **kwargs: Any) -> Any:
+            ident = threading.get_ident()
+            self.track(ident)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.untrack(ident)
+
+        return _run
+
+    def _sample(self, own: int) -> None:
+        with self._threads_lock:
+            idents = set(self.threads)
+        for ident, frame in sys._current_frames().items():
+            if ident == own or ident not in idents:
+                continue
+            stack: List[FrameKey] = []
+            in_app = False
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                in_app = in_app or code.co_filename.startswith(APP_ROOT)
+                frame = frame.f_back
+            # Loop ocioso no select (ou rodando só código do Starlette) não passa pelo app.
+            if in_app:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+def _build_profile(
+    profile_id: str, sampler: _Sampler, method: str, path: str, route: str, status: int, started_at: str, wall_ms: float
+) -> Dict[str, Any]:
+    interval_ms = sampler.interval_s * 1000
+    self_samples: Counter = Counter()
+    cumulative: Counter = Counter()
+    collapsed: List[str] = []
+    for stack, count in sampler.stacks.most_common():
+        self_samples[stack[-1]] += count
+        for key in set(stack):
+            cumulative[key] += count
+        collapsed.append(";".join(_frame_label(key) for key in stack) + f" {count}")
+
+    top = [
+        {
+            "function": _frame_label(key),
+            "self_samples": self_samples.get(key, 0),
+            "cumulative_samples": count,
+            "self_ms": round(self_samples.get(key, 0) * interval_ms, 1),
+            "cumulative_ms": round(count * interval_ms, 1),
+            "app": key[0].startswith(APP_ROOT),
+        }
+        for key, count in cumulative.most_common(PROFILE_TOP)
+    ]
+    return {
+        "id": profile_id,
+        "method": method,
+        "path": path,
+        "route": route,
+        "status": status,
+        "started_at": started_at,
+        "wall_ms": round(wall_ms, 1),
+        "interval_ms": interval_ms,
+        "samples": sampler.samples,
+        "top": top,
+        "collapsed": collapsed,
+    }
+
+
+_profiles: Deque[Dict[str, Any]] = deque(maxlen=max(1, PROFILE_BUFFER_SIZE))
+_profiles_lock = Lock()
+_active = Lock()
+_current: ContextVar[Optional[_Sampler]] = ContextVar("request_profile", default=None)
+_installed = False
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Newest first, without the stacks."""
+    with _profiles_lock:
+        items = list(_profiles)
+    return [
+        {key: item[key] for key in ("id", "method", "path", "route", "status", "started_at", "wall_ms", "samples")}
+        for item in reversed(items)
+    ]
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    with _profiles_lock:
+        return next((item for item in _profiles if item["id"] == profile_id), None)
+
+
+def reset() -> None:
+    with _profiles_lock:
+        _profiles.clear()
+
+
+def _requested(scope) -> bool:
+    for name, value in scope.get("headers") or []:
+        if name == b"x-profile" and value.strip() in {b"1", b"true"}:
+            return True
+    query = scope.get("query_string") or b""
+    return b"profile=1" in query.split(b"&") or b"profile=true" in query.split(b"&")
+
+
+def _bearer_token(scope) -> str:
+    for name, value in scope.get("headers") or []:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" else ""
+    return ""
+
+
+async def _send_json(send, status: int, body: bytes) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    """Profiles flagged requests from admins; everything else passes straight through."""
+
+    def __init__(self, app: Any, authorize: Callable[[str], Awaitable[bool]]):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILING_ENABLED or scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.authorize(_bearer_token(scope)):
+            await _send_json(send, 403, b'{"detail":"Profiling requires an admin token"}')
+            return
+        if not _active.acquire(blocking=False):
+            # Um perfil por vez: amostras de duas requisições se misturariam.
+            await self.app(scope, receive, _with_headers(send, [(b"x-profile-status", b"busy")]))
+            return
+
+        method, path = scope.get("method", ""), scope.get("path", "")
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        status = {"code": 500}
+        sampler = _Sampler(max(PROFILE_INTERVAL_MS, 0.5) / 1000)
+        # O id sai no cabeçalho antes do perfil existir, então é reservado já aqui.
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler.track(threading.get_ident())
+        token = _current.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            wall_ms = (time.perf_counter() - started) * 1000
+            try:
+                sampler.stop()
+            finally:
+                # Mesmo se o amostrador falhar, o perfil parcial é guardado e a trava liberada;
+                # senão toda requisição marcada seguinte voltaria "busy" até reiniciar o processo.
+                try:
+                    route = getattr(scope.get("route"), "path", None) or path
+                    profile = _build_profile(profile_id, sampler, method, path, route, status["code"], started_at, wall_ms)
+                    with _profiles_lock:
+                        _profiles.append(profile)
+                finally:
+                    _active.release()
+
+
+def _with_headers(send, extra: List[Tuple[bytes, bytes]]):
+    async def _send(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), *extra]}
+        await send(message)
+
+    return _send
+
+
+def _tracking_run_sync(run_sync: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    # Rotas síncronas, dependências e run_in_threadpool passam todas por aqui (Starlette e
+    # FastAPI buscam anyio.to_thread.run_sync a cada chamada); sem perfil ativo é repasse direto.
+    @wraps(run_sync)
+    async def _run_sync(func: Callable, *args: Any, **kwargs: Any) -> Any:
+        sampler = _current.get()
+        if sampler is not None:
+            func = sampler.tracked(func)
+        return await run_sync(func, *args, **kwargs)
+
+    return _run_sync
+
+
+def install(app: Any, authorize: Callable[[str], Awaitable[bool]]) -> None:
+    global _installed
+    app.add_middleware(ProfilingMiddleware, authorize=authorize)
+    if not _installed:
+        anyio.to_thread.run_sync = _tracking_run_sync(anyio.to_thread.run_sync)
+        _installed = True
@@ -0,0 +1,5 @@
+"""HTTP routes grouped by domain; app.main includes each module's `router`.
+
+Shared helpers and state live in their own app modules (storage, catalog,
+exclusions_state, ...), so the routers never import app.main.
+"""
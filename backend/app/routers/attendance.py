@@ -0,0 +1,424 @@
+"""Attendance autosave (/attendance-log), force-sync and the justifications log."""
+
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics
+from app.attendance_logs import (
+    _attendance_log_lookup_keys,
+    _latest_attendance_logs_from_journal,
+    _upsert_justifications,
+)
+from app.database import get_async_session, get_session
+from app.models import AttendanceLog, JustificationRecord
+from app.normalize import _normalize_horario_key, _normalize_text, _saved_at_sort_key
+from app.schemas import AttendanceLogPayload, AttendanceSyncProbePayload, JustificationLogEntry
+from app.storage import _append_json_list, _attendance_entry_month, _attendance_segment_path
+
+router = APIRouter()
+
+
+def _append_attendance_journal(item: Dict[str, Any]) -> str:
+    file_path = _attendance_segment_path(_attendance_entry_month(item))
+    _append_json_list(file_path, [item])
+    return file_path
+
+
+def _store_attendance_log_row(db: Session, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Upsert the class/month snapshot row; returns the stale_snapshot response when the client is behind."""
+    _turma_codigo_key = str(item.get("turmaCodigo") or "").strip()
+    _horario_key = str(item.get("horario") or "").strip()
+    _professor_key = str(item.get("professor") or "").strip()
+    _mes_key = str(item.get("mes") or "").strip()
+    _incoming_client_mutation_id = item.get("clientMutationId")
+    try:
+        _incoming_client_mutation_id = int(_incoming_client_mutation_id)
+    except Exception:
+        _incoming_client_mutation_id = None
+    _registros_to_store = item.get("registros") or []
+    _existing = db.exec(
+        select(AttendanceLog).where(
+            AttendanceLog.turma_codigo == _turma_codigo_key,
+            AttendanceLog.horario == _horario_key,
+            AttendanceLog.professor == _professor_key,
+            AttendanceLog.mes == _mes_key,
+        )
+    ).first()
+    existing_metadata = _attendance_source_metadata(_existing.source) if _existing else {}
+    existing_client_mutation_id = existing_metadata.get("clientMutationId")
+    try:
+        existing_client_mutation_id = int(existing_client_mutation_id)
+    except Exception:
+        existing_client_mutation_id = None
+
+    if (
+        _existing
+        and _incoming_client_mutation_id is not None
+        and existing_client_mutation_id is not None
+        and _incoming_client_mutation_id < existing_client_mutation_id
+    ):
+        return {
+            "ok": True,
+            "skipped": True,
+            "reason": "stale_snapshot",
+            "saved_at": _existing.saved_at,
+        }
+
+    source_metadata: Dict[str, Any] = {}
+    if item.get("source"):
+        source_metadata["source"] = item.get("source")
+    if _incoming_client_mutation_id is not None:
+        source_metadata["clientMutationId"] = _incoming_client_mutation_id
+
+    serialized_source = json.dumps(source_metadata, ensure_ascii=False) if source_metadata else None
+    if _existing:
+        _existing.turma_label = str(item.get("turmaLabel") or "").strip()
+        _existing.saved_at = item["saved_at"]
+        _existing.client_saved_at = str(item.get("clientSavedAt") or "")
+        _existing.source = serialized_source
+        _existing.registros_json = json.dumps(_registros_to_store, ensure_ascii=False)
+        db.add(_existing)
+    else:
+        _log_row = AttendanceLog(
+            turma_codigo=_turma_codigo_key,
+            turma_label=str(item.get("turmaLabel") or "").strip(),
+            horario=_horario_key,
+            professor=_professor_key,
+            mes=_mes_key,
+            saved_at=item["saved_at"],
+            client_saved_at=str(item.get("clientSavedAt") or ""),
+            source=serialized_source,
+            registros_json=json.dumps(_registros_to_store, ensure_ascii=False),
+        )
+        db.add(_log_row)
+    db.commit()
+    return None
+
+
+def _attendance_student_key(value: Any) -> str:
+    if not isinstance(value, dict):
+        return ""
+    return _normalize_text(str(value.get("aluno_nome") or "").strip())
+
+
+def _merge_attendance_student_record(existing: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
+    existing_attendance = existing.get("attendance") if isinstance(existing.get("attendance"), dict) else {}
+    incoming_attendance = incoming.get("attendance") if isinstance(incoming.get("attendance"), dict) else {}
+
+    existing_justifications = existing.get("justifications") if isinstance(existing.get("justifications"), dict) else {}
+    incoming_justifications = incoming.get("justifications") if isinstance(incoming.get("justifications"), dict) else {}
+
+    existing_notes = existing.get("notes") if isinstance(existing.get("notes"), list) else []
+    incoming_notes_raw = incoming.get("notes")
+    incoming_notes = [
+        str(note).strip()
+        for note in incoming_notes_raw
+        if str(note or "").strip()
+    ] if isinstance(incoming_notes_raw, list) else None
+
+    normalized_incoming_attendance = {
+        str(date_key).strip(): str(value or "").strip()
+        for date_key, value in incoming_attendance.items()
+        if str(date_key or "").strip()
+    }
+    normalized_incoming_justifications = {
+        str(date_key).strip(): str(value or "").strip()
+        for date_key, value in incoming_justifications.items()
+        if str(date_key or "").strip()
+    }
+
+    merged_attendance = {
+        **existing_attendance,
+    }
+    for date_key, status_value in normalized_incoming_attendance.items():
+        if status_value:
+            merged_attendance[date_key] = status_value
+
+    non_empty_attendance_dates = {
+        date_key
+        for date_key, status_value in normalized_incoming_attendance.items()
+        if status_value
+    }
+
+    merged_justifications = {
+        **existing_justifications,
+    }
+    for date_key in non_empty_attendance_dates:
+        status_value = str(merged_attendance.get(date_key) or "").strip()
+        incoming_reason = normalized_incoming_justifications.get(date_key, "")
+        if status_value == "Justificado":
+            if incoming_reason:
+                merged_justifications[date_key] = incoming_reason
+        else:
+            merged_justifications.pop(date_key, None)
+
+    for date_key, reason in normalized_incoming_justifications.items():
+        status_value = str(merged_attendance.get(date_key) or "").strip()
+        if reason and status_value == "Justificado":
+            merged_justifications[date_key] = reason
+
+    return {
+        **existing,
+        **incoming,
+        "attendance": merged_attendance,
+        "justifications": merged_justifications,
+        "notes": incoming_notes if incoming_notes is not None else existing_notes,
+    }
+
+
+def _merge_attendance_registros(existing_registros: List[Any], incoming_registros: List[Any]) -> List[Dict[str, Any]]:
+    """Merge per student (aluno_nome); runs in a worker thread, off the event loop."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for record in existing_registros:
+        key = _attendance_student_key(record)
+        if key:
+            merged[key] = dict(record)
+
+    for record in incoming_registros:
+        key = _attendance_student_key(record)
+        if key:
+            existing = merged.get(key) or {}
+            merged[key] = _merge_attendance_student_record(existing, dict(record))
+
+    return list(merged.values())
+
+
+@router.post("/attendance-log")
+async def append_attendance_log(payload: AttendanceLogPayload, session: AsyncSession = Depends(get_async_session)):
+    try:
+        item = payload.dict()
+        item["horario"] = _normalize_horario_key(item.get("horario") or "")
+        item["turmaCodigo"] = str(item.get("turmaCodigo") or "").strip()
+        item["turmaLabel"] = str(item.get("turmaLabel") or "").strip()
+        item["professor"] = str(item.get("professor") or "").strip()
+
+        # Defensive merge: if a client sends a partial roster snapshot,
+        # preserve existing students from the latest log for this class/month.
+        latest_same_class = await _load_latest_class_log_async(session, item, str(item.get("mes") or "").strip() or None)
+
+        # Do not reject by client timestamp: devices can have clock skew.
+        # We always merge incoming snapshot with latest server snapshot.
+
+        incoming_registros = item.get("registros") or []
+        save_result = "created"
+        if latest_same_class and isinstance(latest_same_class.get("registros"), list):
+            save_result = "merged"
+            item["registros"] = await run_in_threadpool(
+                _merge_attendance_registros, latest_same_class.get("registros") or [], incoming_registros
+            )
+
+        item["saved_at"] = datetime.now(timezone.utc).isoformat()
+
+        # Gravar no Supabase/PostgreSQL (persistência permanente)
+        try:
+            stale = await session.run_sync(_store_attendance_log_row, item)
+            if stale is not None:
+                metrics.ATTENDANCE_SAVES.inc(result="stale_snapshot")
+                return stale
+        except Exception:
+            await session.rollback()  # falha no DB não impede o salvamento em JSON
+            save_result = "db_error"
+
+        file_path = await run_in_threadpool(_append_attendance_journal, item)
+        metrics.ATTENDANCE_SAVES.inc(result=save_result)
+        return {"ok": True, "file": file_path}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"attendance-log error: {exc}")
+
+
+@router.post("/attendance-log/force-sync")
+async def force_attendance_sync(payload: AttendanceSyncProbePayload, session: AsyncSession = Depends(get_async_session)):
+    try:
+        item = payload.dict()
+        item["horario"] = _normalize_horario_key(item.get("horario") or "")
+        item["turmaCodigo"] = str(item.get("turmaCodigo") or "").strip()
+        item["turmaLabel"] = str(item.get("turmaLabel") or "").strip()
+        item["professor"] = str(item.get("professor") or "").strip()
+        item["mes"] = str(item.get("mes") or "").strip()
+
+        # Polling a cada poucos segundos por professor: só a coluna saved_at da turma/mês.
+        latest_same_class = await _load_latest_class_log_async(session, item, item.get("mes") or None, saved_at_only=True)
+
+        return {
+            "ok": True,
+            "hasLog": bool(latest_same_class),
+            "saved_at": (latest_same_class or {}).get("saved_at"),
+        }
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"attendance-sync error: {exc}")
+
+
+def _justification_as_dict(row: JustificationRecord) -> Dict[str, Any]:
+    return {
+        "aluno_nome": row.aluno_nome,
+        "data": row.data,
+        "motivo": row.motivo,
+        "turmaCodigo": row.turma_codigo,
+        "turmaLabel": row.turma_label,
+        "horario": row.horario,
+        "professor": row.professor,
+        "saved_at": row.saved_at,
+    }
+
+
+@router.post("/justifications-log")
+def append_justifications_log(entries: List[JustificationLogEntry], session: Session = Depends(get_session)):
+    try:
+        if not entries:
+            return {"ok": True, "count": 0}
+
+        saved_at = datetime.now(timezone.utc).isoformat()
+        items = [{**entry.dict(), "saved_at": saved_at} for entry in entries]
+        upsert_count = _upsert_justifications(session, items)
+        session.commit()
+        return {"ok": True, "count": upsert_count}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"justifications-log error: {exc}")
+
+
+@router.get("/justifications")
+def list_justifications(
+    month: str,
+    turmaCodigo: Optional[str] = None,
+    turmaLabel: Optional[str] = None,
+    horario: Optional[str] = None,
+    professor: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    month_key = str(month or "").strip()
+    if not re.fullmatch(r"\d{4}-\d{2}", month_key):
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+
+    stmt = select(JustificationRecord).where(JustificationRecord.mes == month_key)
+    # turma_key guarda o código quando existe; um filtro só por label também casa turma_label_key.
+    turma_filters = []
+    if str(turmaCodigo or "").strip():
+        turma_filters.append(JustificationRecord.turma_key == _normalize_text(turmaCodigo))
+    if str(turmaLabel or "").strip():
+        label_key = _normalize_text(turmaLabel)
+        turma_filters.extend([JustificationRecord.turma_key == label_key, JustificationRecord.turma_label_key == label_key])
+    if turma_filters:
+        stmt = stmt.where(or_(*turma_filters))
+    horario_key = _normalize_horario_key(horario or "")
+    if horario_key:
+        stmt = stmt.where(JustificationRecord.horario == horario_key)
+    if str(professor or "").strip():
+        stmt = stmt.where(JustificationRecord.professor_key == _normalize_text(professor))
+
+    rows = session.exec(stmt.order_by(JustificationRecord.data, JustificationRecord.aluno_key)).all()
+    return [_justification_as_dict(row) for row in rows]
+
+
+def _attendance_source_metadata(source: Any) -> Dict[str, Any]:
+    raw = str(source or "").strip()
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+        return parsed if isinstance(parsed, dict) else {"source": raw}
+    except Exception:
+        return {"source": raw}
+
+
+def _attendance_log_row_as_item(row: AttendanceLog) -> Dict[str, Any]:
+    try:
+        registros = json.loads(row.registros_json or "[]")
+    except Exception:
+        registros = []
+    return {
+        "turmaCodigo": row.turma_codigo,
+        "turmaLabel": row.turma_label,
+        "horario": row.horario,
+        "professor": row.professor,
+        "mes": row.mes,
+        "saved_at": row.saved_at,
+        "source": row.source,
+        "registros": registros,
+    }
+
+
+def _latest_class_log_from_db(
+    db: Session, item: Dict[str, Any], month: Optional[str] = None, saved_at_only: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Latest snapshot of one class; None when attendance_logs has nothing for `month`, {} when this class has no row.
+
+    The upsert key (ix_attendance_logs_class_month) answers the common case with one row.
+    Rows saved under another spelling of turma/horário/professor are matched through
+    _attendance_log_lookup_keys over the key columns only, and registros_json is decoded
+    just for the chosen row. With saved_at_only the result carries only saved_at.
+    """
+    month_filter = [AttendanceLog.mes == month] if month else []
+    turma_codigo = str(item.get("turmaCodigo") or "").strip()
+    if turma_codigo:
+        stmt = select(AttendanceLog.saved_at) if saved_at_only else select(AttendanceLog)
+        found = db.exec(
+            stmt.where(
+                AttendanceLog.turma_codigo == turma_codigo,
+                AttendanceLog.horario == _normalize_horario_key(item.get("horario") or ""),
+                AttendanceLog.professor == str(item.get("professor") or "").strip(),
+                *month_filter,
+            )
+            .order_by(AttendanceLog.saved_at.desc())
+            .limit(1)
+        ).first()
+        if found is not None:
+            return {"saved_at": found} if saved_at_only else _attendance_log_row_as_item(found)
+
+    key_rows = db.exec(
+        select(
+            AttendanceLog.id,
+            AttendanceLog.turma_codigo,
+            AttendanceLog.turma_label,
+            AttendanceLog.horario,
+            AttendanceLog.professor,
+            AttendanceLog.saved_at,
+        )
+        .where(*month_filter)
+        .order_by(AttendanceLog.id)
+    ).all()
+    if not key_rows:
+        return None
+    wanted = _attendance_log_lookup_keys(item)
+    wanted_set = set(wanted)
+    latest: Dict[str, Tuple[int, int, str]] = {}
+    for row_id, row_codigo, row_label, row_horario, row_professor, row_saved_at in key_rows:
+        row_keys = wanted_set.intersection(
+            _attendance_log_lookup_keys(
+                {"turmaCodigo": row_codigo, "turmaLabel": row_label, "horario": row_horario, "professor": row_professor}
+            )
+        )
+        saved_at_val = _saved_at_sort_key(row_saved_at)
+        for key in row_keys:
+            if key not in latest or saved_at_val > latest[key][0]:
+                latest[key] = (saved_at_val, row_id, row_saved_at)
+    chosen = next((latest[key] for key in wanted if key in latest), None)
+    if chosen is None:
+        return {}
+    if saved_at_only:
+        return {"saved_at": chosen[2]}
+    return _attendance_log_row_as_item(db.get(AttendanceLog, chosen[1]))
+
+
+def _latest_class_log_from_journal(item: Dict[str, Any], month: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    latest = _latest_attendance_logs_from_journal(month)
+    return next((latest[key] for key in _attendance_log_lookup_keys(item) if latest.get(key)), None)
+
+
+async def _load_latest_class_log_async(
+    session: AsyncSession, item: Dict[str, Any], month: Optional[str] = None, saved_at_only: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Async lookup for the autosave/polling routes: one class/month from the DB, JSON fallback in a worker thread."""
+    try:
+        latest = await session.run_sync(_latest_class_log_from_db, item, month, saved_at_only)
+        if latest is not None:
+            return latest or None
+    except Exception:
+        await session.rollback()
+    return await run_in_threadpool(_latest_class_log_from_journal, item, month)
@@ -0,0 +1,75 @@
+"""User bootstrap (/users/register) and login (/token) with the per-environment unit lock."""
+
+import unicodedata
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Form, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel import Session, select
+
+from app import models, settings
+from app.auth import authenticate_user, create_access_token, get_password_hash
+from app.database import get_session
+
+router = APIRouter()
+
+
+def _normalize_unit_name(value: str) -> str:
+    raw = str(value or "").strip().lower()
+    if not raw:
+        return ""
+    normalized = unicodedata.normalize("NFD", raw)
+    folded = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+    if folded in {"bela vista", "piscina bela vista"}:
+        return "bela vista"
+    return folded
+
+
+def _validate_unit_for_environment(typed_unit: Optional[str]) -> None:
+    # UNIT_NAME vazio mantém comportamento legado (sem bloqueio por ambiente).
+    if not settings.UNIT_NAME:
+        return
+
+    if not typed_unit:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unidade obrigatória para este ambiente. Unidade oficial: {settings.UNIT_NAME}",
+        )
+
+    if _normalize_unit_name(typed_unit) != _normalize_unit_name(settings.UNIT_NAME):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Login bloqueado: este ambiente aceita apenas a unidade '{settings.UNIT_NAME}'.",
+        )
+
+
+# Users endpoints (bootstrap)
+@router.post("/users/register")
+def register_user(username: str, password: str, session: Session = Depends(get_session)):
+    stmt = select(models.User).where(models.User.username == username)
+    existing = session.exec(stmt).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="User already exists")
+    user = models.User(username=username, password_hash=get_password_hash(password), role="admin")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return {"username": user.username, "id": user.id}
+
+@router.post("/token")
+def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    unit_name: Optional[str] = Form(None),
+    session: Session = Depends(get_session),
+):
+    _validate_unit_for_environment(unit_name)
+    user = authenticate_user(session, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    access_token = create_access_token(data={"sub": user.username})
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "unit_name": settings.UNIT_NAME,
+        "env_name": settings.ENV_NAME,
+    }
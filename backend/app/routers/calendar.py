@@ -0,0 +1,318 @@
+"""Academic calendar (settings, events) and the planned sessions derived from it."""
+
+import hashlib
+import json
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete as sa_delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app import models
+from app.academic_calendar import (
+    ACADEMIC_CALENDAR,
+    ACADEMIC_CALENDAR_JSON_MIRROR,
+    PLANNED_SESSION_CLOSING_EVENTS,
+    SCHEDULE_GROUP_WEEKDAYS,
+    WEEKDAY_BY_NAME,
+    _academic_bank_hour_row,
+    _academic_calendar_file,
+    _academic_event_row,
+    _load_academic_calendar_state_from_db,
+    _save_academic_calendar_settings,
+)
+from app.catalog import _get_import_class_catalog
+from app.database import get_session
+from app.models import AcademicCalendarBankHour, AcademicCalendarEvent, PlannedSessionMonth
+from app.normalize import (
+    _format_horario,
+    _infer_schedule_group,
+    _month_bounds,
+    _normalize_horario_key,
+    _normalize_text,
+    _normalize_text_fold,
+)
+from app.schemas import AcademicCalendarEventPayload, AcademicCalendarSettingsPayload, PlannedSessionsOut
+
+router = APIRouter()
+
+
+def _load_academic_calendar_state(session: Optional[Session] = None) -> Dict[str, Any]:
+    return ACADEMIC_CALENDAR.state(session)
+
+
+def _parse_iso_day(value: Any) -> Optional[date]:
+    try:
+        return datetime.strptime(str(value or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _class_weekdays(cls: models.ImportClass) -> set[int]:
+    dias = _normalize_text_fold(cls.dias_semana or "")
+    weekdays = {weekday for name, weekday in WEEKDAY_BY_NAME.items() if name in dias}
+    if weekdays:
+        return weekdays
+    # Cadastros antigos usam só "tq"/"qs" (ou nem isso): cai no grupo inferido pela turma.
+    group = dias if dias in SCHEDULE_GROUP_WEEKDAYS else _infer_schedule_group(cls.turma_label or "", cls.codigo or "")
+    return set(SCHEDULE_GROUP_WEEKDAYS.get(group, set()))
+
+
+def _event_cancels_class(event: Dict[str, Any], horario: str) -> bool:
+    event_type = str(event.get("type") or "")
+    if event_type not in PLANNED_SESSION_CLOSING_EVENTS:
+        return False
+    if event_type != "reuniao" or event.get("allDay"):
+        return True
+    # Reunião por período só cancela as turmas cujo horário cai dentro do intervalo.
+    start_time = _format_horario(event.get("startTime") or "")
+    end_time = _format_horario(event.get("endTime") or "")
+    if not horario or not start_time or not end_time:
+        return True
+    return start_time <= horario < end_time
+
+
+def _planned_session_dates(cls: models.ImportClass, month: str, settings: Dict[str, Any], events: List[Dict[str, Any]]) -> List[str]:
+    start = _parse_iso_day(settings.get("inicioAulas"))
+    if start is None:
+        return []
+    end = _parse_iso_day(settings.get("terminoAulas"))
+    winter_start = _parse_iso_day(settings.get("feriasInvernoInicio"))
+    winter_end = _parse_iso_day(settings.get("feriasInvernoFim"))
+    weekdays = _class_weekdays(cls)
+    horario = _format_horario(cls.horario or "")
+
+    events_by_date: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        events_by_date.setdefault(str(event.get("date") or ""), []).append(event)
+
+    month_start, month_end = (_parse_iso_day(value) for value in _month_bounds(month))
+    planned: List[str] = []
+    cursor = max(month_start, start)
+    last = min(month_end, end) if end else month_end
+    while cursor <= last:
+        key = cursor.isoformat()
+        in_winter_break = bool(winter_start and winter_end and winter_start <= cursor <= winter_end)
+        if (
+            cursor.weekday() in weekdays
+            and not in_winter_break
+            and not any(_event_cancels_class(event, horario) for event in events_by_date.get(key, []))
+        ):
+            planned.append(key)
+        cursor += timedelta(days=1)
+    return planned
+
+
+def _planned_sessions_fingerprint(cls: models.ImportClass, settings: Dict[str, Any], events: List[Dict[str, Any]]) -> str:
+    # Só eventos em dias da semana da turma entram: um feriado numa segunda não invalida turmas de terça.
+    weekdays = _class_weekdays(cls)
+    payload = {
+        "class": [cls.dias_semana or "", cls.horario or "", cls.turma_label or "", cls.codigo or ""],
+        "settings": [settings.get(key) or "" for key in ["inicioAulas", "feriasInvernoInicio", "feriasInvernoFim", "terminoAulas"]],
+        "events": sorted(
+            [str(e.get("date") or ""), str(e.get("type") or ""), bool(e.get("allDay")), str(e.get("startTime") or ""), str(e.get("endTime") or "")]
+            for e in events
+            if str(e.get("type") or "") in PLANNED_SESSION_CLOSING_EVENTS
+            and getattr(_parse_iso_day(e.get("date")), "weekday", lambda: -1)() in weekdays
+        ),
+    }
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _load_planned_sessions(session: Session, month: str) -> Dict[int, List[str]]:
+    """Planned session dates per ImportClass for `month`, recomputing only rows whose inputs changed."""
+    month_start, month_end = _month_bounds(month)
+    calendar = _load_academic_calendar_state(session)
+    settings = calendar.get("settings") or {}
+    events = [event for event in calendar.get("events") or [] if month_start <= str(event.get("date") or "") <= month_end]
+
+    classes = _get_import_class_catalog(session).classes
+    cached = {
+        row.class_id: row
+        for row in session.exec(select(PlannedSessionMonth).where(PlannedSessionMonth.mes == month)).all()
+    }
+    planned: Dict[int, List[str]] = {}
+    changed = False
+    for cls in classes:
+        fingerprint = _planned_sessions_fingerprint(cls, settings, events)
+        row = cached.pop(cls.id, None)
+        if row is not None and row.fingerprint == fingerprint:
+            planned[cls.id] = [day for day in (row.dates or "").split(",") if day]
+            continue
+        dates = _planned_session_dates(cls, month, settings, events)
+        row = row or PlannedSessionMonth(class_id=cls.id, mes=month)
+        row.fingerprint = fingerprint
+        row.dates = ",".join(dates)
+        row.session_count = len(dates)
+        row.updated_at = datetime.utcnow().isoformat()
+        session.add(row)
+        planned[cls.id] = dates
+        changed = True
+
+    # Linhas de turmas removidas não voltam a ser lidas.
+    for row in cached.values():
+        session.delete(row)
+        changed = True
+    if changed:
+        try:
+            session.commit()
+        except IntegrityError:
+            # Outra requisição gravou o mesmo mês em paralelo; as datas calculadas continuam válidas.
+            session.rollback()
+    return planned
+
+
+def _hours_from_interval(start_time: str, end_time: str) -> float:
+    try:
+        start = datetime.strptime(start_time, "%H:%M")
+        end = datetime.strptime(end_time, "%H:%M")
+        minutes = (end - start).total_seconds() / 60
+        if minutes <= 0:
+            return 0.0
+        return round(minutes / 60, 2)
+    except Exception:
+        return 0.0
+
+
+@router.get("/academic-calendar")
+def get_academic_calendar(month: Optional[str] = None, session: Session = Depends(get_session)):
+    if month:
+        try:
+            return _load_academic_calendar_state_from_db(session, month)
+        except Exception:
+            pass
+    return _load_academic_calendar_state(session)
+
+
+@router.put("/academic-calendar/settings")
+def save_academic_calendar_settings(payload: AcademicCalendarSettingsPayload, session: Session = Depends(get_session)):
+    settings = {
+        "schoolYear": payload.schoolYear,
+        "inicioAulas": payload.inicioAulas,
+        "feriasInvernoInicio": payload.feriasInvernoInicio,
+        "feriasInvernoFim": payload.feriasInvernoFim,
+        "terminoAulas": payload.terminoAulas,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+    _save_academic_calendar_settings(session, settings)
+    session.commit()
+    ACADEMIC_CALENDAR.invalidate()
+    ACADEMIC_CALENDAR_JSON_MIRROR.mark_stale(_academic_calendar_file())
+    return {"ok": True, "settings": settings}
+
+
+@router.post("/academic-calendar/events")
+def save_academic_calendar_event(payload: AcademicCalendarEventPayload, session: Session = Depends(get_session)):
+    if payload.type not in {"feriado", "ponte", "reuniao", "evento"}:
+        raise HTTPException(status_code=400, detail="Tipo de evento inválido")
+
+    if payload.type == "reuniao" and not payload.allDay:
+        if not payload.startTime or not payload.endTime:
+            raise HTTPException(status_code=400, detail="Reunião por período exige horário de início e término")
+
+    if payload.type == "evento":
+        if not payload.startTime or not payload.endTime:
+            raise HTTPException(status_code=400, detail="Evento exige horário de início e término")
+
+    event_id = str(uuid.uuid4())
+    event = {
+        "id": event_id,
+        "date": payload.date,
+        "type": payload.type,
+        "allDay": bool(payload.allDay),
+        "startTime": payload.startTime or "",
+        "endTime": payload.endTime or "",
+        "description": payload.description or "",
+        "teacher": payload.teacher or "",
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    session.add(_academic_event_row(event))
+
+    if payload.type == "evento":
+        hours = _hours_from_interval(payload.startTime or "", payload.endTime or "")
+        if hours > 0:
+            session.add(
+                _academic_bank_hour_row(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "eventId": event_id,
+                        "date": payload.date,
+                        "teacher": payload.teacher or "",
+                        "description": payload.description or "Evento",
+                        "startTime": payload.startTime or "",
+                        "endTime": payload.endTime or "",
+                        "hours": hours,
+                        "created_at": datetime.utcnow().isoformat(),
+                    }
+                )
+            )
+
+    session.commit()
+    ACADEMIC_CALENDAR.invalidate()
+    ACADEMIC_CALENDAR_JSON_MIRROR.mark_stale(_academic_calendar_file())
+    return {"ok": True, "event": event}
+
+
+@router.delete("/academic-calendar/events/{event_id}")
+def delete_academic_calendar_event(event_id: str, session: Session = Depends(get_session)):
+    removed = session.exec(
+        sa_delete(AcademicCalendarEvent).where(AcademicCalendarEvent.event_uid == str(event_id))
+    ).rowcount
+    if not removed:
+        session.rollback()
+        raise HTTPException(status_code=404, detail="Evento não encontrado")
+
+    session.exec(sa_delete(AcademicCalendarBankHour).where(AcademicCalendarBankHour.event_uid == str(event_id)))
+    session.commit()
+    ACADEMIC_CALENDAR.invalidate()
+    ACADEMIC_CALENDAR_JSON_MIRROR.mark_stale(_academic_calendar_file())
+    return {"ok": True}
+
+
+@router.get("/planned-sessions", response_model=List[PlannedSessionsOut])
+def get_planned_sessions(
+    month: str,
+    classId: Optional[int] = None,
+    turma: Optional[str] = None,
+    horario: Optional[str] = None,
+    professor: Optional[str] = None,
+    session: Session = Depends(get_session),
+) -> List[PlannedSessionsOut]:
+    month_key = str(month or "").strip()
+    if not re.fullmatch(r"\d{4}-\d{2}", month_key):
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+
+    planned = _load_planned_sessions(session, month_key)
+    turma_key = _normalize_text(turma or "")
+    horario_key = _normalize_horario_key(horario or "")
+    professor_key = _normalize_text(professor or "")
+
+    result: List[PlannedSessionsOut] = []
+    for cls in _get_import_class_catalog(session).classes:
+        if classId is not None and cls.id != classId:
+            continue
+        if turma_key and turma_key not in {_normalize_text(cls.codigo or ""), _normalize_text(cls.turma_label or "")}:
+            continue
+        if horario_key and _normalize_horario_key(cls.horario or "") != horario_key:
+            continue
+        if professor_key and _normalize_text(cls.professor or "") != professor_key:
+            continue
+        dates = planned.get(cls.id, [])
+        result.append(
+            PlannedSessionsOut(
+                classId=cls.id,
+                codigo=cls.codigo or "",
+                turmaLabel=cls.turma_label or "",
+                horario=cls.horario or "",
+                professor=cls.professor or "",
+                diasSemana=cls.dias_semana or "",
+                mes=month_key,
+                dates=dates,
+                count=len(dates),
+            )
+        )
+    return result
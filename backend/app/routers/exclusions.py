@@ -0,0 +1,228 @@
+"""Excluded students: listing, upserts, restore/delete and the backup/recovery endpoints."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app import exclusions_state, metrics
+from app.database import get_session
+from app.exclusions_state import (
+    _ExclusionMatchIndex,
+    _ExclusionsState,
+    _clean_exclusions_list,
+    _current_exclusions_state,
+    _exclusions_file_path,
+    _exclusions_state_is_current,
+    _list_exclusions_backups,
+    _merge_exclusions,
+    _normalize_exclusion_item,
+    _read_exclusions_state,
+    _resolve_exclusion_match,
+    _write_exclusions_state,
+)
+from app.normalize import _normalize_text
+from app.schemas import ExclusionEntry, ExclusionsBulkPayload, ExclusionsRecoverPayload
+from app.storage import EXCLUSIONS_FILE_LOCK, _load_json_list, _save_json_list
+
+router = APIRouter()
+
+
+def _peek_exclusions_state() -> Optional[_ExclusionsState]:
+    """Lock-free look at the cached state (it is replaced, never mutated); None means a reload is due."""
+    from app.database import engine as _db_engine
+
+    state = exclusions_state._exclusions_state
+    if _exclusions_state_is_current(state, _db_engine, _exclusions_file_path()):
+        metrics.cache_lookup("exclusions", hit=True)
+        return state
+    return None  # a falta é contada por _current_exclusions_state na recarga
+
+
+def _exclusions_state_version() -> int:
+    return _current_exclusions_state().version
+
+
+def _list_exclusions_locked() -> Tuple[List[Dict[str, Any]], int]:
+    with EXCLUSIONS_FILE_LOCK:
+        return _read_exclusions_state(clean=True), _exclusions_state_version()
+
+
+@router.get("/exclusions")
+async def list_exclusions(response: Response):
+    # Caminho quente no event loop; recarga (DB + JSON) e fallback vão para uma thread.
+    state = _peek_exclusions_state()
+    if state is not None:
+        items, version = list(state.cleaned()), state.version
+    else:
+        items, version = await run_in_threadpool(_list_exclusions_locked)
+    response.headers["X-Exclusions-Version"] = str(version)
+    return items
+
+
+@router.get("/exclusions/backups")
+def list_exclusions_backups(limit: int = Query(default=30, ge=1, le=200)):
+    with EXCLUSIONS_FILE_LOCK:
+        current_items = _read_exclusions_state(clean=True)
+        backups = _list_exclusions_backups(limit=limit)
+    return {
+        "ok": True,
+        "current_count": len(current_items),
+        "backups": [{k: v for k, v in item.items() if k != "path"} for item in backups],
+    }
+
+
+@router.post("/exclusions/snapshot")
+def snapshot_exclusions_state():
+    with EXCLUSIONS_FILE_LOCK:
+        current_items = _read_exclusions_state(clean=True)
+        _save_json_list(_exclusions_file_path(), current_items)
+        backups = _list_exclusions_backups(limit=1)
+    return {
+        "ok": True,
+        "count": len(current_items),
+        "backup_file": backups[0]["file"] if backups else None,
+    }
+
+
+@router.post("/exclusions/recover")
+def recover_exclusions(payload: ExclusionsRecoverPayload, session: Session = Depends(get_session)):
+    with EXCLUSIONS_FILE_LOCK:
+        current_items = _read_exclusions_state(clean=True, session=session)
+        backups = _list_exclusions_backups(limit=200)
+
+        target: Optional[Dict[str, Any]] = None
+        requested_backup = str(payload.backup_file or "").strip()
+        if requested_backup:
+            target = next((item for item in backups if item.get("file") == requested_backup), None)
+            if target is None:
+                raise HTTPException(status_code=404, detail="Backup de exclusoes nao encontrado")
+        else:
+            valid = [item for item in backups if int(item.get("count") or 0) >= max(0, int(payload.expected_min_items or 0))]
+            if valid:
+                target = max(valid, key=lambda item: (int(item.get("count") or 0), str(item.get("modified_at") or "")))
+
+        if target is None:
+            raise HTTPException(status_code=409, detail="Nenhum backup elegivel para recuperacao")
+
+        target_items = _clean_exclusions_list(_load_json_list(str(target.get("path") or "")))
+        if not target_items:
+            raise HTTPException(status_code=409, detail="Backup selecionado nao possui exclusoes")
+
+        if current_items and not payload.force:
+            raise HTTPException(
+                status_code=409,
+                detail="Lista atual nao esta vazia. Envie force=true para sobrescrever ou merge=true para combinar",
+            )
+
+        if payload.merge:
+            final_items = _merge_exclusions(current_items, target_items)
+        else:
+            final_items = target_items
+
+        _write_exclusions_state(final_items, clean=True, session=session)
+
+    return {
+        "ok": True,
+        "restored_from": target.get("file"),
+        "before": len(current_items),
+        "after": len(final_items),
+        "backup_count": int(target.get("count") or 0),
+    }
+
+
+@router.post("/exclusions")
+def add_exclusion(entry: ExclusionEntry, session: Session = Depends(get_session)):
+    with EXCLUSIONS_FILE_LOCK:
+        items = _read_exclusions_state(clean=True, session=session)
+        payload = _normalize_exclusion_item(entry.dict())
+        if not payload.get("dataExclusao"):
+            payload["dataExclusao"] = datetime.now(timezone.utc).strftime("%d/%m/%Y")
+
+        updated = False
+        for idx, item in enumerate(items):
+            if _resolve_exclusion_match(item, entry):
+                items[idx] = {**item, **payload}
+                updated = True
+                break
+        if not updated:
+            items.append(payload)
+        _write_exclusions_state(items, clean=True, session=session)
+        return {"ok": True, "updated": updated}
+
+
+@router.post("/exclusions/bulk")
+def bulk_upsert_exclusions(payload: ExclusionsBulkPayload, session: Session = Depends(get_session)):
+    with EXCLUSIONS_FILE_LOCK:
+        existing_items = _ExclusionMatchIndex([] if payload.replace else _read_exclusions_state(clean=True, session=session))
+
+        updated = 0
+        added = 0
+        skipped = 0
+
+        for entry in payload.items or []:
+            normalized_entry = _normalize_exclusion_item(entry.dict())
+            if not normalized_entry.get("dataExclusao"):
+                normalized_entry["dataExclusao"] = datetime.now(timezone.utc).strftime("%d/%m/%Y")
+
+            uid = str(normalized_entry.get("student_uid") or normalized_entry.get("studentUid") or "").strip()
+            item_id = str(normalized_entry.get("id") or "").strip()
+            nome = _normalize_text(normalized_entry.get("nome") or normalized_entry.get("Nome") or "")
+            if not uid and not item_id and not nome:
+                skipped += 1
+                continue
+
+            if existing_items.upsert(normalized_entry):
+                updated += 1
+            else:
+                added += 1
+
+        cleaned = _write_exclusions_state(existing_items.items, clean=True, session=session)
+
+        return {
+            "ok": True,
+            "replace": payload.replace,
+            "received": len(payload.items or []),
+            "added": added,
+            "updated": updated,
+            "skipped": skipped,
+            "total": len(cleaned),
+        }
+
+
+@router.post("/exclusions/restore")
+def restore_exclusion(entry: ExclusionEntry, session: Session = Depends(get_session)):
+    with EXCLUSIONS_FILE_LOCK:
+        # NOTE: Do NOT clean/filter here - preserve all exclusion records
+        items = _read_exclusions_state(clean=False, session=session)
+        restored: Optional[Dict[str, Any]] = None
+        remaining: List[Dict[str, Any]] = []
+        for item in items:
+            if restored is None and _resolve_exclusion_match(item, entry):
+                restored = item
+                continue
+            remaining.append(item)
+        _write_exclusions_state(remaining, clean=False, session=session)
+        if restored is None:
+            raise HTTPException(status_code=404, detail="Exclusion not found")
+        return {"ok": True, "restored": restored}
+
+
+@router.post("/exclusions/delete")
+def delete_exclusion(entry: ExclusionEntry, session: Session = Depends(get_session)):
+    with EXCLUSIONS_FILE_LOCK:
+        # NOTE: Do NOT clean/filter here - preserve all exclusion records
+        items = _read_exclusions_state(clean=False, session=session)
+        remaining: List[Dict[str, Any]] = []
+        deleted = False
+        for item in items:
+            if not deleted and _resolve_exclusion_match(item, entry):
+                deleted = True
+                continue
+            remaining.append(item)
+        _write_exclusions_state(remaining, clean=False, session=session)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Exclusion not found")
+        return {"ok": True}
@@ -0,0 +1,971 @@
+"""File exports: attendance workbook, chamada/PAR-Q PDFs and the vacancies workbook/PDF.
+
+openpyxl and reportlab are imported inside the builders, so they only load on the first export.
+"""
+
+import importlib.util
+import json
+import os
+import re
+import unicodedata
+from copy import copy
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlmodel import Session, select
+
+from app import instrumentation, metrics, models, settings
+from app.catalog import _get_import_class_catalog
+from app.database import get_session
+from app.normalize import _format_horario, _format_whatsapp, _normalize_text
+from app.routers.reports import get_reports
+from app.schemas import ExcelExportPayload, ExportClassSelection, ReportClass, VacancyExportPayload
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+
+# pandas, openpyxl, reportlab, requests e o ETL pesam ~250 ms e dezenas de MB no import:
+# são carregados dentro das rotas de exportação/importação/pool-log que os usam, para o
+# worker subir (e ficar ocioso) sem eles. find_spec só localiza o pacote, não o importa.
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+
+router = APIRouter()
+
+
+def _resolve_export_targets(payload: ExcelExportPayload, reports: List[ReportClass]) -> List[ReportClass]:
+    requested: List[ExportClassSelection] = []
+    if payload.classes:
+        requested = payload.classes
+    elif payload.turma and payload.horario and payload.professor:
+        requested = [
+            ExportClassSelection(
+                turma=payload.turma,
+                horario=payload.horario,
+                professor=payload.professor,
+            )
+        ]
+
+    if not requested:
+        raise HTTPException(status_code=400, detail="No class selection informed")
+
+    selected: List[ReportClass] = []
+    seen_keys = set()
+    for req in requested:
+        code_key = _normalize_text(req.turmaCodigo)
+        turma_key = _normalize_text(req.turma)
+        horario_key = _normalize_text(req.horario)
+        professor_key = _normalize_text(req.professor)
+        key = (code_key, turma_key, horario_key, professor_key)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+
+        found = None
+        if code_key:
+            exact_code_matches = [
+                cls
+                for cls in reports
+                if _normalize_text(cls.turmaCodigo) == code_key
+                or _normalize_text(getattr(cls, "codigo", "")) == code_key
+            ]
+            if exact_code_matches:
+                found = exact_code_matches[0]
+        if found is None:
+            exact_matches = [
+                cls
+                for cls in reports
+                if _normalize_text(cls.turma) == turma_key
+                and _normalize_text(cls.horario) == horario_key
+                and _normalize_text(cls.professor) == professor_key
+            ]
+            if exact_matches:
+                found = exact_matches[0]
+        if found is None:
+            partial_matches = [
+                cls
+                for cls in reports
+                if _normalize_text(cls.turma) == turma_key
+                and _normalize_text(cls.horario) == horario_key
+            ]
+            if len(partial_matches) == 1:
+                found = partial_matches[0]
+            elif partial_matches:
+                if professor_key:
+                    found = next(
+                        (
+                            cls
+                            for cls in partial_matches
+                            if professor_key in _normalize_text(cls.professor)
+                            or _normalize_text(cls.professor) in professor_key
+                        ),
+                        partial_matches[0],
+                    )
+                else:
+                    found = partial_matches[0]
+            else:
+                found = next(
+                    (
+                        cls
+                        for cls in reports
+                        if _normalize_text(cls.turma) == turma_key
+                        and (not professor_key or _normalize_text(cls.professor) == professor_key)
+                    ),
+                    None,
+                )
+        if found:
+            selected.append(found)
+
+    if not selected:
+        raise HTTPException(status_code=404, detail="Class report not found for selected filters")
+    return selected
+
+
+def _sort_report_days(days: List[str]) -> List[str]:
+    unique_days = {str(day).strip() for day in days if str(day).strip()}
+
+    def _day_sort_key(day: str):
+        if day.isdigit():
+            return (0, int(day))
+        return (1, day)
+
+    return sorted(unique_days, key=_day_sort_key)
+
+
+def _build_sheet_title(selected: ReportClass, existing_titles: set[str]) -> str:
+    start = _format_horario(selected.horario or "")
+    base = f"{start}|{selected.turma}"
+    try:
+        start_dt = datetime.strptime(start, "%H:%M")
+        end_dt = start_dt + timedelta(minutes=45)
+        base = f"{start_dt.strftime('%H:%M')}|{end_dt.strftime('%H:%M')}"
+    except Exception:
+        pass
+
+    safe = re.sub(r"[\[\]:*?/\\]", "-", base).strip() or "Turma"
+    safe = safe[:31]
+    candidate = safe
+    suffix = 1
+    while candidate in existing_titles:
+        suffix += 1
+        label_suffix = f"_{suffix}"
+        candidate = f"{safe[: max(1, 31 - len(label_suffix))]}{label_suffix}"
+    return candidate
+
+
+def _populate_attendance_sheet(ws, selected: ReportClass, month: Optional[str], session: Session) -> int:
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    header_font = Font(bold=True)
+    center_alignment = Alignment(horizontal="center", vertical="center")
+    left_alignment = Alignment(horizontal="left", vertical="center")
+
+    ws["A1"] = "Modalidade:"
+    ws["B1"] = "Natação"
+    ws["D1"] = "PREFEITURA MUNICIPAL DE VINHEDO"
+
+    ws["A2"] = "Local:"
+    ws["B2"] = "Piscina Bela Vista"
+    ws["D2"] = "SECRETARIA DE ESPORTE E LAZER"
+
+    ws["A3"] = "Professor:"
+    ws["B3"] = selected.professor
+
+    ws["A4"] = "Turma:"
+    ws["B4"] = selected.turma
+    ws["D4"] = "Nível:"
+    ws["E4"] = selected.nivel
+
+    ws["A5"] = "Horário:"
+    ws["B5"] = _format_horario(selected.horario or "")
+    ws["D5"] = "Mês:"
+    ws["E5"] = _format_month_label(month)
+
+    for cell_ref in ("A1", "A2", "A3", "A4", "A5", "D1", "D2", "D4", "D5"):
+        ws[cell_ref].font = header_font
+        ws[cell_ref].alignment = left_alignment
+    for cell_ref in ("B1", "B2", "B3", "B4", "B5", "E4", "E5"):
+        ws[cell_ref].alignment = left_alignment
+
+    class_days = _sort_report_days([
+        day for aluno in selected.alunos for day in (aluno.historico or {}).keys()
+    ])
+    header_row = 6
+    data_start_row = 7
+    date_col_start = 5
+
+    notes_col = None
+    for col in range(date_col_start, ws.max_column + 1):
+        header_value = str(ws.cell(row=header_row, column=col).value or "").strip()
+        header_norm = _normalize_text(header_value)
+        if header_norm in {"observacoes", "anotacoes"}:
+            notes_col = col
+            break
+
+    if notes_col is None:
+        notes_col = date_col_start + max(1, len(class_days))
+
+    date_columns = list(range(date_col_start, notes_col))
+    visible_days = class_days[:len(date_columns)]
+
+    for col in date_columns:
+        ws.column_dimensions[get_column_letter(col)].width = 4.5
+
+    ws.cell(row=header_row, column=1, value="Nome")
+    ws.cell(row=header_row, column=2, value="Whatsapp")
+    ws.cell(row=header_row, column=3, value="parQ")
+    ws.cell(row=header_row, column=4, value="Aniversário")
+
+    for col in range(1, 5):
+        ws.cell(row=header_row, column=col).font = header_font
+        ws.cell(row=header_row, column=col).alignment = center_alignment
+
+    for idx, col in enumerate(date_columns):
+        _copy_cell_style(ws, header_row, date_col_start, header_row, col)
+        if idx < len(visible_days):
+            day_raw = str(visible_days[idx]).strip()
+            day_value: Any = int(day_raw) if day_raw.isdigit() else day_raw
+            ws.cell(row=header_row, column=col, value=day_value)
+        else:
+            ws.cell(row=header_row, column=col, value="")
+        ws.cell(row=header_row, column=col).font = header_font
+        ws.cell(row=header_row, column=col).alignment = center_alignment
+
+    _copy_cell_style(ws, header_row, date_col_start, header_row, notes_col)
+    ws.cell(row=header_row, column=notes_col, value="Anotações")
+    ws.cell(row=header_row, column=notes_col).font = header_font
+    ws.cell(row=header_row, column=notes_col).alignment = center_alignment
+
+    if ws.max_column > notes_col:
+        ws.delete_cols(notes_col + 1, ws.max_column - notes_col)
+
+    details_map = _build_import_student_details_map(
+        session=session,
+        turma=selected.turma,
+        horario=selected.horario,
+        professor=selected.professor,
+    )
+
+    students_sorted = sorted(selected.alunos, key=lambda item: item.nome)
+    full_cell_border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
+    for idx, aluno in enumerate(students_sorted):
+        row = data_start_row + idx
+        for col in range(1, notes_col + 1):
+            _copy_cell_style(ws, data_start_row, min(col, date_col_start), row, col)
+            ws.cell(row=row, column=col).border = full_cell_border
+
+        student_meta = details_map.get(_normalize_text(aluno.nome), {})
+        ws.cell(row=row, column=1, value=aluno.nome)
+        ws.cell(row=row, column=2, value=student_meta.get("whatsapp") or "")
+        if student_meta.get("atestado"):
+            ws.cell(row=row, column=3, value=student_meta.get("data_atestado") or "Com Atestado")
+        else:
+            ws.cell(row=row, column=3, value=student_meta.get("parq") or "")
+        ws.cell(row=row, column=4, value=student_meta.get("data_nascimento") or "")
+
+        for day_idx, day in enumerate(visible_days):
+            value = (aluno.historico or {}).get(day, "")
+            ws.cell(row=row, column=date_col_start + day_idx, value=value)
+
+        for col in date_columns[len(visible_days):]:
+            ws.cell(row=row, column=col, value="")
+
+        ws.cell(row=row, column=notes_col, value=aluno.anotacoes or "")
+
+    name_col_letter = get_column_letter(1)
+    notes_col_letter = get_column_letter(notes_col)
+    max_name_len = max([len("Nome"), *[len(str(aluno.nome or "")) for aluno in students_sorted]]) if students_sorted else len("Nome")
+    ws.column_dimensions[name_col_letter].width = min(50, max(18, max_name_len + 2))
+    current_notes_width = ws.column_dimensions[notes_col_letter].width or 0
+    ws.column_dimensions[notes_col_letter].width = max(40, current_notes_width)
+
+    end_row = data_start_row + len(students_sorted) - 1
+    if end_row < header_row:
+        end_row = header_row
+
+    for row in range(header_row, end_row + 1):
+        for col in range(1, notes_col + 1):
+            horizontal = "left" if col in (1, notes_col) else "center"
+            ws.cell(row=row, column=col).alignment = Alignment(horizontal=horizontal, vertical="center")
+
+    return len(students_sorted)
+
+
+@instrumentation.timed("excel")
+@metrics.timed_render("reports_excel")
+def _build_excel_export_workbook(selected_reports: List[ReportClass], month: Optional[str], session: Session) -> "Workbook":
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+
+    existing_titles: set[str] = set()
+    for selected in selected_reports:
+        ws = workbook.create_sheet()
+        _populate_attendance_sheet(ws=ws, selected=selected, month=month, session=session)
+        sheet_title = _build_sheet_title(selected, existing_titles)
+        ws.title = sheet_title
+        existing_titles.add(sheet_title)
+
+    return workbook
+
+
+@instrumentation.timed("pdf")
+@metrics.timed_render("chamada_pdf")
+def _build_chamada_pdf(selected_reports: List[ReportClass], month: Optional[str], session: Session) -> bytes:
+    if not REPORTLAB_AVAILABLE:
+        raise HTTPException(status_code=500, detail="PDF export unavailable: install reportlab")
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    def _safe_pdf_text(value: Any) -> str:
+        text = str(value or "")
+        normalized = unicodedata.normalize("NFKD", text)
+        return normalized.encode("latin-1", "ignore").decode("latin-1")
+
+    buffer = BytesIO()
+    page_width, page_height = landscape(A4)
+    pdf = canvas.Canvas(buffer, pagesize=(page_width, page_height))
+
+    margin_left = 18
+    margin_right = 18
+    margin_top = 20
+    margin_bottom = 20
+
+    table_top = page_height - 120
+    row_height = 16
+    fixed_col_widths = [140, 115, 52, 72]  # parQ reduced to free horizontal space
+    notes_width = 168
+    preferred_date_col_width = 14
+
+    def _draw_header_block(selected: ReportClass):
+        y = page_height - margin_top
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left, y, _safe_pdf_text("Modalidade:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 58, y, _safe_pdf_text("Natação"))
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left + 250, y, _safe_pdf_text("PREFEITURA MUNICIPAL DE VINHEDO"))
+
+        y -= 14
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left, y, _safe_pdf_text("Local:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 58, y, _safe_pdf_text("Piscina Bela Vista"))
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left + 250, y, _safe_pdf_text("SECRETARIA DE ESPORTE E LAZER"))
+
+        y -= 14
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left, y, _safe_pdf_text("Professor:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 58, y, _safe_pdf_text(selected.professor or ""))
+
+        y -= 14
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left, y, _safe_pdf_text("Turma:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 58, y, _safe_pdf_text(selected.turma or ""))
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left + 250, y, _safe_pdf_text("Nível:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 295, y, _safe_pdf_text(selected.nivel or ""))
+
+        y -= 14
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left, y, _safe_pdf_text("Horário:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 58, y, _safe_pdf_text(_format_horario(selected.horario or "")))
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(margin_left + 250, y, _safe_pdf_text("Mês:"))
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(margin_left + 295, y, _safe_pdf_text(_format_month_label(month)))
+
+    def _build_columns(day_chunk: List[str]) -> List[tuple[str, float]]:
+        available_for_days = page_width - margin_left - margin_right - sum(fixed_col_widths) - notes_width
+        if day_chunk:
+            fit_width = available_for_days / len(day_chunk)
+            dynamic_width = min(fit_width, preferred_date_col_width)
+            notes_col_width = notes_width + max(0.0, available_for_days - (dynamic_width * len(day_chunk)))
+        else:
+            dynamic_width = available_for_days
+            notes_col_width = notes_width
+        columns: List[tuple[str, float]] = [
+            ("Nome", fixed_col_widths[0]),
+            ("Whatsapp", fixed_col_widths[1]),
+            ("parQ", fixed_col_widths[2]),
+            ("Aniversário", fixed_col_widths[3]),
+        ]
+        for day in day_chunk:
+            columns.append((day, dynamic_width))
+        columns.append(("Anotações", notes_col_width))
+        return columns
+
+    def _draw_grid_page(selected: ReportClass, rows: List[Dict[str, Any]], day_chunk: List[str], day_range_label: str):
+        _draw_header_block(selected)
+        if day_range_label:
+            pdf.setFont("Helvetica-Bold", 8)
+            pdf.drawString(margin_left, table_top + 6, day_range_label)
+
+        columns = _build_columns(day_chunk)
+        x_positions = [margin_left]
+        for _, col_width in columns:
+            x_positions.append(x_positions[-1] + col_width)
+
+        y_top = table_top
+        y_bottom = margin_bottom
+        y = y_top
+
+        pdf.setFont("Helvetica-Bold", 7)
+        for col_idx, (label, _) in enumerate(columns):
+            x0 = x_positions[col_idx]
+            x1 = x_positions[col_idx + 1]
+            pdf.rect(x0, y - row_height, x1 - x0, row_height)
+            text = _safe_pdf_text(label or "")
+            if col_idx in (0, len(columns) - 1):
+                pdf.drawString(x0 + 2, y - 11, text[:28])
+            else:
+                # Personal data columns: whatsapp 18, parQ 10, aniversário 12
+                if label == "Whatsapp":
+                    max_chars = 18
+                elif label == "parQ":
+                    max_chars = 10
+                else:
+                    max_chars = 12
+                pdf.drawCentredString((x0 + x1) / 2, y - 11, text[:max_chars])
+
+        y -= row_height
+        pdf.setFont("Helvetica", 7)
+
+        for row in rows:
+            if y - row_height < y_bottom:
+                return False
+            for col_idx, (label, _) in enumerate(columns):
+                x0 = x_positions[col_idx]
+                x1 = x_positions[col_idx + 1]
+                pdf.rect(x0, y - row_height, x1 - x0, row_height)
+
+                value = ""
+                if label == "Nome":
+                    value = _safe_pdf_text(row.get("nome") or "")
+                elif label == "Whatsapp":
+                    value = _safe_pdf_text(row.get("whatsapp") or "")
+                elif label == "parQ":
+                    value = _safe_pdf_text(row.get("parq") or "")
+                elif label == "Aniversário":
+                    value = _safe_pdf_text(row.get("data_nascimento") or "")
+                elif label == "Anotações":
+                    value = _safe_pdf_text(row.get("anotacoes") or "")
+                elif label in day_chunk:
+                    value = _safe_pdf_text((row.get("historico") or {}).get(label, ""))
+
+                if col_idx in (0, len(columns) - 1):
+                    pdf.drawString(x0 + 2, y - 11, value[:42])
+                else:
+                    # Personal data columns: whatsapp 18, parQ 10, aniversário 12
+                    if label == "Whatsapp":
+                        max_chars = 18
+                    elif label == "parQ":
+                        max_chars = 10
+                    else:
+                        max_chars = 12
+                    pdf.drawCentredString((x0 + x1) / 2, y - 11, value[:max_chars])
+
+            y -= row_height
+
+        return True
+
+    for report_idx, selected in enumerate(selected_reports):
+        details_map = _build_import_student_details_map(
+            session=session,
+            turma=selected.turma,
+            horario=selected.horario,
+            professor=selected.professor,
+            turma_codigo=selected.turmaCodigo,
+        )
+
+        class_days = _sort_report_days([
+            day for aluno in selected.alunos for day in (aluno.historico or {}).keys()
+        ])
+        available_for_days = page_width - margin_left - margin_right - sum(fixed_col_widths) - notes_width
+        max_date_slots_fit = max(1, int(available_for_days // preferred_date_col_width))
+        if class_days:
+            day_chunks = [
+                class_days[idx: idx + max_date_slots_fit]
+                for idx in range(0, len(class_days), max_date_slots_fit)
+            ]
+        else:
+            day_chunks = [[]]
+
+        students_sorted = sorted(selected.alunos, key=lambda item: item.nome)
+        rows: List[Dict[str, Any]] = []
+        for aluno in students_sorted:
+            meta = details_map.get(_normalize_text(aluno.nome), {})
+
+            rows.append(
+                {
+                    "nome": aluno.nome or "",
+                    "whatsapp": meta.get("whatsapp") or "",
+                    "parq": (meta.get("data_atestado") or "Com Atestado") if meta.get("atestado") else (meta.get("parq") or ""),
+                    "data_nascimento": meta.get("data_nascimento") or "",
+                    "historico": aluno.historico or {},
+                    "anotacoes": aluno.anotacoes or "",
+                }
+            )
+
+        if not rows:
+            rows = [{"nome": "", "whatsapp": "", "parq": "", "data_nascimento": "", "historico": {}, "anotacoes": ""}]
+
+        rows_per_page = int((table_top - margin_bottom) // row_height) - 1
+        first_page_global = report_idx == 0
+        for chunk_idx, day_chunk in enumerate(day_chunks):
+            remaining = rows
+            range_label = ""
+            if day_chunk:
+                range_label = f"Datas: {day_chunk[0]} a {day_chunk[-1]}"
+            while remaining:
+                if not first_page_global:
+                    pdf.showPage()
+                current_rows = remaining[:rows_per_page]
+                remaining = remaining[rows_per_page:]
+                label = range_label
+                if len(day_chunks) > 1:
+                    label = f"Bloco {chunk_idx + 1}/{len(day_chunks)} - {range_label}" if range_label else f"Bloco {chunk_idx + 1}/{len(day_chunks)}"
+                _draw_grid_page(
+                    selected=selected,
+                    rows=current_rows,
+                    day_chunk=day_chunk,
+                    day_range_label=label,
+                )
+                first_page_global = False
+
+    pdf.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def _format_month_label(month: Optional[str]) -> str:
+    if not month or "-" not in month:
+        return str(month or "")
+    year, month_number = month.split("-", 1)
+    month_names = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
+    try:
+        idx = max(1, min(12, int(month_number))) - 1
+    except Exception:
+        return str(month)
+    return f"{month_names[idx]}/{year}"
+
+
+def _copy_cell_style(ws, source_row: int, source_col: int, target_row: int, target_col: int) -> None:
+    src = ws.cell(row=source_row, column=source_col)
+    dst = ws.cell(row=target_row, column=target_col)
+    dst._style = copy(src._style)
+    dst.number_format = copy(src.number_format)
+    dst.protection = copy(src.protection)
+    dst.alignment = copy(src.alignment)
+    dst.fill = copy(src.fill)
+    dst.font = copy(src.font)
+    dst.border = copy(src.border)
+
+
+def _build_import_student_details_map(
+    session: Session,
+    turma: str,
+    horario: str,
+    professor: str,
+    turma_codigo: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    catalog = _get_import_class_catalog(session)
+    target = None
+    turma_norm = _normalize_text(turma)
+    horario_norm = _normalize_text(horario)
+    professor_norm = _normalize_text(professor)
+    codigo_norm = _normalize_text(turma_codigo or "")
+
+    # Prefer matching by turma codigo when provided (stable identifier).
+    if codigo_norm:
+        target = catalog.by_codigo.get(codigo_norm)
+
+    # Fallback to legacy matching by turma label + horario + professor
+    if not target:
+        target = catalog.by_label_horario_professor.get((turma_norm, horario_norm, professor_norm))
+
+    details: Dict[str, Dict[str, Any]] = {}
+    if not target:
+        return details
+
+    students = session.exec(
+        select(models.ImportStudent).where(models.ImportStudent.class_id == target.id)
+    ).all()
+    for student in students:
+        details[_normalize_text(student.nome)] = {
+            "whatsapp": _format_whatsapp(student.whatsapp),
+            "parq": student.parq or "",
+            "atestado": bool(student.atestado),
+            "data_nascimento": student.data_nascimento or "",
+            "data_atestado": student.data_atestado or "",
+        }
+    return details
+
+
+@router.post("/reports/excel-file")
+def generate_excel_report_file(payload: ExcelExportPayload, session: Session = Depends(get_session)):
+    month = str(payload.month or "").strip() or None
+    reports = get_reports(month=month, session=session)
+    selected_reports = _resolve_export_targets(payload, reports)
+
+    workbook = _build_excel_export_workbook(selected_reports=selected_reports, month=month, session=session)
+
+    export_dir = os.path.join(settings.DATA_DIR, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    safe_month = (month or "sem-mes").replace("/", "-")
+    output_name = f"Relatorio_Multiturmas_{safe_month}.xlsx"
+    output_path = os.path.join(export_dir, output_name)
+    with instrumentation.span("excel"):
+        workbook.save(output_path)
+
+    return FileResponse(
+        output_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=output_name,
+    )
+
+
+@router.post("/reports/chamada-pdf-file")
+def generate_chamada_pdf_file(payload: ExcelExportPayload, session: Session = Depends(get_session)):
+    month = str(payload.month or "").strip() or None
+    reports = get_reports(month=month, session=session)
+    selected_reports = _resolve_export_targets(payload, reports)
+
+    # --- Debug logging (temporary) ---
+    try:
+        export_dir = os.path.join(settings.DATA_DIR, "exports")
+        os.makedirs(export_dir, exist_ok=True)
+        debug_path = os.path.join(export_dir, "report_debug_logs.jsonl")
+        # Summarize selected_reports for compact log
+        summary = []
+        for s in selected_reports:
+            summary.append({
+                "turmaCodigo": getattr(s, "turmaCodigo", ""),
+                "turma": getattr(s, "turma", ""),
+                "horario": getattr(s, "horario", ""),
+                "professor": getattr(s, "professor", ""),
+                "nivel": getattr(s, "nivel", ""),
+                "alunos_count": len(getattr(s, "alunos", []) or []),
+                "alunos_sample": [a.nome for a in (getattr(s, "alunos", []) or [])[:8]],
+            })
+        log_entry = {
+            "ts": datetime.utcnow().isoformat(),
+            "month": month,
+            "payload": payload.model_dump() if hasattr(payload, "model_dump") else payload.dict() if hasattr(payload, "dict") else payload,
+            "resolved": summary,
+        }
+        with open(debug_path, "a", encoding="utf-8") as df:
+            df.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
+    pdf_bytes = _build_chamada_pdf(selected_reports=selected_reports, month=month, session=session)
+
+    export_dir = os.path.join(settings.DATA_DIR, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    safe_month = (month or "sem-mes").replace("/", "-")
+    output_name = f"Relatorio_Multiturmas_{safe_month}.pdf"
+    output_path = os.path.join(export_dir, output_name)
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
+
+    return FileResponse(
+        output_path,
+        media_type="application/pdf",
+        filename=output_name,
+    )
+
+
+@instrumentation.timed("excel")
+@metrics.timed_render("vacancies_excel")
+def _build_vacancies_workbook(payload: VacancyExportPayload):
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.styles import Alignment
+
+    template_path = os.path.join(settings.DATA_DIR, "templates", "vagasTemplate.xlsx")
+
+    if os.path.exists(template_path):
+        workbook = load_workbook(template_path)
+        ws = workbook.active
+    else:
+        workbook = Workbook()
+        ws = workbook.active
+        ws.title = "Vagas"
+
+    ws["A1"] = "Relatório de Vagas"
+    ws["A2"] = f"Gerado em {payload.generatedAt or datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+    ws["A3"] = (
+        f"Totais: Lotação {payload.summary.totalLotacao}/{payload.summary.totalCapacidade}"
+        f" | Vagas {payload.summary.totalVagas} | Excesso {payload.summary.totalExcesso}"
+    )
+
+    col_starts = [1, 6, 11]
+    row_starts = [5, 11, 17, 23, 28]
+    slots_per_sheet = len(col_starts) * len(row_starts)
+
+    def _normalize_label(value: Any) -> str:
+        return _normalize_text(str(value or ""))
+
+    def _format_period_label(value: str) -> str:
+        normalized = _normalize_text(value)
+        if "ter" in normalized and "qui" in normalized:
+            return "Ter/Qui"
+        if "qua" in normalized and "sex" in normalized:
+            return "Qua/Sex"
+        return str(value or "").strip()
+
+    def _slot_detail_capacity(row_idx: int, col_idx: int) -> int:
+        # Layout fixo do template:
+        # linhas 1-3: 2 detalhes em todas as colunas
+        # linha 4: 1 detalhe em todas as colunas
+        # linha 5: col 1 com 1 detalhe; col 2 e 3 com 2 detalhes
+        if row_idx <= 2:
+            return 2
+        if row_idx == 3:
+            return 1
+        return 1 if col_idx == 0 else 2
+
+    for slot in range(slots_per_sheet):
+        row_idx = slot // len(col_starts)
+        col_idx = slot % len(col_starts)
+        row_start = row_starts[row_idx]
+        col_start = col_starts[col_idx]
+        detail_capacity = _slot_detail_capacity(row_idx, col_idx)
+        detail_rows = [row_start + 1 + idx for idx in range(detail_capacity)]
+        lotacao_row = row_start + 1 + detail_capacity
+        vagas_row = lotacao_row + 1
+
+        # Limpa somente células variáveis, preservando labels estáticos e estilos do template.
+        ws.cell(row=row_start, column=col_start, value="")
+        ws.cell(row=row_start, column=col_start + 1, value="")
+        for row in detail_rows:
+            ws.cell(row=row, column=col_start, value="")
+            ws.cell(row=row, column=col_start + 1, value="")
+            ws.cell(row=row, column=col_start + 2, value="")
+        ws.cell(row=lotacao_row, column=col_start + 1, value="")
+        ws.cell(row=vagas_row, column=col_start + 1, value="")
+        ws.cell(row=vagas_row, column=col_start + 3, value="")
+
+        if slot >= len(payload.blocks):
+            continue
+
+        block = payload.blocks[slot]
+        ws.cell(row=row_start, column=col_start, value=_format_horario(block.horario or ""))
+        ws.cell(row=row_start, column=col_start + 1, value=_format_period_label(block.periodoLabel or ""))
+
+        visible_rows = block.rows[: len(detail_rows)]
+        extra_rows = block.rows[len(detail_rows) :]
+        for idx, row in enumerate(detail_rows):
+            detail = visible_rows[idx] if idx < len(visible_rows) else None
+            ws.cell(row=row, column=col_start, value=(f"{detail.nivel}:" if detail else ""))
+            ws.cell(
+                row=row,
+                column=col_start + 1,
+                value=(f"{detail.lotacao}/{detail.capacidade}" if detail else ""),
+            )
+            ws.cell(row=row, column=col_start + 2, value=(detail.professor if detail else ""))
+
+        if extra_rows and detail_rows:
+            last_detail_row = detail_rows[-1]
+            extra_text = " | ".join(
+                f"{item.nivel} {item.lotacao}/{item.capacidade} {item.professor}".strip()
+                for item in extra_rows
+            )
+            current_prof = str(ws.cell(row=last_detail_row, column=col_start + 2).value or "").strip()
+            ws.cell(
+                row=last_detail_row,
+                column=col_start + 2,
+                value=(f"{current_prof} | {extra_text}" if current_prof else extra_text),
+            )
+
+        ws.cell(
+            row=lotacao_row,
+            column=col_start + 1,
+            value=f"{block.lotacaoHorario}/{block.capacidadeHorario}",
+        )
+        ws.cell(row=lotacao_row, column=col_start + 1).alignment = Alignment(horizontal="center", vertical="center")
+        ws.cell(row=vagas_row, column=col_start + 1, value=block.vagasDisponiveis)
+        ws.cell(row=vagas_row, column=col_start + 3, value=block.excesso)
+        ws.cell(row=vagas_row, column=col_start + 1).alignment = Alignment(horizontal="left", vertical="center")
+        ws.cell(row=vagas_row, column=col_start + 3).alignment = Alignment(horizontal="left", vertical="center")
+
+    return workbook
+
+
+@instrumentation.timed("pdf")
+@metrics.timed_render("vacancies_pdf")
+def _build_vacancies_pdf(payload: VacancyExportPayload) -> bytes:
+    if not REPORTLAB_AVAILABLE:
+        raise HTTPException(status_code=500, detail="PDF export unavailable: install reportlab")
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    page_width, page_height = landscape(A4)
+    pdf = canvas.Canvas(buffer, pagesize=(page_width, page_height))
+
+    pdf.setFont("Helvetica-Bold", 13)
+    pdf.drawString(24, page_height - 28, "Relatório de Vagas - Template")
+    pdf.setFont("Helvetica", 8)
+    generated_at = payload.generatedAt or datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    pdf.drawString(24, page_height - 40, f"Gerado em {generated_at}")
+    pdf.drawString(
+        24,
+        page_height - 50,
+        (
+            f"Totais: Lotação {payload.summary.totalLotacao}/{payload.summary.totalCapacidade}"
+            f" | Vagas {payload.summary.totalVagas} | Excesso {payload.summary.totalExcesso}"
+        ),
+    )
+
+    start_x = 24
+    start_y = page_height - 70
+    col_starts = [24, 190, 356]
+    # Mirror the workbook's actual row heights: default rows are 12.75 pt and footer/spacer rows are 13.5 pt.
+    row_starts = [start_y, start_y - 78.0, start_y - 156.0, start_y - 234.0, start_y - 299.25]
+    block_width = 156
+    body_row_height = 12.75
+    footer_row_height = 13.5
+    header_height = body_row_height
+    left_padding = 4
+    header_time_x = 4
+    header_period_x = 34
+    detail_ratio_x = 50
+    detail_prof_x = 94
+
+    slots_per_page = len(col_starts) * len(row_starts)
+    blocks = payload.blocks[: slots_per_page]
+
+    for slot in range(slots_per_page):
+        row_idx = slot // len(col_starts)
+        col_idx = slot % len(col_starts)
+        x1 = col_starts[col_idx]
+        y1 = row_starts[row_idx]
+
+        if row_idx <= 2:
+            detail_capacity = 2
+        elif row_idx == 3:
+            detail_capacity = 1
+        else:
+            detail_capacity = 1 if col_idx == 0 else 2
+        block_height = body_row_height * (detail_capacity + 2) + footer_row_height
+        x2 = x1 + block_width
+        y2 = y1 - block_height
+
+        pdf.setLineWidth(1.1)
+        pdf.rect(x1, y2, block_width, block_height)
+
+        if slot >= len(blocks):
+            continue
+
+        block = blocks[slot]
+
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(x1 + header_time_x, y1 - 8, _format_horario(block.horario or ""))
+        pdf.drawString(x1 + header_period_x, y1 - 8, block.periodoLabel or "")
+
+        visible_rows = block.rows[:detail_capacity]
+        extra_rows = block.rows[detail_capacity:]
+        row_top = y1 - header_height
+        for idx in range(detail_capacity):
+            next_row = row_top - body_row_height
+            detail = visible_rows[idx] if idx < len(visible_rows) else None
+            detail_label = f"{detail.nivel}:" if detail else ""
+            detail_ratio = f"{detail.lotacao}/{detail.capacidade}" if detail else ""
+            detail_prof = str(detail.professor or "") if detail else ""
+
+            if idx == detail_capacity - 1 and extra_rows:
+                suffix = " | ".join(
+                    f"{item.nivel} {item.lotacao}/{item.capacidade} {item.professor}".strip()
+                    for item in extra_rows
+                )
+                detail_prof = f"{detail_prof} | {suffix}" if detail_prof else suffix
+
+            pdf.setFont("Helvetica-Bold", 8)
+            pdf.drawString(x1 + left_padding, row_top - 8, detail_label)
+            pdf.setFont("Helvetica", 8)
+            pdf.drawString(x1 + detail_ratio_x, row_top - 8, detail_ratio)
+            pdf.drawString(x1 + detail_prof_x, row_top - 8, detail_prof[:36])
+            row_top = next_row
+
+        lotacao_row = row_top - body_row_height
+        pdf.setFont("Helvetica-Bold", 8)
+        pdf.drawString(x1 + left_padding, row_top - 8, "Lotação:")
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(x1 + detail_ratio_x, row_top - 8, f"{block.lotacaoHorario}/{block.capacidadeHorario}")
+
+        footer_row = lotacao_row - footer_row_height
+        middle_x = x1 + (block_width / 2)
+        pdf.setFont("Helvetica-Bold", 8)
+        pdf.drawString(x1 + left_padding, lotacao_row - 8, "Vagas:")
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(x1 + 35, lotacao_row - 8, str(block.vagasDisponiveis))
+        pdf.setFont("Helvetica-Bold", 8)
+        pdf.drawString(middle_x + 4, lotacao_row - 8, "Excesso:")
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(middle_x + 42, lotacao_row - 8, str(block.excesso))
+
+    pdf.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+@router.post("/reports/vacancies-excel-file")
+def generate_vacancies_excel_file(payload: VacancyExportPayload):
+    if not payload.blocks:
+        raise HTTPException(status_code=400, detail="No vacancy data informed")
+
+    workbook = _build_vacancies_workbook(payload)
+
+    export_dir = os.path.join(settings.DATA_DIR, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    output_name = f"Relatorio_Vagas_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+    output_path = os.path.join(export_dir, output_name)
+    with instrumentation.span("excel"):
+        workbook.save(output_path)
+
+    return FileResponse(
+        output_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=output_name,
+    )
+
+
+@router.post("/reports/vacancies-pdf-file")
+def generate_vacancies_pdf_file(payload: VacancyExportPayload):
+    if not payload.blocks:
+        raise HTTPException(status_code=400, detail="No vacancy data informed")
+
+    pdf_bytes = _build_vacancies_pdf(payload)
+
+    export_dir = os.path.join(settings.DATA_DIR, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    output_name = f"Relatorio_Vagas_{datetime.now().strftime('%Y-%m-%d')}.pdf"
+    output_path = os.path.join(export_dir, output_name)
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
+
+    return FileResponse(
+        output_path,
+        media_type="application/pdf",
+        filename=output_name,
+    )
+
+
+@router.post("/reports/parq-pdf-file")
+def generate_parq_pdf_file_compat(payload: ExcelExportPayload, session: Session = Depends(get_session)):
+    return generate_chamada_pdf_file(payload=payload, session=session)
@@ -0,0 +1,767 @@
+"""Data import (CSV/XLSX upload, legacy /import), the frontend bootstrap and import student/class CRUD."""
+
+import csv
+import json
+import os
+from datetime import datetime
+from io import StringIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete as sa_delete
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import models, settings, student_registry
+from app.auth import get_current_user
+from app.catalog import (
+    _build_dias_code,
+    _build_professor_code,
+    _find_import_class_by_triple,
+    _get_import_class_catalog,
+    get_or_create_import_class,
+    get_or_create_import_student,
+    get_or_create_import_unit,
+)
+from app.database import get_async_session, get_session
+from app.models import TransferOverride
+from app.normalize import _format_whatsapp, _normalize_horario_value, _normalize_text_fold, parse_bool
+from app.schemas import (
+    BootstrapOut,
+    ImportClassOut,
+    ImportResult,
+    ImportStatusOut,
+    ImportStudentBulkAllocatePayload,
+    ImportStudentOut,
+    ImportStudentUpsertPayload,
+    ImportUnitOut,
+)
+from app.storage import _import_status_file, _load_import_status
+from app.student_registry import (
+    _dedupe_import_students,
+    _dedupe_import_students_global,
+    _ensure_student_uid_for_student,
+    _load_student_uid_registry,
+    _mark_transfer_overrides_mirror_dirty,
+    _save_student_uid_registry,
+    _student_identity_key,
+)
+
+router = APIRouter()
+
+
+def _save_import_status(status: Dict[str, Any]) -> None:
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    with open(_import_status_file(), "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
+
+
+def _upsert_transfer_overrides(
+    session: Session,
+    moves: List[Tuple[models.ImportStudent, models.ImportClass]],
+) -> int:
+    """Batch upsert: one SELECT for the affected identities; the mirror is rewritten on commit."""
+    payloads: Dict[str, Dict[str, str]] = {}
+    now_iso = datetime.utcnow().isoformat()
+    for student, target_class in moves:
+        identity_key = _student_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+        if not identity_key:
+            continue
+        payloads[identity_key] = {
+            "nome": student.nome,
+            "data_nascimento": student.data_nascimento or "",
+            "whatsapp": student.whatsapp or "",
+            "turma_codigo": target_class.codigo or "",
+            "turma_label": target_class.turma_label or target_class.codigo or "",
+            "horario": target_class.horario or "",
+            "professor": target_class.professor or "",
+            "updated_at": now_iso,
+        }
+    if not payloads:
+        return 0
+
+    existing = {
+        row.identity_key: row
+        for row in session.exec(
+            select(TransferOverride).where(TransferOverride.identity_key.in_(list(payloads.keys())))
+        ).all()
+    }
+    for identity_key, payload in payloads.items():
+        row = existing.get(identity_key) or TransferOverride(identity_key=identity_key)
+        for field_name, value in payload.items():
+            setattr(row, field_name, value)
+        session.add(row)
+
+    _mark_transfer_overrides_mirror_dirty(session)
+    return len(payloads)
+
+
+def _remove_transfer_overrides(session: Session, students: List[models.ImportStudent]) -> int:
+    identity_keys = {
+        _student_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+        for student in students
+    }
+    identity_keys.discard("")
+    if not identity_keys:
+        return 0
+
+    result = session.exec(
+        sa_delete(TransferOverride).where(TransferOverride.identity_key.in_(list(identity_keys)))
+    )
+    removed = int(result.rowcount or 0)
+    if removed > 0:
+        _mark_transfer_overrides_mirror_dirty(session)
+    return removed
+
+
+def _upsert_transfer_override_for_student(
+    session: Session,
+    student: models.ImportStudent,
+    target_class: models.ImportClass,
+) -> None:
+    _upsert_transfer_overrides(session, [(student, target_class)])
+
+
+def _remove_transfer_override_for_student(session: Session, student: models.ImportStudent) -> None:
+    _remove_transfer_overrides(session, [student])
+
+
+def _generate_import_class_codigo(
+    session: Session,
+    unit_id: int,
+    professor: str,
+    dias_semana: str,
+    horario: str
+) -> str:
+    """Generate codigo sequentially by horario for same professor+dias_semana"""
+    prof_code = _build_professor_code(professor)
+    dias_code = _build_dias_code(dias_semana)
+    
+    if not prof_code or not dias_code:
+        # Fallback if missing key parts
+        return f"{prof_code}{dias_code}01"
+    
+    base = f"{prof_code}{dias_code}"
+    professor_norm = _normalize_text_fold(professor)
+    dias_norm = _normalize_text_fold(dias_semana)
+    
+    # Find all existing classes with same unit, professor, and dias
+    existing = _get_import_class_catalog(session).by_unit_professor_dias.get(
+        (int(unit_id or 0), professor_norm, dias_norm),
+        [],
+    )
+    
+    # Filter to only those with same base code
+    same_base = [
+        cls for cls in existing
+        if str(cls.codigo or "").startswith(base)
+    ]
+    
+    # Sort by horario to ensure sequence
+    same_base_sorted = sorted(
+        same_base,
+        key=lambda x: _normalize_horario_value(x.horario or "")
+    )
+    
+    # Next index is count + 1
+    next_index = len(same_base_sorted) + 1
+    
+    return f"{base}{str(next_index).zfill(2)}"
+
+
+def _import_student_out(
+    student: models.ImportStudent,
+    uid_registry: Optional[Dict[str, str]] = None,
+    preferred_uid: Optional[str] = None,
+) -> ImportStudentOut:
+    student_uid, _ = _ensure_student_uid_for_student(
+        student,
+        registry=uid_registry,
+        preferred_uid=preferred_uid,
+    )
+
+    return ImportStudentOut(
+        id=student.id or 0,
+        student_uid=student_uid,
+        class_id=student.class_id,
+        nome=student.nome,
+        whatsapp=student.whatsapp or "",
+        data_nascimento=student.data_nascimento or "",
+        data_atestado=student.data_atestado or "",
+        categoria=student.categoria or "",
+        genero=student.genero or "",
+        parq=student.parq or "",
+        atestado=bool(student.atestado),
+    )
+
+
+@router.post("/api/import-data", response_model=ImportResult)
+async def import_data(
+    file: UploadFile = File(...),
+    apply_overrides: bool = Form(True),
+    session: Session = Depends(get_session),
+) -> ImportResult:
+    if not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="File must be .csv")
+
+    content = await file.read()
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+
+    if text.startswith("\ufeff"):
+        text = text.lstrip("\ufeff")
+
+    try:
+        dialect = csv.Sniffer().sniff(text, delimiters=[",", ";", "\t"])
+        delimiter = dialect.delimiter
+    except Exception:
+        delimiter = ","
+
+    reader = csv.DictReader(StringIO(text), delimiter=delimiter)
+    if reader.fieldnames and len(reader.fieldnames) == 1:
+        header_line = reader.fieldnames[0]
+        if ";" in header_line:
+            delimiter = ";"
+        elif "\t" in header_line:
+            delimiter = "\t"
+        if delimiter != ",":
+            reader = csv.DictReader(StringIO(text), delimiter=delimiter)
+
+    # Personal columns always required; class columns are optional (enables personal-only CSV)
+    personal_required = {
+        "aluno_nome",
+        "whatsapp",
+        "data_nascimento",
+        "data_atest",
+        "categoria",
+        "genero",
+        "parq",
+        "atestado",
+    }
+    class_columns = {"unidade", "turma_codigo", "horario", "professor", "nivel", "capacidade", "dias_semana", "aluno_turma"}
+
+    if reader.fieldnames is None:
+        raise HTTPException(status_code=400, detail="CSV header not found")
+
+    fieldnames_stripped = {name.strip() for name in reader.fieldnames}
+    missing_personal = personal_required.difference(fieldnames_stripped)
+    if missing_personal:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(sorted(missing_personal))}")
+
+    full_mode = class_columns.issubset(fieldnames_stripped)
+
+    counters: Dict[str, int] = {
+        "units_created": 0,
+        "units_updated": 0,
+        "classes_created": 0,
+        "classes_updated": 0,
+        "students_created": 0,
+        "students_updated": 0,
+    }
+    rows_processed = 0
+
+    try:
+        for row in reader:
+            aluno_nome = (row.get("aluno_nome") or "").strip()
+            if not aluno_nome:
+                continue
+
+            rows_processed += 1
+
+            if full_mode:
+                unidade = (row.get("unidade") or "").strip()
+                codigo = (row.get("turma_codigo") or "").strip()
+                raw_horario = (row.get("horario") or "").strip()
+                horario = _normalize_horario_value(raw_horario)
+
+                if not unidade or not codigo or not horario:
+                    # Missing class identifiers even in full mode — treat as personal
+                    student = get_or_create_import_student(session, None, aluno_nome)
+                    if student:
+                        counters["students_updated"] += 1
+                    else:
+                        student = models.ImportStudent(class_id=None, nome=aluno_nome)
+                        session.add(student)
+                        counters["students_created"] += 1
+                else:
+                    unit = get_or_create_import_unit(session, unidade)
+                    if unit.id:
+                        counters["units_updated"] += 1
+                    else:
+                        counters["units_created"] += 1
+
+                    class_obj = get_or_create_import_class(session, unit.id, codigo, horario)
+                    if class_obj:
+                        counters["classes_updated"] += 1
+                    else:
+                        class_obj = models.ImportClass(unit_id=unit.id, codigo=codigo, horario=horario)
+                        session.add(class_obj)
+                        session.flush()
+                        counters["classes_created"] += 1
+
+                    class_obj.horario = horario
+                    class_obj.professor = (row.get("professor") or "").strip()
+                    class_obj.nivel = (row.get("nivel") or "").strip()
+                    class_obj.faixa_etaria = (row.get("faixa_etaria") or "").strip()
+                    class_obj.capacidade = int((row.get("capacidade") or "0") or 0)
+                    class_obj.dias_semana = (row.get("dias_semana") or "").strip()
+                    class_obj.turma_label = (row.get("aluno_turma") or "").strip() or codigo
+
+                    student = get_or_create_import_student(session, class_obj.id, aluno_nome)
+                    if student:
+                        counters["students_updated"] += 1
+                    else:
+                        student = models.ImportStudent(class_id=class_obj.id, nome=aluno_nome)
+                        session.add(student)
+                        counters["students_created"] += 1
+            else:
+                # Personal-only CSV — no class assignment
+                student = get_or_create_import_student(session, None, aluno_nome)
+                if student:
+                    counters["students_updated"] += 1
+                else:
+                    student = models.ImportStudent(class_id=None, nome=aluno_nome)
+                    session.add(student)
+                    counters["students_created"] += 1
+
+            student.whatsapp = _format_whatsapp(row.get("whatsapp"))
+            student.data_nascimento = (row.get("data_nascimento") or "").strip()
+            student.data_atestado = (row.get("data_atest") or "").strip()
+            student.categoria = (row.get("categoria") or "").strip()
+            student.genero = (row.get("genero") or "").strip()
+            student.parq = (row.get("parq") or "").strip()
+            student.atestado = parse_bool(row.get("atestado") or "")
+
+        if apply_overrides:
+            student_registry._apply_transfer_overrides(session)
+        _dedupe_import_students(session)
+        _dedupe_import_students_global(session)
+        session.commit()
+        _save_import_status(
+            {
+                "filename": file.filename,
+                "last_import_at": datetime.utcnow().isoformat(),
+                "rows_processed": rows_processed,
+                **counters,
+            }
+        )
+        return ImportResult(**counters)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"import error: {exc}")
+
+
+@router.get("/api/import-data/status", response_model=ImportStatusOut)
+def get_import_data_status() -> ImportStatusOut:
+    payload = _load_import_status()
+    return ImportStatusOut(**payload)
+
+
+def _load_bootstrap_rows(
+    session: Session,
+    unit_id: Optional[int],
+    professor: Optional[str],
+) -> Tuple[List[models.ImportUnit], List[models.ImportClass], List[models.ImportStudent]]:
+    removed = _dedupe_import_students(session) + _dedupe_import_students_global(session)
+    if removed > 0:
+        session.commit()
+
+    units_stmt = select(models.ImportUnit).order_by(models.ImportUnit.name)
+    units = session.exec(units_stmt).all()
+
+    classes_stmt = select(models.ImportClass)
+    if unit_id is not None:
+        classes_stmt = classes_stmt.where(models.ImportClass.unit_id == unit_id)
+    classes_stmt = classes_stmt.order_by(models.ImportClass.codigo, models.ImportClass.horario)
+    classes = session.exec(classes_stmt).all()
+
+    # Mode switch by environment:
+    # - unit (default): full unit visibility (legacy behavior / Bela Vista)
+    # - professor: each professor sees only own classes/students
+    if settings.ACCESS_MODE == "professor":
+        scoped_professor = _normalize_text_fold(professor)
+        if scoped_professor:
+            classes = [
+                cls
+                for cls in classes
+                if _normalize_text_fold(cls.professor or "") == scoped_professor
+            ]
+        else:
+            classes = []
+
+    class_ids = [c.id for c in classes]
+    students_stmt = select(models.ImportStudent)
+    if class_ids:
+        students_stmt = students_stmt.where(models.ImportStudent.class_id.in_(class_ids))
+    students = list(session.exec(students_stmt).all())
+
+    # Also include unallocated students (class_id IS NULL)
+    unallocated_stmt = select(models.ImportStudent).where(models.ImportStudent.class_id.is_(None))
+    unallocated = session.exec(unallocated_stmt).all()
+    # Avoid duplicates if class_ids was empty (all students already fetched)
+    if class_ids:
+        students = students + list(unallocated)
+    else:
+        # If no classes exist, ensure unallocated students are still visible
+        students = list(unallocated)
+    return list(units), list(classes), students
+
+
+@router.get("/api/bootstrap", response_model=BootstrapOut)
+async def bootstrap(
+    unit_id: Optional[int] = None,
+    professor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+) -> BootstrapOut:
+    uid_registry = await run_in_threadpool(_load_student_uid_registry)
+    uid_registry_changed = False
+    units, classes, students = await session.run_sync(_load_bootstrap_rows, unit_id, professor)
+
+    for student in students:
+        _, changed = _ensure_student_uid_for_student(student, registry=uid_registry)
+        uid_registry_changed = uid_registry_changed or changed
+
+    if uid_registry_changed:
+        await run_in_threadpool(_save_student_uid_registry, uid_registry)
+
+    return BootstrapOut(
+        units=[ImportUnitOut(id=u.id, name=u.name) for u in units],
+        classes=[
+            ImportClassOut(
+                id=c.id,
+                unit_id=c.unit_id,
+                grupo=c.codigo,
+                codigo=c.codigo,
+                turma_label=c.turma_label,
+                horario=c.horario,
+                professor=c.professor,
+                nivel=c.nivel,
+                faixa_etaria=c.faixa_etaria,
+                capacidade=c.capacidade,
+                dias_semana=c.dias_semana,
+            )
+            for c in classes
+        ],
+        students=[
+            _import_student_out(s, uid_registry=uid_registry)
+            for s in students
+        ],
+    )
+
+
+@router.post("/api/import-students", response_model=ImportStudentOut)
+def create_import_student(payload: ImportStudentUpsertPayload, session: Session = Depends(get_session)) -> ImportStudentOut:
+    nome = str(payload.nome or "").strip()
+    if not nome:
+        raise HTTPException(status_code=400, detail="nome is required")
+
+    has_class_info = any([str(payload.turma or "").strip(), str(payload.horario or "").strip(), str(payload.professor or "").strip()])
+
+    if has_class_info:
+        target_class = _find_import_class_by_triple(
+            session=session,
+            turma=payload.turma,
+            horario=payload.horario,
+            professor=payload.professor,
+        )
+        if not target_class:
+            raise HTTPException(status_code=404, detail="Class not found for turma/horario/professor")
+        target_class_id: Optional[int] = target_class.id
+    else:
+        target_class = None
+        target_class_id = None
+
+    student = get_or_create_import_student(session, target_class_id, nome)
+    if not student:
+        student = models.ImportStudent(class_id=target_class_id, nome=nome)
+        session.add(student)
+
+    student.class_id = target_class_id
+    student.nome = nome
+    student.whatsapp = _format_whatsapp(payload.whatsapp)
+    student.data_nascimento = str(payload.data_nascimento or "").strip()
+    student.data_atestado = str(payload.data_atestado or "").strip()
+    student.categoria = str(payload.categoria or "").strip()
+    student.genero = str(payload.genero or "").strip()
+    student.parq = str(payload.parq or "").strip()
+    student.atestado = bool(payload.atestado)
+
+    session.commit()
+    session.refresh(student)
+    return _import_student_out(student, preferred_uid=payload.student_uid)
+
+
+@router.put("/api/import-students/{student_id}", response_model=ImportStudentOut)
+def update_import_student(student_id: int, payload: ImportStudentUpsertPayload, session: Session = Depends(get_session)) -> ImportStudentOut:
+    student = session.get(models.ImportStudent, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Import student not found")
+
+    nome = str(payload.nome or "").strip()
+    if not nome:
+        raise HTTPException(status_code=400, detail="nome is required")
+
+    previous_class_id = student.class_id
+    has_class_info = any([str(payload.turma or "").strip(), str(payload.horario or "").strip(), str(payload.professor or "").strip()])
+
+    if has_class_info:
+        target_class = _find_import_class_by_triple(
+            session=session,
+            turma=payload.turma,
+            horario=payload.horario,
+            professor=payload.professor,
+        )
+        if not target_class:
+            raise HTTPException(status_code=404, detail="Class not found for turma/horario/professor")
+        target_class_id: Optional[int] = target_class.id
+    else:
+        target_class = None
+        # Preserve the current allocation when the edit is partial.
+        # This prevents a birth-date change from accidentally moving the student
+        # to the unallocated bucket.
+        target_class_id = previous_class_id
+
+    existing_target = get_or_create_import_student(session, target_class_id, nome)
+    target_student = student
+    if existing_target and existing_target.id != student.id:
+        target_student = existing_target
+        session.delete(student)
+
+    target_student.class_id = target_class_id
+    target_student.nome = nome
+    target_student.whatsapp = _format_whatsapp(payload.whatsapp)
+    target_student.data_nascimento = str(payload.data_nascimento or "").strip()
+    target_student.data_atestado = str(payload.data_atestado or "").strip()
+    target_student.categoria = str(payload.categoria or "").strip()
+    target_student.genero = str(payload.genero or "").strip()
+    target_student.parq = str(payload.parq or "").strip()
+    target_student.atestado = bool(payload.atestado)
+
+    movement_type = str(payload.movement_type or "correction").strip().lower()
+    is_transfer = movement_type == "transfer"
+    if target_class is not None and previous_class_id != target_class_id:
+        if is_transfer:
+            _upsert_transfer_override_for_student(session, target_student, target_class)
+        else:
+            _remove_transfer_override_for_student(session, target_student)
+
+    session.add(target_student)
+    _dedupe_import_students(session)
+    _dedupe_import_students_global(session)
+    session.commit()
+    session.refresh(target_student)
+    return _import_student_out(target_student, preferred_uid=payload.student_uid)
+
+
+@router.post("/api/import-students/bulk-allocate")
+def bulk_allocate_import_students(
+    payload: ImportStudentBulkAllocatePayload,
+    session: Session = Depends(get_session),
+):
+    student_ids = sorted({int(student_id) for student_id in payload.student_ids if int(student_id) > 0})
+    if not student_ids:
+        raise HTTPException(status_code=400, detail="student_ids is required")
+
+    target_class = _find_import_class_by_triple(
+        session=session,
+        turma=payload.turma,
+        horario=payload.horario,
+        professor=payload.professor,
+    )
+    if not target_class:
+        raise HTTPException(status_code=404, detail="Class not found for turma/horario/professor")
+
+    students = session.exec(
+        select(models.ImportStudent).where(models.ImportStudent.id.in_(student_ids))
+    ).all()
+    found_ids = {int(student.id) for student in students if student.id is not None}
+    missing_ids = [student_id for student_id in student_ids if student_id not in found_ids]
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Import students not found: {missing_ids}")
+
+    movement_type = str(payload.movement_type or "correction").strip().lower()
+    is_transfer = movement_type == "transfer"
+
+    updated = 0
+    transfer_moves: List[Tuple[models.ImportStudent, models.ImportClass]] = []
+    override_removals: List[models.ImportStudent] = []
+    for student in students:
+        previous_class_id = student.class_id
+        existing_target = get_or_create_import_student(session, target_class.id, student.nome)
+        target_student = student
+        if existing_target and existing_target.id != student.id:
+            target_student = existing_target
+            target_student.whatsapp = student.whatsapp
+            target_student.data_nascimento = student.data_nascimento
+            target_student.data_atestado = student.data_atestado
+            target_student.categoria = student.categoria
+            target_student.genero = student.genero
+            target_student.parq = student.parq
+            target_student.atestado = student.atestado
+            session.delete(student)
+
+        target_student.class_id = target_class.id
+        if is_transfer and previous_class_id != target_class.id:
+            transfer_moves.append((target_student, target_class))
+        else:
+            override_removals.append(target_student)
+        session.add(target_student)
+        updated += 1
+
+    # Uma escrita em lote por operação, independente do número de alunos movidos.
+    _upsert_transfer_overrides(session, transfer_moves)
+    _remove_transfer_overrides(session, override_removals)
+    _dedupe_import_students(session)
+    _dedupe_import_students_global(session)
+    session.commit()
+    return {"ok": True, "updated": updated}
+
+
+# Import classes endpoints (for turma management via UI)
+@router.post("/import-classes")
+def create_import_class(
+    data: models.ImportClassCreate,
+    session: Session = Depends(get_session),
+):
+    """Create a new import class (turma) - default unit_id is 1"""
+    unit_id = 1  # Default unit
+    # Generate codigo sequentially by horario for same professor+dias_semana
+    codigo = _generate_import_class_codigo(
+        session,
+        unit_id,
+        data.professor,
+        data.dias_semana or "",
+        data.horario
+    )
+    
+    new_class = models.ImportClass(
+        unit_id=unit_id,
+        codigo=codigo,
+        turma_label=data.turma_label,
+        horario=data.horario,
+        professor=data.professor,
+        nivel=data.nivel or "",
+        faixa_etaria=data.faixa_etaria or "",
+        capacidade=data.capacidade or 0,
+        dias_semana=data.dias_semana or "",
+    )
+    session.add(new_class)
+    session.commit()
+    session.refresh(new_class)
+    return {
+        "id": new_class.id,
+        "unit_id": new_class.unit_id,
+        "codigo": new_class.codigo,
+        "turma_label": new_class.turma_label,
+        "horario": new_class.horario,
+        "professor": new_class.professor,
+        "nivel": new_class.nivel,
+        "faixa_etaria": new_class.faixa_etaria,
+        "capacidade": new_class.capacidade,
+        "dias_semana": new_class.dias_semana,
+    }
+
+
+@router.put("/import-classes/{class_id}")
+def update_import_class(
+    class_id: int,
+    data: models.ImportClassUpdate,
+    session: Session = Depends(get_session),
+):
+    """Update an existing import class (turma)"""
+    import_class = session.exec(select(models.ImportClass).where(models.ImportClass.id == class_id)).first()
+    if not import_class:
+        raise HTTPException(status_code=404, detail="Class not found")
+    
+    if data.turma_label is not None:
+        import_class.turma_label = data.turma_label
+    if data.horario is not None:
+        import_class.horario = data.horario
+    if data.professor is not None:
+        import_class.professor = data.professor
+    if data.nivel is not None:
+        import_class.nivel = data.nivel
+    if data.faixa_etaria is not None:
+        import_class.faixa_etaria = data.faixa_etaria
+    if data.capacidade is not None:
+        import_class.capacidade = data.capacidade
+    if data.dias_semana is not None:
+        import_class.dias_semana = data.dias_semana
+    
+    session.add(import_class)
+    session.commit()
+    session.refresh(import_class)
+    return {
+        "id": import_class.id,
+        "unit_id": import_class.unit_id,
+        "codigo": import_class.codigo,
+        "turma_label": import_class.turma_label,
+        "horario": import_class.horario,
+        "professor": import_class.professor,
+        "nivel": import_class.nivel,
+        "faixa_etaria": import_class.faixa_etaria,
+        "capacidade": import_class.capacidade,
+        "dias_semana": import_class.dias_semana,
+    }
+
+
+@router.delete("/import-classes/{class_id}")
+def delete_import_class(
+    class_id: int,
+    session: Session = Depends(get_session),
+):
+    """Delete an import class (turma) by ID and deallocate its students"""
+    import_class = session.exec(select(models.ImportClass).where(models.ImportClass.id == class_id)).first()
+    if not import_class:
+        raise HTTPException(status_code=404, detail="Class not found")
+    
+    # Deallocate students: set their class_id to None so they appear as pending allocation
+    students = session.exec(
+        select(models.ImportStudent).where(models.ImportStudent.class_id == class_id)
+    ).all()
+    for student in students:
+        student.class_id = None
+    
+    session.delete(import_class)
+    session.commit()
+    return {"ok": True, "id": class_id, "deallocatedStudents": len(students)}
+
+
+# Import endpoint (protected) - accepts uploaded file or file param (file must be in data/)
+@router.post("/import")
+def import_excel(
+    file: Optional[str] = Query(None, description="Nome do arquivo em /app/data/"),
+    out_clean: Optional[bool] = Query(False, description="Salvar arquivo cleaned em data/"),
+    upload: Optional[UploadFile] = File(None),
+    session: Session = Depends(get_session),
+    current_user: models.User = Depends(get_current_user),
+):
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+
+    if upload:
+        dest_path = os.path.join(settings.DATA_DIR, upload.filename)
+        with open(dest_path, "wb") as f:
+            f.write(upload.file.read())
+        file_path = dest_path
+    elif file:
+        file_path = os.path.join(settings.DATA_DIR, file)
+    else:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    out_cleaned_path = None
+    if out_clean:
+        base = os.path.basename(file_path)
+        out_cleaned_path = os.path.join(settings.DATA_DIR, f"{base}.cleaned.xlsx")
+
+    from app.etl.import_excel import import_from_excel
+
+    result = import_from_excel(file_path, session, out_cleaned=out_cleaned_path)
+    response = {"imported": result["counts"], "mapping": result["mapping"]}
+    if result.get("cleaned_path"):
+        response["cleaned_path"] = os.path.basename(result["cleaned_path"])
+    return response
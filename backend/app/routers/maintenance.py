@@ -0,0 +1,436 @@
+"""Admin/maintenance endpoints: purges, diagnostics, request stats and profiles."""
+
+import os
+import re
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import delete as sa_delete
+from sqlmodel import Session, func, select
+
+from app import instrumentation, models, profiling, settings, student_registry
+from app.auth import get_admin_user
+from app.catalog import _build_dias_code, _build_professor_code, _get_import_class_catalog
+from app.database import get_session
+from app.exclusions_state import (
+    _current_exclusions_state,
+    _exclusion_month,
+    _read_exclusions_state,
+    _write_exclusions_state,
+)
+from app.models import (
+    AttendanceLog,
+    ExclusionRecord,
+    JustificationRecord,
+    PoolLog,
+    PoolLogDailySummary,
+    TransferOverride,
+    WeatherSnapshot,
+)
+from app.normalize import _month_bounds, _normalize_horario_value, _normalize_text_fold
+from app.pool_log_storage import POOL_LOG_EXCEL_MIRROR, _rebuild_pool_log_excel_from_db
+from app.schemas import (
+    MaintenanceBootstrapResetPayload,
+    MaintenanceDiagnosticsOut,
+    MaintenancePurgeMonthPayload,
+)
+from app.storage import (
+    EXCLUSIONS_FILE_LOCK,
+    _attendance_segment_path,
+    _backup_runtime_json,
+    _import_status_file,
+    _load_attendance_journal,
+    _load_import_status,
+    _load_json_list,
+)
+from app.student_registry import _student_uid_registry_file
+from app.weather import _export_weather_snapshots_json
+
+router = APIRouter()
+
+
+def _count_weather_snapshots(session: Session, month: Optional[str] = None) -> int:
+    stmt = select(func.count()).select_from(WeatherSnapshot)
+    if month:
+        stmt = stmt.where(WeatherSnapshot.date.like(f"{month}-%"))
+    return int(session.exec(stmt).one() or 0)
+
+
+def _count_justifications(session: Session, month: Optional[str] = None) -> int:
+    stmt = select(func.count()).select_from(JustificationRecord)
+    if month:
+        stmt = stmt.where(JustificationRecord.mes == month)
+    return int(session.exec(stmt).one() or 0)
+
+
+def _clear_transfer_overrides(session: Session) -> int:
+    removed = int(session.exec(select(func.count()).select_from(TransferOverride)).one() or 0)
+    if removed > 0:
+        session.exec(sa_delete(TransferOverride))
+        session.commit()
+        student_registry._write_transfer_overrides_mirror([])
+    return removed
+
+
+def _month_date_filter(column: Any, month: str) -> Any:
+    month_start, month_end = _month_bounds(month)
+    return column.between(month_start, month_end)
+
+
+def _purge_attendance_month(db: Session, month: str, delete_database_rows: bool = False) -> Dict[str, Any]:
+    segment_path = _attendance_segment_path(month)
+    removed = len(_load_json_list(segment_path))
+    if os.path.exists(segment_path):
+        # Descartar o mês é apagar o segmento (com cópia no archive/).
+        _backup_runtime_json(segment_path)
+        os.remove(segment_path)
+    logs_removed = 0
+    if delete_database_rows:
+        # attendance_logs é o histórico permanente que os relatórios leem; só sai a pedido explícito.
+        logs_removed = int(db.exec(select(func.count()).select_from(AttendanceLog).where(AttendanceLog.mes == month)).one() or 0)
+        if logs_removed:
+            db.exec(sa_delete(AttendanceLog).where(AttendanceLog.mes == month))
+    return {"removed": removed, "segment": os.path.basename(segment_path), "logsRemoved": logs_removed}
+
+
+def _purge_pool_log_month(db: Session, month: str, delete_database_rows: bool = False) -> Dict[str, int]:
+    """Counts describe the logPiscina.xlsx mirror; pool_logs rows only go with delete_database_rows."""
+    in_month = _month_date_filter(PoolLog.data, month)
+    before = int(db.exec(select(func.count()).select_from(PoolLog)).one() or 0)
+    removed = int(db.exec(select(func.count()).select_from(PoolLog).where(in_month)).one() or 0)
+    logs_removed = 0
+    if removed and delete_database_rows:
+        db.exec(sa_delete(PoolLog).where(in_month))
+        db.exec(sa_delete(PoolLogDailySummary).where(PoolLogDailySummary.mes == month))
+        logs_removed = removed
+    return {"before": before, "after": before - removed, "removed": removed, "logsRemoved": logs_removed}
+
+
+def _month_data_counts(session: Session, month: str) -> Dict[str, int]:
+    _current_exclusions_state(session)  # sincroniza exclusion_records se o JSON foi editado por fora
+    return {
+        "attendance": len(_load_attendance_journal(month)),
+        "attendanceLogs": int(session.exec(select(func.count()).select_from(AttendanceLog).where(AttendanceLog.mes == month)).one() or 0),
+        "justifications": _count_justifications(session, month),
+        "exclusions": int(session.exec(select(func.count()).select_from(ExclusionRecord).where(ExclusionRecord.mes == month)).one() or 0),
+        "weatherSnapshots": _count_weather_snapshots(session, month),
+        "poolLog": int(session.exec(select(func.count()).select_from(PoolLog).where(_month_date_filter(PoolLog.data, month))).one() or 0),
+    }
+
+
+def _purge_month_data(
+    session: Session,
+    month: str,
+    clear_transfer_overrides: bool = True,
+    clear_exclusions: bool = False,
+    delete_database_rows: bool = False,
+) -> Dict[str, Any]:
+    """Purge one month inside the caller's unit of work: as tabelas do mês saem num único commit.
+
+    By default only the runtime copies go (journal segment, logPiscina.xlsx rows, justifications
+    and weather snapshots), as before. attendance_logs and pool_logs are kept unless
+    delete_database_rows is set.
+    """
+    if not re.fullmatch(r"\d{4}-\d{2}", str(month or "").strip()):
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+
+    month = str(month).strip()
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+
+    chamada_stats = _purge_attendance_month(session, month, delete_database_rows)
+    justificativas_before = _count_justifications(session)
+    justificativas_removed = _count_justifications(session, month)
+    if justificativas_removed:
+        session.exec(sa_delete(JustificationRecord).where(JustificationRecord.mes == month))
+    pool_stats = _purge_pool_log_month(session, month, delete_database_rows)
+    snapshots_before = _count_weather_snapshots(session)
+    snapshots_removed = _count_weather_snapshots(session, month)
+    if snapshots_removed > 0:
+        session.exec(sa_delete(WeatherSnapshot).where(WeatherSnapshot.date.like(f"{month}-%")))
+
+    overrides_cleared = False
+    overrides_count = 0
+    if clear_transfer_overrides:
+        # Já faz commit quando há overrides; na sessão única isso confirma o mês inteiro junto.
+        overrides_count = _clear_transfer_overrides(session)
+        overrides_cleared = overrides_count > 0
+    session.commit()
+
+    justificativa_stats = {
+        "before": justificativas_before,
+        "after": justificativas_before - justificativas_removed,
+        "removed": justificativas_removed,
+    }
+
+    if pool_stats["removed"]:
+        pool_file = os.path.join(settings.DATA_DIR, "logPiscina.xlsx")
+        try:
+            if os.path.exists(pool_file) or POOL_LOG_EXCEL_MIRROR.pending_count(pool_file):
+                _rebuild_pool_log_excel_from_db(pool_file, session, exclude_month=month)
+        except PermissionError:
+            raise HTTPException(status_code=423, detail="logPiscina.xlsx em uso. Feche o arquivo para limpar o mês.")
+    if snapshots_removed > 0:
+        _export_weather_snapshots_json(session)
+
+    # Exclusões passam pela API de estado (cache + espelho JSON), na mesma sessão.
+    if clear_exclusions:
+        with EXCLUSIONS_FILE_LOCK:
+            items = _read_exclusions_state(clean=False, session=session)
+            kept = [item for item in items if _exclusion_month(item) != month]
+            if len(kept) != len(items):
+                _write_exclusions_state(kept, clean=False, session=session)
+        exclusao_stats = {"before": len(items), "after": len(kept), "removed": len(items) - len(kept)}
+    else:
+        _current_exclusions_state(session)
+        total_exclusions = int(session.exec(select(func.count()).select_from(ExclusionRecord)).one() or 0)
+        month_exclusions = int(
+            session.exec(select(func.count()).select_from(ExclusionRecord).where(ExclusionRecord.mes == month)).one() or 0
+        )
+        exclusao_stats = {
+            "before": total_exclusions,
+            "after": total_exclusions,
+            "removed": 0,
+            "skipped": True,
+            "month_matches": month_exclusions,
+        }
+
+    status_cleared = False
+    status_path = _import_status_file()
+    if os.path.exists(status_path):
+        try:
+            os.remove(status_path)
+            status_cleared = True
+        except Exception:
+            status_cleared = False
+
+    return {
+        "ok": True,
+        "month": month,
+        "attendance": chamada_stats,
+        "justifications": justificativa_stats,
+        "exclusions": exclusao_stats,
+        "weatherSnapshots": {
+            "before": snapshots_before,
+            "after": snapshots_before - snapshots_removed,
+            "removed": snapshots_removed,
+        },
+        "poolLog": pool_stats,
+        "transferOverrides": {
+            "cleared": overrides_cleared,
+            "removed": overrides_count if overrides_cleared else 0,
+        },
+        "importStatus": {
+            "cleared": status_cleared,
+        },
+    }
+
+
+@router.post("/maintenance/clear-transfer-overrides")
+def clear_transfer_overrides(session: Session = Depends(get_session)):
+    removed = _clear_transfer_overrides(session)
+    return {
+        "ok": True,
+        "removed": removed,
+    }
+
+
+@router.post("/maintenance/purge-month-data")
+def purge_month_data(payload: MaintenancePurgeMonthPayload, session: Session = Depends(get_session)):
+    return _purge_month_data(
+        session,
+        month=payload.month,
+        clear_transfer_overrides=payload.clear_transfer_overrides,
+        clear_exclusions=payload.clear_exclusions,
+        delete_database_rows=payload.delete_database_rows,
+    )
+
+
+@router.post("/maintenance/reset-bootstrap-data")
+def reset_bootstrap_data(
+    payload: MaintenanceBootstrapResetPayload,
+    session: Session = Depends(get_session),
+):
+    removed_students = int(session.exec(select(func.count()).select_from(models.ImportStudent)).one() or 0)
+    removed_classes = len(_get_import_class_catalog(session).classes)
+    removed_units = int(session.exec(select(func.count()).select_from(models.ImportUnit)).one() or 0)
+
+    session.exec(sa_delete(models.ImportStudent))
+    session.exec(sa_delete(models.ImportClass))
+    session.exec(sa_delete(models.ImportUnit))
+    session.commit()
+
+    transfer_removed = 0
+    transfer_cleared = False
+    if payload.clear_transfer_overrides:
+        transfer_removed = _clear_transfer_overrides(session)
+        transfer_cleared = transfer_removed > 0
+
+    uid_removed = False
+    if payload.clear_student_uid_registry:
+        uid_path = _student_uid_registry_file()
+        if os.path.exists(uid_path):
+            try:
+                os.remove(uid_path)
+                uid_removed = True
+            except Exception:
+                uid_removed = False
+
+    status_cleared = False
+    if payload.clear_import_status:
+        status_path = _import_status_file()
+        if os.path.exists(status_path):
+            try:
+                os.remove(status_path)
+                status_cleared = True
+            except Exception:
+                status_cleared = False
+
+    return {
+        "ok": True,
+        "removed": {
+            "students": removed_students,
+            "classes": removed_classes,
+            "units": removed_units,
+        },
+        "transferOverrides": {
+            "cleared": transfer_cleared,
+            "removed": transfer_removed,
+        },
+        "studentUidRegistry": {
+            "cleared": uid_removed,
+        },
+        "importStatus": {
+            "cleared": status_cleared,
+        },
+    }
+
+
+@router.get("/maintenance/diagnostics", response_model=MaintenanceDiagnosticsOut)
+def get_maintenance_diagnostics(month: str = "2026-02", session: Session = Depends(get_session)):
+    month = str(month or "").strip()
+    if not re.fullmatch(r"\d{4}-\d{2}", month):
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+
+    units_count = int(session.exec(select(func.count()).select_from(models.ImportUnit)).one() or 0)
+    classes_count = len(_get_import_class_catalog(session).classes)
+    students_count = int(session.exec(select(func.count()).select_from(models.ImportStudent)).one() or 0)
+
+    counts = _month_data_counts(session, month)
+    return MaintenanceDiagnosticsOut(
+        bootstrap={
+            "units": units_count,
+            "classes": classes_count,
+            "students": students_count,
+        },
+        month=month,
+        counts=counts,
+        # Mantido para o painel atual, que lê sempre fevereiro/2026.
+        feb2026=counts if month == "2026-02" else _month_data_counts(session, "2026-02"),
+        importStatus=_load_import_status(),
+    )
+
+
+@router.get("/maintenance/request-stats")
+def get_request_stats(
+    route: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=200),
+    admin: models.User = Depends(get_admin_user),
+):
+    """Rolling per-route SQL/IO accounting (see app/instrumentation.py), slowest p95 first."""
+    return instrumentation.summary(route=route, limit=limit)
+
+
+@router.post("/maintenance/request-stats/reset")
+def reset_request_stats(admin: models.User = Depends(get_admin_user)):
+    instrumentation.reset()
+    return {"ok": True}
+
+
+@router.get("/maintenance/profiles")
+def list_request_profiles(admin: models.User = Depends(get_admin_user)):
+    """Recent profiles taken with X-Profile: 1 / ?profile=1 (see app/profiling.py), newest first."""
+    return {"enabled": profiling.PROFILING_ENABLED, "profiles": profiling.list_profiles()}
+
+
+@router.get("/maintenance/profiles/{profile_id}")
+def get_request_profile(profile_id: str, admin: models.User = Depends(get_admin_user)):
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/maintenance/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_request_profile_collapsed(profile_id: str, admin: models.User = Depends(get_admin_user)):
+    # Formato "folded" (frame;frame;frame contagem) aceito por flamegraph.pl e speedscope.
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse("\n".join(profile["collapsed"]) + "\n")
+
+
+@router.post("/maintenance/fix-import-class-codigos")
+def fix_import_class_codigos(session: Session = Depends(get_session)):
+    """Fix all incorrectly generated import_class codigos.
+    Old incorrect logic: prof[:2] + turma_label[:3] resulted in duplicates like 'maqua'
+    New correct logic: prof[:2] + dias_code + sequential_index like 'maqs01', 'maqs02', etc.
+    """
+    # Get all import classes
+    classes_stmt = select(models.ImportClass).order_by(models.ImportClass.professor, models.ImportClass.dias_semana, models.ImportClass.horario)
+    classes = session.exec(classes_stmt).all()
+
+    if not classes:
+        return {"message": "No classes found", "updated_count": 0}
+
+    # Group by (professor, dias_semana) to assign sequential indices
+    groups = {}
+    for cls in classes:
+        key = (
+            _normalize_text_fold(cls.professor or ""),
+            _normalize_text_fold(cls.dias_semana or ""),
+        )
+        if key not in groups:
+            groups[key] = []
+        groups[key].append(cls)
+
+    # Fix codigos
+    updated_count = 0
+    changes = []
+
+    for (_, _), cls_list in groups.items():
+        cls_list = sorted(cls_list, key=lambda item: _normalize_horario_value(item.horario or ""))
+        professor = cls_list[0].professor or ""
+        dias_semana = cls_list[0].dias_semana or ""
+        prof_code = _build_professor_code(professor)
+        dias_code = _build_dias_code(dias_semana)
+
+        if not prof_code or not dias_code:
+            continue
+
+        base = f"{prof_code}{dias_code}"
+
+        for idx, cls in enumerate(cls_list, 1):
+            new_codigo = f"{base}{str(idx).zfill(2)}"
+
+            if cls.codigo != new_codigo:
+                old_codigo = cls.codigo
+                cls.codigo = new_codigo
+                changes.append({
+                    "id": cls.id,
+                    "professor": professor,
+                    "dias_semana": dias_semana,
+                    "horario": cls.horario,
+                    "old_codigo": old_codigo,
+                    "new_codigo": new_codigo
+                })
+                updated_count += 1
+
+    if updated_count > 0:
+        session.commit()
+
+    return {
+        "message": f"Fixed {updated_count} class codigos",
+        "updated_count": updated_count,
+        "changes": changes
+    }
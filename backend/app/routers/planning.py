@@ -0,0 +1,80 @@
+"""Planning files: list, paginated index, read, save and delete."""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete as sa_delete
+from sqlmodel import Session, func, select
+
+from app.database import get_session
+from app.models import PlanningFile, PlanningFileContent
+from app.planning import _planning_file_as_dict, _planning_file_summary, _upsert_planning_file
+from app.schemas import PlanningFileModel, PlanningFilePageOut
+
+router = APIRouter()
+
+
+@router.get("/planning-files")
+def get_planning_files(session: Session = Depends(get_session)) -> List[Dict[str, Any]]:
+    # Lista completa (com blocos) usada pela tela de relatórios; para listagens longas use /planning-files/index.
+    rows = session.exec(
+        select(PlanningFile, PlanningFileContent.blocks_json)
+        .join(PlanningFileContent, PlanningFileContent.file_uid == PlanningFile.file_uid, isouter=True)
+        .order_by(PlanningFile.position.desc(), PlanningFile.id.desc())
+    ).all()
+    return [_planning_file_as_dict(row, blocks_json) for row, blocks_json in rows]
+
+
+@router.get("/planning-files/index", response_model=PlanningFilePageOut)
+def list_planning_files(
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    year: Optional[int] = None,
+    session: Session = Depends(get_session),
+) -> PlanningFilePageOut:
+    filters = [PlanningFile.year == year] if year is not None else []
+    total = int(session.exec(select(func.count()).select_from(PlanningFile).where(*filters)).one() or 0)
+    rows = session.exec(
+        select(PlanningFile)
+        .where(*filters)
+        .order_by(PlanningFile.position.desc(), PlanningFile.id.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    return PlanningFilePageOut(
+        total=total,
+        limit=limit,
+        offset=offset,
+        items=[_planning_file_summary(row) for row in rows],
+    )
+
+
+@router.get("/planning-files/{file_id}")
+def get_planning_file(file_id: str, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    row = session.exec(select(PlanningFile).where(PlanningFile.file_uid == file_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Planning file not found")
+    content = session.get(PlanningFileContent, file_id)
+    return _planning_file_as_dict(row, content.blocks_json if content else None)
+
+
+@router.post("/planning-files")
+def save_planning_file(file_data: PlanningFileModel, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    entry = _upsert_planning_file(session, file_data.dict())
+    session.commit()
+    return entry
+
+
+@router.put("/planning-files/{file_id}")
+def put_planning_file(file_id: str, file_data: PlanningFileModel, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    if file_data.id != file_id:
+        raise HTTPException(status_code=400, detail="Planning file id mismatch")
+    return save_planning_file(file_data, session)
+
+
+@router.delete("/planning-files/{file_id}")
+def delete_planning_file(file_id: str, session: Session = Depends(get_session)) -> Dict[str, bool]:
+    session.exec(sa_delete(PlanningFileContent).where(PlanningFileContent.file_uid == file_id))
+    session.exec(sa_delete(PlanningFile).where(PlanningFile.file_uid == file_id))
+    session.commit()
+    return {"ok": True}
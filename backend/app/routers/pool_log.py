@@ -0,0 +1,445 @@
+"""Pool log (registro diário da piscina): save, daily lookup, monthly summary and the Excel export."""
+
+import math
+import os
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlmodel import Session, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics, settings
+from app.database import get_async_session, get_session
+from app.models import PoolLog, PoolLogDailySummary
+from app.normalize import (
+    _horario_to_minutes,
+    _is_missing,
+    _normalize_date_key,
+    _normalize_horario_key,
+    _normalize_text_fold,
+    _saved_at_sort_key,
+)
+from app.pool_log_storage import (
+    POOL_LOG_EXCEL_MIRROR,
+    _load_pool_log,
+    _pool_log_frame_from_rows,
+    _pool_log_row_from_db,
+    _pool_log_row_from_entry,
+    _rebuild_pool_log_excel_from_db,
+    _store_pool_log_row,
+)
+from app.schemas import PoolLogEntryModel, PoolLogRollupOut, PoolLogSummaryOut
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+router = APIRouter()
+
+
+def _format_temperature_output(value: Any, fallback: str = "28") -> str:
+    if value is None:
+        return fallback
+    raw = str(value).strip().replace(",", ".")
+    if not raw:
+        return fallback
+    try:
+        num = float(raw)
+        if math.isfinite(num):
+            return str(num)
+    except Exception:
+        pass
+    return fallback
+
+
+def _normalize_excel_string(value: Any) -> str:
+    if value is None:
+        return ""
+    if _is_missing(value):
+        return ""
+    return str(value).strip()
+
+
+def _pool_log_day_rows_from_db(db: Session, date_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Rows for one day from pool_logs; None while the table is still empty (planilha legada)."""
+    rows = db.exec(select(PoolLog).where(PoolLog.data == date_key).order_by(PoolLog.id)).all()
+    if rows:
+        return [_pool_log_row_from_db(row) for row in rows]
+    if db.exec(select(PoolLog.id).limit(1)).first() is not None:
+        return []
+    return None
+
+
+def _pool_log_day_frame_from_excel(date_key: str) -> "pd.DataFrame":
+    # Banco vazio/indisponível: mantém a leitura legada da planilha.
+    file_path = os.path.join(settings.DATA_DIR, "logPiscina.xlsx")
+    df = _load_pool_log(file_path)
+    if df.empty:
+        return df
+    return df[df["Data"].apply(_normalize_date_key) == date_key]
+
+
+async def _load_pool_log_day_rows(date_key: str, session: AsyncSession) -> Optional[List[Dict[str, Any]]]:
+    """Rows for one day through the indexed (canonical ISO) `data` column; None means planilha legada."""
+    if not date_key:
+        return []
+    try:
+        return await session.run_sync(_pool_log_day_rows_from_db, date_key)
+    except Exception:
+        await session.rollback()  # libera a transação da requisição para as gravações seguintes
+        return None
+
+
+def _latest_pool_log_for_day(
+    rows: Optional[List[Dict[str, Any]]],
+    date_value: str,
+    requested_horario: str,
+    requested_professor: str = "",
+    requested_turma_codigo: str = "",
+    requested_turma_label: str = "",
+) -> Optional[Dict[str, Any]]:
+    """DataFrame do dia (banco ou planilha) + seleção; roda num worker, fora do event loop.
+
+    Turma/horário scoping stays in _select_latest_pool_log_for_day: the legacy
+    fallback (código/label vazio, escopo diário) needs the whole day set, which is small.
+    """
+    date_key = _normalize_date_key(date_value)
+    if not date_key:
+        return None
+    df = _pool_log_frame_from_rows(rows) if rows is not None else _pool_log_day_frame_from_excel(date_key)
+    return _select_latest_pool_log_for_day(
+        df, date_value, requested_horario, requested_professor, requested_turma_codigo, requested_turma_label
+    )
+
+
+def _pool_log_row_as_response(row: Dict[str, Any]) -> Dict[str, Any]:
+    raw_cloro = row.get("Cloro (ppm)", None)
+    cloro_value = None
+    if raw_cloro is not None:
+        raw_cloro_str = str(raw_cloro).strip().replace(",", ".")
+        if raw_cloro_str and raw_cloro_str != "-":
+            try:
+                parsed_cloro = float(raw_cloro_str)
+                if math.isfinite(parsed_cloro):
+                    cloro_value = parsed_cloro
+            except Exception:
+                pass
+
+    return {
+        "data": _normalize_date_key(row.get("Data", "")),
+        "turmaCodigo": _normalize_excel_string(row.get("TurmaCodigo", "")),
+        "turmaLabel": _normalize_excel_string(row.get("TurmaLabel", "")),
+        "horario": _normalize_excel_string(row.get("Horario", "")),
+        "professor": _normalize_excel_string(row.get("Professor", "")),
+        "clima1": _normalize_excel_string(row.get("Clima 1", "")),
+        "clima2": _normalize_excel_string(row.get("Clima 2", "")),
+        "statusAula": _normalize_excel_string(row.get("Status_aula", "")),
+        "nota": _normalize_excel_string(row.get("Nota", "")),
+        "tipoOcorrencia": _normalize_excel_string(row.get("Tipo_ocorrencia", "")),
+        "tempExterna": _format_temperature_output(row.get("Temp. (C)", None), ""),
+        "tempPiscina": _format_temperature_output(row.get("Piscina (C)", None), "28"),
+        "cloroPpm": cloro_value,
+    }
+
+
+def _pool_log_meaningful_signature(row: Dict[str, Any]) -> tuple:
+    return (
+        _normalize_excel_string(row.get("Clima 1", "")),
+        _normalize_excel_string(row.get("Clima 2", "")),
+        _normalize_excel_string(row.get("Status_aula", "")),
+        _normalize_excel_string(row.get("Nota", "")),
+        _normalize_excel_string(row.get("Tipo_ocorrencia", "")),
+        _format_temperature_output(row.get("Temp. (C)", None), ""),
+        _format_temperature_output(row.get("Piscina (C)", None), "28"),
+        "" if row.get("Cloro (ppm)", None) is None else _normalize_excel_string(row.get("Cloro (ppm)", None)),
+    )
+
+
+def _select_latest_pool_log_from_rows(rows: "pd.DataFrame", requested_horario: str) -> Optional[Dict[str, Any]]:
+    if rows.empty:
+        return None
+
+    ordered_rows = rows.copy()
+    ordered_rows["__horario_minutes"] = ordered_rows["Horario"].astype(str).map(
+        lambda value: _horario_to_minutes(_normalize_excel_string(value))
+    )
+    ordered_rows["__horario_minutes"] = ordered_rows["__horario_minutes"].apply(
+        lambda value: value if value is not None else 10**9
+    )
+    if "saved_at" in ordered_rows.columns:
+        ordered_rows["__saved_at_key"] = ordered_rows["saved_at"].astype(str).map(_saved_at_sort_key)
+    else:
+        ordered_rows["__saved_at_key"] = -1
+    ordered_rows = ordered_rows.sort_values(["__horario_minutes", "__saved_at_key"], kind="mergesort")
+    ordered_rows = ordered_rows.drop(columns=["__horario_minutes", "__saved_at_key"], errors="ignore")
+
+    requested_minutes = _horario_to_minutes(requested_horario)
+    selected: Optional[Dict[str, Any]] = None
+    selected_minutes = -1
+    selected_index = -1
+
+    for row_index, row in ordered_rows.iterrows():
+        row_minutes = _horario_to_minutes(_normalize_excel_string(row.get("Horario", "")))
+        if requested_minutes is not None and row_minutes is not None and row_minutes > requested_minutes:
+            continue
+        current_minutes = row_minutes if row_minutes is not None else -1
+        if current_minutes > selected_minutes or (current_minutes == selected_minutes and int(row_index) >= selected_index):
+            selected = row.to_dict()
+            selected_minutes = current_minutes
+            selected_index = int(row_index)
+
+    if selected is not None:
+        return selected
+
+    return ordered_rows.iloc[0].to_dict()
+
+
+def _select_latest_pool_log_for_day(
+    df: "pd.DataFrame",
+    date_value: str,
+    requested_horario: str,
+    requested_professor: str = "",
+    requested_turma_codigo: str = "",
+    requested_turma_label: str = "",
+) -> Optional[Dict[str, Any]]:
+    if df.empty or "Data" not in df.columns:
+        return None
+
+    date_key = _normalize_date_key(date_value)
+    if not date_key:
+        return None
+
+    day_rows = df[df["Data"].apply(_normalize_date_key) == date_key]
+    if day_rows.empty:
+        return None
+
+    turma_codigo_key = _normalize_text_fold(_normalize_excel_string(requested_turma_codigo))
+    turma_label_key = _normalize_text_fold(_normalize_excel_string(requested_turma_label))
+
+    scoped_rows = day_rows
+    if turma_codigo_key or turma_label_key:
+        turma_codigo_col = day_rows["TurmaCodigo"].astype(str).map(
+            lambda value: _normalize_text_fold(_normalize_excel_string(value))
+        )
+        turma_label_col = day_rows["TurmaLabel"].astype(str).map(
+            lambda value: _normalize_text_fold(_normalize_excel_string(value))
+        )
+
+        import pandas as pd
+
+        scope_mask = pd.Series([True] * len(day_rows), index=day_rows.index)
+        if turma_codigo_key:
+            scope_mask = scope_mask & ((turma_codigo_col == turma_codigo_key) | (turma_codigo_col == ""))
+        if turma_label_key:
+            scope_mask = scope_mask & ((turma_label_col == turma_label_key) | (turma_label_col == ""))
+
+        scoped_rows = day_rows[scope_mask]
+
+    # Compatibilidade retroativa: se não houver escopo claro no histórico,
+    # volta para a regra diária para não quebrar leituras antigas.
+    if scoped_rows.empty:
+        scoped_rows = day_rows
+
+    baseline_row = _select_latest_pool_log_from_rows(scoped_rows, requested_horario)
+    if baseline_row is None:
+        return None
+
+    # Regra de sincronização: sempre retorna o log mais recente por escopo
+    # (dia/turma/horário), sem segmentar por professor/dispositivo.
+    return baseline_row
+
+
+def _pool_log_rollups(session: Session, group_column: Any, filters: List[Any]) -> List[PoolLogRollupOut]:
+    summary = PoolLogDailySummary
+    cancelled = summary.status_aula == "cancelada"
+    stats = session.exec(
+        select(
+            group_column,
+            func.count(),
+            func.min(summary.temp_piscina),
+            func.max(summary.temp_piscina),
+            func.avg(summary.temp_piscina),
+            func.min(summary.temp_externa),
+            func.max(summary.temp_externa),
+            func.avg(summary.temp_externa),
+            func.min(summary.cloro_ppm),
+            func.max(summary.cloro_ppm),
+            func.avg(summary.cloro_ppm),
+        )
+        .where(*filters)
+        .group_by(group_column)
+        .order_by(group_column)
+    ).all()
+
+    by_motivo: Dict[str, Dict[str, int]] = {}
+    for periodo, motivo, total in session.exec(
+        select(group_column, summary.motivo, func.count())
+        .where(*filters, cancelled)
+        .group_by(group_column, summary.motivo)
+    ).all():
+        by_motivo.setdefault(periodo, {})[motivo or "sem motivo"] = int(total)
+
+    def _round(value: Any) -> Optional[float]:
+        return None if value is None else round(float(value), 2)
+
+    result = []
+    for periodo, aulas, *values in stats:
+        motivos = by_motivo.get(periodo, {})
+        result.append(
+            PoolLogRollupOut(
+                periodo=periodo,
+                aulas=int(aulas),
+                tempPiscinaMin=_round(values[0]),
+                tempPiscinaMax=_round(values[1]),
+                tempPiscinaAvg=_round(values[2]),
+                tempExternaMin=_round(values[3]),
+                tempExternaMax=_round(values[4]),
+                tempExternaAvg=_round(values[5]),
+                cloroMin=_round(values[6]),
+                cloroMax=_round(values[7]),
+                cloroAvg=_round(values[8]),
+                canceladas=sum(motivos.values()),
+                canceladasPorMotivo=motivos,
+            )
+        )
+    return result
+
+
+@router.post("/pool-log")
+async def append_pool_log(entry: PoolLogEntryModel, session: AsyncSession = Depends(get_async_session)):
+    try:
+        os.makedirs(settings.DATA_DIR, exist_ok=True)
+        file_path = os.path.join(settings.DATA_DIR, "logPiscina.xlsx")
+        row = _pool_log_row_from_entry(entry)
+
+        rows = await _load_pool_log_day_rows(_normalize_date_key(entry.data), session)
+        try:
+            latest_for_day = await run_in_threadpool(
+                _latest_pool_log_for_day,
+                rows,
+                entry.data,
+                entry.horario,
+                entry.professor,
+                entry.turmaCodigo,
+                entry.turmaLabel,
+            )
+        except PermissionError:
+            raise HTTPException(status_code=423, detail="logPiscina.xlsx em uso. Feche o arquivo para salvar.")
+        if latest_for_day and _pool_log_meaningful_signature(latest_for_day) == _pool_log_meaningful_signature(row):
+            metrics.POOL_LOG_SAVES.inc(action="noop")
+            return {"ok": True, "action": "noop", "file": file_path}
+
+        action = "created"
+        db_saved = False
+        db_error = None
+        log_id = None
+
+        # Tentar salvar no banco PostgreSQL (mesma sessão/conexão da leitura acima)
+        try:
+            log_id = await session.run_sync(_store_pool_log_row, row)
+            db_saved = True
+        except Exception as e:
+            await session.rollback()
+            db_error = str(e)
+            print(f"[WARN] pool-log DB save failed: {db_error}")
+
+        # Espelho Excel é gravado em segundo plano (sempre enfileira, mesmo se banco falhar)
+        POOL_LOG_EXCEL_MIRROR.enqueue(file_path, row, log_id)
+        metrics.POOL_LOG_SAVES.inc(action=action)
+
+        # Se banco falhou, tentar avisar ao cliente
+        if not db_saved and db_error:
+            print(f"[WARN] Pool-log enfileirado para o Excel mas falhou no banco: {db_error}")
+
+        return {"ok": True, "action": action, "file": file_path, "db_saved": db_saved}
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"pool-log error: {exc}")
+
+
+@router.get("/pool-log")
+async def get_pool_log(
+    date: str,
+    turmaCodigo: Optional[str] = None,
+    turmaLabel: Optional[str] = None,
+    horario: Optional[str] = None,
+    professor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        rows = await _load_pool_log_day_rows(_normalize_date_key(date), session)
+        selected_row = await run_in_threadpool(
+            _latest_pool_log_for_day,
+            rows,
+            date,
+            horario or "",
+            professor or "",
+            turmaCodigo or "",
+            turmaLabel or "",
+        )
+        if selected_row is None:
+            return Response(status_code=204)
+
+        return _pool_log_row_as_response(selected_row)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"pool-log read error: {exc}")
+
+
+@router.get("/pool-log/summary", response_model=PoolLogSummaryOut)
+def get_pool_log_summary(
+    start: str,
+    end: str,
+    turmaCodigo: Optional[str] = None,
+    turmaLabel: Optional[str] = None,
+    horario: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    start_key = _normalize_date_key(start)
+    end_key = _normalize_date_key(end)
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", start_key) or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", end_key):
+        raise HTTPException(status_code=400, detail="start/end must be valid dates")
+    if start_key > end_key:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    filters: List[Any] = [PoolLogDailySummary.data >= start_key, PoolLogDailySummary.data <= end_key]
+    codigo_key = _normalize_text_fold(turmaCodigo or "")
+    label_key = _normalize_text_fold(turmaLabel or "")
+    if codigo_key:
+        filters.append(PoolLogDailySummary.turma_key == codigo_key)
+    elif label_key:
+        # turma_key guarda o código quando existe; só com a label, casa também turma_label_key.
+        filters.append(or_(PoolLogDailySummary.turma_key == label_key, PoolLogDailySummary.turma_label_key == label_key))
+    horario_key = _normalize_horario_key(horario or "")
+    if horario_key:
+        filters.append(PoolLogDailySummary.horario == horario_key)
+
+    return PoolLogSummaryOut(
+        start=start_key,
+        end=end_key,
+        daily=_pool_log_rollups(session, PoolLogDailySummary.data, filters),
+        monthly=_pool_log_rollups(session, PoolLogDailySummary.mes, filters),
+    )
+
+
+@router.get("/pool-log/export")
+def export_pool_log(rebuild: bool = False):
+    file_path = os.path.join(settings.DATA_DIR, "logPiscina.xlsx")
+    try:
+        if rebuild or not os.path.exists(file_path) or POOL_LOG_EXCEL_MIRROR.needs_rebuild(file_path):
+            _rebuild_pool_log_excel_from_db(file_path)
+        else:
+            POOL_LOG_EXCEL_MIRROR.flush()
+            if POOL_LOG_EXCEL_MIRROR.pending_count(file_path):
+                raise PermissionError(POOL_LOG_EXCEL_MIRROR.last_error)
+    except PermissionError:
+        raise HTTPException(status_code=423, detail="logPiscina.xlsx em uso. Feche o arquivo para exportar.")
+    return FileResponse(
+        file_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename="logPiscina.xlsx",
+    )
@@ -0,0 +1,817 @@
+"""Monthly attendance reports, report filters and the statistics page."""
+
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlmodel import Session, select
+
+from app import models, settings, student_registry
+from app.academic_calendar import ACADEMIC_CALENDAR
+from app.attendance_logs import _latest_attendance_logs_from_db, _latest_attendance_logs_from_journal
+from app.catalog import _get_import_class_catalog
+from app.database import get_session, session_scope
+from app.exclusions_state import _exclusion_records_match, _read_exclusions_state
+from app.normalize import (
+    _infer_schedule_group,
+    _map_attendance_value,
+    _normalize_date_key,
+    _normalize_horario_key,
+    _normalize_text,
+    _normalize_text_fold,
+    _repair_mojibake_text,
+    _saved_at_sort_key,
+)
+from app.schemas import LevelHistoryOut, ReportClass, ReportsFilterOut, ReportStudent, StudentStatisticsOut
+from app.storage import _attendance_journal_segments, _load_attendance_journal
+from app.student_registry import (
+    _ensure_student_uid_for_student,
+    _load_student_uid_registry,
+    _save_student_uid_registry,
+)
+
+router = APIRouter()
+
+
+def _to_proper_case(value: Optional[str]) -> str:
+    raw = _repair_mojibake_text(value).strip()
+    if not raw:
+        return ""
+
+    lower_particles = {"da", "de", "do", "das", "dos", "e"}
+    tokens = re.split(r"(\s+)", raw)
+    words: List[str] = []
+    word_index = 0
+
+    for token in tokens:
+        if token.isspace() or token == "":
+            words.append(token)
+            continue
+
+        chunk_parts = re.split(r"([-'])", token)
+        rebuilt: List[str] = []
+        local_word = ""
+        for part in chunk_parts:
+            if part in {"-", "'"}:
+                rebuilt.append(part)
+                continue
+            piece = part.strip()
+            if not piece:
+                rebuilt.append(part)
+                continue
+            p = piece.lower()
+            if word_index > 0 and p in lower_particles:
+                local_word = p
+            else:
+                local_word = p[:1].upper() + p[1:]
+            rebuilt.append(local_word)
+        words.append("".join(rebuilt))
+        word_index += 1
+
+    return "".join(words)
+
+
+def _exclusion_matches_class(entry: Dict[str, Any], cls: models.ImportClass) -> bool:
+
+    cls_codigo = _normalize_text(cls.codigo or "")
+    cls_label = _normalize_text(cls.turma_label or cls.codigo or "")
+    cls_horario = _normalize_horario_key(cls.horario or "")
+    cls_professor = _normalize_text(cls.professor or "")
+
+    ex_codigo = _normalize_text(entry.get("turmaCodigo") or entry.get("TurmaCodigo") or "")
+    ex_label = _normalize_text(
+        entry.get("turmaLabel")
+        or entry.get("TurmaLabel")
+        or entry.get("turma")
+        or entry.get("Turma")
+        or ""
+    )
+    ex_horario = _normalize_horario_key(entry.get("horario") or entry.get("Horario") or "")
+    ex_professor = _normalize_text(entry.get("professor") or entry.get("Professor") or "")
+
+    if ex_codigo and ex_codigo not in {cls_codigo, cls_label}:
+        return False
+    if ex_label and ex_label not in {cls_label, cls_codigo}:
+        return False
+    if ex_horario and cls_horario and ex_horario != cls_horario:
+        return False
+    if ex_professor and cls_professor and ex_professor != cls_professor:
+        return False
+    return True
+
+
+def _build_report_student_identity(
+    student: models.ImportStudent,
+    cls: models.ImportClass,
+    student_uid: str = "",
+) -> Dict[str, Any]:
+    turma_codigo = str(cls.codigo or "").strip()
+    turma_label = str(cls.turma_label or cls.codigo or "").strip()
+    return {
+        "id": str(student.id or "").strip(),
+        "student_uid": str(student_uid or "").strip(),
+        "nome": str(student.nome or "").strip(),
+        "turma": turma_label,
+        "turmaLabel": turma_label,
+        "turmaCodigo": turma_codigo,
+        "grupo": turma_codigo,
+        "horario": str(cls.horario or "").strip(),
+        "professor": str(cls.professor or "").strip(),
+    }
+
+
+def _is_student_excluded_for_report(
+    student: models.ImportStudent,
+    cls: models.ImportClass,
+    exclusions: List[Dict[str, Any]],
+    student_uid: str = "",
+) -> bool:
+    student_payload = _build_report_student_identity(student, cls, student_uid=student_uid)
+    return any(
+        _exclusion_matches_class(entry, cls)
+        and _exclusion_records_match(entry, student_payload)
+        for entry in exclusions
+    )
+
+
+def _report_day_key(date_value: str) -> str:
+    if not date_value:
+        return ""
+    parts = str(date_value).split("-")
+    if len(parts) >= 3:
+        return parts[2].zfill(2)
+    return str(date_value).strip()
+
+
+def _load_latest_attendance_logs(
+    month: Optional[str] = None, session: Optional[Session] = None
+) -> Dict[str, Dict[str, Any]]:
+    # DB-first: lê do Supabase/PostgreSQL
+    try:
+        with session_scope(session) as _db:
+            latest = _latest_attendance_logs_from_db(_db, month)
+        if latest is not None:
+            return latest
+    except Exception:
+        if session is not None:
+            session.rollback()
+    return _latest_attendance_logs_from_journal(month)
+
+
+@router.get("/filters", response_model=ReportsFilterOut)
+def get_report_filters(session: Session = Depends(get_session)) -> ReportsFilterOut:
+    classes = _get_import_class_catalog(session).classes
+    turmas = sorted({(c.turma_label or c.codigo or "").strip() for c in classes if (c.turma_label or c.codigo)})
+    horarios = sorted({(c.horario or "").strip() for c in classes if c.horario})
+    professores = sorted({(c.professor or "").strip() for c in classes if c.professor})
+
+    months = [month for month, _ in _attendance_journal_segments() if month]
+    years = sorted({m.split("-")[0] for m in months if "-" in m})
+    return ReportsFilterOut(turmas=turmas, horarios=horarios, professores=professores, meses=months, anos=years)
+
+
+@router.get("/reports", response_model=List[ReportClass])
+def get_reports(month: Optional[str] = None, session: Session = Depends(get_session)) -> List[ReportClass]:
+    classes = _get_import_class_catalog(session).classes
+    students = session.exec(select(models.ImportStudent)).all()
+    excluded_items = _read_exclusions_state(clean=True, session=session)
+    uid_registry = _load_student_uid_registry()
+    uid_registry_changed = False
+
+    students_by_class: Dict[int, List[models.ImportStudent]] = {}
+    for student in students:
+        students_by_class.setdefault(student.class_id, []).append(student)
+
+    latest_logs = _load_latest_attendance_logs(month, session)
+    report: List[ReportClass] = []
+
+    for cls in classes:
+        turma_key = (cls.codigo or cls.turma_label or "").strip()
+        turma_label = (cls.turma_label or cls.codigo or "").strip()
+        horario = (cls.horario or "").strip()
+        professor = (cls.professor or "").strip()
+
+        horario_digits = "".join(ch for ch in horario if ch.isdigit())
+        horario_variants = [h for h in [horario, horario_digits, f"{horario_digits[:2]}:{horario_digits[2:4]}" if len(horario_digits) >= 4 else ""] if h]
+        professor_variants = [p for p in [professor, _normalize_text(professor)] if p]
+        if not horario_variants:
+            horario_variants = [""]
+        if not professor_variants:
+            professor_variants = [""]
+
+        turma_variants = [t for t in [turma_label, _normalize_text(turma_label)] if t]
+        composite_keys: List[str] = []
+        if turma_key:
+            for h in horario_variants:
+                for p in professor_variants:
+                    composite_keys.append(f"codigo|{turma_key}|{h}|{p}")
+        for turma_candidate in turma_variants:
+            for h in horario_variants:
+                for p in professor_variants:
+                    composite_keys.append(f"label|{turma_candidate}|{h}|{p}")
+
+        log_entry = None
+        for key in composite_keys:
+            log_entry = latest_logs.get(key)
+            if log_entry:
+                break
+
+        class_roster = students_by_class.get(cls.id, [])
+        name_to_student_meta: Dict[str, Dict[str, str]] = {}
+        excluded_names = set()
+
+        for student in class_roster:
+            student_uid, changed = _ensure_student_uid_for_student(student, registry=uid_registry)
+            uid_registry_changed = uid_registry_changed or changed
+            normalized_name = _normalize_text(student.nome)
+            if normalized_name and normalized_name not in name_to_student_meta:
+                name_to_student_meta[normalized_name] = {
+                    "id": str(student.id),
+                    "student_uid": student_uid,
+                }
+            if _is_student_excluded_for_report(student, cls, excluded_items, student_uid=student_uid):
+                excluded_names.add(normalized_name)
+
+        class_students: List[ReportStudent] = []
+
+        if log_entry:
+            allowed_names = {
+                _normalize_text(student.nome)
+                for student in class_roster
+                if str(student.nome or "").strip()
+            }
+            registros = log_entry.get("registros") or []
+            for record in registros:
+                nome = str(record.get("aluno_nome") or "").strip()
+                normalized_name = _normalize_text(nome)
+                if allowed_names and normalized_name not in allowed_names:
+                    continue
+                if normalized_name in excluded_names:
+                    continue
+                attendance = record.get("attendance") or {}
+                presencas = 0
+                faltas = 0
+                justificativas = 0
+                historico: Dict[str, str] = {}
+                for date_key, value in attendance.items():
+                    mapped = _map_attendance_value(str(value))
+                    if mapped == "c":
+                        presencas += 1
+                    elif mapped == "f":
+                        faltas += 1
+                    elif mapped == "j":
+                        justificativas += 1
+                    day_key = _report_day_key(date_key)
+                    if day_key:
+                        historico[day_key] = mapped
+
+                justifications_raw = record.get("justifications") or {}
+                justifications: Dict[str, str] = {}
+                if isinstance(justifications_raw, dict):
+                    for date_key, reason in justifications_raw.items():
+                        normalized_date = _normalize_date_key(date_key)
+                        normalized_reason = str(reason or "").strip()
+                        if normalized_date and normalized_reason:
+                            justifications[normalized_date] = normalized_reason
+
+                notes_raw = record.get("notes") or []
+                notes: List[str] = []
+                if isinstance(notes_raw, list):
+                    notes = [str(note or "").strip() for note in notes_raw if str(note or "").strip()]
+
+                total = presencas + faltas + justificativas
+                frequencia = round(((presencas + justificativas) / total) * 100, 1) if total else 0.0
+                student_meta = name_to_student_meta.get(normalized_name, {})
+                class_students.append(
+                    ReportStudent(
+                        id=student_meta.get("id") or nome or "0",
+                        student_uid=student_meta.get("student_uid") or None,
+                        nome=_to_proper_case(nome),
+                        presencas=presencas,
+                        faltas=faltas,
+                        justificativas=justificativas,
+                        frequencia=frequencia,
+                        historico=historico,
+                        justifications=justifications,
+                        notes=notes,
+                    )
+                )
+        else:
+            for student in class_roster:
+                normalized_name = _normalize_text(student.nome)
+                if normalized_name in excluded_names:
+                    continue
+                student_meta = name_to_student_meta.get(normalized_name, {})
+                class_students.append(
+                    ReportStudent(
+                        id=str(student.id),
+                        student_uid=student_meta.get("student_uid") or None,
+                        nome=_to_proper_case(student.nome),
+                        presencas=0,
+                        faltas=0,
+                        justificativas=0,
+                        frequencia=0.0,
+                        historico={},
+                        justifications={},
+                        notes=[],
+                    )
+                )
+
+        class_students.sort(key=lambda s: s.nome)
+        report.append(
+            ReportClass(
+                turma=turma_label or turma_key,
+                turmaCodigo=cls.codigo or "",
+                horario=cls.horario or "",
+                professor=cls.professor or "",
+                nivel=cls.nivel or "",
+                hasLog=bool(log_entry),
+                alunos=class_students,
+            )
+        )
+
+    report.sort(key=lambda c: (c.turma, c.horario))
+    if uid_registry_changed:
+        _save_student_uid_registry(uid_registry)
+    return report
+
+
+@router.post("/reports")
+def generate_report(payload: Dict[str, Any], session: Session = Depends(get_session)):
+    month = str(payload.get("month") or payload.get("mes") or "").strip() or None
+    return get_reports(month=month, session=session)
+
+
+@router.post("/reports/consolidated")
+def generate_consolidated_report(payload: Dict[str, Any], session: Session = Depends(get_session)):
+    return generate_report(payload, session=session)
+
+
+@router.post("/reports/excel")
+def generate_excel_report(payload: Dict[str, Any], session: Session = Depends(get_session)):
+    return generate_report(payload, session=session)
+
+
+@router.get("/reports/debug-last")
+def get_last_report_debug():
+    """Temporary: returns the last debug log entry written by PDF generation (if any)."""
+    debug_path = os.path.join(settings.DATA_DIR, "exports", "report_debug_logs.jsonl")
+    if not os.path.exists(debug_path):
+        return {"ok": False, "detail": "no debug log found"}
+    try:
+        with open(debug_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return {"ok": False, "detail": "no entries"}
+        last = json.loads(lines[-1])
+        return {"ok": True, "last": last}
+    except Exception as e:
+        return {"ok": False, "detail": str(e)}
+
+
+# --- Statistics aggregation endpoint ---
+@router.get("/reports/statistics", response_model=List[StudentStatisticsOut])
+def get_reports_statistics(session: Session = Depends(get_session)):
+    """Aggregate per-student retention and per-level permanence from attendance logs.
+
+    - firstPresence: primeira data com registro de presença ('Presente' ou 'Justificado').
+    - retention: dias entre firstPresence e data de exclusão (se houver) ou hoje.
+    - levels: para cada nível onde o aluno teve registros, retorna período e frequência.
+
+    Nota: identificação de aluno é por nome normalizado (mesmo critério usado em relatórios atuais).
+    """
+    # load classes to map turmaCodigo/turmaLabel -> nivel
+    overrides_applied = student_registry._apply_transfer_overrides(session)
+    if overrides_applied > 0:
+        session.commit()
+
+    catalog = _get_import_class_catalog(session)
+    class_by_code = catalog.by_codigo_raw
+    class_by_label_norm = catalog.by_label_fold
+    class_by_triple = catalog.by_triple_fold
+
+    # map current active class level by student name from import tables (source of truth for current allocation)
+    active_level_by_name: Dict[str, Dict[str, Any]] = {}
+    import_students = session.exec(select(models.ImportStudent)).all()
+    class_by_id = catalog.by_id
+    for st in import_students:
+        nome_raw = str(getattr(st, "nome", "") or "").strip()
+        if not nome_raw:
+            continue
+        name_key = _normalize_text_fold(nome_raw)
+        cls = class_by_id.get(int(st.class_id)) if getattr(st, "class_id", None) else None
+        nivel_raw = str(getattr(cls, "nivel", "") or "").strip() if cls else ""
+        candidate = {
+            "nivel": nivel_raw,
+            "student_id": int(getattr(st, "id", 0) or 0),
+            "class_id": int(getattr(st, "class_id", 0) or 0),
+            "dias_semana": str(getattr(cls, "dias_semana", "") or "") if cls else "",
+            "turma_label": str(getattr(cls, "turma_label", "") or "") if cls else "",
+            "codigo": str(getattr(cls, "codigo", "") or "") if cls else "",
+            "data_nascimento": str(getattr(st, "data_nascimento", "") or ""),
+            "nome": _to_proper_case(nome_raw),
+        }
+        existing = active_level_by_name.get(name_key)
+        if not existing:
+            active_level_by_name[name_key] = candidate
+            continue
+        # prefer entries with level, and then the latest import student id
+        existing_has_level = bool(str(existing.get("nivel") or "").strip())
+        candidate_has_level = bool(nivel_raw)
+        if (candidate_has_level and not existing_has_level) or (
+            candidate_has_level == existing_has_level and candidate["student_id"] >= int(existing.get("student_id") or 0)
+        ):
+            active_level_by_name[name_key] = candidate
+
+    # load all attendance log entries (sorted to let the newest snapshot win)
+    items = _load_attendance_journal()
+    items = sorted(items, key=lambda item: _saved_at_sort_key((item or {}).get("saved_at")))
+
+    today = datetime.utcnow().date()
+    class_day_index = ACADEMIC_CALENDAR.class_days(today, session)
+
+    students: Dict[str, Dict[str, Any]] = {}
+
+    def _ensure_student(name: str):
+        key = _normalize_text_fold(name)
+        if key not in students:
+            students[key] = {
+                "nome": _to_proper_case(name),
+                "ids": set(),
+                "attendance_by_date": {},  # date -> { status, nivel, turmaCodigo }
+                "per_level": {},
+                "event_by_key": {},  # deduped event map
+                "first_presence": None,
+                "last_presence": None,
+                "exclusion_date": None,
+            }
+        return students[key]
+
+    # iterate logs (order not guaranteed) — process dates in each registro
+    for item in items:
+        turma_codigo = str(item.get("turmaCodigo") or "").strip()
+        turma_label = str(item.get("turmaLabel") or "").strip()
+        turma_horario = _normalize_horario_key(item.get("horario") or "")
+        turma_professor = _normalize_text(item.get("professor") or "")
+        schedule_group = _infer_schedule_group(turma_label, turma_codigo)
+        # resolve nivel from import classes
+        nivel = ""
+        cls = None
+        ambiguous_level = False
+        class_triple_key = (
+            _normalize_text_fold(turma_label),
+            turma_horario,
+            turma_professor,
+        )
+
+        # Prefer class code when available (historically more stable than generic labels).
+        if turma_codigo and turma_codigo in class_by_code:
+            cls = class_by_code.get(turma_codigo)
+        elif class_triple_key in class_by_triple:
+            triple_candidates = class_by_triple.get(class_triple_key) or []
+            if len(triple_candidates) == 1:
+                cls = triple_candidates[0]
+            elif len(triple_candidates) > 1:
+                ambiguous_level = True
+        elif turma_label:
+            cls = class_by_label_norm.get(_normalize_text_fold(turma_label))
+
+        # Generic day labels without class code can map to multiple levels over time.
+        if not turma_codigo and schedule_group in {"tq", "qs"}:
+            ambiguous_level = True
+
+        if cls:
+            nivel = str(cls.nivel or "")
+
+        registros = item.get("registros") or []
+        for record in registros:
+            nome = str(record.get("aluno_nome") or "").strip()
+            if not nome:
+                continue
+            st = _ensure_student(nome)
+            attendance_map = record.get("attendance") or {}
+            # iterate dates in chronological order
+            for date_key in sorted(attendance_map.keys()):
+                raw = str(attendance_map.get(date_key) or "").strip()
+                mapped = _map_attendance_value(raw)
+                # keep records for frequency calculation even if empty (we'll skip empty)
+                if not date_key:
+                    continue
+                # ignore empty markers
+                if mapped == "":
+                    continue
+                try:
+                    parsed_d = datetime.strptime(date_key, "%Y-%m-%d").date()
+                except Exception:
+                    continue
+
+                # dedupe snapshots: same student/day/schedule should count once (latest wins)
+                if schedule_group in {"tq", "qs"}:
+                    event_key = (date_key, schedule_group, turma_horario, turma_professor)
+                else:
+                    event_key = (
+                        date_key,
+                        _normalize_text(turma_codigo or turma_label),
+                        turma_horario,
+                        turma_professor,
+                    )
+
+                st["event_by_key"][event_key] = {
+                    "date": parsed_d,
+                    "status": mapped,
+                    "nivel": nivel or "(sem-nivel)",
+                    "ambiguous_level": bool(ambiguous_level),
+                }
+
+    # build per-student aggregates from deduped events
+    for student_key, st in students.items():
+        st["attendance_by_date"] = {}
+        st["per_level"] = {}
+        st["first_presence"] = None
+        st["last_presence"] = None
+
+        active_level_for_student = str((active_level_by_name.get(student_key) or {}).get("nivel") or "").strip()
+
+        deduped_events = sorted(
+            st.get("event_by_key", {}).values(),
+            key=lambda event: event.get("date") or date.min,
+        )
+
+        for event in deduped_events:
+            parsed_d = event.get("date")
+            if not parsed_d:
+                continue
+            date_key = parsed_d.isoformat()
+            mapped = str(event.get("status") or "")
+            level_key = str(event.get("nivel") or "(sem-nivel)")
+            if (level_key == "(sem-nivel)" or bool(event.get("ambiguous_level"))) and active_level_for_student:
+                level_key = active_level_for_student
+
+            st["attendance_by_date"][date_key] = {
+                "status": mapped,
+                "nivel": level_key,
+                "turmaCodigo": "",
+            }
+
+            if mapped in {"c", "j"}:
+                if st["first_presence"] is None or parsed_d < st["first_presence"]:
+                    st["first_presence"] = parsed_d
+                if st["last_presence"] is None or parsed_d > st["last_presence"]:
+                    st["last_presence"] = parsed_d
+
+            lvl = st["per_level"].setdefault(level_key, {
+                "first": None,
+                "last": None,
+                "presencas": 0,
+                "faltas": 0,
+                "justificativas": 0,
+            })
+
+            if lvl["first"] is None or parsed_d < lvl["first"]:
+                lvl["first"] = parsed_d
+            if lvl["last"] is None or parsed_d > lvl["last"]:
+                lvl["last"] = parsed_d
+
+            if mapped == "c":
+                lvl["presencas"] += 1
+            elif mapped == "f":
+                lvl["faltas"] += 1
+            elif mapped == "j":
+                lvl["justificativas"] += 1
+
+    # load exclusions
+    excluded = _read_exclusions_state(clean=True, session=session)
+    for ex in excluded:
+        nome = str(ex.get("nome") or "").strip()
+        if not nome:
+            continue
+        key = _normalize_text_fold(nome)
+        if key not in students:
+            students[key] = {"nome": _to_proper_case(nome), "ids": set(), "attendance_by_date": {}, "per_level": {}, "event_by_key": {}, "first_presence": None, "last_presence": None, "exclusion_date": None}
+        date_str = str(ex.get("dataExclusao") or "").strip()
+        if date_str:
+            try:
+                parsed = datetime.strptime(date_str, "%d/%m/%Y").date()
+                students[key]["exclusion_date"] = parsed
+            except Exception:
+                # keep as None on parse failure
+                pass
+
+    # build output list
+    out: List[Dict[str, Any]] = []
+    for key, st in sorted(students.items(), key=lambda t: t[1]["nome"].lower()):
+        first = st.get("first_presence")
+        last = st.get("last_presence")
+        exclusion = st.get("exclusion_date")
+        end_date = exclusion or today
+        retention_days = 0
+        if first and end_date:
+            retention_days = max(0, (end_date - first).days)
+        # determine current nivel: prefer active student allocation in import tables, fallback to latest attendance history
+        current_nivel = None
+        active_entry = active_level_by_name.get(key)
+        if active_entry:
+            resolved_active_level = str(active_entry.get("nivel") or "").strip()
+            if resolved_active_level and resolved_active_level != "(sem-nivel)":
+                current_nivel = resolved_active_level
+
+        if not current_nivel and st.get("per_level"):
+            candidates = [(k, v["last"]) for k, v in st["per_level"].items() if v.get("last")]
+            if candidates:
+                candidates.sort(key=lambda x: x[1], reverse=True)
+                current_nivel = candidates[0][0]
+                if current_nivel == "(sem-nivel)":
+                    current_nivel = None
+
+        def _find_level_values(level_name: str) -> Optional[Dict[str, Any]]:
+            if not level_name:
+                return None
+            exact = st.get("per_level", {}).get(level_name)
+            if exact:
+                return exact
+            normalized_target = _normalize_text(level_name)
+            for stored_level_name, stored_values in st.get("per_level", {}).items():
+                if _normalize_text(stored_level_name) == normalized_target:
+                    return stored_values
+            return None
+
+        def _schedule_group_from_active_entry(entry: Dict[str, Any]) -> str:
+            dias_semana = _normalize_text_fold(str(entry.get("dias_semana") or ""))
+            if ("terca" in dias_semana and "quinta" in dias_semana) or "tq" in dias_semana:
+                return "tq"
+            if ("quarta" in dias_semana and "sexta" in dias_semana) or "qs" in dias_semana:
+                return "qs"
+            return _infer_schedule_group(str(entry.get("turma_label") or ""), str(entry.get("codigo") or ""))
+
+        def _count_planned_days(entry: Dict[str, Any], start_date: date, end_date: date) -> int:
+            if not start_date or not end_date or start_date > end_date:
+                return 0
+            group = _schedule_group_from_active_entry(entry)
+            if group not in {"tq", "qs"}:
+                return 0
+            return class_day_index.count(group, start_date, end_date)
+
+        # Merge stray Adult buckets into current non-adult level before rendering levels list.
+        if current_nivel and "adult" not in _normalize_text_fold(current_nivel):
+            adult_bucket_keys = [
+                lvl_name
+                for lvl_name in list(st.get("per_level", {}).keys())
+                if "adult" in _normalize_text_fold(lvl_name)
+            ]
+            if adult_bucket_keys:
+                target_bucket = st.setdefault("per_level", {}).setdefault(current_nivel, {
+                    "first": None,
+                    "last": None,
+                    "presencas": 0,
+                    "faltas": 0,
+                    "justificativas": 0,
+                })
+                for adult_key in adult_bucket_keys:
+                    adult_bucket = st.get("per_level", {}).get(adult_key) or {}
+                    adult_first = adult_bucket.get("first")
+                    adult_last = adult_bucket.get("last")
+                    if adult_first and (target_bucket.get("first") is None or adult_first < target_bucket.get("first")):
+                        target_bucket["first"] = adult_first
+                    if adult_last and (target_bucket.get("last") is None or adult_last > target_bucket.get("last")):
+                        target_bucket["last"] = adult_last
+                    target_bucket["presencas"] = int(target_bucket.get("presencas") or 0) + int(adult_bucket.get("presencas") or 0)
+                    target_bucket["faltas"] = int(target_bucket.get("faltas") or 0) + int(adult_bucket.get("faltas") or 0)
+                    target_bucket["justificativas"] = int(target_bucket.get("justificativas") or 0) + int(adult_bucket.get("justificativas") or 0)
+                    st.get("per_level", {}).pop(adult_key, None)
+
+        # build levels array
+        levels_out: List[LevelHistoryOut] = []
+        for lvl_name, vals in st.get("per_level", {}).items():
+            first_d = vals.get("first")
+            last_d = vals.get("last")
+            pres = int(vals.get("presencas") or 0)
+            falt = int(vals.get("faltas") or 0)
+            just = int(vals.get("justificativas") or 0)
+            total = pres + falt + just
+            freq = round(((pres + just) / total) * 100, 1) if total else 0.0
+            days = 0
+            if first_d and last_d:
+                days = max(0, (last_d - first_d).days + 1)
+            name_out = None if lvl_name == "(sem-nivel)" else lvl_name
+            levels_out.append(LevelHistoryOut(
+                nivel=name_out or "",
+                firstDate=first_d.isoformat() if first_d else None,
+                lastDate=last_d.isoformat() if last_d else None,
+                days=days,
+                presencas=pres,
+                faltas=falt,
+                justificativas=just,
+                frequencia=freq,
+            ))
+
+        if current_nivel:
+            active_entry = active_level_by_name.get(key) or {}
+            current_key = _normalize_text(current_nivel)
+            current_first = None
+            current_last = None
+            current_pres = 0
+            current_falt = 0
+            current_just = 0
+            current_total_days = 0
+
+            def _aggregate_all_levels() -> Dict[str, Any]:
+                agg_first = None
+                agg_last = None
+                agg_pres = 0
+                agg_falt = 0
+                agg_just = 0
+                for lvl_name, vals in st.get("per_level", {}).items():
+                    if lvl_name == "(sem-nivel)":
+                        continue
+                    lvl_first = vals.get("first")
+                    lvl_last = vals.get("last")
+                    if lvl_first and (agg_first is None or lvl_first < agg_first):
+                        agg_first = lvl_first
+                    if lvl_last and (agg_last is None or lvl_last > agg_last):
+                        agg_last = lvl_last
+                    agg_pres += int(vals.get("presencas") or 0)
+                    agg_falt += int(vals.get("faltas") or 0)
+                    agg_just += int(vals.get("justificativas") or 0)
+                return {
+                    "first": agg_first,
+                    "last": agg_last,
+                    "presencas": agg_pres,
+                    "faltas": agg_falt,
+                    "justificativas": agg_just,
+                }
+
+            current_level_vals = _find_level_values(current_nivel)
+            current_first = current_level_vals.get("first") if current_level_vals else None
+            current_last = current_level_vals.get("last") if current_level_vals else None
+
+            if current_first is None:
+                previous_last_dates = [vals.get("last") for lvl, vals in st.get("per_level", {}).items() if _normalize_text(lvl) != current_key and vals.get("last")]
+                current_first = (max(previous_last_dates) + timedelta(days=1)) if previous_last_dates else first
+
+            current_last = current_last or end_date
+
+            # Count all recorded events in the current period, regardless of the bucket that produced them.
+            period_entries = [
+                entry
+                for date_key, entry in st.get("attendance_by_date", {}).items()
+                if date_key and current_first and current_last and current_first.isoformat() <= date_key <= current_last.isoformat()
+            ]
+            current_pres = sum(1 for entry in period_entries if str(entry.get("status") or "") == "c")
+            current_falt = sum(1 for entry in period_entries if str(entry.get("status") or "") == "f")
+            current_just = sum(1 for entry in period_entries if str(entry.get("status") or "") == "j")
+            current_total_days = current_pres + current_falt + current_just
+
+            if current_total_days == 0 and current_level_vals:
+                current_pres = int(current_level_vals.get("presencas") or 0)
+                current_falt = int(current_level_vals.get("faltas") or 0)
+                current_just = int(current_level_vals.get("justificativas") or 0)
+                current_total_days = current_pres + current_falt + current_just
+
+            if current_total_days == 0:
+                aggregate_vals = _aggregate_all_levels()
+                current_first = aggregate_vals.get("first") or current_first or first
+                current_last = aggregate_vals.get("last") or current_last or end_date
+                current_pres = int(aggregate_vals.get("presencas") or 0)
+                current_falt = int(aggregate_vals.get("faltas") or 0)
+                current_just = int(aggregate_vals.get("justificativas") or 0)
+                current_total_days = current_pres + current_falt + current_just
+
+            if current_total_days < 0:
+                current_total_days = 0
+
+            current_frequency = round(((current_pres + current_just) / current_total_days) * 100, 1) if current_total_days else 0.0
+            current_entry = LevelHistoryOut(
+                nivel=current_nivel,
+                firstDate=current_first.isoformat() if current_first else None,
+                lastDate=current_last.isoformat() if current_last else None,
+                days=current_total_days,
+                presencas=current_pres,
+                faltas=current_falt,
+                justificativas=current_just,
+                frequencia=current_frequency,
+            )
+
+            replaced = False
+            for idx, entry in enumerate(levels_out):
+                if _normalize_text(entry.nivel or "") == current_key:
+                    levels_out[idx] = current_entry
+                    replaced = True
+                    break
+            if not replaced:
+                levels_out.append(current_entry)
+
+        levels_out.sort(key=lambda lvl: (lvl.lastDate or "", lvl.firstDate or ""), reverse=True)
+        out.append(StudentStatisticsOut(
+            id=None,
+            nome=_to_proper_case(st.get("nome") or key),
+            firstPresence=first.isoformat() if first else None,
+            lastPresence=last.isoformat() if last else None,
+            exclusionDate=exclusion.isoformat() if exclusion else None,
+            retentionDays=retention_days,
+            currentNivel=current_nivel,
+            levels=levels_out,
+        ))
+    return out
@@ -0,0 +1,48 @@
+"""Legacy CRUD routes for students, classes and attendance (app.crud)."""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, select
+
+from app import crud, models
+from app.database import get_session
+
+router = APIRouter()
+
+
+# Data endpoints
+@router.get("/students", response_model=List[models.Student])
+def list_students(limit: int = 100, session: Session = Depends(get_session)):
+    return crud.get_students(session, limit)
+
+@router.post("/students", response_model=models.Student)
+def add_student(student: models.Student, session: Session = Depends(get_session)):
+    return crud.create_student(session, student)
+
+@router.delete("/students/{student_id}")
+def delete_student(student_id: int, session: Session = Depends(get_session)):
+    student = session.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    session.delete(student)
+    session.commit()
+    return {"ok": True}
+
+@router.get("/classes", response_model=List[models.ClassModel])
+def list_classes(session: Session = Depends(get_session)):
+    return crud.get_classes(session)
+
+@router.post("/classes", response_model=models.ClassModel)
+def add_class(class_model: models.ClassModel, session: Session = Depends(get_session)):
+    return crud.create_class(session, class_model)
+
+
+@router.get("/attendance", response_model=List[models.Attendance])
+def list_attendance(session: Session = Depends(get_session)):
+    statement = session.exec(select(models.Attendance))
+    return statement.all()
+
+@router.post("/attendance", response_model=models.Attendance)
+def add_attendance(attendance: models.Attendance, session: Session = Depends(get_session)):
+    return crud.create_attendance(session, attendance)
@@ -0,0 +1,63 @@
+"""Service routes: health, Prometheus metrics, environment info, file download and debug listings."""
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlmodel import Session, select
+
+from app import metrics, models, settings
+from app.database import get_session
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    return {"status": "ok", "reports_runtime_version": settings.REPORTS_RUNTIME_VERSION}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Assíncrona de propósito: amostra o limiter do threadpool sem ocupar um slot dele.
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/environment")
+def environment_info():
+    return {
+        "env_name": settings.ENV_NAME,
+        "unit_name": settings.UNIT_NAME,
+        "access_mode": settings.ACCESS_MODE or "unit",
+    }
+
+
+# File download endpoint
+@router.get("/files/{filename}")
+def download_file(filename: str):
+    path = os.path.join(settings.DATA_DIR, filename)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename=filename)
+
+
+# DEBUG ONLY: List unallocated students (debug endpoint)
+@router.get("/debug/unallocated-students")
+def debug_unallocated_students(session: Session = Depends(get_session)):
+    """Returns students with no class_id (unallocated/pending)"""
+    unallocated = session.exec(
+        select(models.ImportStudent).where(models.ImportStudent.class_id == None)
+    ).all()
+    return {
+        "count": len(unallocated),
+        "students": [
+            {
+                "id": s.id,
+                "nome": s.nome,
+                "class_id": s.class_id,
+                "genero": s.genero,
+                "whatsapp": s.whatsapp,
+            }
+            for s in unallocated
+        ],
+    }
@@ -0,0 +1,58 @@
+"""Weather for a class day (/weather) and the snapshots export."""
+
+import re
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import weather
+from app.database import get_async_session, get_session
+from app.weather import (
+    WEATHER_MISS_WAIT_SECONDS,
+    _load_weather_snapshot_async,
+    _load_weather_snapshots,
+    _weather_snapshot_response,
+)
+
+router = APIRouter()
+
+
+@router.get("/weather")
+async def get_weather(date: str, session: AsyncSession = Depends(get_async_session)):
+    # Async: num cache miss a espera pelo CPTEC (até WEATHER_MISS_WAIT) não prende um worker do threadpool.
+    requested_date = str(date or "").strip()
+    snapshot = await _load_weather_snapshot_async(session, requested_date)
+    if isinstance(snapshot, dict):
+        return _weather_snapshot_response(snapshot)
+
+    # Para datas passadas sem snapshot salvo, a previsão de 7 dias nunca terá o dia.
+    today_iso = datetime.utcnow().date().isoformat()
+    if requested_date and requested_date < today_iso:
+        return {"temp": "", "condition": "", "conditionCode": "", "source": "unavailable"}
+
+    forecast = await weather.WEATHER_SERVICE.refresh_async(wait_seconds=WEATHER_MISS_WAIT_SECONDS)
+    # O refresh grava pela thread do serviço; encerra a transação de leitura para enxergar o commit.
+    await session.rollback()
+    refreshed = await _load_weather_snapshot_async(session, requested_date)
+    if isinstance(refreshed, dict):
+        return _weather_snapshot_response(refreshed)
+    if not forecast:
+        return {"temp": "", "condition": "", "conditionCode": "", "source": "unavailable"}
+
+    first = forecast[0]
+    return {
+        "temp": first["temp"],
+        "condition": first["condition"],
+        "conditionCode": first["conditionCode"],
+        "source": "cptec-fallback",
+    }
+
+@router.get("/weather/snapshots")
+def export_weather_snapshots(month: Optional[str] = None, session: Session = Depends(get_session)):
+    month_key = str(month or "").strip()
+    if month_key and not re.fullmatch(r"\d{4}-\d{2}", month_key):
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+    return _load_weather_snapshots(month_key or None, session)
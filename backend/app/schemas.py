@@ -0,0 +1,365 @@
+"""Request/response models shared by the routers."""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PoolLogEntryModel(BaseModel):
+    data: str
+    turmaCodigo: str = ""
+    turmaLabel: str = ""
+    horario: str = ""
+    professor: str = ""
+    clima1: str
+    clima2: str
+    statusAula: str
+    nota: str
+    tipoOcorrencia: str
+    tempExterna: Optional[str] = ""
+    tempPiscina: Optional[str] = ""
+    cloroPpm: Optional[float] = None
+
+class AttendanceLogItem(BaseModel):
+    aluno_nome: str
+    attendance: Dict[str, str]
+    justifications: Optional[Dict[str, str]] = None
+    notes: Optional[List[str]] = None
+
+class AttendanceLogPayload(BaseModel):
+    turmaCodigo: str = ""
+    turmaLabel: str = ""
+    horario: str = ""
+    professor: str = ""
+    mes: str = ""
+    clientSavedAt: Optional[str] = ""
+    clientMutationId: Optional[int] = None
+    registros: List[AttendanceLogItem]
+
+class AttendanceSyncProbePayload(BaseModel):
+    turmaCodigo: str = ""
+    turmaLabel: str = ""
+    horario: str = ""
+    professor: str = ""
+    mes: str = ""
+
+class JustificationLogEntry(BaseModel):
+    aluno_nome: str
+    data: str
+    motivo: str
+    turmaCodigo: str = ""
+    turmaLabel: str = ""
+    horario: str = ""
+    professor: str = ""
+
+class ExclusionEntry(BaseModel):
+    id: Optional[str] = None
+    student_uid: Optional[str] = None
+    nome: Optional[str] = None
+    turma: Optional[str] = None
+    turmaCodigo: Optional[str] = None
+    horario: Optional[str] = None
+    professor: Optional[str] = None
+    dataExclusao: Optional[str] = None
+    motivo_exclusao: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
+
+
+class ExclusionsBulkPayload(BaseModel):
+    items: List[ExclusionEntry] = Field(default_factory=list)
+    replace: bool = False
+
+
+class ExclusionsRecoverPayload(BaseModel):
+    backup_file: Optional[str] = None
+    force: bool = False
+    merge: bool = True
+    expected_min_items: int = 1
+
+class ReportStudent(BaseModel):
+    id: str
+    student_uid: Optional[str] = None
+    nome: str
+    presencas: int
+    faltas: int
+    justificativas: int
+    frequencia: float
+    historico: Dict[str, str]
+    justifications: Dict[str, str] = Field(default_factory=dict)
+    notes: List[str] = Field(default_factory=list)
+    anotacoes: Optional[str] = None
+
+class ReportClass(BaseModel):
+    turma: str
+    turmaCodigo: str = ""
+    horario: str
+    professor: str
+    nivel: str
+    hasLog: bool = False
+    alunos: List[ReportStudent]
+
+class ReportsFilterOut(BaseModel):
+    turmas: List[str]
+    horarios: List[str]
+    professores: List[str]
+    meses: List[str]
+    anos: List[str]
+
+
+# --- Statistics models (per-student retention & per-level permanence) ---
+class LevelHistoryOut(BaseModel):
+    nivel: str
+    firstDate: Optional[str]
+    lastDate: Optional[str]
+    days: int
+    presencas: int
+    faltas: int
+    justificativas: int
+    frequencia: float
+
+class StudentStatisticsOut(BaseModel):
+    id: Optional[str] = None
+    nome: str
+    firstPresence: Optional[str] = None
+    lastPresence: Optional[str] = None
+    exclusionDate: Optional[str] = None
+    retentionDays: int = 0
+    currentNivel: Optional[str] = None
+    levels: List[LevelHistoryOut] = []
+
+class ExportClassSelection(BaseModel):
+    turmaCodigo: Optional[str] = None
+    turma: str
+    horario: str
+    professor: str
+
+class ExcelExportPayload(BaseModel):
+    month: Optional[str] = None
+    turma: Optional[str] = None
+    horario: Optional[str] = None
+    professor: Optional[str] = None
+    classes: List[ExportClassSelection] = Field(default_factory=list)
+
+
+class VacancyExportDetail(BaseModel):
+    nivel: str
+    lotacao: int
+    capacidade: int
+    professor: str
+
+
+class VacancyExportBlock(BaseModel):
+    groupKey: str
+    periodoLabel: str
+    horario: str
+    lotacaoHorario: int
+    capacidadeHorario: int
+    vagasDisponiveis: int
+    excesso: int
+    rows: List[VacancyExportDetail] = Field(default_factory=list)
+
+
+class VacancyExportSummary(BaseModel):
+    totalCapacidade: int = 0
+    totalLotacao: int = 0
+    totalVagas: int = 0
+    totalExcesso: int = 0
+
+
+class VacancyExportPayload(BaseModel):
+    generatedAt: Optional[str] = None
+    summary: VacancyExportSummary
+    blocks: List[VacancyExportBlock] = Field(default_factory=list)
+
+class AcademicCalendarSettingsPayload(BaseModel):
+    schoolYear: int
+    inicioAulas: str
+    feriasInvernoInicio: str
+    feriasInvernoFim: str
+    terminoAulas: str
+
+class AcademicCalendarEventPayload(BaseModel):
+    date: str
+    type: str
+    allDay: Optional[bool] = False
+    startTime: Optional[str] = ""
+    endTime: Optional[str] = ""
+    description: Optional[str] = ""
+    teacher: Optional[str] = ""
+
+
+class PlanningBlockModel(BaseModel):
+    id: str
+    type: str
+    key: str
+    label: str
+    text: str
+    month: Optional[str] = None
+    week: Optional[int] = None
+    startDay: Optional[int] = None
+    endDay: Optional[int] = None
+
+
+class PlanningFileModel(BaseModel):
+    id: str
+    sourceName: str
+    target: str
+    year: int
+    blocks: List[PlanningBlockModel] = Field(default_factory=list)
+    createdAt: str
+    author: Optional[str] = ""
+
+
+class PlanningFileSummaryOut(BaseModel):
+    id: str
+    title: str
+    sourceName: str
+    target: str
+    year: int
+    author: str
+    date: str
+    updatedAt: str
+    blockCount: int
+
+
+class PlanningFilePageOut(BaseModel):
+    total: int
+    limit: int
+    offset: int
+    items: List[PlanningFileSummaryOut]
+
+
+class PoolLogRollupOut(BaseModel):
+    periodo: str
+    aulas: int
+    tempPiscinaMin: Optional[float] = None
+    tempPiscinaMax: Optional[float] = None
+    tempPiscinaAvg: Optional[float] = None
+    tempExternaMin: Optional[float] = None
+    tempExternaMax: Optional[float] = None
+    tempExternaAvg: Optional[float] = None
+    cloroMin: Optional[float] = None
+    cloroMax: Optional[float] = None
+    cloroAvg: Optional[float] = None
+    canceladas: int = 0
+    canceladasPorMotivo: Dict[str, int] = Field(default_factory=dict)
+
+
+class PoolLogSummaryOut(BaseModel):
+    start: str
+    end: str
+    daily: List[PoolLogRollupOut]
+    monthly: List[PoolLogRollupOut]
+
+
+class ImportResult(BaseModel):
+    units_created: int
+    units_updated: int
+    classes_created: int
+    classes_updated: int
+    students_created: int
+    students_updated: int
+
+class ImportStatusOut(BaseModel):
+    filename: Optional[str] = None
+    last_import_at: Optional[str] = None
+    rows_processed: int = 0
+    units_created: int = 0
+    units_updated: int = 0
+    classes_created: int = 0
+    classes_updated: int = 0
+    students_created: int = 0
+    students_updated: int = 0
+
+
+class ImportUnitOut(BaseModel):
+    id: int
+    name: str
+
+class ImportClassOut(BaseModel):
+    id: int
+    unit_id: int
+    grupo: str
+    codigo: str
+    turma_label: str
+    horario: str
+    professor: str
+    nivel: str
+    faixa_etaria: str
+    capacidade: int = Field(ge=0)
+    dias_semana: str
+
+class ImportStudentOut(BaseModel):
+    id: int
+    student_uid: str = ""
+    class_id: Optional[int] = None
+    nome: str
+    whatsapp: str
+    data_nascimento: str
+    data_atestado: str
+    categoria: str
+    genero: str
+    parq: str
+    atestado: bool
+
+class BootstrapOut(BaseModel):
+    units: list[ImportUnitOut]
+    classes: list[ImportClassOut]
+    students: list[ImportStudentOut]
+
+class ImportStudentUpsertPayload(BaseModel):
+    nome: str
+    student_uid: Optional[str] = ""
+    turma: Optional[str] = ""
+    horario: Optional[str] = ""
+    professor: Optional[str] = ""
+    whatsapp: Optional[str] = ""
+    data_nascimento: Optional[str] = ""
+    data_atestado: Optional[str] = ""
+    categoria: Optional[str] = ""
+    genero: Optional[str] = ""
+    parq: Optional[str] = ""
+    atestado: bool = False
+    movement_type: str = "correction"
+
+
+class ImportStudentBulkAllocatePayload(BaseModel):
+    student_ids: list[int]
+    turma: str
+    horario: str
+    professor: str
+    movement_type: str = "correction"
+
+
+class MaintenancePurgeMonthPayload(BaseModel):
+    month: str = "2026-02"
+    clear_transfer_overrides: bool = True
+    clear_exclusions: bool = False
+    delete_database_rows: bool = False
+
+
+class MaintenanceBootstrapResetPayload(BaseModel):
+    clear_transfer_overrides: bool = True
+    clear_student_uid_registry: bool = True
+    clear_import_status: bool = True
+
+
+class MaintenanceDiagnosticsOut(BaseModel):
+    bootstrap: Dict[str, int]
+    month: str
+    counts: Dict[str, int]
+    feb2026: Dict[str, int]
+    importStatus: Dict[str, Any]
+
+
+class PlannedSessionsOut(BaseModel):
+    classId: int
+    codigo: str
+    turmaLabel: str
+    horario: str
+    professor: str
+    diasSemana: str
+    mes: str
+    dates: List[str]
+    count: int
@@ -0,0 +1,54 @@
+"""Environment-driven settings: DATA_DIR, unit/environment identity and CORS origins.
+
+Other modules read them as `settings.X` at call time, so tests and scripts can point
+DATA_DIR (and the unit lock) elsewhere with a plain setattr.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+REPORTS_RUNTIME_VERSION = "v.005.00-00"
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+load_dotenv(os.path.join(BASE_DIR, "backend", ".env"))
+
+DATA_DIR = (
+    os.getenv("APP_DATA_DIR", "").strip()
+    or os.getenv("DATA_DIR", "").strip()
+    or os.path.join(BASE_DIR, "data")
+)
+
+ENV_NAME = os.getenv("ENV_NAME", "").strip()
+UNIT_NAME = os.getenv("UNIT_NAME", "").strip()
+ACCESS_MODE = os.getenv("ACCESS_MODE", "unit").strip().lower()
+
+cors_origins_raw = os.getenv(
+    "CORS_ORIGINS",
+    "http://localhost:3000,http://localhost:5173,https://chamadabelavista.pages.dev",
+)
+
+
+def _normalize_origin(origin: str) -> str:
+    return origin.strip().strip("\"'").rstrip("/")
+
+
+origins = [
+    _normalize_origin(origin)
+    for origin in cors_origins_raw.split(",")
+    if _normalize_origin(origin)
+]
+for mandatory_origin in [
+    "https://chamadabelavista.pages.dev",
+    "https://chamadasaomatheus.pages.dev",
+    "https://chamadavila.pages.dev",
+]:
+    normalized_mandatory = _normalize_origin(mandatory_origin)
+    if normalized_mandatory and normalized_mandatory not in origins:
+        origins.append(normalized_mandatory)
+
+cors_origin_regex = os.getenv(
+    "CORS_ORIGIN_REGEX",
+    r"^https://.*\.(vercel\.app|netlify\.app|pages\.dev)$",
+)
@@ -0,0 +1,351 @@
+"""JSON files under DATA_DIR: list read/write with archive backups (manifest + journal)
+and the monthly attendance journal segments in chamada/.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from threading import RLock
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import settings
+from app.normalize import _extract_month_key
+
+EXCLUSIONS_FILE_LOCK = RLock()
+ACADEMIC_CALENDAR_FILE_LOCK = RLock()
+POOL_LOG_FILE_LOCK = RLock()
+WEATHER_SNAPSHOTS_FILE_LOCK = RLock()
+BACKUP_MANIFEST_LOCK = RLock()
+BACKUP_MANIFEST_FILE = "backups_manifest.json"
+BACKUP_MANIFEST_JOURNAL = "backups_manifest.jsonl"
+ATTENDANCE_SEGMENT_BACKUPS_KEPT = max(1, int(os.getenv("ATTENDANCE_SEGMENT_BACKUPS_KEPT", "20") or 20))
+
+
+def _append_json_list(file_path: str, items: List[Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(file_path) or settings.DATA_DIR, exist_ok=True)
+    payload: List[Dict[str, Any]] = []
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if not isinstance(payload, list):
+                raise RuntimeError(f"Arquivo JSON inválido para append: {file_path} (esperado array)")
+        except Exception:
+            # Fail-open strategy for runtime persistence: corrupted/partial JSON
+            # must not break attendance writes in production.
+            try:
+                archive_dir = os.path.join(settings.DATA_DIR, "archive")
+                os.makedirs(archive_dir, exist_ok=True)
+                ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+                backup_path = os.path.join(
+                    archive_dir,
+                    f"{os.path.splitext(os.path.basename(file_path))[0]}_corrupted_{ts}.json",
+                )
+                if os.path.exists(file_path):
+                    with open(file_path, "r", encoding="utf-8") as src, open(
+                        backup_path, "w", encoding="utf-8"
+                    ) as dst:
+                        dst.write(src.read())
+            except Exception:
+                pass
+            payload = []
+    payload.extend(items)
+    _backup_runtime_json(file_path)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+def _load_json_list(file_path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(file_path):
+        return []
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return payload if isinstance(payload, list) else []
+    except Exception:
+        return []
+
+def _backup_manifest_entry(file_name: str, source: str, raw: bytes, modified_ts: float) -> Dict[str, Any]:
+    try:
+        payload = json.loads(raw.decode("utf-8"))
+        count = len(payload) if isinstance(payload, (list, dict)) else 0
+    except Exception:
+        count = 0
+    return {
+        "file": file_name,
+        "source": source,
+        "count": count,
+        "size": len(raw),
+        "modified_at": datetime.fromtimestamp(modified_ts).isoformat(),
+        "hash": hashlib.sha256(raw).hexdigest(),
+    }
+
+
+class _BackupArchiveIndex:
+    """In-memory view of the archive manifest for the backup hot path.
+
+    Autosaves look up duplicates and rotate per-source copies here and append one
+    line to BACKUP_MANIFEST_JOURNAL; only listing/recovery reconcile with the
+    directory and rewrite the full manifest.
+    """
+
+    def __init__(self, entries: Dict[str, Dict[str, Any]]):
+        self.hashes: set[Tuple[str, str]] = set()
+        self.by_source: Dict[str, List[str]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        for file_name, entry in sorted(entries.items(), key=lambda item: str(item[1].get("modified_at") or "")):
+            self.add(file_name, entry)
+
+    def add(self, file_name: str, entry: Dict[str, Any]) -> None:
+        self.remove(file_name)
+        source = str(entry.get("source") or "")
+        self.entries[file_name] = entry
+        self.hashes.add((source, str(entry.get("hash") or "")))
+        self.by_source.setdefault(source, []).append(file_name)
+
+    def remove(self, file_name: str) -> None:
+        entry = self.entries.pop(file_name, None)
+        if entry is None:
+            return
+        source = str(entry.get("source") or "")
+        self.hashes.discard((source, str(entry.get("hash") or "")))
+        names = self.by_source.get(source, [])
+        if file_name in names:
+            names.remove(file_name)
+
+
+_backup_indexes: Dict[str, _BackupArchiveIndex] = {}
+
+
+def _load_backup_manifest(archive_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Manifest of archive/*.json keyed by file name, reconciled with the directory listing.
+
+    Replays the append-only journal, reads only files missing from the manifest (or
+    whose size changed), drops entries for deleted files and compacts everything back
+    into BACKUP_MANIFEST_FILE. Listing/recovery path only; callers hold BACKUP_MANIFEST_LOCK.
+    """
+    manifest_path = os.path.join(archive_dir, BACKUP_MANIFEST_FILE)
+    journal_path = os.path.join(archive_dir, BACKUP_MANIFEST_JOURNAL)
+    manifest: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if isinstance(payload, dict):
+            manifest = {str(k): v for k, v in payload.items() if isinstance(v, dict)}
+    except Exception:
+        manifest = {}
+
+    changed = False
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # linha truncada por queda no meio do append
+                if record.get("op") == "add" and isinstance(record.get("entry"), dict):
+                    manifest[str(record["entry"].get("file"))] = record["entry"]
+                elif record.get("op") == "remove":
+                    manifest.pop(str(record.get("file")), None)
+        changed = True
+    except FileNotFoundError:
+        pass
+
+    present = set()
+    try:
+        with os.scandir(archive_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or entry.name == BACKUP_MANIFEST_FILE or not entry.is_file():
+                    continue
+                present.add(entry.name)
+                stat = entry.stat()
+                known = manifest.get(entry.name)
+                if known is not None and int(known.get("size") or -1) == stat.st_size:
+                    continue
+                with open(entry.path, "rb") as f:
+                    raw = f.read()
+                manifest[entry.name] = _backup_manifest_entry(entry.name, entry.name.split("_", 1)[0], raw, stat.st_mtime)
+                changed = True
+    except FileNotFoundError:
+        _backup_indexes.pop(archive_dir, None)
+        return {}
+
+    for file_name in [name for name in manifest if name not in present]:
+        manifest.pop(file_name, None)
+        changed = True
+
+    if changed:
+        _save_backup_manifest(archive_dir, manifest)
+        try:
+            os.remove(journal_path)
+        except FileNotFoundError:
+            pass
+    _backup_indexes[archive_dir] = _BackupArchiveIndex(manifest)
+    return manifest
+
+
+def _save_backup_manifest(archive_dir: str, manifest: Dict[str, Dict[str, Any]]) -> None:
+    manifest_path = os.path.join(archive_dir, BACKUP_MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _backup_index(archive_dir: str) -> _BackupArchiveIndex:
+    # Reconcilia com o diretório uma vez por processo; depois só o diário é tocado.
+    index = _backup_indexes.get(archive_dir)
+    if index is None:
+        _load_backup_manifest(archive_dir)
+        index = _backup_indexes.setdefault(archive_dir, _BackupArchiveIndex({}))
+    return index
+
+
+def _append_backup_journal(archive_dir: str, records: List[Dict[str, Any]]) -> None:
+    with open(os.path.join(archive_dir, BACKUP_MANIFEST_JOURNAL), "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _backup_runtime_json(file_path: str) -> None:
+    try:
+        if not os.path.exists(file_path):
+            return
+
+        with open(file_path, "rb") as f:
+            raw = f.read()
+
+        if not raw.strip():
+            return
+
+        archive_dir = os.path.join(settings.DATA_DIR, "archive")
+        if not os.path.isdir(archive_dir):
+            _backup_indexes.pop(archive_dir, None)  # archive/ apagado por fora: índice não vale mais
+        os.makedirs(archive_dir, exist_ok=True)
+
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        content_hash = hashlib.sha256(raw).hexdigest()
+        with BACKUP_MANIFEST_LOCK:
+            index = _backup_index(archive_dir)
+            # Backup idêntico já arquivado: não grava outra cópia completa.
+            if (base_name, content_hash) in index.hashes:
+                return
+
+            ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+            backup_name = f"{base_name}_backup_{ts}.json"
+            suffix = 1
+            while backup_name in index.entries:  # autosaves no mesmo segundo
+                backup_name = f"{base_name}_backup_{ts}_{suffix}.json"
+                suffix += 1
+            backup_path = os.path.join(archive_dir, backup_name)
+
+            with open(backup_path, "wb") as f:
+                f.write(raw)
+
+            entry = _backup_manifest_entry(backup_name, base_name, raw, os.path.getmtime(backup_path))
+            index.add(backup_name, entry)
+            records = [{"op": "add", "entry": entry}]
+
+            # Segmentos do diário de chamada são regravados a cada autosave: guarda só os últimos.
+            if base_name.startswith(ATTENDANCE_JOURNAL_PREFIX):
+                kept = [name for name in index.by_source.get(base_name, []) if "_backup_" in name]
+                for stale_name in kept[:-ATTENDANCE_SEGMENT_BACKUPS_KEPT]:
+                    try:
+                        os.remove(os.path.join(archive_dir, stale_name))
+                    except FileNotFoundError:
+                        pass
+                    index.remove(stale_name)
+                    records.append({"op": "remove", "file": stale_name})
+            _append_backup_journal(archive_dir, records)
+    except Exception:
+        # best-effort only
+        return
+
+def _save_json_list(file_path: str, items: List[Dict[str, Any]]) -> None:
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    _backup_runtime_json(file_path)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+
+
+ATTENDANCE_JOURNAL_PREFIX = "baseChamada-"
+ATTENDANCE_JOURNAL_UNDATED = "sem-mes"
+
+
+def _attendance_journal_dir() -> str:
+    return os.path.join(settings.DATA_DIR, "chamada")
+
+
+def _attendance_segment_path(month: str) -> str:
+    return os.path.join(_attendance_journal_dir(), f"{ATTENDANCE_JOURNAL_PREFIX}{month or ATTENDANCE_JOURNAL_UNDATED}.json")
+
+
+def _attendance_entry_month(item: Dict[str, Any]) -> str:
+    mes = str(item.get("mes") or "").strip()
+    if re.fullmatch(r"\d{4}-\d{2}", mes):
+        return mes
+    for record in item.get("registros") or []:
+        for date_key in sorted(((record or {}).get("attendance") or {}).keys()):
+            month = _extract_month_key(date_key)
+            if month:
+                return month
+    return _extract_month_key(item.get("saved_at"))
+
+
+def _attendance_journal_segments() -> List[Tuple[str, str]]:
+    """(mes, caminho) of each monthly segment, oldest first; undated entries sort first with mes=''."""
+    journal_dir = _attendance_journal_dir()
+    if not os.path.isdir(journal_dir):
+        return []
+    segments: List[Tuple[str, str]] = []
+    with os.scandir(journal_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (entry.is_file() and name.startswith(ATTENDANCE_JOURNAL_PREFIX) and name.endswith(".json")):
+                continue
+            month = name[len(ATTENDANCE_JOURNAL_PREFIX):-len(".json")]
+            segments.append(("" if month == ATTENDANCE_JOURNAL_UNDATED else month, entry.path))
+    return sorted(segments)
+
+
+def _load_attendance_journal(month: Optional[str] = None) -> List[Dict[str, Any]]:
+    if month:
+        return _load_json_list(_attendance_segment_path(month))
+    items: List[Dict[str, Any]] = []
+    for _, path in _attendance_journal_segments():
+        items.extend(_load_json_list(path))
+    return items
+
+
+def _migrate_attendance_journal() -> int:
+    """Split the legacy single-file baseChamada.json into monthly segments (once)."""
+    legacy_path = os.path.join(settings.DATA_DIR, "baseChamada.json")
+    if not os.path.exists(legacy_path):
+        return 0
+    by_month: Dict[str, List[Dict[str, Any]]] = {}
+    for item in _load_json_list(legacy_path):
+        if isinstance(item, dict):
+            by_month.setdefault(_attendance_entry_month(item), []).append(item)
+    for month, items in by_month.items():
+        _append_json_list(_attendance_segment_path(month), items)
+    # O arquivo antigo fica só no archive/; os segmentos passam a ser a fonte.
+    _backup_runtime_json(legacy_path)
+    os.remove(legacy_path)
+    return sum(len(items) for items in by_month.values())
+
+
+def _import_status_file() -> str:
+    return os.path.join(settings.DATA_DIR, "import_status.json")
+
+
+def _load_import_status() -> Dict[str, Any]:
+    file_path = _import_status_file()
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return payload if isinstance(payload, dict) else {}
+    except Exception:
+        return {}
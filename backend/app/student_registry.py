@@ -0,0 +1,323 @@
+"""Student identity: uid registry, transfer overrides with their JSON mirror, import_students dedupe."""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event as sa_event
+from sqlmodel import Session, select
+
+from app import models, settings
+from app.catalog import _find_import_class_by_triple, _get_import_class_catalog
+from app.models import TransferOverride
+from app.normalize import _normalize_horario_value, _normalize_text, _normalize_whatsapp_digits
+from app.storage import _load_json_list
+
+
+def _transfer_overrides_file() -> str:
+    return os.path.join(settings.DATA_DIR, "studentTransferOverrides.json")
+
+
+def _student_uid_registry_file() -> str:
+    return os.path.join(settings.DATA_DIR, "studentUids.json")
+
+
+def _student_identity_key(nome: Optional[str], data_nascimento: Optional[str], whatsapp: Optional[str]) -> str:
+    name_key = _normalize_text(nome)
+    birth_key = str(data_nascimento or "").strip()
+    phone_key = _normalize_whatsapp_digits(whatsapp)
+    return "|".join([name_key, birth_key, phone_key])
+
+
+def _student_uid_identity_key(nome: Optional[str], data_nascimento: Optional[str], whatsapp: Optional[str]) -> str:
+    name_key = _normalize_text(nome)
+    birth_key = str(data_nascimento or "").strip()
+    phone_key = _normalize_whatsapp_digits(whatsapp)
+    if not name_key:
+        return ""
+    if not birth_key and not phone_key:
+        return ""
+    return "|".join([name_key, birth_key, phone_key])
+
+
+def _load_student_uid_registry() -> Dict[str, str]:
+    path = _student_uid_registry_file()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if isinstance(payload, dict):
+            return {str(k): str(v) for k, v in payload.items() if str(k).strip() and str(v).strip()}
+    except Exception:
+        pass
+    return {}
+
+
+def _save_student_uid_registry(registry: Dict[str, str]) -> None:
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    path = _student_uid_registry_file()
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(registry, handle, ensure_ascii=False, indent=2)
+
+
+def _ensure_student_uid_for_student(
+    student: models.ImportStudent,
+    registry: Optional[Dict[str, str]] = None,
+    preferred_uid: Optional[str] = None,
+) -> tuple[str, bool]:
+    data = registry if registry is not None else _load_student_uid_registry()
+    changed = False
+
+    identity_key = _student_uid_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+    registry_identity_key = f"identity:{identity_key}" if identity_key else ""
+    registry_legacy_key = f"legacy:{int(student.id or 0)}" if student.id else ""
+    preferred = str(preferred_uid or "").strip()
+
+    uid = ""
+    if preferred:
+        uid = preferred
+    elif registry_legacy_key and data.get(registry_legacy_key):
+        uid = str(data.get(registry_legacy_key) or "")
+    elif registry_identity_key and data.get(registry_identity_key):
+        uid = str(data.get(registry_identity_key) or "")
+
+    if not uid:
+        uid = str(uuid.uuid4())
+
+    if registry_legacy_key and data.get(registry_legacy_key) != uid:
+        data[registry_legacy_key] = uid
+        changed = True
+    if registry_identity_key and data.get(registry_identity_key) != uid:
+        data[registry_identity_key] = uid
+        changed = True
+
+    if registry is None and changed:
+        _save_student_uid_registry(data)
+
+    return uid, changed
+
+
+def _transfer_override_as_dict(row: TransferOverride) -> Dict[str, Any]:
+    return {
+        "key": row.identity_key,
+        "nome": row.nome,
+        "data_nascimento": row.data_nascimento or "",
+        "whatsapp": row.whatsapp or "",
+        "turmaCodigo": row.turma_codigo or "",
+        "turmaLabel": row.turma_label or "",
+        "horario": row.horario or "",
+        "professor": row.professor or "",
+        "updated_at": row.updated_at or "",
+    }
+
+
+def _write_transfer_overrides_mirror(items: List[Dict[str, Any]]) -> None:
+    # Espelho JSON apenas para compatibilidade/inspeção manual; a fonte de verdade é a tabela.
+    try:
+        os.makedirs(settings.DATA_DIR, exist_ok=True)
+        with open(_transfer_overrides_file(), "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+
+def _mark_transfer_overrides_mirror_dirty(session: Session) -> None:
+    # O espelho só é regravado depois do commit: um import que falhe não deixa no JSON
+    # overrides que a tabela nunca recebeu (e que o startup reimportaria).
+    session.info["transfer_overrides_mirror_dirty"] = True
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _write_transfer_overrides_mirror_after_commit(session) -> None:
+    if not session.info.pop("transfer_overrides_mirror_dirty", False):
+        return
+    # A sessão que acabou de commitar não emite SQL aqui; lê numa sessão própria.
+    with Session(session.get_bind()) as db:
+        _write_transfer_overrides_mirror(_load_transfer_overrides(db))
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_transfer_overrides_mirror(session) -> None:
+    session.info.pop("transfer_overrides_mirror_dirty", None)
+
+
+def _migrate_transfer_overrides_from_json() -> int:
+    """One-time import of the legacy studentTransferOverrides.json into the table (idempotent)."""
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as db:
+        if db.exec(select(TransferOverride.id).limit(1)).first() is not None:
+            return 0
+
+        migrated: Dict[str, Dict[str, Any]] = {}
+        for item in _load_json_list(_transfer_overrides_file()):
+            if not isinstance(item, dict):
+                continue
+            identity_key = str(item.get("key") or "").strip() or _student_identity_key(
+                str(item.get("nome") or ""),
+                str(item.get("data_nascimento") or ""),
+                str(item.get("whatsapp") or ""),
+            )
+            if identity_key.strip("|"):
+                migrated[identity_key] = item
+
+        for identity_key, item in migrated.items():
+            db.add(
+                TransferOverride(
+                    identity_key=identity_key,
+                    nome=str(item.get("nome") or ""),
+                    data_nascimento=str(item.get("data_nascimento") or ""),
+                    whatsapp=str(item.get("whatsapp") or ""),
+                    turma_codigo=str(item.get("turmaCodigo") or ""),
+                    turma_label=str(item.get("turmaLabel") or ""),
+                    horario=str(item.get("horario") or ""),
+                    professor=str(item.get("professor") or ""),
+                    updated_at=str(item.get("updated_at") or datetime.utcnow().isoformat()),
+                )
+            )
+        if migrated:
+            db.commit()
+        return len(migrated)
+
+
+def _load_transfer_overrides(session: Session) -> List[Dict[str, Any]]:
+    rows = session.exec(select(TransferOverride).order_by(TransferOverride.id.asc())).all()
+    return [_transfer_override_as_dict(row) for row in rows]
+
+
+def _find_class_from_transfer_override(session: Session, override: Dict[str, Any]) -> Optional[models.ImportClass]:
+    turma_ref = str(override.get("turmaCodigo") or override.get("turmaLabel") or "").strip()
+    horario_ref = str(override.get("horario") or "").strip()
+    professor_ref = str(override.get("professor") or "").strip()
+    if not turma_ref or not horario_ref or not professor_ref:
+        return None
+    return _find_import_class_by_triple(session, turma_ref, horario_ref, professor_ref)
+
+
+def _has_strong_student_identity(student: models.ImportStudent) -> bool:
+    return bool(str(student.data_nascimento or "").strip() or _normalize_whatsapp_digits(student.whatsapp))
+
+
+def _dedupe_import_students(session: Session) -> int:
+    students = session.exec(select(models.ImportStudent)).all()
+    seen: Dict[tuple[int, str, str], int] = {}
+    removed = 0
+
+    for student in students:
+        identity = _student_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+        key = (student.class_id, _normalize_text(student.nome), identity)
+        previous_id = seen.get(key)
+        if previous_id is None:
+            seen[key] = int(student.id or 0)
+            continue
+
+        # Keep the oldest id and remove newer duplicates.
+        if int(student.id or 0) < previous_id:
+            old = session.get(models.ImportStudent, previous_id)
+            if old is not None:
+                session.delete(old)
+                removed += 1
+            seen[key] = int(student.id or 0)
+        else:
+            session.delete(student)
+            removed += 1
+
+    return removed
+
+
+def _dedupe_import_students_global(session: Session) -> int:
+    students = session.exec(select(models.ImportStudent)).all()
+    candidates: Dict[str, List[models.ImportStudent]] = {}
+    for student in students:
+        if not _has_strong_student_identity(student):
+            continue
+        identity = _student_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+        if not identity:
+            continue
+        candidates.setdefault(identity, []).append(student)
+
+    if not candidates:
+        return 0
+
+    removed = 0
+    for grouped_students in candidates.values():
+        if len(grouped_students) <= 1:
+            continue
+
+        # Prefer the allocated student (class_id not None); among equals, keep oldest id.
+        keep = min(
+            grouped_students,
+            key=lambda s: (0 if s.class_id is not None else 1, int(s.id or 0)),
+        )
+        for student in grouped_students:
+            if student.id == keep.id:
+                continue
+            session.delete(student)
+            removed += 1
+
+    return removed
+
+
+def _apply_transfer_overrides(session: Session) -> int:
+    overrides = _load_transfer_overrides(session)
+    if not overrides:
+        return 0
+
+    with session.no_autoflush:
+        students = session.exec(select(models.ImportStudent)).all()
+        class_index = _get_import_class_catalog(session).by_triple
+
+        by_identity: Dict[str, List[models.ImportStudent]] = {}
+        for student in students:
+            identity = _student_identity_key(student.nome, student.data_nascimento, student.whatsapp)
+            if not identity:
+                continue
+            by_identity.setdefault(identity, []).append(student)
+
+        def _resolve_target_class(override: Dict[str, Any]) -> Optional[models.ImportClass]:
+            turma_ref = _normalize_text(override.get("turmaCodigo") or override.get("turmaLabel") or "")
+            horario_ref = _normalize_horario_value(str(override.get("horario") or ""))
+            professor_ref = _normalize_text(override.get("professor") or "")
+            if not turma_ref or not horario_ref or not professor_ref:
+                return None
+            return class_index.get((turma_ref, horario_ref, professor_ref))
+
+        moved = 0
+        for override in overrides:
+            identity = str(override.get("key") or "").strip()
+            if not identity:
+                identity = _student_identity_key(
+                    str(override.get("nome") or ""),
+                    str(override.get("data_nascimento") or ""),
+                    str(override.get("whatsapp") or ""),
+                )
+            if not identity:
+                continue
+
+            target_class = _resolve_target_class(override)
+            if target_class is None:
+                continue
+
+            group = list(by_identity.get(identity, []))
+            if not group:
+                continue
+
+            group.sort(key=lambda item: int(item.id or 0))
+            canonical = group[0]
+
+            if canonical.class_id != target_class.id:
+                canonical.class_id = target_class.id
+                moved += 1
+
+            for duplicate in group[1:]:
+                session.delete(duplicate)
+                moved += 1
+
+            by_identity[identity] = [canonical]
+
+        moved += _dedupe_import_students(session)
+        moved += _dedupe_import_students_global(session)
+        return moved
@@ -0,0 +1,372 @@
+"""Weather snapshots (weather_snapshots + JSON mirror) and the CPTEC prefetch service."""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Future, wait as futures_wait
+from datetime import datetime
+from threading import Event, RLock, Thread, current_thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics, settings
+from app.database import session_scope
+from app.models import WeatherSnapshot
+from app.storage import WEATHER_SNAPSHOTS_FILE_LOCK
+
+
+def _weather_snapshots_file() -> str:
+    return os.path.join(settings.DATA_DIR, "weatherSnapshots.json")
+
+
+def _load_weather_snapshots_json() -> Dict[str, Dict[str, Any]]:
+    file_path = _weather_snapshots_file()
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if not isinstance(payload, dict):
+            return {}
+        return payload
+    except Exception:
+        return {}
+
+
+def _weather_snapshot_as_dict(row: WeatherSnapshot) -> Dict[str, Any]:
+    return {
+        "date": row.date,
+        "temp": row.temp or "",
+        "condition": row.condition or "",
+        "conditionCode": row.condition_code or "",
+        "saved_at": row.saved_at or "",
+    }
+
+
+def _load_weather_snapshot(date_key: str, session: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+    key = str(date_key or "").strip()
+    if not key:
+        return None
+    with session_scope(session) as db:
+        row = db.exec(select(WeatherSnapshot).where(WeatherSnapshot.date == key)).first()
+        return _weather_snapshot_as_dict(row) if row else None
+
+
+def _load_weather_snapshots(month: Optional[str] = None, session: Optional[Session] = None) -> Dict[str, Dict[str, Any]]:
+    with session_scope(session) as db:
+        stmt = select(WeatherSnapshot).order_by(WeatherSnapshot.date)
+        if month:
+            stmt = stmt.where(WeatherSnapshot.date.like(f"{month}-%"))
+        return {row.date: _weather_snapshot_as_dict(row) for row in db.exec(stmt).all()}
+
+
+def _upsert_weather_snapshot(session: Session, date_key: str, temp: str, condition: str, condition_code: str) -> bool:
+    """Insert or update one day; returns False when the stored values already match."""
+    snapshot = _build_weather_snapshot(date_key, temp, condition, condition_code)
+    row = session.exec(select(WeatherSnapshot).where(WeatherSnapshot.date == snapshot["date"])).first()
+    if row is not None and (row.temp, row.condition, row.condition_code) == (
+        snapshot["temp"],
+        snapshot["condition"],
+        snapshot["conditionCode"],
+    ):
+        return False
+    if row is None:
+        row = WeatherSnapshot(date=snapshot["date"])
+    row.temp = snapshot["temp"]
+    row.condition = snapshot["condition"]
+    row.condition_code = snapshot["conditionCode"]
+    row.saved_at = snapshot["saved_at"]
+    session.add(row)
+    return True
+
+
+def _save_weather_snapshots(payload: Dict[str, Dict[str, Any]], file_path: Optional[str] = None) -> None:
+    """JSON export of the snapshot table, kept for tools that still read weatherSnapshots.json."""
+    file_path = file_path or _weather_snapshots_file()
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with WEATHER_SNAPSHOTS_FILE_LOCK:
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def _export_weather_snapshots_json(session: Optional[Session] = None, file_path: Optional[str] = None) -> None:
+    _save_weather_snapshots(_load_weather_snapshots(session=session), file_path)
+
+
+def _migrate_weather_snapshots_from_json() -> int:
+    from app.database import engine as _db_engine
+
+    with Session(_db_engine) as session:
+        if session.exec(select(WeatherSnapshot.id).limit(1)).first() is not None:
+            return 0
+        migrated = 0
+        for date_key, item in _load_weather_snapshots_json().items():
+            if not isinstance(item, dict) or not str(date_key).strip():
+                continue
+            session.add(
+                WeatherSnapshot(
+                    date=str(date_key).strip(),
+                    temp=str(item.get("temp") or "").strip(),
+                    condition=str(item.get("condition") or "").strip(),
+                    condition_code=str(item.get("conditionCode") or "").strip().lower(),
+                    saved_at=str(item.get("saved_at") or ""),
+                )
+            )
+            migrated += 1
+        if migrated:
+            session.commit()
+        return migrated
+
+
+def _build_weather_snapshot(date_key: str, temp: str, condition: str, condition_code: str) -> Dict[str, Any]:
+    return {
+        "date": date_key,
+        "temp": str(temp or "").strip(),
+        "condition": str(condition or "").strip(),
+        "conditionCode": str(condition_code or "").strip().lower(),
+        "saved_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _compute_weather_temp(minima_txt: str, maxima_txt: str, fallback: str = "26") -> str:
+    temp = fallback
+    try:
+        if minima_txt and maxima_txt:
+            temp = str(round((float(minima_txt) + float(maxima_txt)) / 2))
+        elif maxima_txt:
+            temp = str(round(float(maxima_txt)))
+        elif minima_txt:
+            temp = str(round(float(minima_txt)))
+    except Exception:
+        temp = fallback
+    return temp
+
+CPTEC_TEMPO_MAP = {
+    "ec": "Encoberto com Chuvas Isoladas",
+    "ci": "Chuvas Isoladas",
+    "c": "Chuva",
+    "in": "Instável",
+    "pp": "Possibilidade de Pancadas de Chuva",
+    "cm": "Chuva pela Manhã",
+    "cn": "Chuva à Noite",
+    "pt": "Pancadas de Chuva à Tarde",
+    "pm": "Pancadas de Chuva pela Manhã",
+    "np": "Nublado e Pancadas de Chuva",
+    "pc": "Pancadas de Chuva",
+    "pn": "Parcialmente Nublado",
+    "cv": "Chuvisco",
+    "ch": "Chuvoso",
+    "t": "Tempestade",
+    "ps": "Predomínio de Sol",
+    "sn": "Sol entre Nuvens",
+    "e": "Encoberto",
+    "n": "Nublado",
+    "cl": "Céu Claro",
+    "nv": "Nevoeiro",
+    "g": "Geada",
+    "pnt": "Pancadas de Chuva à Noite",
+    "psc": "Possibilidade de Chuva",
+    "pcm": "Possibilidade de Chuva pela Manhã",
+    "pct": "Possibilidade de Chuva à Tarde",
+    "pcn": "Possibilidade de Chuva à Noite",
+    "npt": "Nublado com Pancadas à Tarde",
+    "npn": "Nublado com Pancadas à Noite",
+    "ncn": "Nublado com Possibilidade de Chuva à Noite",
+    "nct": "Nublado com Possibilidade de Chuva à Tarde",
+    "ncm": "Nublado com Possibilidade de Chuva pela Manhã",
+    "npm": "Nublado com Pancadas pela Manhã",
+    "npp": "Nublado com Possibilidade de Chuva",
+    "vn": "Variação de Nebulosidade",
+    "ct": "Chuva à Tarde",
+    "ppn": "Possibilidade de Pancadas de Chuva à Noite",
+    "ppt": "Possibilidade de Pancadas de Chuva à Tarde",
+    "ppm": "Possibilidade de Pancadas de Chuva pela Manhã",
+}
+
+# 0 (padrão) desliga o prefetch em segundo plano; o deploy liga (Dockerfile: 10800 = 3 h).
+WEATHER_PREFETCH_INTERVAL_SECONDS = float(os.getenv("WEATHER_PREFETCH_INTERVAL", "0") or 0)
+WEATHER_MISS_WAIT_SECONDS = float(os.getenv("WEATHER_MISS_WAIT", "3") or 0)
+WEATHER_FETCH_COOLDOWN_SECONDS = 60.0
+WEATHER_FETCH_TIMEOUT_SECONDS = 10.0
+
+
+def _cptec_weather_url() -> str:
+    return os.getenv(
+        "CPTEC_WEATHER_URL",
+        "http://servicos.cptec.inpe.br/XML/cidade/7dias/5678/previsao.xml",
+    )
+
+
+def _weather_snapshot_response(snapshot: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "temp": str(snapshot.get("temp") or ""),
+        "condition": str(snapshot.get("condition") or ""),
+        "conditionCode": str(snapshot.get("conditionCode") or ""),
+        "source": "snapshot",
+    }
+
+
+def _parse_cptec_forecast(content: bytes) -> List[Dict[str, str]]:
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(content)
+    forecast = []
+    for item in root.findall(".//previsao"):
+        dia = (item.findtext("dia") or "").strip()
+        minima_txt = (item.findtext("minima") or "").strip()
+        maxima_txt = (item.findtext("maxima") or "").strip()
+        tempo_code = (item.findtext("tempo") or "").strip().lower()
+        forecast.append({
+            "date": dia,
+            "temp": _compute_weather_temp(minima_txt, maxima_txt, "26"),
+            "condition": CPTEC_TEMPO_MAP.get(tempo_code, "Parcialmente Nublado"),
+            "conditionCode": tempo_code,
+        })
+    return forecast
+
+
+def _store_weather_forecast(forecast: List[Dict[str, str]], target_engine: Any, snapshots_file: str) -> int:
+    changed = 0
+    with Session(target_engine) as session:
+        for item in forecast:
+            if item["date"] and _upsert_weather_snapshot(
+                session, item["date"], item["temp"], item["condition"], item["conditionCode"]
+            ):
+                changed += 1
+        if changed:
+            session.commit()
+            _export_weather_snapshots_json(session, snapshots_file)
+    return changed
+
+
+class _WeatherService:
+    """CPTEC 7-day forecast fetcher with single-flight refreshes and an opt-in background prefetch.
+
+    Concurrent misses share one in-flight fetch; callers wait at most
+    ``wait_seconds`` and then answer from whatever the snapshot store has.
+    Fetched days go to the engine and DATA_DIR captured in start(), not to
+    whatever is current when a late fetch finishes.
+    """
+
+    def __init__(self, prefetch_interval_seconds: float, cooldown_seconds: float):
+        self.prefetch_interval_seconds = prefetch_interval_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.fetch_count = 0
+        self.last_error = ""
+        self._forecast: List[Dict[str, str]] = []
+        self._fetched_at = 0.0
+        self._lock = RLock()
+        self._inflight: Optional[Future] = None
+        self._fetch_thread: Optional[Thread] = None
+        self._store_target: Optional[Tuple[Any, str]] = None
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def forecast(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return list(self._forecast)
+
+    def _target(self) -> Tuple[Any, str]:
+        if self._store_target is not None:
+            return self._store_target
+        from app.database import engine as _db_engine
+
+        return _db_engine, _weather_snapshots_file()
+
+    def _begin_refresh(self, force: bool) -> Optional[Future]:
+        with self._lock:
+            recent = self._fetched_at and (time.monotonic() - self._fetched_at) < self.cooldown_seconds
+            if recent and not force:
+                return None
+            if self._inflight is None:
+                inflight: Future = Future()
+                inflight.set_running_or_notify_cancel()  # quem desiste de esperar não cancela o fetch
+                self._inflight = inflight
+                self._fetch_thread = Thread(
+                    target=self._fetch, args=(inflight, self._target()), name="weather-fetch", daemon=True
+                )
+                self._fetch_thread.start()
+            return self._inflight
+
+    def refresh(self, wait_seconds: Optional[float] = None, force: bool = False) -> List[Dict[str, str]]:
+        inflight = self._begin_refresh(force)
+        if inflight is not None:
+            futures_wait([inflight], timeout=wait_seconds)
+        return self.forecast
+
+    async def refresh_async(self, wait_seconds: Optional[float] = None, force: bool = False) -> List[Dict[str, str]]:
+        """Same as refresh, but waits on the event loop instead of holding a worker thread."""
+        inflight = self._begin_refresh(force)
+        if inflight is not None:
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(inflight), wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+        return self.forecast
+
+    def _fetch(self, done: Future, target: Tuple[Any, str]) -> None:
+        try:
+            with self._lock:
+                self.fetch_count += 1
+            started = time.perf_counter()
+            try:
+                import requests
+
+                resp = requests.get(_cptec_weather_url(), timeout=WEATHER_FETCH_TIMEOUT_SECONDS)
+                resp.raise_for_status()
+            finally:
+                metrics.CPTEC_FETCH_DURATION.observe(time.perf_counter() - started)
+            forecast = _parse_cptec_forecast(resp.content)
+            with self._lock:
+                self._forecast = forecast
+            _store_weather_forecast(forecast, *target)
+            self.last_error = ""
+        except Exception as exc:
+            self.last_error = str(exc)
+            metrics.CPTEC_FETCH_FAILURES.inc()
+        finally:
+            with self._lock:
+                self._fetched_at = time.monotonic()
+                self._inflight = None
+            done.set_result(None)
+
+    def start(self) -> None:
+        from app.database import engine as _db_engine
+
+        self._store_target = (_db_engine, _weather_snapshots_file())
+        if self.prefetch_interval_seconds <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = Event()
+        self._thread = Thread(target=self._run, args=(self._stopping,), name="weather-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        # O timeout do requests limita quanto um fetch em andamento segura o shutdown.
+        for thread in (self._thread, self._fetch_thread):
+            if thread is not None and thread is not current_thread():
+                thread.join(timeout=WEATHER_FETCH_TIMEOUT_SECONDS + 1)
+        self._thread = None
+        self._store_target = None
+
+    def _run(self, stopping: Event) -> None:
+        while not stopping.is_set():
+            self.refresh(wait_seconds=None, force=True)
+            stopping.wait(self.prefetch_interval_seconds)
+
+
+WEATHER_SERVICE = _WeatherService(WEATHER_PREFETCH_INTERVAL_SECONDS, WEATHER_FETCH_COOLDOWN_SECONDS)
+
+
+async def _load_weather_snapshot_async(session: AsyncSession, date_key: str) -> Optional[Dict[str, Any]]:
+    key = str(date_key or "").strip()
+    if not key:
+        return None
+    row = (await session.exec(select(WeatherSnapshot).where(WeatherSnapshot.date == key))).first()
+    return _weather_snapshot_as_dict(row) if row else None
@@ -0,0 +1,203 @@
+"""baseline: schema anterior ao histórico do Alembic, congelado como snapshot
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Any, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BASELINE_TABLES = [
+    "student", "classmodel", "attendance", "category", "user", "import_units", "import_classes",
+    "import_students", "attendance_logs", "pool_logs", "academic_calendar_state", "exclusion_records",
+]
+
+# Índices de coluna única declarados nos models da época (Field(index=True)).
+BASELINE_INDEXES = {
+    "attendance_logs": ["turma_codigo", "horario", "professor", "mes"],
+    "pool_logs": ["data", "turma_codigo", "horario", "professor"],
+    "exclusion_records": ["exclusion_id", "student_uid", "nome", "turma_codigo", "horario", "professor"],
+}
+
+
+def _existing_tables() -> List[str]:
+    return sa.inspect(op.get_bind()).get_table_names()
+
+
+def _create(name: str, *elements: Any) -> None:
+    if name in _existing_tables():
+        return
+    op.create_table(name, *elements)
+    for column in BASELINE_INDEXES.get(name, []):
+        op.create_index(f"ix_{name}_{column}", name, [column])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Snapshot explícito (não importa app.models, que segue evoluindo nas revisões
+    # seguintes). Bancos anteriores ao Alembic já têm estas tabelas: só cria o que faltar.
+    _create(
+        "student",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("aniversario", sa.Date(), nullable=True),
+        sa.Column("whatsapp", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("observacoes", sa.String(), nullable=True),
+        sa.Column("genero", sa.String(), nullable=True),
+        sa.Column("nivel", sa.String(), nullable=True),
+        sa.Column("turma", sa.String(), nullable=True),
+        sa.Column("horario", sa.String(), nullable=True),
+        sa.Column("professor", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "classmodel",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=True),
+        sa.Column("local", sa.String(), nullable=True),
+        sa.Column("instrutor", sa.String(), nullable=True),
+        sa.Column("nivel", sa.String(), nullable=True),
+        sa.Column("capacidade_maxima", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "attendance",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=True),
+        sa.Column("class_id", sa.Integer(), nullable=True),
+        sa.Column("student_name", sa.String(), nullable=True),
+        sa.Column("class_name", sa.String(), nullable=True),
+        sa.Column("data", sa.Date(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("notas", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "category",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("idade_min", sa.Integer(), nullable=True),
+        sa.Column("idade_max", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "user",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "import_units",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "import_classes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("unit_id", sa.Integer(), nullable=False),
+        sa.Column("codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("nivel", sa.String(), nullable=False),
+        sa.Column("faixa_etaria", sa.String(), nullable=False),
+        sa.Column("capacidade", sa.Integer(), nullable=False),
+        sa.Column("dias_semana", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("unit_id", "codigo", "horario", name="uq_import_class_unit_codigo_horario"),
+    )
+    _create(
+        "import_students",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("class_id", sa.Integer(), nullable=True),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("whatsapp", sa.String(), nullable=False),
+        sa.Column("data_nascimento", sa.String(), nullable=False),
+        sa.Column("data_atestado", sa.String(), nullable=False),
+        sa.Column("categoria", sa.String(), nullable=False),
+        sa.Column("genero", sa.String(), nullable=False),
+        sa.Column("parq", sa.String(), nullable=False),
+        sa.Column("atestado", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("class_id", "nome", name="uq_import_student_class_nome"),
+    )
+    _create(
+        "attendance_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("mes", sa.String(), nullable=False),
+        sa.Column("saved_at", sa.String(), nullable=False),
+        sa.Column("client_saved_at", sa.String(), nullable=True),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("registros_json", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "pool_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("data", sa.String(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("clima1", sa.String(), nullable=False),
+        sa.Column("clima2", sa.String(), nullable=False),
+        sa.Column("status_aula", sa.String(), nullable=False),
+        sa.Column("nota", sa.String(), nullable=False),
+        sa.Column("tipo_ocorrencia", sa.String(), nullable=False),
+        sa.Column("temp_externa", sa.String(), nullable=False),
+        sa.Column("temp_piscina", sa.String(), nullable=False),
+        sa.Column("cloro_ppm", sa.String(), nullable=True),
+        sa.Column("saved_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "academic_calendar_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("state_json", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create(
+        "exclusion_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("exclusion_id", sa.String(), nullable=False),
+        sa.Column("student_uid", sa.String(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("turma", sa.String(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("data_exclusao", sa.String(), nullable=False),
+        sa.Column("motivo_exclusao", sa.String(), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=True),
+        sa.Column("saved_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(BASELINE_TABLES):
+        if name in _existing_tables():
+            op.drop_table(name)
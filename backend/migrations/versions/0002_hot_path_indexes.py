@@ -0,0 +1,47 @@
+"""hot-path indexes: chave da chamada mensal e busca de aluno por nome
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_hot_path_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# import_students.class_id e import_classes.unit_id já são prefixo das UNIQUE
+# (class_id, nome) e (unit_id, codigo, horario); não ganham índice redundante.
+HOT_PATH_INDEXES = [
+    ("ix_attendance_logs_class_month", "attendance_logs", ["turma_codigo", "horario", "professor", "mes"]),
+    ("ix_import_students_nome", "import_students", ["nome"]),
+]
+
+
+def _existing_indexes(table: str) -> List[str]:
+    inspector = sa.inspect(op.get_bind())
+    if table not in inspector.get_table_names():
+        return []
+    return [index["name"] for index in inspector.get_indexes(table)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bancos que já tinham o índice (criado pelo create_all) passam direto.
+    for name, table, columns in HOT_PATH_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in HOT_PATH_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
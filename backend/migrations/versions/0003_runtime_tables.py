@@ -0,0 +1,213 @@
+"""runtime tables: estado que saiu dos JSON/Excel de data/ para o banco
+
+Revision ID: 0003_runtime_tables
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Any, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_runtime_tables"
+down_revision: Union[str, Sequence[str], None] = "0002_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RUNTIME_TABLES = [
+    "transfer_overrides", "pool_log_daily_summary", "weather_snapshots", "justifications",
+    "academic_calendar_events", "academic_calendar_bank_hours", "planned_sessions",
+    "planning_files", "planning_file_contents",
+]
+
+
+def _existing_tables() -> List[str]:
+    return sa.inspect(op.get_bind()).get_table_names()
+
+
+def _existing_indexes(table: str) -> List[str]:
+    inspector = sa.inspect(op.get_bind())
+    if table not in inspector.get_table_names():
+        return []
+    return [index["name"] for index in inspector.get_indexes(table)]
+
+
+def _create(name: str, *elements: Any, indexes: Sequence = ()) -> None:
+    # Bancos que já passaram pelo create_all têm a tabela; só cria o que faltar.
+    if name in _existing_tables():
+        return
+    op.create_table(name, *elements)
+    for index_name, columns, unique in indexes:
+        op.create_index(index_name, name, columns, unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _create(
+        "transfer_overrides",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("identity_key", sa.String(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("data_nascimento", sa.String(), nullable=False),
+        sa.Column("whatsapp", sa.String(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("identity_key", name="uq_transfer_override_identity_key"),
+    )
+    _create(
+        "pool_log_daily_summary",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("data", sa.String(), nullable=False),
+        sa.Column("mes", sa.String(), nullable=False),
+        sa.Column("turma_key", sa.String(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("temp_piscina", sa.Float(), nullable=True),
+        sa.Column("temp_externa", sa.Float(), nullable=True),
+        sa.Column("cloro_ppm", sa.Float(), nullable=True),
+        sa.Column("status_aula", sa.String(), nullable=False),
+        sa.Column("nota", sa.String(), nullable=False),
+        sa.Column("tipo_ocorrencia", sa.String(), nullable=False),
+        sa.Column("motivo", sa.String(), nullable=False),
+        sa.Column("log_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("data", "turma_key", "horario", name="uq_pool_log_summary_slot"),
+        indexes=[
+            ("ix_pool_log_daily_summary_data", ["data"], False),
+            ("ix_pool_log_daily_summary_mes", ["mes"], False),
+            ("ix_pool_log_daily_summary_turma_key", ["turma_key"], False),
+            ("ix_pool_log_daily_summary_horario", ["horario"], False),
+        ],
+    )
+    _create(
+        "weather_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.String(), nullable=False),
+        sa.Column("temp", sa.String(), nullable=False),
+        sa.Column("condition", sa.String(), nullable=False),
+        sa.Column("condition_code", sa.String(), nullable=False),
+        sa.Column("saved_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[("ix_weather_snapshots_date", ["date"], True)],
+    )
+    _create(
+        "justifications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("aluno_key", sa.String(), nullable=False),
+        sa.Column("aluno_nome", sa.String(), nullable=False),
+        sa.Column("data", sa.String(), nullable=False),
+        sa.Column("mes", sa.String(), nullable=False),
+        sa.Column("turma_key", sa.String(), nullable=False),
+        sa.Column("turma_codigo", sa.String(), nullable=False),
+        sa.Column("turma_label", sa.String(), nullable=False),
+        sa.Column("horario", sa.String(), nullable=False),
+        sa.Column("professor_key", sa.String(), nullable=False),
+        sa.Column("professor", sa.String(), nullable=False),
+        sa.Column("motivo", sa.String(), nullable=False),
+        sa.Column("saved_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("aluno_key", "data", "turma_key", "horario", "professor_key", name="uq_justification_slot"),
+        indexes=[
+            ("ix_justifications_data", ["data"], False),
+            ("ix_justifications_mes_turma", ["mes", "turma_key"], False),
+        ],
+    )
+    _create(
+        "academic_calendar_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("event_uid", sa.String(), nullable=False),
+        sa.Column("date", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("all_day", sa.Boolean(), nullable=False),
+        sa.Column("start_time", sa.String(), nullable=False),
+        sa.Column("end_time", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("teacher", sa.String(), nullable=False),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[
+            ("ix_academic_calendar_events_event_uid", ["event_uid"], True),
+            ("ix_academic_calendar_events_date", ["date"], False),
+        ],
+    )
+    _create(
+        "academic_calendar_bank_hours",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entry_uid", sa.String(), nullable=False),
+        sa.Column("event_uid", sa.String(), nullable=False),
+        sa.Column("date", sa.String(), nullable=False),
+        sa.Column("teacher", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("start_time", sa.String(), nullable=False),
+        sa.Column("end_time", sa.String(), nullable=False),
+        sa.Column("hours", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[
+            ("ix_academic_calendar_bank_hours_entry_uid", ["entry_uid"], True),
+            ("ix_academic_calendar_bank_hours_event_uid", ["event_uid"], False),
+            ("ix_academic_calendar_bank_hours_date", ["date"], False),
+        ],
+    )
+    _create(
+        "planned_sessions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("class_id", sa.Integer(), nullable=False),
+        sa.Column("mes", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("dates", sa.Text(), nullable=True),
+        sa.Column("session_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("class_id", "mes", name="uq_planned_sessions_class_mes"),
+        indexes=[
+            ("ix_planned_sessions_class_id", ["class_id"], False),
+            ("ix_planned_sessions_mes", ["mes"], False),
+        ],
+    )
+    _create(
+        "planning_files",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("file_uid", sa.String(), nullable=False),
+        sa.Column("source_name", sa.String(), nullable=False),
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("author", sa.String(), nullable=False),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.String(), nullable=False),
+        sa.Column("block_count", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[
+            ("ix_planning_files_file_uid", ["file_uid"], True),
+            ("ix_planning_files_year", ["year"], False),
+            ("ix_planning_files_position", ["position"], False),
+        ],
+    )
+    _create(
+        "planning_file_contents",
+        sa.Column("file_uid", sa.String(), nullable=False),
+        sa.Column("blocks_json", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("file_uid"),
+    )
+    # pool_logs é da baseline; a chave composta do upsert por turma/dia veio depois.
+    if "ix_pool_logs_data_turma_horario" not in _existing_indexes("pool_logs"):
+        op.create_index("ix_pool_logs_data_turma_horario", "pool_logs", ["data", "turma_codigo", "horario"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if "ix_pool_logs_data_turma_horario" in _existing_indexes("pool_logs"):
+        op.drop_index("ix_pool_logs_data_turma_horario", table_name="pool_logs")
+    for name in reversed(RUNTIME_TABLES):
+        if name in _existing_tables():
+            op.drop_table(name)
@@ -0,0 +1,44 @@
+"""exclusion_records.mes: partição mensal das exclusões
+
+Revision ID: 0004_exclusion_records_mes
+Revises: 0003_runtime_tables
+Create Date: 2026-10-19 10:30:00
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_exclusion_records_mes"
+down_revision: Union[str, Sequence[str], None] = "0003_runtime_tables"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns(table: str) -> List[str]:
+    return [column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def _existing_indexes(table: str) -> List[str]:
+    return [index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Linhas antigas ficam com '' e são preenchidas por _backfill_exclusion_months no startup.
+    if "mes" not in _existing_columns("exclusion_records"):
+        op.add_column("exclusion_records", sa.Column("mes", sa.String(), nullable=False, server_default=""))
+    if "ix_exclusion_records_mes" not in _existing_indexes("exclusion_records"):
+        op.create_index("ix_exclusion_records_mes", "exclusion_records", ["mes"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if "ix_exclusion_records_mes" in _existing_indexes("exclusion_records"):
+        op.drop_index("ix_exclusion_records_mes", table_name="exclusion_records")
+    if "mes" in _existing_columns("exclusion_records"):
+        with op.batch_alter_table("exclusion_records") as batch_op:
+            batch_op.drop_column("mes")
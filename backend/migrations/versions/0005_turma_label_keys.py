@@ -0,0 +1,52 @@
+"""turma_label_key: filtro só por label em justificativas e no resumo do log da piscina
+
+Revision ID: 0005_turma_label_keys
+Revises: 0004_exclusion_records_mes
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_turma_label_keys"
+down_revision: Union[str, Sequence[str], None] = "0004_exclusion_records_mes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LABEL_KEY_INDEXES = [
+    ("ix_justifications_mes_turma_label", "justifications", ["mes", "turma_label_key"]),
+    ("ix_pool_log_daily_summary_turma_label_key", "pool_log_daily_summary", ["turma_label_key"]),
+]
+
+
+def _existing_columns(table: str) -> List[str]:
+    return [column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def _existing_indexes(table: str) -> List[str]:
+    return [index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Valores das linhas existentes vêm dos backfills de label no startup.
+    for _, table, _ in LABEL_KEY_INDEXES:
+        if "turma_label_key" not in _existing_columns(table):
+            op.add_column(table, sa.Column("turma_label_key", sa.String(), nullable=False, server_default=""))
+    for name, table, columns in LABEL_KEY_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in LABEL_KEY_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+        if "turma_label_key" in _existing_columns(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column("turma_label_key")
@@ -0,0 +1,116 @@
+"""
+Compara os perfis de engine ("legacy" x "tuned") sob leitura/escrita concorrente no SQLite.
+
+Cada perfil roda num banco temporário novo: W threads gravam linhas em pool_logs
+(um commit por gravação, como o autosave) enquanto R threads fazem a consulta do dia.
+Uso: python scripts/benchmark_db_profile.py [--seconds 5] [--writers 4] [--readers 8] [--out arquivo.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlmodel import Session, SQLModel, select
+
+from app import models  # noqa: F401 - registra as tabelas no metadata
+from app.database import build_engine
+from app.models import PoolLog
+
+DAYS = [f"2026-03-{day:02d}" for day in range(1, 29)]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run_profile(profile: str, seconds: float, writers: int, readers: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", profile=profile)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            for idx in range(2000):
+                session.add(PoolLog(data=DAYS[idx % len(DAYS)], turma_codigo=f"T{idx % 40:02d}", horario="1830"))
+            session.commit()
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats: Dict[str, Any] = {"write_ms": [], "read_ms": [], "errors": 0}
+
+        def _writer(worker: int) -> None:
+            counter = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        session.add(PoolLog(data=DAYS[counter % len(DAYS)], turma_codigo=f"W{worker}", horario="1830"))
+                        session.commit()
+                    with lock:
+                        stats["write_ms"].append((time.perf_counter() - started) * 1000)
+                except Exception:
+                    with lock:
+                        stats["errors"] += 1
+                counter += 1
+
+        def _reader(worker: int) -> None:
+            counter = worker
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        session.exec(select(PoolLog).where(PoolLog.data == DAYS[counter % len(DAYS)])).all()
+                    with lock:
+                        stats["read_ms"].append((time.perf_counter() - started) * 1000)
+                except Exception:
+                    with lock:
+                        stats["errors"] += 1
+                counter += 1
+
+        threads = [threading.Thread(target=_writer, args=(idx,)) for idx in range(writers)]
+        threads += [threading.Thread(target=_reader, args=(idx,)) for idx in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes": len(stats["write_ms"]),
+        "reads": len(stats["read_ms"]),
+        "writes_per_s": round(len(stats["write_ms"]) / seconds, 1),
+        "reads_per_s": round(len(stats["read_ms"]) / seconds, 1),
+        "write_p95_ms": round(_percentile(stats["write_ms"], 0.95), 2),
+        "read_p95_ms": round(_percentile(stats["read_ms"], 0.95), 2),
+        "errors": stats["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--out", default="")
+    args = parser.parse_args()
+
+    results = [_run_profile(profile, args.seconds, args.writers, args.readers) for profile in ["legacy", "tuned"]]
+    payload = {"seconds": args.seconds, "writers": args.writers, "readers": args.readers, "results": results}
+    print(json.dumps(payload, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark ponta a ponta da API sobre o conjunto sintético (scripts/synthetic_dataset.py).
+
+Gera os dados num diretório temporário, aponta o app para esse banco/APP_DATA_DIR e mede
+cada rota via TestClient: relatórios, estatísticas, bootstrap, autosave da chamada,
+force-sync, pool-log, importação CSV e cada exportação. A saída é JSON (p50/p95 por caso,
+statements SQL e spans excel/pdf vindos dos cabeçalhos de app/instrumentation.py).
+Antes dos casos, um processo novo mede o custo de subida: tempo de `import app.main`,
+startup (lifespan + /health), RSS ocioso e quais módulos pesados já foram carregados.
+Uso: python scripts/benchmark_suite.py [--repeat 5] [--startup-repeat 3] [--units 2] [--out resultado.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+
+from app import database as db_module
+from app import settings, weather
+from app import main as app_main
+from app.database import build_engine
+from scripts.synthetic_dataset import Dataset, DatasetSpec, generate, import_csv
+
+# Carregados só nas rotas de exportação/importação/pool-log; não devem aparecer no worker ocioso.
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "reportlab", "requests")
+
+_STARTUP_PROBE = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+import app.main
+import_ms = (time.perf_counter() - started) * 1000
+import_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    client.get("/health")
+    startup_ms = (time.perf_counter() - started) * 1000
+    try:
+        with open("/proc/self/statm") as f:
+            idle_rss_kb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        idle_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({"import_ms": import_ms, "startup_ms": startup_ms, "import_rss_kb": import_rss_kb,
+                  "idle_rss_kb": idle_rss_kb, "heavy_modules": heavy}))
+"""
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _server_timing(header: str) -> Dict[str, float]:
+    spans: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            try:
+                spans[name] = float(duration)
+            except ValueError:
+                continue
+    return spans
+
+
+def _measure(name: str, repeat: int, call: Callable[[int], Any]) -> Dict[str, Any]:
+    call(-1)  # aquecimento: caches, compilação de statements, import preguiçoso
+    wall_ms: List[float] = []
+    statements: List[int] = []
+    spans: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    for idx in range(repeat):
+        started = time.perf_counter()
+        response = call(idx)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        statements.append(int(response.headers.get("x-db-statements", 0)))
+        for span_name, value in _server_timing(response.headers.get("server-timing", "")).items():
+            if span_name != "app":
+                spans.setdefault(span_name, []).append(value)
+    return {
+        "name": name,
+        "runs": repeat,
+        "status": statuses,
+        "p50_ms": round(_percentile(wall_ms, 0.5), 2),
+        "p95_ms": round(_percentile(wall_ms, 0.95), 2),
+        "max_ms": round(max(wall_ms), 2),
+        "mean_ms": round(sum(wall_ms) / len(wall_ms), 2),
+        "db_statements_max": max(statements),
+        "spans_p50_ms": {span_name: round(_percentile(values, 0.5), 2) for span_name, values in sorted(spans.items())},
+    }
+
+
+def _measure_startup(dataset: Dataset, repeat: int) -> Dict[str, Any]:
+    """Sobe o app em processos novos (import frio + lifespan) apontando para o conjunto gerado."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": dataset.database_url,
+        "APP_DATA_DIR": dataset.data_dir,
+        "WEATHER_PREFETCH_INTERVAL": "0",  # sem rede na medição
+    }
+    runs: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _STARTUP_PROBE % (HEAVY_MODULES,)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "runs": repeat,
+        "import_ms_p50": round(_percentile([run["import_ms"] for run in runs], 0.5), 1),
+        "startup_ms_p50": round(_percentile([run["startup_ms"] for run in runs], 0.5), 1),
+        "import_rss_mb": round(_percentile([run["import_rss_kb"] for run in runs], 0.5) / 1024, 1),
+        "idle_rss_mb": round(_percentile([run["idle_rss_kb"] for run in runs], 0.5) / 1024, 1),
+        "heavy_modules": sorted({name for run in runs for name in run["heavy_modules"]}),
+    }
+
+
+def _vacancy_payload(dataset: Dataset) -> Dict[str, Any]:
+    blocks: Dict[str, Dict[str, Any]] = {}
+    for cls in dataset.classes:
+        key = f"{cls['turma_label']}|{cls['horario']}"
+        block = blocks.setdefault(
+            key,
+            {"groupKey": key, "periodoLabel": cls["turma_label"], "horario": cls["horario"], "lotacaoHorario": 0,
+             "capacidadeHorario": 0, "vagasDisponiveis": 0, "excesso": 0, "rows": []},
+        )
+        lotacao = len(cls["students"])
+        block["rows"].append({"nivel": cls["nivel"], "lotacao": lotacao, "capacidade": cls["capacidade"], "professor": cls["professor"]})
+        block["lotacaoHorario"] += lotacao
+        block["capacidadeHorario"] += cls["capacidade"]
+    for block in blocks.values():
+        block["vagasDisponiveis"] = max(0, block["capacidadeHorario"] - block["lotacaoHorario"])
+        block["excesso"] = max(0, block["lotacaoHorario"] - block["capacidadeHorario"])
+    summary = {
+        "totalCapacidade": sum(block["capacidadeHorario"] for block in blocks.values()),
+        "totalLotacao": sum(block["lotacaoHorario"] for block in blocks.values()),
+        "totalVagas": sum(block["vagasDisponiveis"] for block in blocks.values()),
+        "totalExcesso": sum(block["excesso"] for block in blocks.values()),
+    }
+    return {"generatedAt": "2026-03-31T12:00:00", "summary": summary, "blocks": list(blocks.values())}
+
+
+def _cases(client: TestClient, dataset: Dataset) -> List[Any]:
+    month = dataset.months[-1]
+    first = dataset.classes[0]
+    target = {"turmaCodigo": first["codigo"], "turmaLabel": first["turma_label"], "horario": first["horario"], "professor": first["professor"]}
+    export_classes = [
+        {"turmaCodigo": cls["codigo"], "turma": cls["turma_label"], "horario": cls["horario"], "professor": cls["professor"]}
+        for cls in dataset.classes
+        if cls["professor"] == first["professor"] and cls["unit_id"] == first["unit_id"]
+    ]
+    export_payload = {"month": month, "classes": export_classes}
+    csv_payload, _ = import_csv(dataset)
+    day = f"{month}-10"
+
+    def _autosave(idx: int):
+        nome = first["students"][idx % len(first["students"])]
+        return client.post(
+            "/attendance-log",
+            json={**target, "mes": month, "clientMutationId": 1000 + idx,
+                  "registros": [{"aluno_nome": nome, "attendance": {day: "Presente" if idx % 2 else "Falta"}, "justifications": {}, "notes": []}]},
+        )
+
+    def _pool_log(idx: int):
+        # Alterna gravação nova (nota muda) e noop (mesma assinatura da anterior).
+        return client.post(
+            "/pool-log",
+            json={**target, "data": day, "clima1": "Sol", "clima2": "Calor", "statusAula": "normal",
+                  "nota": f"aula {idx // 2}", "tipoOcorrencia": "", "tempExterna": "28", "tempPiscina": "27", "cloroPpm": 1.5},
+        )
+
+    return [
+        ("GET /reports", lambda idx: client.get("/reports", params={"month": month})),
+        ("GET /reports/statistics", lambda idx: client.get("/reports/statistics")),
+        ("GET /api/bootstrap", lambda idx: client.get("/api/bootstrap")),
+        ("GET /api/bootstrap?unit_id&professor", lambda idx: client.get("/api/bootstrap", params={"unit_id": first["unit_id"], "professor": first["professor"]})),
+        ("POST /attendance-log", _autosave),
+        ("POST /attendance-log/force-sync", lambda idx: client.post("/attendance-log/force-sync", json={**target, "mes": month})),
+        ("GET /exclusions", lambda idx: client.get("/exclusions")),
+        ("POST /pool-log", _pool_log),
+        ("GET /pool-log", lambda idx: client.get("/pool-log", params={"date": day})),
+        ("POST /api/import-data", lambda idx: client.post(
+            "/api/import-data", files={"file": ("bench.csv", csv_payload, "text/csv")}, data={"apply_overrides": "false"})),
+        ("POST /reports/excel-file", lambda idx: client.post("/reports/excel-file", json=export_payload)),
+        ("POST /reports/chamada-pdf-file", lambda idx: client.post("/reports/chamada-pdf-file", json=export_payload)),
+        ("POST /reports/vacancies-excel-file", lambda idx: client.post("/reports/vacancies-excel-file", json=_vacancy_payload(dataset))),
+        ("POST /reports/vacancies-pdf-file", lambda idx: client.post("/reports/vacancies-pdf-file", json=_vacancy_payload(dataset))),
+    ]
+
+
+def run_suite(
+    spec: DatasetSpec,
+    repeat: int = 5,
+    work_dir: Optional[str] = None,
+    only: Optional[List[str]] = None,
+    startup_repeat: int = 3,
+) -> Dict[str, Any]:
+    """Gera os dados, roda os casos e devolve o relatório; restaura engine/DATA_DIR ao final."""
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        started = time.perf_counter()
+        dataset = generate(spec, tmp_dir)
+        generated_s = time.perf_counter() - started
+        startup = _measure_startup(dataset, startup_repeat) if startup_repeat > 0 else None
+
+        previous_engine, previous_data_dir = db_module.engine, settings.DATA_DIR
+        previous_weather = weather.WEATHER_SERVICE
+        bench_engine = build_engine(dataset.database_url)
+        db_module.engine = bench_engine
+        settings.DATA_DIR = dataset.data_dir
+        # Como em _measure_startup: sem prefetch do CPTEC disputando a medição.
+        weather.WEATHER_SERVICE = weather._WeatherService(0, weather.WEATHER_FETCH_COOLDOWN_SECONDS)
+        try:
+            with TestClient(app_main.app) as client:
+                results = [
+                    _measure(name, max(1, repeat), call)
+                    for name, call in _cases(client, dataset)
+                    if not only or any(part in name for part in only)
+                ]
+        finally:
+            db_module.engine, settings.DATA_DIR = previous_engine, previous_data_dir
+            weather.WEATHER_SERVICE = previous_weather
+            bench_engine.dispose()
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": asdict(spec),
+        "dataset": dataset.counts,
+        "generated_s": round(generated_s, 2),
+        "repeat": repeat,
+        "startup": startup,
+        "cases": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--startup-repeat", type=int, default=3, help="processos novos para medir import/RSS (0 desliga)")
+    parser.add_argument("--only", action="append", default=[], help="substring do nome do caso (pode repetir)")
+    parser.add_argument("--out", default="")
+    for name, default in asdict(DatasetSpec()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(**{name: getattr(args, name) for name in asdict(DatasetSpec())})
+    payload = run_suite(spec, repeat=args.repeat, only=args.only or None, startup_repeat=args.startup_repeat)
+    print(json.dumps(payload, indent=2, ensure_ascii=False))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,10 @@ if BACKEND_DIR not in sys.path:
 
 from app import models
 from app.database import engine
-from app.main import (
-    DATA_DIR,
-    _load_json_list,
-    _map_attendance_value,
-    _normalize_text,
-    get_reports_statistics,
-)
+from app.normalize import _map_attendance_value, _normalize_text
+from app.routers.reports import get_reports_statistics
+from app.settings import DATA_DIR
+from app.storage import _load_attendance_journal, _load_json_list
 
 EXPORT_DIR = os.path.join(BASE_DIR, "data", "exports")
 OUT_FILE = os.path.join(EXPORT_DIR, "statistics_diff_top10.csv")
@@ -33,7 +30,7 @@ def old_statistics_like_before_fix(session: Session) -> List[Dict[str, Any]]:
     class_by_code = {str(c.codigo or ""): c for c in classes}
     class_by_label = {str(c.turma_label or ""): c for c in classes}
 
-    items = _load_json_list(os.path.join(DATA_DIR, "baseChamada.json"))
+    items = _load_attendance_journal()
     students: Dict[str, Dict[str, Any]] = {}
 
     def ensure_student(name: str):
@@ -11,7 +11,8 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(BASE_DIR))
 
 from app.database import engine
-from app.main import get_reports, DATA_DIR
+from app.routers.reports import get_reports
+from app.settings import DATA_DIR
 
 month = "2026-02"
 year, mon = map(int, month.split("-"))
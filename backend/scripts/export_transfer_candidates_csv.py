@@ -14,7 +14,7 @@ if BACKEND_DIR not in sys.path:
 
 from sqlmodel import Session
 from app.database import engine
-from app.main import get_reports_statistics
+from app.routers.reports import get_reports_statistics
 
 EXPORT_DIR = os.path.join(BASE_DIR, "data", "exports")
 EXPORT_FILE = os.path.join(EXPORT_DIR, "transfer_candidates.csv")
@@ -1,6 +1,7 @@
 import argparse
 import os
 import re
+import sys
 from dataclasses import dataclass
 from datetime import date
 from typing import Any
@@ -48,6 +49,7 @@ class ImportStats:
     updated: int = 0
     skipped_invalid_date: int = 0
     removed_existing: int = 0
+    snapshots_updated: int = 0
 
 
 
@@ -201,12 +203,37 @@ def _row_key(row: dict[str, Any]) -> tuple[str, str, str, str, str]:
 
 
 
+def _update_weather_snapshots(day_weather: dict[str, tuple[str, str]]) -> int:
+    """Upsert one weather_snapshots row per day (temperatura observada + Clima 1)."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+
+    from sqlmodel import Session
+
+    from app.database import create_db_and_tables, engine
+    from app.weather import _export_weather_snapshots_json, _upsert_weather_snapshot
+
+    create_db_and_tables()
+    changed = 0
+    with Session(engine) as session:
+        for data_iso, (temp, condition) in sorted(day_weather.items()):
+            if _upsert_weather_snapshot(session, data_iso, temp, condition, ""):
+                changed += 1
+        session.commit()
+    if changed:
+        _export_weather_snapshots_json()
+    return changed
+
+
+
 def import_retro(
     csv_path: str,
     output_path: str,
     default_year: int,
     month_filter: str | None = None,
     replace_month_data: bool = False,
+    update_weather_snapshots: bool = False,
 ) -> ImportStats:
     df_in = _read_csv(csv_path).fillna("")
     df_out = _load_pool_log(output_path)
@@ -219,6 +246,7 @@ def import_retro(
         df_out = df_out[keep_mask].copy()
         stats.removed_existing = before - len(df_out)
 
+    day_weather: dict[str, tuple[str, str]] = {}
     existing_index: dict[tuple[str, str, str, str, str], int] = {}
     for idx, row in df_out.iterrows():
         key = _row_key(row.to_dict())
@@ -258,6 +286,9 @@ def import_retro(
             "Cloro (ppm)": _coerce_cloro_or_zero(src.get("Cloro (ppm)", "")),
         }
 
+        if row["Temp. (C)"] != "" or row["Clima 1"]:
+            day_weather.setdefault(data_iso, (str(row["Temp. (C)"]), row["Clima 1"]))
+
         key = _row_key(row)
         if key in existing_index:
             df_out.loc[existing_index[key], POOL_LOG_COLUMNS] = [row[col] for col in POOL_LOG_COLUMNS]
@@ -274,6 +305,9 @@ def import_retro(
         df_out.to_csv(output_path, index=False, sep=";", encoding="utf-8-sig")
     else:
         df_out.to_excel(output_path, index=False)
+
+    if update_weather_snapshots and day_weather:
+        stats.snapshots_updated = _update_weather_snapshots(day_weather)
     return stats
 
 
@@ -288,6 +322,11 @@ def main() -> None:
         action="store_true",
         help="Remove registros existentes do mês filtrado antes de importar",
     )
+    parser.add_argument(
+        "--update-weather-snapshots",
+        action="store_true",
+        help="Grava também a temperatura/clima de cada dia na tabela weather_snapshots",
+    )
     parser.add_argument(
         "--output",
         default=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "logPiscina.csv"),
@@ -303,6 +342,7 @@ def main() -> None:
         default_year=args.year,
         month_filter=month_filter,
         replace_month_data=bool(args.replace_month_data),
+        update_weather_snapshots=bool(args.update_weather_snapshots),
     )
 
     print("Importacao concluida")
@@ -312,6 +352,7 @@ def main() -> None:
     print(f"atualizados={stats.updated}")
     print(f"datas_invalidas={stats.skipped_invalid_date}")
     print(f"removidos_mes={stats.removed_existing}")
+    print(f"snapshots_clima={stats.snapshots_updated}")
     print(f"arquivo_saida={args.output}")
 
 
@@ -50,9 +50,15 @@ def inspect_db():
                 print(f"  - {s.nome}")
 
 def inspect_basechamada():
-    """Check baseChamada.json for references"""
-    print("\n=== Checking baseChamada.json ===")
-    base_path = Path(__file__).parent.parent.parent / "data" / "baseChamada.json"
+    """Check the attendance journal for references"""
+    print("\n=== Checking attendance journal ===")
+    data_path = Path(__file__).parent.parent.parent / "data"
+    # Journal particionado por mês (data/chamada/); o arquivo único antigo é lido se ainda existir.
+    for base_path in [data_path / "baseChamada.json", *sorted((data_path / "chamada").glob("baseChamada-*.json"))]:
+        _inspect_chamada_file(base_path)
+
+
+def _inspect_chamada_file(base_path: Path):
     if base_path.exists():
         with open(base_path, "r", encoding="utf-8") as f:
             try:
@@ -62,14 +68,14 @@ def inspect_basechamada():
                         aluno = entry.get("aluno_nome", "")
                         for missing in MISSING_STUDENTS:
                             if missing.lower() in aluno.lower():
-                                print(f"✓ Found '{aluno}' in baseChamada.json")
+                                print(f"✓ Found '{aluno}' in {base_path.name}")
                                 print(f"  Entry: {json.dumps(entry, ensure_ascii=False)[:100]}...")
                                 break
-                    print(f"Total entries in baseChamada.json: {len(data)}")
+                    print(f"Total entries in {base_path.name}: {len(data)}")
             except Exception as e:
-                print(f"Error reading baseChamada.json: {e}")
+                print(f"Error reading {base_path.name}: {e}")
     else:
-        print(f"baseChamada.json not found at {base_path}")
+        print(f"{base_path.name} not found at {base_path}")
 
 if __name__ == "__main__":
     try:
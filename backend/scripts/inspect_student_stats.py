@@ -11,7 +11,8 @@ if BACKEND_DIR not in sys.path:
     sys.path.insert(0, BACKEND_DIR)
 
 from app.database import engine
-from app.main import get_reports_statistics
+from app.routers.reports import get_reports_statistics
+from app.storage import _load_attendance_journal
 
 TARGET = "Matheus Henrique de Souza Marciano".lower()
 
@@ -43,8 +44,7 @@ for row in found:
         )
 
 data_dir = os.path.join(BASE_DIR, "data")
-with open(os.path.join(data_dir, "baseChamada.json"), "r", encoding="utf-8") as f:
-    chamada = json.load(f)
+chamada = _load_attendance_journal()
 
 raw_records = []
 for item in chamada:
@@ -0,0 +1,300 @@
+"""
+Carga do Sync Engine da chamada: K professores x T abas sobre o conjunto sintético.
+
+Cada professor fica numa turma; a aba 0 (ou as --editing-tabs primeiras) grava rajadas de
+autosave (POST /attendance-log) e todas as abas fazem o polling do frontend
+(POST /attendance-log/force-sync e GET /exclusions, ATTENDANCE_SYNC_POLL_MS = 3000).
+Convergência = tempo entre o ack de um autosave numa aba e a primeira resposta de polling
+de outra aba do mesmo professor com saved_at novo; uma resposta enviada depois do ack que
+ainda traz o saved_at antigo conta como leitura velha (stale_reads).
+
+Sem --base-url roda tudo em processo (httpx + ASGI, lifespan incluso) sobre um conjunto
+gerado por scripts/synthetic_dataset.py; com --base-url mira um uvicorn já no ar (subir com
+APP_DATA_DIR/DATABASE_URL apontando para um conjunto gerado com a mesma --seed).
+Uso: python scripts/load_sync_engine.py [--teachers 8] [--tabs 2] [--duration 30] [--out carga.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from scripts.synthetic_dataset import Dataset, DatasetSpec, generate
+
+
+@dataclass
+class LoadConfig:
+    teachers: int = 8
+    tabs: int = 2
+    editing_tabs: int = 1
+    duration: float = 30.0
+    autosave_interval: float = 4.0
+    burst: int = 3
+    burst_gap: float = 0.15
+    sync_interval: float = 3.0
+    exclusions_interval: float = 3.0
+    timeout: float = 10.0
+    seed: int = 7
+
+
+@dataclass
+class _Teacher:
+    target: Dict[str, Any]
+    students: List[str]
+    month: str
+    mutation_id: int = 0
+    acks: List[Any] = field(default_factory=list)  # (envio, ack, aba que gravou)
+
+
+@dataclass
+class _Tab:
+    teacher: _Teacher
+    index: int
+    last_saved_at: str = ""
+    last_received: float = 0.0
+    acks_seen: int = 0
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.latency_ms: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.skipped = 0
+        self.convergence_ms: List[float] = []
+        self.stale_reads = 0
+
+    def record(self, endpoint: str, elapsed_ms: float, ok: bool) -> None:
+        self.latency_ms.setdefault(endpoint, []).append(elapsed_ms)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _teachers(dataset: Dataset, count: int) -> List[_Teacher]:
+    # Uma turma por professor; se faltar professor, repete turmas de outros professores.
+    by_professor: Dict[str, Dict[str, Any]] = {}
+    for cls in dataset.classes:
+        by_professor.setdefault(f"{cls['unit_id']}|{cls['professor']}", cls)
+    pool = list(by_professor.values()) + [cls for cls in dataset.classes if cls not in by_professor.values()]
+    teachers = []
+    for idx in range(count):
+        cls = pool[idx % len(pool)]
+        target = {"turmaCodigo": cls["codigo"], "turmaLabel": cls["turma_label"], "horario": cls["horario"], "professor": cls["professor"]}
+        teachers.append(_Teacher(target=target, students=list(cls["students"]), month=dataset.months[-1]))
+    return teachers
+
+
+async def _sleep(seconds: float, stop_at: float) -> None:
+    # Nunca dorme além do fim da janela: a duração medida fica igual a --duration.
+    await asyncio.sleep(max(0.0, min(seconds, stop_at - time.perf_counter())))
+
+
+async def _timed(client: httpx.AsyncClient, stats: _Stats, endpoint: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        stats.record(endpoint, (time.perf_counter() - started) * 1000, ok=False)
+        return None
+    stats.record(endpoint, (time.perf_counter() - started) * 1000, ok=response.status_code < 400)
+    return response
+
+
+async def _autosave_loop(client, tab: _Tab, cfg: LoadConfig, stats: _Stats, stop_at: float, rng: random.Random) -> None:
+    teacher = tab.teacher
+    await _sleep(rng.uniform(0, cfg.autosave_interval), stop_at)
+    while time.perf_counter() < stop_at:
+        for _ in range(cfg.burst):
+            if time.perf_counter() >= stop_at:
+                break
+            teacher.mutation_id += 1
+            nome = rng.choice(teacher.students)
+            day = f"{teacher.month}-{rng.randrange(1, 29):02d}"
+            payload = {
+                **teacher.target,
+                "mes": teacher.month,
+                "clientMutationId": teacher.mutation_id,
+                "registros": [{"aluno_nome": nome, "attendance": {day: rng.choice(["Presente", "Falta"])}, "justifications": {}, "notes": []}],
+            }
+            requested = time.perf_counter()
+            response = await _timed(client, stats, "POST /attendance-log", "POST", "/attendance-log", json=payload)
+            if response is not None and response.status_code < 400:
+                if response.json().get("skipped"):
+                    stats.skipped += 1
+                else:
+                    teacher.acks.append((requested, time.perf_counter(), tab.index))
+            await _sleep(cfg.burst_gap, stop_at)
+        await _sleep(cfg.autosave_interval * rng.uniform(0.8, 1.2), stop_at)
+
+
+async def _sync_loop(client, tab: _Tab, cfg: LoadConfig, stats: _Stats, stop_at: float, rng: random.Random) -> None:
+    teacher = tab.teacher
+    await _sleep(rng.uniform(0, cfg.sync_interval), stop_at)
+    while time.perf_counter() < stop_at:
+        sent = time.perf_counter()
+        acked_before = [ack for ack in teacher.acks[tab.acks_seen:] if ack[1] <= sent]
+        response = await _timed(
+            client, stats, "POST /attendance-log/force-sync", "POST", "/attendance-log/force-sync", json={**teacher.target, "mes": teacher.month}
+        )
+        if response is not None and response.status_code < 400:
+            saved_at = str(response.json().get("saved_at") or "")
+            received = time.perf_counter()
+            changed = bool(saved_at) and saved_at != tab.last_saved_at
+            for requested, t_ack, origin in acked_before:
+                if changed:
+                    seen_at = received
+                elif requested <= tab.last_received:
+                    # Gravação em voo junto com o polling anterior: ele já pode ter trazido o saved_at novo.
+                    seen_at = max(t_ack, tab.last_received)
+                else:
+                    stats.stale_reads += 1  # gravação confirmada antes do envio e ainda invisível
+                    break
+                if origin != tab.index:
+                    stats.convergence_ms.append((seen_at - t_ack) * 1000)
+                tab.acks_seen += 1
+            tab.last_saved_at = saved_at or tab.last_saved_at
+            tab.last_received = received
+        await _sleep(cfg.sync_interval - (time.perf_counter() - sent), stop_at)
+
+
+async def _exclusions_loop(client, tab: _Tab, cfg: LoadConfig, stats: _Stats, stop_at: float, rng: random.Random) -> None:
+    await _sleep(rng.uniform(0, cfg.exclusions_interval), stop_at)
+    while time.perf_counter() < stop_at:
+        sent = time.perf_counter()
+        await _timed(client, stats, "GET /exclusions", "GET", "/exclusions")
+        await _sleep(cfg.exclusions_interval - (time.perf_counter() - sent), stop_at)
+
+
+async def _run(client: httpx.AsyncClient, dataset: Dataset, cfg: LoadConfig) -> Dict[str, Any]:
+    rng = random.Random(cfg.seed)
+    stats = _Stats()
+    teachers = _teachers(dataset, cfg.teachers)
+    started = time.perf_counter()
+    stop_at = started + cfg.duration
+    tasks = []
+    for teacher in teachers:
+        for index in range(cfg.tabs):
+            tab = _Tab(teacher=teacher, index=index)
+            tab_rng = random.Random(rng.random())
+            if index < cfg.editing_tabs:
+                tasks.append(_autosave_loop(client, tab, cfg, stats, stop_at, tab_rng))
+            tasks.append(_sync_loop(client, tab, cfg, stats, stop_at, tab_rng))
+            tasks.append(_exclusions_loop(client, tab, cfg, stats, stop_at, tab_rng))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, values in sorted(stats.latency_ms.items()):
+        errors = stats.errors.get(endpoint, 0)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": errors,
+            "error_rate": round(errors / len(values), 4) if values else 0.0,
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(_percentile(values, 0.5), 2),
+            "p95_ms": round(_percentile(values, 0.95), 2),
+            "p99_ms": round(_percentile(values, 0.99), 2),
+            "max_ms": round(max(values), 2),
+        }
+    total = sum(len(values) for values in stats.latency_ms.values())
+    total_errors = sum(stats.errors.values())
+    observers = max(0, cfg.tabs - 1)
+    pending = sum(len(teacher.acks) for teacher in teachers) * observers - len(stats.convergence_ms)
+    return {
+        "config": asdict(cfg),
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "error_rate": round(total_errors / total, 4) if total else 0.0,
+        "stale_snapshot_skipped": stats.skipped,
+        "endpoints": endpoints,
+        "convergence": {
+            "samples": len(stats.convergence_ms),
+            "p50_ms": round(_percentile(stats.convergence_ms, 0.5), 2),
+            "p95_ms": round(_percentile(stats.convergence_ms, 0.95), 2),
+            "p99_ms": round(_percentile(stats.convergence_ms, 0.99), 2),
+            "max_ms": round(max(stats.convergence_ms), 2) if stats.convergence_ms else 0.0,
+            "stale_reads": stats.stale_reads,
+            "unobserved_at_end": max(0, pending),
+        },
+    }
+
+
+async def _run_in_process(spec: DatasetSpec, cfg: LoadConfig, work_dir: Optional[str]) -> Dict[str, Any]:
+    from app import database as db_module
+    from app import settings, weather
+    from app import main as app_main
+    from app.database import build_engine
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        dataset = generate(spec, tmp_dir)
+        previous_engine, previous_data_dir = db_module.engine, settings.DATA_DIR
+        previous_weather = weather.WEATHER_SERVICE
+        load_engine = build_engine(dataset.database_url)
+        db_module.engine = load_engine
+        settings.DATA_DIR = dataset.data_dir
+        # Offline mesmo com WEATHER_PREFETCH_INTERVAL no ambiente: o lifespan não sobe o prefetch do CPTEC.
+        weather.WEATHER_SERVICE = weather._WeatherService(0, weather.WEATHER_FETCH_COOLDOWN_SECONDS)
+        try:
+            async with app_main.app.router.lifespan_context(app_main.app):
+                transport = httpx.ASGITransport(app=app_main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=cfg.timeout) as client:
+                    report = await _run(client, dataset, cfg)
+        finally:
+            db_module.engine, settings.DATA_DIR = previous_engine, previous_data_dir
+            weather.WEATHER_SERVICE = previous_weather
+            load_engine.dispose()
+    return {"mode": "in-process", "dataset": dataset.counts, **report}
+
+
+async def _run_remote(base_url: str, spec: DatasetSpec, cfg: LoadConfig, work_dir: Optional[str]) -> Dict[str, Any]:
+    # Só as turmas/alunos importam aqui: regenera a mesma spec para saber o que o servidor tem.
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        dataset = generate(spec, tmp_dir)
+    async with httpx.AsyncClient(base_url=base_url, timeout=cfg.timeout) as client:
+        report = await _run(client, dataset, cfg)
+    return {"mode": base_url, "dataset": dataset.counts, **report}
+
+
+def run_load(cfg: LoadConfig, spec: Optional[DatasetSpec] = None, base_url: str = "", work_dir: Optional[str] = None) -> Dict[str, Any]:
+    spec = spec or DatasetSpec()
+    if base_url:
+        return asyncio.run(_run_remote(base_url, spec, cfg, work_dir))
+    return asyncio.run(_run_in_process(spec, cfg, work_dir))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="")
+    parser.add_argument("--out", default="")
+    parser.add_argument("--dataset-seed", type=int, default=DatasetSpec().seed)
+    parser.add_argument("--students", type=int, default=DatasetSpec().students_per_class)
+    for name, default in asdict(LoadConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    cfg = LoadConfig(**{name: getattr(args, name) for name in asdict(LoadConfig())})
+    spec = DatasetSpec(seed=args.dataset_seed, students_per_class=args.students)
+    payload = run_load(cfg, spec, base_url=args.base_url)
+    print(json.dumps(payload, indent=2, ensure_ascii=False))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """
-Migra registros de baseChamada.json para a tabela attendance_logs no Supabase.
+Migra registros do journal de chamadas (data/chamada/baseChamada-YYYY-MM.json, ou o
+baseChamada.json antigo) para a tabela attendance_logs no Supabase.
 Uso: python scripts/migrate_chamada_json_to_db.py
 """
 import os
@@ -29,15 +30,17 @@ def main():
     print("Criando tabelas se necessário...")
     create_db_and_tables()
 
-    items = _load_json(CHAMADA_FILE)
+    from app.storage import _load_attendance_journal
+    items = _load_json(CHAMADA_FILE) + _load_attendance_journal()
     if not items:
-        print("Nenhum registro encontrado em baseChamada.json.")
+        print("Nenhum registro encontrado no journal de chamadas.")
         return
 
     print(f"Encontrados {len(items)} registros no JSON.")
 
     # Agrupar por (turmaCodigo, horario, professor, mes) → manter o mais recente
-    from app.main import _attendance_log_lookup_keys, _saved_at_sort_key, _normalize_horario_key
+    from app.attendance_logs import _attendance_log_lookup_keys
+    from app.normalize import _normalize_horario_key, _saved_at_sort_key
     latest = {}
     for item in items:
         item_norm = dict(item)
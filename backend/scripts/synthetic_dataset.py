@@ -0,0 +1,285 @@
+"""
+Gera um conjunto de dados sintético e determinístico (semente) para benchmarks.
+
+Unidades -> professores -> turmas (tq/qs) -> alunos, snapshots mensais de chamada,
+exclusões (excludedStudents.json), registros de piscina e eventos do calendário, gravados
+num banco SQLite e num APP_DATA_DIR próprios. Nada toca o dev.db nem a pasta data/.
+Uso: python scripts/synthetic_dataset.py --out-dir /tmp/bench [--units 2] [--students 18] ...
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlmodel import Session, SQLModel
+
+from app import academic_calendar, models, normalize, pool_log_storage, schemas
+from app.database import build_engine
+
+UNIT_NAMES = ["Bela Vista", "São Matheus", "Vila João XXIII", "Parque Municipal", "Jardim Europa", "Centro"]
+PROFESSORS = ["Ana Souza", "Bruno Lima", "Carla Mendes", "Diego Rocha", "Elisa Prado", "Fábio Nunes", "Gabriela Reis", "Heitor Alves"]
+FIRST_NAMES = ["Ana", "Beatriz", "Caio", "Davi", "Eduarda", "Felipe", "Giovana", "Heloísa", "Igor", "Júlia", "Lucas", "Marina", "Nicolas", "Olívia", "Pedro", "Rafaela", "Samuel", "Tainá", "Vitor", "Yasmin"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento", "Lima", "Araújo", "Fernandes", "Carvalho", "Gomes", "Martins"]
+LEVELS = ["Iniciação", "Iniciante", "Intermediário", "Avançado"]
+SCHEDULES = [("Terça e Quinta", "terca e quinta", {1, 3}), ("Quarta e Sexta", "quarta e sexta", {2, 4})]
+HORARIOS = ["07:00", "08:00", "09:00", "10:00", "14:00", "15:00", "16:00", "17:00", "18:00", "18:30", "19:15", "20:00"]
+STATUSES = (["Presente"] * 16) + (["Falta"] * 3) + ["Justificado"]
+
+
+@dataclass
+class DatasetSpec:
+    seed: int = 42
+    units: int = 2
+    professors_per_unit: int = 3
+    classes_per_professor: int = 6
+    students_per_class: int = 18
+    first_month: str = "2026-02"
+    months: int = 3
+    exclusions: int = 40
+    pool_log_days: int = 20
+    calendar_events: int = 6
+
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    database_url: str
+    data_dir: str
+    months: List[str]
+    classes: List[Dict[str, Any]] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"spec": asdict(self.spec), "months": self.months, "counts": self.counts}
+
+
+def _months(first_month: str, count: int) -> List[str]:
+    year, month = (int(part) for part in first_month.split("-"))
+    result = []
+    for _ in range(max(1, count)):
+        result.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return result
+
+
+def _class_days(month: str, weekdays: set) -> List[str]:
+    year, mon = (int(part) for part in month.split("-"))
+    day = date(year, mon, 1)
+    days = []
+    while day.month == mon:
+        if day.weekday() in weekdays:
+            days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+
+def _student_row(rng: random.Random, class_id: int, nome: str) -> models.ImportStudent:
+    born = date(2008, 1, 1) + timedelta(days=rng.randrange(0, 365 * 50))
+    return models.ImportStudent(
+        class_id=class_id,
+        nome=nome,
+        whatsapp=f"1199{rng.randrange(1000000, 9999999)}",
+        data_nascimento=born.strftime("%d/%m/%Y"),
+        categoria=rng.choice(["Juvenil", "Adulto", "Sênior"]),
+        genero=rng.choice(["Feminino", "Masculino"]),
+        parq=rng.choice(["Sim", "Não"]),
+        atestado=rng.random() < 0.3,
+    )
+
+
+def _build_classes(rng: random.Random, spec: DatasetSpec, session: Session) -> List[Dict[str, Any]]:
+    classes: List[Dict[str, Any]] = []
+    for unit_idx in range(spec.units):
+        name = UNIT_NAMES[unit_idx % len(UNIT_NAMES)] + ("" if unit_idx < len(UNIT_NAMES) else f" {unit_idx + 1}")
+        unit = models.ImportUnit(name=name)
+        session.add(unit)
+        session.flush()
+        for prof_idx in range(spec.professors_per_unit):
+            professor = PROFESSORS[(unit_idx * spec.professors_per_unit + prof_idx) % len(PROFESSORS)]
+            if unit_idx * spec.professors_per_unit + prof_idx >= len(PROFESSORS):
+                professor = f"{professor} {unit_idx + 1}"
+            for class_idx in range(spec.classes_per_professor):
+                label, dias, weekdays = SCHEDULES[class_idx % len(SCHEDULES)]
+                horario = HORARIOS[(class_idx // len(SCHEDULES)) % len(HORARIOS)]
+                row = models.ImportClass(
+                    unit_id=unit.id,
+                    codigo=f"u{unit_idx + 1}p{prof_idx + 1}t{class_idx + 1:02d}",
+                    turma_label=label,
+                    horario=horario,
+                    professor=professor,
+                    nivel=LEVELS[class_idx % len(LEVELS)],
+                    capacidade=rng.choice([16, 18, 20, 24]),
+                    dias_semana=dias,
+                )
+                session.add(row)
+                session.flush()
+                classes.append({**row.model_dump(), "unit_name": name, "weekdays": sorted(weekdays), "students": []})
+    return classes
+
+
+def generate(spec: DatasetSpec, out_dir: str) -> Dataset:
+    """Cria o banco (out_dir/bench.db) e o APP_DATA_DIR (out_dir/data) com os dados da spec."""
+    rng = random.Random(spec.seed)
+    data_dir = os.path.join(out_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    database_url = f"sqlite:///{os.path.join(out_dir, 'bench.db')}"
+    engine = build_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    dataset = Dataset(spec=spec, database_url=database_url, data_dir=data_dir, months=_months(spec.first_month, spec.months))
+
+    with Session(engine) as session:
+        dataset.classes = _build_classes(rng, spec, session)
+        students = 0
+        for cls in dataset.classes:
+            names = set()
+            while len(names) < spec.students_per_class:
+                names.add(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}")
+            for nome in sorted(names):
+                session.add(_student_row(rng, cls["id"], nome))
+                cls["students"].append(nome)
+                students += 1
+        session.commit()
+
+        logs = 0
+        for month in dataset.months:
+            for cls in dataset.classes:
+                registros = []
+                for nome in cls["students"]:
+                    attendance = {day: rng.choice(STATUSES) for day in _class_days(month, set(cls["weekdays"]))}
+                    justifications = {day: "Atestado médico" for day, status in attendance.items() if status == "Justificado"}
+                    registros.append({"aluno_nome": nome, "attendance": attendance, "justifications": justifications, "notes": []})
+                session.add(
+                    models.AttendanceLog(
+                        turma_codigo=cls["codigo"],
+                        turma_label=cls["turma_label"],
+                        horario=normalize._normalize_horario_key(cls["horario"]),
+                        professor=cls["professor"],
+                        mes=month,
+                        saved_at=f"{month}-28T21:00:00+00:00",
+                        registros_json=json.dumps(registros, ensure_ascii=False),
+                    )
+                )
+                logs += 1
+        session.commit()
+
+        year = int(dataset.months[0][:4])
+        academic_calendar._save_academic_calendar_settings(
+            session,
+            {
+                "schoolYear": year,
+                "inicioAulas": f"{dataset.months[0]}-02",
+                "feriasInvernoInicio": f"{year}-07-13",
+                "feriasInvernoFim": f"{year}-07-24",
+                "terminoAulas": f"{year}-12-11",
+                "updated_at": f"{year}-01-15T12:00:00",
+            },
+        )
+        for idx in range(spec.calendar_events):
+            month = dataset.months[idx % len(dataset.months)]
+            event = {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "date": f"{month}-{rng.randrange(1, 28):02d}",
+                "type": ["feriado", "ponte", "reuniao"][idx % 3],
+                "allDay": True,
+                "description": f"Evento sintético {idx + 1}",
+                "created_at": f"{month}-01T12:00:00",
+            }
+            session.add(academic_calendar._academic_event_row(event))
+        session.commit()
+
+        pool_logs = 0
+        pool_days = [day for month in dataset.months for day in _class_days(month, {1, 2, 3, 4})][: spec.pool_log_days]
+        for day in pool_days:
+            weekday = date.fromisoformat(day).weekday()
+            for cls in dataset.classes:
+                if weekday not in cls["weekdays"]:
+                    continue
+                entry = schemas.PoolLogEntryModel(
+                    data=day,
+                    turmaCodigo=cls["codigo"],
+                    turmaLabel=cls["turma_label"],
+                    horario=cls["horario"],
+                    professor=cls["professor"],
+                    clima1=rng.choice(["Sol", "Nublado", "Chuva"]),
+                    clima2=rng.choice(["Calor", "Agradável", "Frio"]),
+                    statusAula="normal",
+                    nota="aula",
+                    tipoOcorrencia="",
+                    tempExterna=str(rng.randrange(16, 34)),
+                    tempPiscina=str(rng.randrange(24, 30)),
+                    cloroPpm=round(rng.uniform(0.5, 3.0), 1),
+                )
+                pool_log_storage._store_pool_log_row(session, pool_log_storage._pool_log_row_from_entry(entry))
+                pool_logs += 1
+
+    exclusions = []
+    candidates = [(cls, nome) for cls in dataset.classes for nome in cls["students"]]
+    for cls, nome in rng.sample(candidates, min(spec.exclusions, len(candidates))):
+        month = rng.choice(dataset.months)
+        exclusions.append(
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "nome": nome,
+                "turma": cls["turma_label"],
+                "turmaCodigo": cls["codigo"],
+                "horario": cls["horario"],
+                "professor": cls["professor"],
+                "dataExclusao": f"{rng.randrange(1, 28):02d}/{month[5:]}/{month[:4]}",
+                "motivo_exclusao": rng.choice(["Desistência", "Mudança de horário", "Saúde"]),
+            }
+        )
+    with open(os.path.join(data_dir, "excludedStudents.json"), "w", encoding="utf-8") as f:
+        json.dump(exclusions, f, ensure_ascii=False, indent=2)
+
+    engine.dispose()
+    dataset.counts = {
+        "units": spec.units,
+        "classes": len(dataset.classes),
+        "students": students,
+        "attendance_logs": logs,
+        "pool_logs": pool_logs,
+        "exclusions": len(exclusions),
+        "calendar_events": spec.calendar_events,
+    }
+    return dataset
+
+
+def import_csv(dataset: Dataset, new_students_per_class: int = 2, seed_offset: int = 1) -> Tuple[bytes, int]:
+    """CSV no layout de /api/import-data com os alunos já existentes e alguns novos por turma."""
+    rng = random.Random(dataset.spec.seed + seed_offset)
+    header = ["unidade", "turma_codigo", "horario", "professor", "nivel", "capacidade", "dias_semana", "aluno_turma",
+              "aluno_nome", "whatsapp", "data_nascimento", "data_atest", "categoria", "genero", "parq", "atestado"]
+    lines = [",".join(header)]
+    for cls in dataset.classes:
+        names = list(cls["students"]) + [f"Novo {rng.choice(FIRST_NAMES)} {cls['codigo']} {idx}" for idx in range(new_students_per_class)]
+        for nome in names:
+            lines.append(",".join([
+                cls["unit_name"], cls["codigo"], cls["horario"], cls["professor"], cls["nivel"], str(cls["capacidade"]),
+                cls["dias_semana"], cls["turma_label"], nome, f"1198{rng.randrange(1000000, 9999999)}", "01/01/2010",
+                "", "Juvenil", "Feminino", "Sim", "nao",
+            ]))
+    return "\n".join(lines).encode("utf-8"), len(lines) - 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out-dir", required=True)
+    for name, default in asdict(DatasetSpec()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+    spec = DatasetSpec(**{name: getattr(args, name) for name in asdict(DatasetSpec())})
+    dataset = generate(spec, args.out_dir)
+    print(json.dumps({**dataset.summary(), "database_url": dataset.database_url, "data_dir": dataset.data_dir}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
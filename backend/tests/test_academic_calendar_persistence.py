@@ -1,11 +1,14 @@
+import json
+from datetime import date
 from pathlib import Path
 
 from fastapi.testclient import TestClient
 from sqlmodel import Session, create_engine, select
 
 from app import database as db_module
+from app import academic_calendar, settings
 from app import main as app_main
-from app.models import AcademicCalendarState
+from app.models import AcademicCalendarEvent, AcademicCalendarState
 
 
 def _build_settings_payload() -> dict[str, object]:
@@ -44,7 +47,7 @@ def test_academic_calendar_persists_in_database_and_survives_json_loss(tmp_path:
         connect_args={"check_same_thread": False},
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
     monkeypatch.setattr(db_module, "engine", test_engine)
 
     db_module.create_db_and_tables()
@@ -60,9 +63,13 @@ def test_academic_calendar_persists_in_database_and_survives_json_loss(tmp_path:
 
         rows = _calendar_state_rows(test_engine)
         assert len(rows) == 1
-        assert "Carnaval" in rows[0].state_json
+        assert "Carnaval" not in rows[0].state_json
+        with Session(test_engine) as session:
+            events = session.exec(select(AcademicCalendarEvent)).all()
+        assert [event.description for event in events] == ["Carnaval"]
 
         saved_file = data_dir / "academicCalendar.json"
+        academic_calendar.ACADEMIC_CALENDAR_JSON_MIRROR.flush()
         assert saved_file.exists()
         saved_file.unlink()
 
@@ -71,4 +78,103 @@ def test_academic_calendar_persists_in_database_and_survives_json_loss(tmp_path:
         payload = refresh_response.json()
         assert payload["settings"]["schoolYear"] == 2026
         assert len(payload["events"]) == 1
-        assert payload["events"][0]["description"] == "Carnaval"
\ No newline at end of file
+        assert payload["events"][0]["description"] == "Carnaval"
+
+
+def test_legacy_state_blob_is_split_into_tables(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'legacy.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    db_module.create_db_and_tables()
+
+    legacy_state = {
+        "settings": _build_settings_payload(),
+        "events": [{**_build_event_payload(), "id": "evt-1"}],
+        "bankHours": [{"id": "bh-1", "eventId": "evt-9", "date": "2026-03-05", "hours": 2.5}],
+    }
+    with Session(test_engine) as session:
+        session.add(AcademicCalendarState(id=1, state_json=json.dumps(legacy_state)))
+        session.commit()
+
+    with TestClient(app_main.app) as client:
+        payload = client.get("/academic-calendar").json()
+        assert payload["settings"]["inicioAulas"] == "2026-01-01"
+        assert [event["id"] for event in payload["events"]] == ["evt-1"]
+        assert payload["bankHours"][0]["hours"] == 2.5
+        assert client.get("/academic-calendar", params={"month": "2026-03"}).json()["events"] == []
+
+    rows = _calendar_state_rows(test_engine)
+    assert json.loads(rows[0].state_json) == {"settings": legacy_state["settings"]}
+
+
+def test_class_day_counts_follow_calendar_writes(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'days.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    db_module.create_db_and_tables()
+
+    today = date(2026, 3, 31)
+    with TestClient(app_main.app) as client:
+        client.put("/academic-calendar/settings", json={**_build_settings_payload(), "inicioAulas": "2026-03-01"})
+        index = academic_calendar.ACADEMIC_CALENDAR.class_days(today)
+        assert academic_calendar.ACADEMIC_CALENDAR.class_days(today) is index
+        # Março/2026: terças e quintas = 9 dias, quartas e sextas = 8 dias.
+        assert index.count("tq", date(2026, 3, 1), today) == 9
+        assert index.count("qs", date(2026, 3, 1), today) == 8
+        assert index.count("tq", date(2026, 3, 10), date(2026, 3, 12)) == 2
+        assert index.count("tq", date(2026, 2, 1), date(2026, 2, 28)) == 0
+        assert index.count("other", date(2026, 3, 1), today) == 0
+
+        event = client.post("/academic-calendar/events", json={**_build_event_payload(), "date": "2026-03-10"}).json()["event"]
+        refreshed = academic_calendar.ACADEMIC_CALENDAR.class_days(today)
+        assert refreshed is not index
+        assert refreshed.count("tq", date(2026, 3, 1), today) == 8
+        assert "2026-03-10" not in refreshed.days["tq"]
+
+        assert client.delete(f"/academic-calendar/events/{event['id']}").status_code == 200
+        assert academic_calendar.ACADEMIC_CALENDAR.class_days(today).count("tq", date(2026, 3, 1), today) == 9
+        assert client.delete(f"/academic-calendar/events/{event['id']}").status_code == 404
+
+
+def test_calendar_json_mirror_coalesces_writes(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'mirror.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    monkeypatch.setattr(academic_calendar.ACADEMIC_CALENDAR_JSON_MIRROR, "interval_seconds", 3600)
+    db_module.create_db_and_tables()
+
+    saved_file = data_dir / "academicCalendar.json"
+    mirror = academic_calendar.ACADEMIC_CALENDAR_JSON_MIRROR
+    with TestClient(app_main.app) as client:
+        client.put("/academic-calendar/settings", json=_build_settings_payload())
+        for day in ["2026-02-23", "2026-04-03", "2026-04-21"]:
+            client.post("/academic-calendar/events", json={**_build_event_payload(), "date": day})
+        # Nenhuma escrita reescreve o arquivo na requisição; só marca como desatualizado.
+        assert not saved_file.exists()
+        assert mirror.is_stale(str(saved_file))
+
+        assert mirror.flush() == 1
+        assert mirror.flush() == 0
+        saved = json.loads(saved_file.read_text(encoding="utf-8"))
+        assert sorted(event["date"] for event in saved["events"]) == ["2026-02-23", "2026-04-03", "2026-04-21"]
+
+        event_id = saved["events"][0]["id"]
+        client.delete(f"/academic-calendar/events/{event_id}")
+    # O stop() do lifespan grava o que ficou pendente.
+    assert not mirror.is_stale()
+    assert len(json.loads(saved_file.read_text(encoding="utf-8"))["events"]) == 2
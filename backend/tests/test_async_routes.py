@@ -0,0 +1,141 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import anyio
+import httpx
+import pytest
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from app import database as db_module
+from app import models, settings
+from app import main as app_main
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'async.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    db_module.create_db_and_tables()
+    with Session(test_engine) as session:
+        session.add(
+            models.AttendanceLog(
+                turma_codigo="T01",
+                turma_label="Turma T01",
+                horario="1830",
+                professor="Prof. Teste",
+                mes="2026-03",
+                saved_at="2026-03-10T18:40:00",
+                registros_json=json.dumps([{"aluno_nome": "Ana", "attendance": {"2026-03-10": "Presente"}}]),
+            )
+        )
+        session.commit()
+    yield {"engine": test_engine}
+
+
+def test_polling_routes_do_not_need_the_threadpool(env):
+    probe = {"turmaCodigo": "T01", "turmaLabel": "Turma T01", "horario": "18:30", "professor": "Prof. Teste", "mes": "2026-03"}
+
+    async def _scenario() -> list:
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/exclusions")).status_code == 200  # carga fria vai para a thread
+
+            # Com o único slot do threadpool ocupado, rotas síncronas ficariam paradas.
+            limiter = anyio.to_thread.current_default_thread_limiter()
+            limiter.total_tokens = 1
+            results: list = []
+
+            async def _poll(idx: int) -> None:
+                if idx % 5 == 0:
+                    response = await client.get("/exclusions")
+                    results.append(response.status_code == 200 and response.json() == [])
+                else:
+                    response = await client.post("/attendance-log/force-sync", json=probe)
+                    results.append(response.status_code == 200 and response.json()["hasLog"] is True)
+
+            async with limiter:
+                with anyio.fail_after(30):
+                    async with anyio.create_task_group() as tg:
+                        for idx in range(200):
+                            tg.start_soon(_poll, idx)
+            await db_module.dispose_async_engine()
+            return results
+
+    results = anyio.run(_scenario)
+    assert len(results) == 200 and all(results)
+
+
+def test_attendance_save_round_trip_on_async_engine(env):
+    from fastapi.testclient import TestClient
+
+    payload = {
+        "turmaCodigo": "T01",
+        "turmaLabel": "Turma T01",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "mes": "2026-03",
+        "registros": [{"aluno_nome": "Bruno", "attendance": {"2026-03-12": "Falta"}, "justifications": {}, "notes": []}],
+    }
+    with TestClient(app_main.app) as client:
+        assert client.post("/attendance-log", json=payload).status_code == 200
+        bootstrap = client.get("/api/bootstrap")
+        assert bootstrap.status_code == 200 and bootstrap.json()["classes"] == []
+
+    with Session(env["engine"]) as session:
+        row = session.get(models.AttendanceLog, 1)
+        names = [item["aluno_nome"] for item in json.loads(row.registros_json)]
+    # O snapshot parcial é mesclado com o que já estava salvo.
+    assert sorted(names) == ["Ana", "Bruno"]
+
+
+def test_force_sync_reads_only_saved_at_of_one_class(env):
+    from fastapi.testclient import TestClient
+
+    with Session(env["engine"]) as session:
+        # Linha antiga sem código e com outra grafia: só casa pelas chaves de lookup.
+        session.add(
+            models.AttendanceLog(
+                turma_codigo="",
+                turma_label="Turma T02",
+                horario="18:30",
+                professor="prof. teste",
+                mes="2026-03",
+                saved_at="2026-03-11T09:00:00",
+                registros_json="not json",
+            )
+        )
+        for idx in range(20):
+            session.add(models.AttendanceLog(turma_codigo=f"X{idx}", horario="0700", professor="Outro", mes="2026-03", saved_at="2026-03-01T07:00:00"))
+        session.commit()
+
+    statements: list = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    probe = {"turmaCodigo": "T01", "turmaLabel": "Turma T01", "horario": "18:30", "professor": "Prof. Teste", "mes": "2026-03"}
+    legacy_probe = {"turmaCodigo": "", "turmaLabel": "Turma T02", "horario": "1830", "professor": "Prof. Teste", "mes": "2026-03"}
+    with TestClient(app_main.app) as client:
+        sa_event.listen(Engine, "before_cursor_execute", _capture)
+        try:
+            exact = client.post("/attendance-log/force-sync", json=probe).json()
+            legacy = client.post("/attendance-log/force-sync", json=legacy_probe).json()
+            missing = client.post("/attendance-log/force-sync", json={**probe, "turmaCodigo": "T99", "turmaLabel": "T99"}).json()
+        finally:
+            sa_event.remove(Engine, "before_cursor_execute", _capture)
+
+    assert exact == {"ok": True, "hasLog": True, "saved_at": "2026-03-10T18:40:00"}
+    assert legacy == {"ok": True, "hasLog": True, "saved_at": "2026-03-11T09:00:00"}
+    assert missing == {"ok": True, "hasLog": False, "saved_at": None}
+    selects = [statement for statement in statements if "attendance_logs" in statement]
+    assert selects and not any("registros_json" in statement for statement in selects)
+    assert "LIMIT" in selects[0] and "ORDER BY attendance_logs.saved_at DESC" in selects[0]
@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import create_engine
 
 from app import database as db_module
+from app import settings
 from app import main as app_main
 
 
@@ -21,7 +22,7 @@ def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
         connect_args={"check_same_thread": False},
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
     monkeypatch.setattr(db_module, "engine", test_engine)
 
     db_module.create_db_and_tables()
@@ -58,7 +59,7 @@ def test_merge_does_not_erase_existing_status_when_incoming_is_empty(client: Tes
     second = client.post("/attendance-log", json=_payload("", "2026-03-31T10:05:00Z"))
     assert second.status_code == 200
 
-    output_file = tmp_path / "data" / "baseChamada.json"
+    output_file = tmp_path / "data" / "chamada" / "baseChamada-2026-03.json"
     assert output_file.exists()
 
     items = json.loads(output_file.read_text(encoding="utf-8"))
@@ -82,7 +83,7 @@ def test_merge_does_not_erase_existing_justification_when_incoming_is_empty(clie
     second = client.post("/attendance-log", json=payload)
     assert second.status_code == 200
 
-    output_file = tmp_path / "data" / "baseChamada.json"
+    output_file = tmp_path / "data" / "chamada" / "baseChamada-2026-03.json"
     assert output_file.exists()
 
     items = json.loads(output_file.read_text(encoding="utf-8"))
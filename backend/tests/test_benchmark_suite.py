@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from app import database as db_module
+from app import settings, weather
+from scripts.benchmark_suite import run_suite
+from scripts.synthetic_dataset import DatasetSpec, generate
+
+TINY = DatasetSpec(units=1, professors_per_unit=2, classes_per_professor=2, students_per_class=3, months=2, exclusions=2, pool_log_days=3, calendar_events=2)
+
+
+def test_generator_is_deterministic(tmp_path: Path):
+    first = generate(TINY, str(tmp_path / "a"))
+    second = generate(TINY, str(tmp_path / "b"))
+    assert first.classes == second.classes
+    assert first.counts == {"units": 1, "classes": 4, "students": 12, "attendance_logs": 8, "pool_logs": first.counts["pool_logs"], "exclusions": 2, "calendar_events": 2}
+    assert first.counts["pool_logs"] > 0
+    exclusions = json.loads((tmp_path / "a" / "data" / "excludedStudents.json").read_text(encoding="utf-8"))
+    assert exclusions == json.loads((tmp_path / "b" / "data" / "excludedStudents.json").read_text(encoding="utf-8"))
+
+
+def test_suite_runs_every_case_against_the_synthetic_dataset(tmp_path: Path, monkeypatch):
+    prefetching = weather._WeatherService(3600, 60)
+    monkeypatch.setattr(weather, "WEATHER_SERVICE", prefetching)
+    engine, data_dir = db_module.engine, settings.DATA_DIR
+    report = run_suite(TINY, repeat=1, work_dir=str(tmp_path), startup_repeat=1)
+
+    assert db_module.engine is engine and settings.DATA_DIR == data_dir  # estado do app restaurado
+    assert weather.WEATHER_SERVICE is prefetching and prefetching.fetch_count == 0  # sem rede na medição
+    names = [case["name"] for case in report["cases"]]
+    assert "POST /reports/chamada-pdf-file" in names and "POST /api/import-data" in names
+    for case in report["cases"]:
+        assert set(case["status"]) == {"200"}, case
+    # pandas/openpyxl/reportlab só sobem nas rotas que os usam, nunca no worker ocioso.
+    assert report["startup"]["heavy_modules"] == []
+    assert report["startup"]["import_ms_p50"] > 0 and report["startup"]["idle_rss_mb"] > 0
+    json.dumps(report)
@@ -0,0 +1,100 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+from app import database as db_module
+from app import catalog, models, settings
+from app import main as app_main
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    test_db_path = tmp_path / "catalog.db"
+    test_engine = create_engine(
+        f"sqlite:///{test_db_path}",
+        connect_args={"check_same_thread": False},
+    )
+
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    db_module.create_db_and_tables()
+
+    with Session(test_engine) as session:
+        unit = models.ImportUnit(name="Unidade Teste")
+        session.add(unit)
+        session.commit()
+        session.refresh(unit)
+        unit_id = unit.id
+        for idx in range(20):
+            session.add(
+                models.ImportClass(
+                    unit_id=unit_id,
+                    codigo=f"T{idx:02d}",
+                    turma_label=f"Turma {idx:02d}",
+                    horario=f"{7 + idx % 10:02d}00",
+                    professor=f"Prof {idx % 4}",
+                )
+            )
+        session.commit()
+
+    catalog._invalidate_import_class_catalog()
+    yield {"engine": test_engine, "unit_id": unit_id}
+    catalog._invalidate_import_class_catalog()
+
+
+def _count_class_selects(engine, statements: list):
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        normalized = " ".join(statement.lower().split())
+        if normalized.startswith("select") and "from import_classes" in normalized and "where" not in normalized:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    return _before
+
+
+def test_catalog_is_loaded_once_across_read_endpoints(env):
+    statements: list = []
+    listener = _count_class_selects(env["engine"], statements)
+    try:
+        with TestClient(app_main.app) as client:
+            for _ in range(3):
+                assert client.get("/filters").status_code == 200
+                assert client.get("/reports").status_code == 200
+    finally:
+        event.remove(env["engine"], "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+
+
+def test_class_writes_invalidate_catalog(env):
+    with TestClient(app_main.app) as client:
+        before = client.get("/filters").json()
+        assert "Turma Nova" not in before["turmas"]
+
+        with Session(env["engine"]) as session:
+            session.add(
+                models.ImportClass(
+                    unit_id=env["unit_id"],
+                    codigo="NOVA",
+                    turma_label="Turma Nova",
+                    horario="1800",
+                    professor="Prof Nova",
+                )
+            )
+            session.commit()
+
+        after = client.get("/filters").json()
+        assert "Turma Nova" in after["turmas"]
+        assert "Prof Nova" in after["professores"]
+
+    with Session(env["engine"]) as session:
+        found = catalog._find_import_class_by_triple(session, "nova", "18:00", "prof nova")
+        assert found is not None and found.codigo == "NOVA"
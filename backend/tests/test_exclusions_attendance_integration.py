@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import create_engine
 
 from app import database as db_module
+from app import settings
 from app import main as app_main
 
 
@@ -21,7 +22,7 @@ def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
         connect_args={"check_same_thread": False},
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
     monkeypatch.setattr(db_module, "engine", test_engine)
 
     db_module.create_db_and_tables()
@@ -71,7 +72,7 @@ def test_exclusion_does_not_remove_attendance_history(client: TestClient, tmp_pa
     exclusion_resp = client.post("/exclusions", json=_exclusion_payload())
     assert exclusion_resp.status_code == 200
 
-    attendance_file = tmp_path / "data" / "baseChamada.json"
+    attendance_file = tmp_path / "data" / "chamada" / "baseChamada-2026-03.json"
     assert attendance_file.exists()
 
     items = json.loads(attendance_file.read_text(encoding="utf-8"))
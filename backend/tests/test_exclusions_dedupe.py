@@ -0,0 +1,72 @@
+import random
+from typing import Any, Dict, List
+
+from app import exclusions_state, normalize
+
+
+def _linear_clean(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Implementação anterior (varredura linear), usada como referência.
+    cleaned: List[Dict[str, Any]] = []
+    for raw in items:
+        if not isinstance(raw, dict):
+            continue
+        item = exclusions_state._normalize_exclusion_item(raw)
+        uid = str(item.get("student_uid") or item.get("studentUid") or "").strip()
+        item_id = str(item.get("id") or "").strip()
+        nome = normalize._normalize_text(item.get("nome") or item.get("Nome") or "")
+        if not uid and not item_id and not nome:
+            continue
+        idx = next((i for i, existing in enumerate(cleaned) if exclusions_state._exclusion_records_match(existing, item)), -1)
+        if idx >= 0:
+            cleaned[idx] = {**cleaned[idx], **item}
+        else:
+            cleaned.append(item)
+    return cleaned
+
+
+def _linear_merge(base: List[Dict[str, Any]], incoming: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged = list(_linear_clean(base))
+    for item in _linear_clean(incoming):
+        idx = next((i for i, existing in enumerate(merged) if exclusions_state._exclusion_records_match(existing, item)), -1)
+        if idx >= 0:
+            merged[idx] = {**merged[idx], **item}
+        else:
+            merged.append(item)
+    return _linear_clean(merged)
+
+
+def _random_exclusions(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    names = ["Ana Silva", "ANA SILVA", "Bruno Lima", "Carla Souza", "Davi Rocha", "Élio Ramos"]
+    turmas = ["Turma A", "Turma B", "", "INF-A"]
+    horarios = ["18:30", "1830", "19:15", ""]
+    professores = ["Prof. A", "prof. a", "Prof. B", ""]
+    items = []
+    for _ in range(count):
+        item: Dict[str, Any] = {}
+        if rng.random() < 0.4:
+            item["student_uid"] = f"uid-{rng.randint(1, 15)}"
+        if rng.random() < 0.4:
+            item["id"] = str(rng.randint(1, 15))
+        if rng.random() < 0.9:
+            item["nome" if rng.random() < 0.8 else "Nome"] = rng.choice(names)
+        item["turma"] = rng.choice(turmas)
+        item["horario"] = rng.choice(horarios)
+        item["professor"] = rng.choice(professores)
+        item["motivo_exclusao"] = rng.choice(["Falta", "Desistência", ""])
+        items.append(item)
+    return items
+
+
+def test_bucketed_clean_matches_linear_scan():
+    rng = random.Random(20260408)
+    for _ in range(60):
+        items = _random_exclusions(rng, rng.randint(0, 80))
+        assert exclusions_state._clean_exclusions_list(items) == _linear_clean(items)
+
+
+def test_bucketed_merge_matches_linear_scan():
+    rng = random.Random(42)
+    for _ in range(40):
+        base = _random_exclusions(rng, rng.randint(0, 60))
+        incoming = _random_exclusions(rng, rng.randint(0, 60))
+        assert exclusions_state._merge_exclusions(base, incoming) == _linear_merge(base, incoming)
@@ -3,6 +3,7 @@ from pathlib import Path
 
 from fastapi.testclient import TestClient
 
+from app import exclusions_state, settings, storage
 from app import main as app_main
 
 
@@ -37,7 +38,7 @@ def test_recover_exclusions_uses_largest_eligible_backup(tmp_path: Path, monkeyp
         [_mk_exclusion(i) for i in range(1, 26)],
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
 
     with TestClient(app_main.app) as client:
         recover_response = client.post(
@@ -65,7 +66,7 @@ def test_recover_exclusions_requires_force_when_current_not_empty(tmp_path: Path
     _write_json(current_file, [_mk_exclusion(101)])
     _write_json(archive_dir / "excludedStudents_backup_20260408_103000.json", [_mk_exclusion(i) for i in range(1, 4)])
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
 
     with TestClient(app_main.app) as client:
         recover_response = client.post(
@@ -74,3 +75,68 @@ def test_recover_exclusions_requires_force_when_current_not_empty(tmp_path: Path
         )
         assert recover_response.status_code == 409
         assert "Lista atual nao esta vazia" in recover_response.json().get("detail", "")
+
+
+def test_backups_are_deduplicated_and_listed_from_manifest(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    archive_dir = data_dir / "archive"
+    current_file = data_dir / "excludedStudents.json"
+    _write_json(current_file, [_mk_exclusion(1), _mk_exclusion(2)])
+    _write_json(archive_dir / "excludedStudents_backup_20260408_100000.json", [_mk_exclusion(i) for i in range(1, 6)])
+
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+
+    # Mesmo conteúdo arquivado duas vezes gera uma única cópia.
+    storage._backup_runtime_json(str(current_file))
+    storage._backup_runtime_json(str(current_file))
+    backup_files = sorted(p.name for p in archive_dir.glob("excludedStudents_*.json"))
+    assert len(backup_files) == 2
+
+    parsed = []
+    original_open = open
+
+    def _tracking_open(path, *args, **kwargs):
+        if str(path).endswith(".json") and "excludedStudents_" in str(path):
+            parsed.append(str(path))
+        return original_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", _tracking_open)
+    backups = exclusions_state._list_exclusions_backups(limit=10)
+    monkeypatch.setattr("builtins.open", original_open)
+
+    assert parsed == []
+    assert [item["count"] for item in backups if item["file"].endswith("100000.json")] == [5]
+    # A listagem reconcilia o diário de backups no manifesto completo.
+    assert not (archive_dir / storage.BACKUP_MANIFEST_JOURNAL).exists()
+    manifest = json.loads((archive_dir / storage.BACKUP_MANIFEST_FILE).read_text(encoding="utf-8"))
+    assert sorted(manifest) == backup_files
+    assert sorted(entry["count"] for entry in manifest.values()) == [2, 5]
+
+
+def test_backup_hot_path_does_not_rescan_the_archive(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    archive_dir = data_dir / "archive"
+    for idx in range(50):
+        _write_json(archive_dir / f"excludedStudents_backup_20260101_{idx:06d}.json", [_mk_exclusion(idx)])
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(storage, "ATTENDANCE_SEGMENT_BACKUPS_KEPT", 3)
+
+    segment = data_dir / "chamada" / "baseChamada-2026-03.json"
+    _write_json(segment, [])
+    storage._backup_runtime_json(str(segment))  # primeira vez no processo: reconcilia
+
+    scans = []
+    original_scandir = storage.os.scandir
+    monkeypatch.setattr(storage.os, "scandir", lambda path: scans.append(path) or original_scandir(path))
+    manifest_before = (archive_dir / storage.BACKUP_MANIFEST_FILE).stat().st_mtime_ns
+    for idx in range(6):
+        _write_json(segment, [{"idx": idx}])
+        storage._backup_runtime_json(str(segment))
+    assert scans == []
+    assert (archive_dir / storage.BACKUP_MANIFEST_FILE).stat().st_mtime_ns == manifest_before
+    assert len(list(archive_dir.glob("baseChamada-2026-03_backup_*.json"))) == 3
+
+    with storage.BACKUP_MANIFEST_LOCK:
+        manifest = storage._load_backup_manifest(str(archive_dir))
+    assert len([name for name in manifest if name.startswith("baseChamada-")]) == 3
+    assert len([name for name in manifest if name.startswith("excludedStudents_")]) == 50
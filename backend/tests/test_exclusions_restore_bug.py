@@ -92,7 +92,9 @@ def test_restore_exclusion_preserves_other_excluded_students():
         # Simular chamada POST /exclusions/restore (manualmente aqui)
         # Copiar lógica da função restore_exclusion
         from threading import RLock
-        from app.main import ExclusionEntry, _resolve_exclusion_match, _load_json_list, _save_json_list
+        from app.exclusions_state import _resolve_exclusion_match
+        from app.schemas import ExclusionEntry
+        from app.storage import _load_json_list, _save_json_list
         
         EXCLUSIONS_FILE_LOCK = RLock()
         
@@ -177,7 +179,9 @@ def test_delete_exclusion_preserves_other_excluded_students():
         
         # Simular chamada POST /exclusions/delete
         from threading import RLock
-        from app.main import ExclusionEntry, _resolve_exclusion_match, _load_json_list, _save_json_list
+        from app.exclusions_state import _resolve_exclusion_match
+        from app.schemas import ExclusionEntry
+        from app.storage import _load_json_list, _save_json_list
         
         EXCLUSIONS_FILE_LOCK = RLock()
         
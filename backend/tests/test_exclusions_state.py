@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, select
+
+from app import database as db_module
+from app import models, settings
+from app import main as app_main
+
+
+def _mk_exclusion(idx: int) -> dict:
+    return {
+        "id": f"excl-{idx}",
+        "student_uid": f"uid-{idx}",
+        "nome": f"Aluno {idx}",
+        "turma": "Turma A",
+        "horario": "1830",
+        "professor": "Prof. Teste",
+        "dataExclusao": "08/04/2026",
+        "motivo_exclusao": "Falta",
+    }
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "excludedStudents.json").write_text(
+        json.dumps([_mk_exclusion(i) for i in range(1, 51)], ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'exclusions.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    writes: list = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        normalized = statement.lstrip().upper()
+        if "EXCLUSION_RECORDS" in normalized and normalized.startswith(("INSERT", "UPDATE", "DELETE")):
+            writes.append(normalized.split()[0])
+
+    event.listen(test_engine, "before_cursor_execute", _track)
+    yield {"engine": test_engine, "data_dir": data_dir, "writes": writes}
+    event.remove(test_engine, "before_cursor_execute", _track)
+
+
+def test_reads_do_not_rewrite_exclusion_rows(env):
+    with TestClient(app_main.app) as client:
+        first = client.get("/exclusions")
+        assert len(first.json()) == 50
+        initial_writes = len(env["writes"])
+        assert initial_writes > 0  # primeira carga importa o arquivo para o banco
+
+        for _ in range(5):
+            assert len(client.get("/exclusions").json()) == 50
+        assert client.get("/reports").status_code == 200
+        assert len(env["writes"]) == initial_writes
+        assert client.get("/exclusions").headers["X-Exclusions-Version"] == first.headers["X-Exclusions-Version"]
+
+
+def test_mutations_touch_single_rows(env):
+    with TestClient(app_main.app) as client:
+        version = int(client.get("/exclusions").headers["X-Exclusions-Version"])
+        env["writes"].clear()
+
+        response = client.post("/exclusions", json=_mk_exclusion(99))
+        assert response.json() == {"ok": True, "updated": False}
+        assert env["writes"] == ["INSERT"]
+
+        env["writes"].clear()
+        assert client.post("/exclusions/delete", json=_mk_exclusion(7)).status_code == 200
+        assert "INSERT" not in env["writes"] and len(env["writes"]) <= 2
+
+        after = client.get("/exclusions")
+        assert int(after.headers["X-Exclusions-Version"]) > version
+        names = {item["nome"] for item in after.json()}
+        assert "Aluno 99" in names and "Aluno 7" not in names
+
+    with Session(env["engine"]) as session:
+        assert len(session.exec(select(models.ExclusionRecord)).all()) == 50
+
+
+def test_external_file_edit_is_picked_up(env):
+    with TestClient(app_main.app) as client:
+        assert len(client.get("/exclusions").json()) == 50
+
+        (env["data_dir"] / "excludedStudents.json").write_text(
+            json.dumps([_mk_exclusion(1), _mk_exclusion(2)], ensure_ascii=False),
+            encoding="utf-8",
+        )
+        assert [item["nome"] for item in client.get("/exclusions").json()] == ["Aluno 1", "Aluno 2"]
+
+    with Session(env["engine"]) as session:
+        assert len(session.exec(select(models.ExclusionRecord)).all()) == 2
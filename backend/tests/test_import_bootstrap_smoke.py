@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import create_engine
 
 from app import database as db_module
+from app import settings
 from app import main as app_main
 
 
@@ -29,7 +30,7 @@ def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
         connect_args={"check_same_thread": False},
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
     monkeypatch.setattr(db_module, "engine", test_engine)
 
     db_module.create_db_and_tables()
@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, select
+
+from app import database as db_module
+from app import attendance_logs, models, settings
+from app import main as app_main
+
+
+def _entry(aluno: str, data: str, motivo: str = "Atestado", turma: str = "T01", horario: str = "18:30") -> dict:
+    return {
+        "aluno_nome": aluno,
+        "data": data,
+        "motivo": motivo,
+        "turmaCodigo": turma,
+        "turmaLabel": f"Turma {turma}",
+        "horario": horario,
+        "professor": "Prof. Teste",
+    }
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'justifications.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    statements: list = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        normalized = " ".join(statement.upper().split())
+        if "JUSTIFICATIONS" in normalized and normalized.startswith(("INSERT", "UPDATE", "DELETE")):
+            statements.append(normalized)
+
+    event.listen(test_engine, "before_cursor_execute", _track)
+    yield {"engine": test_engine, "data_dir": data_dir, "statements": statements}
+    event.remove(test_engine, "before_cursor_execute", _track)
+
+
+def test_batch_is_upserted_in_a_single_statement(env):
+    with TestClient(app_main.app) as client:
+        first = client.post(
+            "/justifications-log",
+            json=[_entry(f"Aluno {idx}", "2026-03-10") for idx in range(30)],
+        )
+        assert first.json() == {"ok": True, "count": 30}
+        assert len(env["statements"]) == 1 and "ON CONFLICT" in env["statements"][0]
+
+        env["statements"].clear()
+        second = client.post(
+            "/justifications-log",
+            json=[
+                _entry("ALUNO 1", "10/03/2026", motivo="Viagem", horario="1830"),
+                _entry("Aluno 1", "2026-03-10", motivo="Consulta"),
+                _entry("Aluno Novo", "2026-03-11"),
+                {"aluno_nome": "", "data": "", "motivo": "vazio"},
+            ],
+        )
+        assert second.json() == {"ok": True, "count": 2}
+        assert len(env["statements"]) == 1
+
+    with Session(env["engine"]) as session:
+        rows = session.exec(select(models.JustificationRecord)).all()
+        assert len(rows) == 31
+        updated = [row for row in rows if row.aluno_key == "aluno 1"]
+        assert len(updated) == 1 and updated[0].motivo == "Consulta"
+
+
+def test_query_by_class_and_month(env):
+    with TestClient(app_main.app) as client:
+        client.post(
+            "/justifications-log",
+            json=[
+                _entry("Ana", "2026-03-02"),
+                _entry("Bruno", "2026-03-09", turma="T02"),
+                _entry("Carla", "2026-04-01"),
+                _entry("Davi", "2026-03-16", horario="19:15"),
+            ],
+        )
+
+        march = client.get("/justifications", params={"month": "2026-03", "turmaCodigo": "t01"}).json()
+        assert [item["aluno_nome"] for item in march] == ["Ana", "Davi"]
+        assert march[0]["horario"] == "1830" and march[0]["turmaLabel"] == "Turma T01"
+
+        by_horario = client.get(
+            "/justifications",
+            params={"month": "2026-03", "turmaCodigo": "T01", "horario": "19:15"},
+        ).json()
+        assert [item["aluno_nome"] for item in by_horario] == ["Davi"]
+
+        by_label = client.get("/justifications", params={"month": "2026-03", "turmaLabel": "TURMA T01"}).json()
+        assert [item["aluno_nome"] for item in by_label] == ["Ana", "Davi"]
+        assert client.get("/justifications", params={"month": "03/2026"}).status_code == 400
+
+        purge = client.post(
+            "/maintenance/purge-month-data",
+            json={"month": "2026-03", "clear_transfer_overrides": False},
+        ).json()
+        assert purge["justifications"] == {"before": 4, "after": 1, "removed": 3}
+        assert client.get("/justifications", params={"month": "2026-03"}).json() == []
+
+
+def test_legacy_json_is_imported_once(env):
+    legacy = [_entry("Ana", "2026-02-03"), _entry("Bruno", "2026-02-04"), _entry("Ana", "03/02/2026", motivo="Dup")]
+    (env["data_dir"] / "baseJustificativas.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        items = client.get("/justifications", params={"month": "2026-02"}).json()
+        assert [(item["aluno_nome"], item["motivo"]) for item in items] == [("Ana", "Dup"), ("Bruno", "Atestado")]
+
+    assert attendance_logs._migrate_justifications_from_json() == 0
+    assert not (env["data_dir"] / "baseJustificativas.json").exists()
+    assert list((env["data_dir"] / "archive").glob("baseJustificativas_backup_*.json"))
+
+
+def test_purged_month_is_not_reimported_on_restart(env):
+    (env["data_dir"] / "baseJustificativas.json").write_text(json.dumps([_entry("Ana", "2026-02-03")]), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        client.post("/maintenance/purge-month-data", json={"month": "2026-02", "clear_transfer_overrides": False})
+        assert client.get("/justifications", params={"month": "2026-02"}).json() == []
+
+    with TestClient(app_main.app) as client:
+        assert client.get("/justifications", params={"month": "2026-02"}).json() == []
+
+
+def test_label_keys_are_backfilled_for_existing_rows(env):
+    with TestClient(app_main.app) as client:
+        client.post("/justifications-log", json=[_entry("Ana", "2026-03-02")])
+        with Session(env["engine"]) as session:
+            row = session.exec(select(models.JustificationRecord)).one()
+            row.turma_label_key = ""
+            session.add(row)
+            session.commit()
+
+        assert attendance_logs._backfill_justification_label_keys() == 1
+        by_label = client.get("/justifications", params={"month": "2026-03", "turmaLabel": "Turma T01"}).json()
+        assert [item["aluno_nome"] for item in by_label] == ["Ana"]
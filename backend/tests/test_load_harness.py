@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from app import database as db_module
+from app import settings, weather
+from scripts.load_sync_engine import LoadConfig, run_load
+from scripts.synthetic_dataset import DatasetSpec
+
+
+def test_tabs_of_the_same_teacher_converge(tmp_path: Path, monkeypatch):
+    # Um serviço com prefetch ligado (como no deploy) não pode sair para a rede durante a carga.
+    prefetching = weather._WeatherService(3600, 60)
+    monkeypatch.setattr(weather, "WEATHER_SERVICE", prefetching)
+    engine, data_dir = db_module.engine, settings.DATA_DIR
+    cfg = LoadConfig(teachers=2, tabs=2, duration=1.5, autosave_interval=0.3, burst=2, burst_gap=0.02, sync_interval=0.1, exclusions_interval=0.2)
+    spec = DatasetSpec(units=1, professors_per_unit=2, classes_per_professor=1, students_per_class=4, months=1, exclusions=1, pool_log_days=0, calendar_events=0)
+
+    report = run_load(cfg, spec, work_dir=str(tmp_path))
+
+    assert db_module.engine is engine and settings.DATA_DIR == data_dir
+    assert weather.WEATHER_SERVICE is prefetching and prefetching.fetch_count == 0
+    assert report["error_rate"] == 0.0
+    assert set(report["endpoints"]) == {"POST /attendance-log", "POST /attendance-log/force-sync", "GET /exclusions"}
+    convergence = report["convergence"]
+    assert convergence["samples"] > 0 and convergence["stale_reads"] == 0
+    # Sem fila nem leitura velha, a outra aba vê a gravação no ciclo de polling seguinte.
+    assert convergence["p50_ms"] < 1000
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import create_engine
 
 from app import database as db_module
+from app import settings
 from app import main as app_main
 
 
@@ -20,7 +21,7 @@ def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
         connect_args={"check_same_thread": False},
     )
 
-    monkeypatch.setattr(app_main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
     monkeypatch.setattr(db_module, "engine", test_engine)
 
     db_module.create_db_and_tables()
@@ -38,8 +39,8 @@ def _register_user(client: TestClient) -> None:
 
 
 def test_token_allows_matching_unit(client: TestClient, monkeypatch):
-    monkeypatch.setattr(app_main, "UNIT_NAME", "São Matheus")
-    monkeypatch.setattr(app_main, "ENV_NAME", "piloto-sao-matheus")
+    monkeypatch.setattr(settings, "UNIT_NAME", "São Matheus")
+    monkeypatch.setattr(settings, "ENV_NAME", "piloto-sao-matheus")
     _register_user(client)
 
     response = client.post(
@@ -59,7 +60,7 @@ def test_token_allows_matching_unit(client: TestClient, monkeypatch):
 
 
 def test_token_blocks_mismatched_unit(client: TestClient, monkeypatch):
-    monkeypatch.setattr(app_main, "UNIT_NAME", "Piscina Bela Vista")
+    monkeypatch.setattr(settings, "UNIT_NAME", "Piscina Bela Vista")
     _register_user(client)
 
     response = client.post(
@@ -76,7 +77,7 @@ def test_token_blocks_mismatched_unit(client: TestClient, monkeypatch):
 
 
 def test_token_requires_unit_when_environment_is_locked(client: TestClient, monkeypatch):
-    monkeypatch.setattr(app_main, "UNIT_NAME", "Vila João XXIII")
+    monkeypatch.setattr(settings, "UNIT_NAME", "Vila João XXIII")
     _register_user(client)
 
     response = client.post(
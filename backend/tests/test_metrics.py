@@ -0,0 +1,124 @@
+import re
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import create_engine
+
+from app import database as db_module
+from app import metrics, settings
+from app import main as app_main
+
+
+def _sample(body: str, name: str, **labels: str) -> float:
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = rf"^{re.escape(name)}" + (rf"\{{{re.escape(wanted)}\}}" if wanted else "") + r" (\S+)$"
+    match = re.search(pattern, body, re.MULTILINE)
+    assert match, f"{name}{{{wanted}}} not exported"
+    return float(match.group(1))
+
+
+def _attendance(aluno: str, mutation_id: int) -> dict:
+    return {
+        "turmaCodigo": "T01",
+        "turmaLabel": "Turma T01",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "mes": "2026-03",
+        "clientMutationId": mutation_id,
+        "registros": [{"aluno_nome": aluno, "attendance": {"2026-03-10": "Presente"}, "justifications": {}, "notes": []}],
+    }
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'metrics.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    metrics.reset()
+    with TestClient(app_main.app) as client_instance:
+        yield client_instance
+    metrics.reset()
+
+
+def test_metrics_exposes_route_latency_and_threadpool(client: TestClient):
+    client.get("/health")
+    client.get("/health")
+    client.get("/does-not-exist")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert _sample(body, "http_requests_total", method="GET", route="/health", status="200") == 2
+    assert _sample(body, "http_request_duration_seconds_count", method="GET", route="/health") == 2
+    assert _sample(body, "http_request_duration_seconds_bucket", method="GET", route="/health", le="+Inf") == 2
+    assert _sample(body, "http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert 'route="/metrics"' not in body  # o scrape não conta a si mesmo
+    assert _sample(body, "threadpool_max_threads") >= 1
+    assert _sample(body, "threadpool_busy_threads") >= 0
+    assert _sample(body, "http_requests_in_flight", method="GET") == 0
+
+
+def test_domain_counters(client: TestClient):
+    assert client.post("/attendance-log", json=_attendance("Ana", 1)).status_code == 200
+    assert client.post("/attendance-log", json=_attendance("Bruno", 2)).status_code == 200
+    assert client.post("/attendance-log", json=_attendance("Carla", 1)).json()["reason"] == "stale_snapshot"
+
+    pool_entry = {
+        "data": "2026-03-10",
+        "turmaCodigo": "T01",
+        "turmaLabel": "Turma T01",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "clima1": "Sol",
+        "clima2": "Calor",
+        "statusAula": "normal",
+        "nota": "aula",
+        "tipoOcorrencia": "",
+        "tempExterna": "28",
+        "tempPiscina": "27",
+        "cloroPpm": 1.5,
+    }
+    assert client.post("/pool-log", json=pool_entry).json()["action"] == "created"
+    assert client.post("/pool-log", json=pool_entry).json()["action"] == "noop"
+
+    client.get("/exclusions")
+    client.get("/exclusions")
+
+    body = client.get("/metrics").text
+    assert _sample(body, "attendance_saves_total", result="created") == 1
+    assert _sample(body, "attendance_saves_total", result="merged") == 1
+    assert _sample(body, "attendance_saves_total", result="stale_snapshot") == 1
+    assert _sample(body, "pool_log_saves_total", action="created") == 1
+    assert _sample(body, "pool_log_saves_total", action="noop") == 1
+    assert _sample(body, "cache_requests_total", cache="exclusions", result="miss") >= 1
+    assert _sample(body, "cache_requests_total", cache="exclusions", result="hit") >= 1
+
+
+def test_export_renders_are_counted_and_timed():
+    metrics.reset()
+
+    @metrics.timed_render("chamada_pdf")
+    def _render(fail: bool) -> bytes:
+        if fail:
+            raise ValueError("boom")
+        return b"%PDF"
+
+    assert _render(False) == b"%PDF"
+    with pytest.raises(ValueError):
+        _render(True)
+
+    body = metrics.render()
+    assert _sample(body, "export_renders_total", kind="chamada_pdf", status="ok") == 1
+    assert _sample(body, "export_renders_total", kind="chamada_pdf", status="error") == 1
+    assert _sample(body, "export_render_duration_seconds_count", kind="chamada_pdf") == 2
+    metrics.reset()
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine, select
+
+from app import database as db_module
+from app import models, settings
+from app import main as app_main
+
+HEAD = "0005_turma_label_keys"
+
+
+@pytest.fixture
+def legacy_engine(tmp_path: Path, monkeypatch):
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'legacy.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    # Tabelas como estavam antes do histórico do Alembic: só os índices de coluna única.
+    with test_engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE attendance_logs (id INTEGER PRIMARY KEY, turma_codigo VARCHAR NOT NULL, turma_label VARCHAR NOT NULL,"
+            " horario VARCHAR NOT NULL, professor VARCHAR NOT NULL, mes VARCHAR NOT NULL, saved_at VARCHAR NOT NULL,"
+            " client_saved_at VARCHAR, source VARCHAR, registros_json TEXT)"
+        ))
+        for column in ["turma_codigo", "horario", "professor", "mes"]:
+            conn.execute(text(f"CREATE INDEX ix_attendance_logs_{column} ON attendance_logs ({column})"))
+        conn.execute(text(
+            "CREATE TABLE import_students (id INTEGER PRIMARY KEY AUTOINCREMENT, class_id INTEGER, nome TEXT NOT NULL DEFAULT '',"
+            " whatsapp TEXT NOT NULL DEFAULT '', data_nascimento TEXT NOT NULL DEFAULT '', data_atestado TEXT NOT NULL DEFAULT '',"
+            " categoria TEXT NOT NULL DEFAULT '', genero TEXT NOT NULL DEFAULT '', parq TEXT NOT NULL DEFAULT '',"
+            " atestado INTEGER NOT NULL DEFAULT 0, UNIQUE(class_id, nome))"
+        ))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    return test_engine
+
+
+def _plan(engine, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return " | ".join(str(row[-1]) for row in rows)
+
+
+def test_upgrade_adds_hot_path_indexes_to_legacy_tables(legacy_engine):
+    db_module.run_migrations()
+    db_module.run_migrations()  # idempotente no startup seguinte
+
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar_one() == HEAD
+    inspector = inspect(legacy_engine)
+    assert "ix_attendance_logs_class_month" in {ix["name"] for ix in inspector.get_indexes("attendance_logs")}
+    assert "ix_import_students_nome" in {ix["name"] for ix in inspector.get_indexes("import_students")}
+    assert {"planning_files", "justifications", "pool_log_daily_summary"} <= set(inspector.get_table_names())
+    assert "mes" in {column["name"] for column in inspector.get_columns("exclusion_records")}
+
+
+def test_hot_path_queries_use_indexes(legacy_engine):
+    db_module.run_migrations()
+    with legacy_engine.begin() as conn:
+        for idx in range(200):
+            conn.execute(text(
+                "INSERT INTO attendance_logs (turma_codigo, turma_label, horario, professor, mes, saved_at)"
+                f" VALUES ('T{idx % 20:02d}', '', '18{idx % 4}0', 'Prof {idx % 5}', '2026-0{idx % 9 + 1}', '')"
+            ))
+        conn.execute(text("ANALYZE"))
+
+    attendance = _plan(
+        legacy_engine,
+        select(models.AttendanceLog).where(
+            models.AttendanceLog.turma_codigo == "T01",
+            models.AttendanceLog.horario == "1810",
+            models.AttendanceLog.professor == "Prof 1",
+            models.AttendanceLog.mes == "2026-02",
+        ),
+    )
+    assert "ix_attendance_logs_class_month" in attendance
+
+    for statement in [
+        select(models.ImportStudent).where(models.ImportStudent.class_id == 3, models.ImportStudent.nome == "Ana"),
+        select(models.ImportStudent).where(models.ImportStudent.class_id.is_(None), models.ImportStudent.nome == "Ana"),
+        select(models.ImportStudent).where(models.ImportStudent.nome == "Ana"),
+        select(models.ImportClass).where(models.ImportClass.unit_id == 1),
+    ]:
+        plan = _plan(legacy_engine, statement)
+        assert "USING" in plan and not plan.startswith("SCAN"), plan
+
+
+def test_fresh_database_reaches_head_through_startup(tmp_path: Path, monkeypatch):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db_module, "engine", fresh)
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path / "data"))
+
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_main.app):
+        pass
+    with fresh.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar_one() == HEAD
+
+
+def test_revisions_build_the_declared_schema_on_an_empty_database(tmp_path: Path, monkeypatch):
+    empty = create_engine(f"sqlite:///{tmp_path / 'empty.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db_module, "engine", empty)
+
+    db_module.run_migrations()
+
+    with empty.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn, opts={"compare_type": True}), SQLModel.metadata)
+    assert diff == []
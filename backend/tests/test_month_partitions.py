@@ -0,0 +1,145 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlmodel import create_engine
+
+from app import database as db_module
+from app import pool_log_storage, settings
+from app import main as app_main
+
+
+def _attendance(mes: str, aluno: str = "Ana", turma: str = "T01") -> dict:
+    day = f"{mes}-10"
+    return {
+        "turmaCodigo": turma,
+        "turmaLabel": f"Turma {turma}",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "mes": mes,
+        "registros": [{"aluno_nome": aluno, "attendance": {day: "Presente"}, "justifications": {}, "notes": []}],
+    }
+
+
+def _pool_log(data: str) -> dict:
+    return {
+        "data": data,
+        "turmaCodigo": "T01",
+        "turmaLabel": "Turma T01",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "clima1": "Sol",
+        "clima2": "",
+        "statusAula": "normal",
+        "nota": "",
+        "tipoOcorrencia": "",
+        "tempExterna": "27",
+        "tempPiscina": "25",
+        "cloroPpm": 2.0,
+    }
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "baseChamada.json").write_text(
+        json.dumps([_attendance("2026-02"), _attendance("2026-02", turma="T02"), _attendance("2026-03")]),
+        encoding="utf-8",
+    )
+    (data_dir / "excludedStudents.json").write_text(
+        json.dumps(
+            [
+                {"id": "e1", "nome": "Bruno", "turma": "T01", "dataExclusao": "12/02/2026"},
+                {"id": "e2", "nome": "Carla", "turma": "T01", "dataExclusao": "2026-03-02"},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'partitions.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    yield {"engine": test_engine, "data_dir": data_dir}
+
+
+def test_legacy_journal_is_split_and_purge_can_drop_the_database_rows(env):
+    segments = env["data_dir"] / "chamada"
+    with TestClient(app_main.app) as client:
+        assert not (env["data_dir"] / "baseChamada.json").exists()
+        assert sorted(path.name for path in segments.iterdir()) == ["baseChamada-2026-02.json", "baseChamada-2026-03.json"]
+        assert client.get("/filters").json()["meses"] == ["2026-02", "2026-03"]
+
+        assert client.post("/attendance-log", json=_attendance("2026-03", aluno="Davi")).status_code == 200
+        for day in ["2026-02-10", "2026-02-11", "2026-03-05"]:
+            client.post("/pool-log", json=_pool_log(day))
+
+        march = client.get("/maintenance/diagnostics", params={"month": "2026-03"}).json()
+        assert march["month"] == "2026-03"
+        assert march["counts"] == {
+            "attendance": 2,
+            "attendanceLogs": 1,
+            "justifications": 0,
+            "exclusions": 1,
+            "weatherSnapshots": 0,
+            "poolLog": 1,
+        }
+        assert march["feb2026"]["attendance"] == 2 and march["feb2026"]["poolLog"] == 2
+
+        purge = client.post(
+            "/maintenance/purge-month-data",
+            json={"month": "2026-02", "clear_transfer_overrides": False, "clear_exclusions": True, "delete_database_rows": True},
+        ).json()
+        assert purge["attendance"] == {"removed": 2, "segment": "baseChamada-2026-02.json", "logsRemoved": 0}
+        assert purge["poolLog"] == {"before": 3, "after": 1, "removed": 2, "logsRemoved": 2}
+        assert purge["exclusions"] == {"before": 2, "after": 1, "removed": 1}
+
+        assert sorted(path.name for path in segments.iterdir()) == ["baseChamada-2026-03.json"]
+        after = client.get("/maintenance/diagnostics").json()
+        assert after["month"] == "2026-02" and set(after["counts"].values()) == {0}
+        assert [item["nome"] for item in client.get("/exclusions").json()] == ["Carla"]
+
+
+def test_purge_keeps_database_history_by_default(env):
+    with TestClient(app_main.app) as client:
+        assert client.post("/attendance-log", json=_attendance("2026-02", aluno="Davi")).status_code == 200
+        for day in ["2026-02-10", "2026-02-11", "2026-03-05"]:
+            client.post("/pool-log", json=_pool_log(day))
+        pool_log_storage.POOL_LOG_EXCEL_MIRROR.flush()
+
+        purge = client.post("/maintenance/purge-month-data", json={"month": "2026-02", "clear_transfer_overrides": False}).json()
+        assert purge["attendance"] == {"removed": 3, "segment": "baseChamada-2026-02.json", "logsRemoved": 0}
+        assert purge["poolLog"] == {"before": 3, "after": 1, "removed": 2, "logsRemoved": 0}
+
+        counts = client.get("/maintenance/diagnostics", params={"month": "2026-02"}).json()["counts"]
+        assert counts["attendance"] == 0
+        assert counts["attendanceLogs"] == 1 and counts["poolLog"] == 2
+        workbook = pool_log_storage._load_pool_log(str(env["data_dir"] / "logPiscina.xlsx"))
+        assert list(workbook["Data"]) == ["2026-03-05"]
+
+
+def test_exclusion_month_column_is_added_to_baseline_tables(env):
+    with env["engine"].begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE exclusion_records (id INTEGER PRIMARY KEY, exclusion_id VARCHAR NOT NULL, student_uid VARCHAR NOT NULL,"
+            " nome VARCHAR NOT NULL, turma VARCHAR NOT NULL, turma_codigo VARCHAR NOT NULL, horario VARCHAR NOT NULL,"
+            " professor VARCHAR NOT NULL, data_exclusao VARCHAR NOT NULL, motivo_exclusao VARCHAR NOT NULL,"
+            " payload_json TEXT, saved_at VARCHAR NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO exclusion_records (exclusion_id, student_uid, nome, turma, turma_codigo, horario, professor,"
+            " data_exclusao, motivo_exclusao, saved_at) VALUES ('e1', 'u1', 'Legado', '', '', '', '', '', '', '')"
+        ))
+
+    db_module.migrate_db()
+
+    inspector = inspect(env["engine"])
+    assert "mes" in {column["name"] for column in inspector.get_columns("exclusion_records")}
+    assert "ix_exclusion_records_mes" in {index["name"] for index in inspector.get_indexes("exclusion_records")}
+    with env["engine"].connect() as conn:
+        assert conn.execute(text("SELECT mes FROM exclusion_records")).scalar_one() == ""
@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine, select
+
+from app import database as db_module
+from app import catalog, models, settings
+from app import main as app_main
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'planned.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    db_module.create_db_and_tables()
+
+    with Session(test_engine) as session:
+        unit = models.ImportUnit(name="Unidade Teste")
+        session.add(unit)
+        session.commit()
+        unit_id = unit.id
+        session.add(models.ImportClass(unit_id=unit_id, codigo="TQ1", turma_label="Terça e Quinta", horario="0800", professor="Ana", dias_semana="Terça e Quinta"))
+        session.add(models.ImportClass(unit_id=unit_id, codigo="QS1", turma_label="Quarta e Sexta", horario="1800", professor="Bia", dias_semana=""))
+        session.add(models.ImportClass(unit_id=unit_id, codigo="SEG", turma_label="Segunda", horario="1000", professor="Caio", dias_semana="Segunda"))
+        session.commit()
+
+    catalog._invalidate_import_class_catalog()
+    yield {"engine": test_engine}
+    catalog._invalidate_import_class_catalog()
+
+
+def _settings(**overrides) -> dict:
+    return {
+        "schoolYear": 2026,
+        "inicioAulas": "2026-07-06",
+        "feriasInvernoInicio": "2026-07-13",
+        "feriasInvernoFim": "2026-07-24",
+        "terminoAulas": "2026-12-11",
+        **overrides,
+    }
+
+
+def _by_code(payload: list) -> dict:
+    return {item["codigo"]: item["dates"] for item in payload}
+
+
+def test_planned_sessions_follow_schedule_and_calendar(env):
+    with TestClient(app_main.app) as client:
+        assert client.get("/planned-sessions", params={"month": "2026-07"}).json()[0]["count"] == 0
+
+        client.put("/academic-calendar/settings", json=_settings())
+        client.post("/academic-calendar/events", json={"date": "2026-07-09", "type": "feriado", "allDay": True})
+        client.post("/academic-calendar/events", json={"date": "2026-07-29", "type": "reuniao", "allDay": False, "startTime": "17:00", "endTime": "19:00"})
+        client.post("/academic-calendar/events", json={"date": "2026-07-30", "type": "evento", "startTime": "08:00", "endTime": "10:00"})
+
+        july = _by_code(client.get("/planned-sessions", params={"month": "2026-07"}).json())
+        # Começa em 06/07, férias de 13 a 24, feriado em 09/07; a reunião de 29/07 só pega o horário das 18h.
+        assert july["TQ1"] == ["2026-07-07", "2026-07-28", "2026-07-30"]
+        assert july["QS1"] == ["2026-07-08", "2026-07-10", "2026-07-31"]
+        assert july["SEG"] == ["2026-07-06", "2026-07-27"]
+
+        december = client.get("/planned-sessions", params={"month": "2026-12", "turma": "seg"}).json()
+        assert [(item["codigo"], item["count"]) for item in december] == [("SEG", 1)]
+        assert client.get("/planned-sessions", params={"month": "2026/12"}).status_code == 400
+
+
+def test_cached_rows_are_reused_until_inputs_change(env):
+    with TestClient(app_main.app) as client:
+        client.put("/academic-calendar/settings", json=_settings())
+        client.get("/planned-sessions", params={"month": "2026-08"})
+
+        with Session(env["engine"]) as session:
+            rows = session.exec(select(models.PlannedSessionMonth)).all()
+            stamps = {row.class_id: row.updated_at for row in rows}
+        assert len(rows) == 3
+
+        client.get("/planned-sessions", params={"month": "2026-08"})
+        client.post("/academic-calendar/events", json={"date": "2026-08-10", "type": "ponte", "allDay": True})
+        payload = _by_code(client.get("/planned-sessions", params={"month": "2026-08"}).json())
+        assert "2026-08-10" not in payload["SEG"] and len(payload["SEG"]) == 4
+
+        with Session(env["engine"]) as session:
+            rows = {row.class_id: row for row in session.exec(select(models.PlannedSessionMonth)).all()}
+            seg_id = session.exec(select(models.ImportClass.id).where(models.ImportClass.codigo == "SEG")).one()
+        # Só a turma de segunda tinha aula no dia da ponte; as outras mantêm a linha em cache.
+        assert rows[seg_id].updated_at != stamps[seg_id]
+        assert all(rows[class_id].updated_at == stamps[class_id] for class_id in stamps if class_id != seg_id)
@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import create_engine
+
+from app import database as db_module
+from app import settings
+from app import main as app_main
+
+
+def _planning_file(idx: int, blocks: int = 3, year: int = 2026) -> dict:
+    return {
+        "id": f"file-{idx}",
+        "sourceName": f"Planejamento {idx}.pdf",
+        "target": f"Planejamento {idx}",
+        "year": year,
+        "createdAt": f"2026-02-{idx % 28 + 1:02d}T10:00:00",
+        "blocks": [
+            {"id": f"b-{idx}-{n}", "type": "week", "key": f"2026-02-sem-{n}", "label": f"{n}ª SEM", "text": "Crawl"}
+            for n in range(blocks)
+        ],
+    }
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'planning.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    statements: list = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.lower().split()))
+
+    event.listen(test_engine, "before_cursor_execute", _track)
+    yield {"data_dir": data_dir, "statements": statements}
+    event.remove(test_engine, "before_cursor_execute", _track)
+
+
+def test_paginated_index_skips_block_content(env):
+    with TestClient(app_main.app) as client:
+        for idx in range(1, 8):
+            client.post("/planning-files", json=_planning_file(idx, year=2025 if idx == 3 else 2026))
+        client.post("/planning-files", json={**_planning_file(2, blocks=5), "author": "Prof. Ana"})
+
+        env["statements"].clear()
+        page = client.get("/planning-files/index", params={"limit": 3, "offset": 0}).json()
+        assert page["total"] == 7
+        assert [item["id"] for item in page["items"]] == ["file-2", "file-7", "file-6"]
+        assert page["items"][0] == {
+            "id": "file-2",
+            "title": "Planejamento 2",
+            "sourceName": "Planejamento 2.pdf",
+            "target": "Planejamento 2",
+            "year": 2026,
+            "author": "Prof. Ana",
+            "date": "2026-02-03T10:00:00",
+            "updatedAt": page["items"][0]["updatedAt"],
+            "blockCount": 5,
+        }
+        assert not any("planning_file_contents" in statement for statement in env["statements"])
+
+        second = client.get("/planning-files/index", params={"limit": 3, "offset": 3, "year": 2026}).json()
+        assert second["total"] == 6
+        assert [item["id"] for item in second["items"]] == ["file-5", "file-4", "file-1"]
+
+        single = client.get("/planning-files/file-2").json()
+        assert len(single["blocks"]) == 5 and single["blocks"][0]["label"] == "0ª SEM"
+
+        assert client.delete("/planning-files/file-2").json() == {"ok": True}
+        assert client.get("/planning-files/file-2").status_code == 404
+        assert len(client.get("/planning-files").json()) == 6
+        assert client.put("/planning-files/file-9", json=_planning_file(1)).status_code == 400
+
+    assert not (env["data_dir"] / "planningFiles.json").exists()
+
+
+def test_legacy_json_keeps_order(env):
+    legacy = [_planning_file(3), _planning_file(1), _planning_file(2)]
+    (env["data_dir"] / "planningFiles.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        files = client.get("/planning-files").json()
+        assert [item["id"] for item in files] == ["file-3", "file-1", "file-2"]
+        assert files[0]["blocks"] == legacy[0]["blocks"]
+
+        client.put("/planning-files/file-2", json=_planning_file(2, blocks=1))
+        assert [item["id"] for item in client.get("/planning-files/index").json()["items"]] == ["file-2", "file-3", "file-1"]
+
+
+def test_deleted_files_stay_deleted_after_restart(env):
+    (env["data_dir"] / "planningFiles.json").write_text(json.dumps([_planning_file(1), _planning_file(2)]), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        assert len(client.get("/planning-files").json()) == 2
+        for file_id in ["file-1", "file-2"]:
+            assert client.delete(f"/planning-files/{file_id}").json() == {"ok": True}
+
+    assert not (env["data_dir"] / "planningFiles.json").exists()
+    assert list((env["data_dir"] / "archive").glob("planningFiles_backup_*.json"))
+
+    with TestClient(app_main.app) as client:
+        assert client.get("/planning-files").json() == []
@@ -5,7 +5,11 @@ from typing import Any, Dict
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, select
 
+from app import database as db_module
+from app import models, pool_log_storage, schemas, settings
 from app import main as app_main
 
 
@@ -32,8 +36,13 @@ def _build_payload(overrides: Dict[str, str] | None = None) -> Dict[str, Any]:
 
 @pytest.fixture
 def client(tmp_path: Path, monkeypatch) -> TestClient:
-    monkeypatch.setattr(app_main, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
     os.makedirs(tmp_path, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool_log.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(db_module, "engine", test_engine)
     with TestClient(app_main.app) as client_instance:
         yield client_instance
 
@@ -45,6 +54,8 @@ def test_pool_log_roundtrip(client: TestClient, tmp_path: Path):
     assert response.json()["ok"] is True
     assert response.json()["action"] == "created"
 
+    export = client.get("/pool-log/export")
+    assert export.status_code == 200
     saved_file = tmp_path / "logPiscina.xlsx"
     assert saved_file.exists()
     df = pd.read_excel(saved_file)
@@ -216,7 +227,203 @@ def test_pool_log_noop_when_same_day_state_repeats(client: TestClient, tmp_path:
     assert second.status_code == 200
     assert second.json()["action"] == "noop"
 
+    assert client.get("/pool-log/export").status_code == 200
     saved_file = tmp_path / "logPiscina.xlsx"
     df = pd.read_excel(saved_file)
     same_day = df[df["Data"] == payload["data"]]
     assert len(same_day) == 1
+
+
+def test_pool_log_excel_mirror_is_written_in_background(client: TestClient, tmp_path: Path, monkeypatch):
+    saved_file = tmp_path / "logPiscina.xlsx"
+    original_to_excel = pd.DataFrame.to_excel
+    locked = {"value": True}
+
+    def _maybe_locked(self, *args, **kwargs):
+        if locked["value"]:
+            raise PermissionError("logPiscina.xlsx aberto")
+        return original_to_excel(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_excel", _maybe_locked)
+
+    for idx, horario in enumerate(["08:00", "09:00", "10:00"]):
+        response = client.post("/pool-log", json=_build_payload({"horario": horario, "clima1": f"Sol {idx}"}))
+        assert response.status_code == 200
+        assert response.json()["db_saved"] is True
+
+    assert not saved_file.exists()
+    assert pool_log_storage.POOL_LOG_EXCEL_MIRROR.flush() == 0
+    assert pool_log_storage.POOL_LOG_EXCEL_MIRROR.pending_count(str(saved_file)) == 3
+    assert client.get("/pool-log/export").status_code == 423
+
+    locked["value"] = False
+    assert client.get("/pool-log/export").status_code == 200
+    assert len(pd.read_excel(saved_file)) == 3
+
+
+def test_pool_log_rebuild_keeps_rows_queued_after_its_query(client: TestClient, tmp_path: Path):
+    saved_file = str(tmp_path / "logPiscina.xlsx")
+    mirror = pool_log_storage.POOL_LOG_EXCEL_MIRROR
+    assert client.post("/pool-log", json=_build_payload({"horario": "08:00"})).status_code == 200
+    with Session(db_module.engine) as session:
+        stored_id = session.exec(select(models.PoolLog.id)).one()
+
+    # Linha gravada depois da consulta do rebuild (id ainda desconhecido) e outra que o banco recusou.
+    late_row = pool_log_storage._pool_log_row_from_entry(schemas.PoolLogEntryModel(**_build_payload({"horario": "09:00"})))
+    failed_row = pool_log_storage._pool_log_row_from_entry(schemas.PoolLogEntryModel(**_build_payload({"horario": "10:00"})))
+    mirror.enqueue(saved_file, late_row, stored_id + 1)
+    mirror.enqueue(saved_file, failed_row, None)
+    assert mirror.pending_count(saved_file) == 3
+
+    assert pool_log_storage._rebuild_pool_log_excel_from_db(saved_file) == 1
+    assert mirror.pending_count(saved_file) == 1
+    assert sorted(pd.read_excel(saved_file)["Horario"]) == ["08:00", "10:00"]
+
+    assert mirror.flush() == 1
+    assert sorted(pd.read_excel(saved_file)["Horario"]) == ["08:00", "09:00", "10:00"]
+
+
+def test_pool_log_mirror_drops_queue_after_repeated_failures(client: TestClient, tmp_path: Path, monkeypatch, capsys):
+    saved_file = tmp_path / "logPiscina.xlsx"
+    mirror = pool_log_storage.POOL_LOG_EXCEL_MIRROR
+    assert client.post("/pool-log", json=_build_payload({"horario": "08:00"})).status_code == 200
+    mirror.flush()
+    assert saved_file.exists()
+
+    original_to_excel = pd.DataFrame.to_excel
+    locked = {"value": True}
+
+    def _maybe_locked(self, *args, **kwargs):
+        if locked["value"]:
+            raise PermissionError("logPiscina.xlsx aberto")
+        return original_to_excel(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_excel", _maybe_locked)
+    monkeypatch.setattr(mirror, "max_failures", 2)
+    for horario in ["09:00", "10:00"]:
+        response = client.post("/pool-log", json=_build_payload({"horario": horario, "clima1": f"Sol {horario}"}))
+        assert response.json()["action"] == "created"
+
+    mirror.flush()
+    mirror.flush()
+    assert mirror.pending_count(str(saved_file)) == 0
+    assert mirror.needs_rebuild(str(saved_file))
+    assert "gave up" in capsys.readouterr().out
+
+    # O arquivo existe mas está desatualizado: a exportação regenera do banco.
+    locked["value"] = False
+    assert client.get("/pool-log/export").status_code == 200
+    assert not mirror.needs_rebuild(str(saved_file))
+    assert sorted(pd.read_excel(saved_file)["Horario"]) == ["08:00", "09:00", "10:00"]
+
+
+def test_pool_log_reads_only_requested_day(client: TestClient):
+    with Session(db_module.engine) as session:
+        for day in range(1, 29):
+            session.add(
+                models.PoolLog(
+                    data=f"2025-02-{day:02d}",
+                    turma_codigo="OLD",
+                    horario="1015",
+                    clima1="Antigo",
+                )
+            )
+        session.commit()
+
+    assert client.post("/pool-log", json=_build_payload()).status_code == 200
+
+    fetched_rows = []
+
+    def _count_rows(conn, cursor, statement, parameters, context, executemany):
+        if "FROM pool_logs" in statement and "pool_logs.data = " in statement:
+            fetched_rows.append(parameters)
+
+    # GET /pool-log roda no engine assíncrono.
+    traced = db_module.get_async_engine().sync_engine
+    event.listen(traced, "after_cursor_execute", _count_rows)
+    try:
+        resp = client.get("/pool-log", params={"date": "23/02/2026", "turmaCodigo": "TEST-POOL", "horario": "10:15"})
+    finally:
+        event.remove(traced, "after_cursor_execute", _count_rows)
+
+    assert resp.status_code == 200
+    assert resp.json()["clima1"] == "Sol"
+    assert fetched_rows and all("2026-02-23" in params for params in fetched_rows)
+
+
+def test_legacy_pool_log_dates_are_normalized(client: TestClient):
+    with Session(db_module.engine) as session:
+        session.add(models.PoolLog(data="05/03/2026", turma_codigo="LEG", horario="0800", clima1="Nublado"))
+        session.commit()
+
+    assert pool_log_storage._normalize_pool_log_dates() == 1
+
+    with Session(db_module.engine) as session:
+        assert session.exec(select(models.PoolLog.data)).all() == ["2026-03-05"]
+
+    resp = client.get("/pool-log", params={"date": "2026-03-05", "turmaCodigo": "LEG", "horario": "08:00"})
+    assert resp.status_code == 200
+    assert resp.json()["clima1"] == "Nublado"
+
+
+def test_pool_log_summary_rolls_up_days_and_months(client: TestClient):
+    saves = [
+        {"data": "2026-03-02", "horario": "08:00", "tempPiscina": "26", "tempExterna": "22", "cloroPpm": 1.0},
+        # Ressalvar o mesmo escopo substitui o estado do dia em vez de somar.
+        {"data": "2026-03-02", "horario": "08:00", "tempPiscina": "27", "tempExterna": "23", "cloroPpm": 2.0},
+        {"data": "2026-03-02", "horario": "09:00", "tempPiscina": "29", "tempExterna": "25", "cloroPpm": 3.0},
+        {
+            "data": "2026-03-03",
+            "horario": "08:00",
+            "statusAula": "cancelada",
+            "nota": "ocorrencia",
+            "tipoOcorrencia": "Chuva forte",
+            "cloroPpm": None,
+        },
+        {"data": "2026-04-01", "horario": "08:00", "tempPiscina": "30", "tempExterna": "31", "cloroPpm": 1.5},
+    ]
+    for overrides in saves:
+        assert client.post("/pool-log", json=_build_payload(overrides)).status_code == 200
+
+    resp = client.get("/pool-log/summary", params={"start": "2026-03-01", "end": "30/04/2026", "turmaCodigo": "test-pool"})
+    assert resp.status_code == 200
+    body = resp.json()
+
+    daily = {item["periodo"]: item for item in body["daily"]}
+    assert set(daily) == {"2026-03-02", "2026-03-03", "2026-04-01"}
+    assert daily["2026-03-02"]["aulas"] == 2
+    assert daily["2026-03-02"]["tempPiscinaMin"] == 27.0
+    assert daily["2026-03-02"]["tempPiscinaMax"] == 29.0
+    assert daily["2026-03-02"]["cloroAvg"] == 2.5
+    assert daily["2026-03-03"]["canceladasPorMotivo"] == {"Chuva forte": 1}
+
+    monthly = {item["periodo"]: item for item in body["monthly"]}
+    assert monthly["2026-03"]["aulas"] == 3
+    assert monthly["2026-03"]["canceladas"] == 1
+    assert monthly["2026-04"]["tempExternaMax"] == 31.0
+
+    only_nine = client.get(
+        "/pool-log/summary",
+        params={"start": "2026-03-01", "end": "2026-03-31", "horario": "09:00"},
+    ).json()
+    assert [item["aulas"] for item in only_nine["daily"]] == [1]
+
+    by_label = client.get("/pool-log/summary", params={"start": "2026-03-01", "end": "2026-04-30", "turmaLabel": "teste pool"}).json()
+    assert by_label["monthly"] == body["monthly"]
+
+    assert pool_log_storage._rebuild_pool_log_summary(force=True) == 4
+    rebuilt = client.get("/pool-log/summary", params={"start": "2026-03-01", "end": "2026-04-30"}).json()
+    assert rebuilt == {**body, "end": "2026-04-30"}
+
+
+def test_pool_log_summary_label_keys_are_backfilled(client: TestClient):
+    assert client.post("/pool-log", json=_build_payload({"data": "2026-03-02"})).status_code == 200
+    with Session(db_module.engine) as session:
+        summary = session.exec(select(models.PoolLogDailySummary)).one()
+        summary.turma_label_key = ""
+        session.add(summary)
+        session.commit()
+
+    assert pool_log_storage._backfill_pool_log_summary_label_keys() == 1
+    resp = client.get("/pool-log/summary", params={"start": "2026-03-01", "end": "2026-03-31", "turmaLabel": "Teste Pool"})
+    assert [item["aulas"] for item in resp.json()["daily"]] == [1]
@@ -0,0 +1,120 @@
+import threading
+import time
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine
+
+from app import database as db_module
+from app import models, profiling, settings, student_registry
+from app import main as app_main
+from app.routers import reports as reports_router
+from app.auth import create_access_token, get_password_hash
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'profiling.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 1.0)
+    db_module.create_db_and_tables()
+    with Session(test_engine) as session:
+        session.add(models.User(username="admin", password_hash=get_password_hash("x"), role="admin"))
+        session.add(models.User(username="operador", password_hash=get_password_hash("x"), role="operator"))
+        session.commit()
+
+    original = student_registry._apply_transfer_overrides
+
+    def _slow_overrides(session):
+        time.sleep(0.05)  # dá ao amostrador tempo de ver a rota síncrona no worker
+        return original(session)
+
+    monkeypatch.setattr(student_registry, "_apply_transfer_overrides", _slow_overrides)
+    profiling.reset()
+    with TestClient(app_main.app) as client_instance:
+        yield client_instance
+    profiling.reset()
+
+
+def _auth(username: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': username})}"}
+
+
+def test_admin_can_profile_a_sync_route(client: TestClient):
+    plain = client.get("/reports/statistics")
+    assert plain.status_code == 200 and "x-profile-id" not in plain.headers
+
+    response = client.get("/reports/statistics", params={"profile": "1"}, headers=_auth("admin"))
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    listed = client.get("/maintenance/profiles", headers=_auth("admin")).json()
+    assert [item["id"] for item in listed["profiles"]] == [profile_id]
+
+    profile = client.get(f"/maintenance/profiles/{profile_id}", headers=_auth("admin")).json()
+    assert profile["route"] == "/reports/statistics" and profile["samples"] > 0
+    assert any(item["function"].startswith("routers/reports.py:get_reports_statistics:") for item in profile["top"])
+
+    collapsed = client.get(f"/maintenance/profiles/{profile_id}/collapsed", headers=_auth("admin")).text
+    lines = [line for line in collapsed.splitlines() if "get_reports_statistics" in line]
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_concurrent_unprofiled_request_stays_out_of_the_profile(client: TestClient, monkeypatch):
+    started = threading.Event()
+
+    def _busy_segments():
+        started.set()
+        deadline = time.perf_counter() + 0.4
+        while time.perf_counter() < deadline:
+            pass  # CPU no worker da outra requisição, visível em sys._current_frames()
+        return []
+
+    monkeypatch.setattr(reports_router, "_attendance_journal_segments", _busy_segments)
+    other = threading.Thread(target=lambda: client.get("/filters"))
+    other.start()
+    assert started.wait(5)
+    response = client.get("/reports/statistics", headers={"X-Profile": "1", **_auth("admin")})
+    other.join()
+
+    profile = profiling.get_profile(response.headers["x-profile-id"])
+    assert profile["samples"] > 0
+    assert any("get_reports_statistics" in line for line in profile["collapsed"])
+    assert not any("get_report_filters" in line or "_busy_segments" in line for line in profile["collapsed"])
+
+
+def test_profiling_requires_an_admin(client: TestClient):
+    assert client.get("/reports/statistics", headers={"X-Profile": "1"}).status_code == 403
+    assert client.get("/reports/statistics", headers={"X-Profile": "1", **_auth("operador")}).status_code == 403
+    assert client.get("/maintenance/profiles", headers=_auth("operador")).status_code == 403
+    assert client.get("/maintenance/profiles").status_code == 401
+    assert profiling.list_profiles() == []
+
+
+def test_ring_buffer_is_bounded(client: TestClient, monkeypatch):
+    monkeypatch.setattr(profiling, "_profiles", profiling.deque(maxlen=2))
+    ids = [client.get("/health", headers={"X-Profile": "1", **_auth("admin")}).headers["x-profile-id"] for _ in range(3)]
+    assert [item["id"] for item in profiling.list_profiles()] == ids[:0:-1]
+
+
+def test_failed_sampler_stop_still_stores_profile_and_releases(client: TestClient, monkeypatch):
+    def _broken_stop(self):
+        raise RuntimeError("sampler stop failed")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(profiling._Sampler, "stop", _broken_stop)
+        with pytest.raises(RuntimeError):
+            client.get("/health", headers={"X-Profile": "1", **_auth("admin")})
+    assert len(profiling.list_profiles()) == 1
+
+    response = client.get("/health", headers={"X-Profile": "1", **_auth("admin")})
+    assert "x-profile-status" not in response.headers and "x-profile-id" in response.headers
@@ -5,9 +5,11 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session, create_engine
 
 from app import database as db_module
+from app import models, settings
 from app import main as app_main
-from app import models
-from app.main import ExcelExportPayload, ReportClass, ReportStudent, _resolve_export_targets
+from app.routers.exports import _resolve_export_targets
+from app.routers.reports import get_reports
+from app.schemas import ExcelExportPayload, ReportClass, ReportStudent
 
 
 def test_resolve_export_targets_falls_back_to_turma_and_horario_when_professor_differs():
@@ -61,7 +63,7 @@ def test_excel_export_creates_separate_sheets_for_each_class(tmp_path):
         connect_args={"check_same_thread": False},
     )
 
-    app_main.DATA_DIR = str(data_dir)
+    settings.DATA_DIR = str(data_dir)
     db_module.engine = test_engine
     db_module.create_db_and_tables()
 
@@ -141,7 +143,7 @@ def test_get_reports_ignores_students_outside_class_roster(tmp_path):
         connect_args={"check_same_thread": False},
     )
 
-    app_main.DATA_DIR = str(data_dir)
+    settings.DATA_DIR = str(data_dir)
     db_module.engine = test_engine
     db_module.create_db_and_tables()
 
@@ -185,7 +187,7 @@ def test_get_reports_ignores_students_outside_class_roster(tmp_path):
         )
         session.commit()
 
-        reports = app_main.get_reports(month="2026-04", session=session)
+        reports = get_reports(month="2026-04", session=session)
 
     assert len(reports) == 1
     assert [aluno.nome for aluno in reports[0].alunos] == ["Aluno da Turma"]
\ No newline at end of file
@@ -0,0 +1,114 @@
+import json
+import time
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, create_engine
+
+from app import database as db_module
+from app import instrumentation, models, settings
+from app import main as app_main
+from app.auth import create_access_token, get_password_hash
+
+
+def _csv_payload(rows: int) -> bytes:
+    header = "aluno_nome,whatsapp,data_nascimento,data_atest,categoria,genero,parq,atestado"
+    lines = [header] + [f"Aluno {idx:02d},1999999{idx:04d},01/01/2010,,A,F,,nao" for idx in range(rows)]
+    return "\n".join(lines).encode("utf-8")
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch) -> Generator[TestClient, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "excludedStudents.json").write_text(json.dumps([{"id": "e1", "nome": "Bruno", "turma": "T01"}]), encoding="utf-8")
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'stats.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+    db_module.create_db_and_tables()
+    with Session(test_engine) as session:
+        session.add(models.User(username="admin", password_hash=get_password_hash("x"), role="admin"))
+        session.add(models.User(username="operador", password_hash=get_password_hash("x"), role="operator"))
+        session.commit()
+    instrumentation.reset()
+    with TestClient(app_main.app) as client_instance:
+        yield client_instance
+    instrumentation.reset()
+
+
+def _auth(username: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': username})}"}
+
+
+def test_headers_report_sql_and_data_dir_io(client: TestClient):
+    cold = client.get("/exclusions")
+    assert int(cold.headers["x-io-read-bytes"]) > 0
+    assert int(cold.headers["x-db-statements"]) >= 1
+    warm = client.get("/exclusions")
+    assert warm.headers["x-io-read-bytes"] == "0" and warm.headers["x-db-statements"] == "0"
+
+    saved = client.post(
+        "/attendance-log",
+        json={"turmaCodigo": "T01", "horario": "18:30", "professor": "Prof", "mes": "2026-03", "registros": [{"aluno_nome": "Ana", "attendance": {"2026-03-10": "Presente"}}]},
+    )
+    assert saved.status_code == 200
+    assert int(saved.headers["x-db-statements"]) >= 2
+    assert int(saved.headers["x-io-write-bytes"]) > 0  # segmento chamada/baseChamada-2026-03.json
+    assert "db;dur=" in saved.headers["server-timing"] and "x-db-repeated" not in saved.headers
+
+
+def test_per_row_lookups_are_flagged_as_n_plus_one(client: TestClient):
+    response = client.post(
+        "/api/import-data",
+        files={"file": ("import.csv", _csv_payload(15), "text/csv")},
+        data={"apply_overrides": "false"},
+    )
+    assert response.status_code == 200
+    assert "x-db-repeated" in response.headers
+
+    summary = client.get("/maintenance/request-stats", params={"route": "/api/import-data"}, headers=_auth("admin")).json()
+    assert summary["requests"] == 1
+    route = summary["routes"][0]
+    assert route["route"] == "POST /api/import-data"
+    hits = route["n_plus_one"]
+    assert hits and hits[0]["max_count"] >= 15
+    assert any("FROM import_students WHERE" in hit["sql"] for hit in hits)  # get_or_create_import_student por linha
+
+    client.post("/maintenance/request-stats/reset", headers=_auth("admin"))
+    assert client.get("/maintenance/request-stats", headers=_auth("admin")).json()["requests"] == 1  # só a própria consulta acima
+
+
+def test_request_stats_require_an_admin(client: TestClient):
+    assert client.get("/maintenance/request-stats").status_code == 401
+    assert client.get("/maintenance/request-stats", headers=_auth("operador")).status_code == 403
+    assert client.post("/maintenance/request-stats/reset").status_code == 401
+    assert client.post("/maintenance/request-stats/reset", headers=_auth("operador")).status_code == 403
+
+
+def test_failed_statement_does_not_skew_the_next_duration(client: TestClient, tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'errors.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE slots (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO slots (id) VALUES (1)"))
+
+    stats = instrumentation.RequestStats("POST", "/upsert", "")
+    token = instrumentation._current.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO slots (id) VALUES (1)"))  # conflito esperado do upsert
+            conn.rollback()
+            time.sleep(0.2)
+            conn.execute(text("SELECT id FROM slots"))
+            assert "request_stats_started" not in conn.info
+    finally:
+        instrumentation._current.reset(token)
+    assert stats.statements == 1
+    assert stats.db_ms < 150
@@ -0,0 +1,188 @@
+import json
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine, select
+
+from app import database as db_module
+from app import models, settings, student_registry
+from app import main as app_main
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    test_db_path = tmp_path / "overrides.db"
+    test_engine = create_engine(
+        f"sqlite:///{test_db_path}",
+        connect_args={"check_same_thread": False},
+    )
+
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    db_module.create_db_and_tables()
+
+    with Session(test_engine) as session:
+        unit = models.ImportUnit(name="Unidade Teste")
+        session.add(unit)
+        session.commit()
+        session.refresh(unit)
+
+        origin = models.ImportClass(
+            unit_id=unit.id,
+            codigo="ORI-01",
+            turma_label="Terça e Quinta",
+            horario="0800",
+            professor="Prof Origem",
+        )
+        target = models.ImportClass(
+            unit_id=unit.id,
+            codigo="DST-01",
+            turma_label="Quarta e Sexta",
+            horario="0930",
+            professor="Prof Destino",
+        )
+        session.add(origin)
+        session.add(target)
+        session.commit()
+        session.refresh(origin)
+        session.refresh(target)
+
+        for idx in range(100):
+            session.add(
+                models.ImportStudent(
+                    class_id=origin.id,
+                    nome=f"Aluno {idx:03d}",
+                    data_nascimento=f"01/01/{2000 + (idx % 20)}",
+                    whatsapp=f"1999999{idx:04d}",
+                )
+            )
+        session.commit()
+        student_ids = [s.id for s in session.exec(select(models.ImportStudent)).all()]
+
+        yield {
+            "engine": test_engine,
+            "data_dir": data_dir,
+            "origin_id": origin.id,
+            "target_id": target.id,
+            "student_ids": student_ids,
+        }
+
+
+def test_bulk_transfer_writes_overrides_in_a_single_batch(env, monkeypatch):
+    mirror_writes = []
+    original_writer = student_registry._write_transfer_overrides_mirror
+
+    def _counting_writer(items):
+        mirror_writes.append(len(items))
+        original_writer(items)
+
+    monkeypatch.setattr(student_registry, "_write_transfer_overrides_mirror", _counting_writer)
+
+    with TestClient(app_main.app) as client:
+        response = client.post(
+            "/api/import-students/bulk-allocate",
+            json={
+                "student_ids": env["student_ids"],
+                "turma": "Quarta e Sexta",
+                "horario": "09:30",
+                "professor": "Prof Destino",
+                "movement_type": "transfer",
+            },
+        )
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 100
+    assert mirror_writes == [100]
+
+    with Session(env["engine"]) as session:
+        rows = session.exec(select(models.TransferOverride)).all()
+    assert len(rows) == 100
+    assert {row.turma_codigo for row in rows} == {"DST-01"}
+
+    mirror = json.loads((env["data_dir"] / "studentTransferOverrides.json").read_text(encoding="utf-8"))
+    assert len(mirror) == 100
+
+
+def test_overrides_are_reapplied_through_class_index(env):
+    with TestClient(app_main.app) as client:
+        client.post(
+            "/api/import-students/bulk-allocate",
+            json={
+                "student_ids": env["student_ids"][:3],
+                "turma": "DST-01",
+                "horario": "0930",
+                "professor": "prof destino",
+                "movement_type": "transfer",
+            },
+        )
+
+    with Session(env["engine"]) as session:
+        for student in session.exec(select(models.ImportStudent)).all():
+            student.class_id = env["origin_id"]
+            session.add(student)
+        session.commit()
+
+        moved = student_registry._apply_transfer_overrides(session)
+        session.commit()
+
+        assert moved == 3
+        in_target = session.exec(
+            select(models.ImportStudent).where(models.ImportStudent.class_id == env["target_id"])
+        ).all()
+        assert len(in_target) == 3
+
+
+def test_legacy_json_overrides_are_migrated_on_startup(env):
+    legacy = [
+        {
+            "key": "aluno legado|01/01/2010|19999990000",
+            "nome": "Aluno Legado",
+            "data_nascimento": "01/01/2010",
+            "whatsapp": "19999990000",
+            "turmaCodigo": "DST-01",
+            "turmaLabel": "Quarta e Sexta",
+            "horario": "0930",
+            "professor": "Prof Destino",
+        }
+    ]
+    (env["data_dir"] / "studentTransferOverrides.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        response = client.post("/maintenance/clear-transfer-overrides")
+
+    assert response.status_code == 200
+    assert response.json()["removed"] == 1
+    with Session(env["engine"]) as session:
+        assert session.exec(select(models.TransferOverride)).all() == []
+
+
+def test_rolled_back_import_does_not_leave_overrides_in_the_mirror(env):
+    from app.routers import imports as imports_router
+
+    mirror_file = env["data_dir"] / "studentTransferOverrides.json"
+    with Session(env["engine"]) as session:
+        student = session.get(models.ImportStudent, env["student_ids"][0])
+        target = session.get(models.ImportClass, env["target_id"])
+        assert imports_router._upsert_transfer_overrides(session, [(student, target)]) == 1
+        session.flush()
+        session.rollback()
+    assert not mirror_file.exists()
+
+    # Próximo startup: nada de override fantasma vindo do espelho.
+    with TestClient(app_main.app):
+        pass
+    with Session(env["engine"]) as session:
+        assert session.exec(select(models.TransferOverride)).all() == []
+
+        student = session.get(models.ImportStudent, env["student_ids"][0])
+        target = session.get(models.ImportClass, env["target_id"])
+        imports_router._upsert_transfer_overrides(session, [(student, target)])
+        assert not mirror_file.exists()
+        session.commit()
+    assert [item["turmaCodigo"] for item in json.loads(mirror_file.read_text(encoding="utf-8"))] == ["DST-01"]
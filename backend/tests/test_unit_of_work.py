@@ -0,0 +1,87 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import create_engine
+
+from app import database as db_module
+from app import settings
+from app import main as app_main
+
+
+def _attendance(aluno: str, mutation_id: int) -> dict:
+    return {
+        "turmaCodigo": "T01",
+        "turmaLabel": "Turma T01",
+        "horario": "18:30",
+        "professor": "Prof. Teste",
+        "mes": "2026-03",
+        "clientMutationId": mutation_id,
+        "registros": [{"aluno_nome": aluno, "attendance": {"2026-03-10": "Presente"}, "justifications": {}, "notes": []}],
+    }
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'uow.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(db_module, "engine", test_engine)
+
+    checkouts: list = []
+
+    def _track(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    # Rotas de alta frequência usam o engine assíncrono derivado do mesmo banco.
+    engines = [test_engine, db_module.get_async_engine().sync_engine]
+    for traced in engines:
+        event.listen(traced, "checkout", _track)
+    yield {"checkouts": checkouts}
+    for traced in engines:
+        event.remove(traced, "checkout", _track)
+
+
+def test_hot_requests_use_a_single_connection_checkout(env):
+    with TestClient(app_main.app) as client:
+        client.get("/exclusions")  # aquece o cache de exclusões
+        client.post("/attendance-log", json=_attendance("Ana", 1))
+
+        env["checkouts"].clear()
+        response = client.post("/attendance-log", json=_attendance("Bruno", 2))
+        assert response.status_code == 200 and "file" in response.json()
+        assert len(env["checkouts"]) == 1
+
+        env["checkouts"].clear()
+        stale = client.post("/attendance-log", json=_attendance("Carla", 1)).json()
+        assert stale["reason"] == "stale_snapshot"
+        assert len(env["checkouts"]) == 1
+
+        env["checkouts"].clear()
+        assert client.get("/reports", params={"month": "2026-03"}).status_code == 200
+        assert len(env["checkouts"]) == 1
+
+        env["checkouts"].clear()
+        client.post("/exclusions", json={"nome": "Ana", "turma": "T01", "horario": "18:30", "professor": "Prof. Teste"})
+        assert len(env["checkouts"]) == 1
+
+
+def test_purge_runs_in_one_unit_of_work(env):
+    with TestClient(app_main.app) as client:
+        client.post("/attendance-log", json=_attendance("Ana", 1))
+        client.post("/justifications-log", json=[{"aluno_nome": "Ana", "data": "2026-03-10", "turmaCodigo": "T01", "horario": "18:30", "professor": "Prof. Teste", "motivo": "Atestado"}])
+
+        env["checkouts"].clear()
+        purge = client.post(
+            "/maintenance/purge-month-data",
+            json={"month": "2026-03", "clear_transfer_overrides": True, "clear_exclusions": True, "delete_database_rows": True},
+        ).json()
+        assert purge["attendance"]["logsRemoved"] == 1
+        assert purge["justifications"]["removed"] == 1
+        assert len(env["checkouts"]) == 1
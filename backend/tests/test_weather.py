@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlmodel import Session, create_engine, select
+
+from app import database as db_module
+from app import models, settings, weather
+from app import main as app_main
+
+
+def _forecast_xml(days: list) -> bytes:
+    previsoes = "".join(
+        f"<previsao><dia>{day}</dia><tempo>pn</tempo><maxima>30</maxima><minima>20</minima></previsao>"
+        for day in days
+    )
+    return f"<cidade><nome>Teste</nome>{previsoes}</cidade>".encode("utf-8")
+
+
+@pytest.fixture
+def cptec(tmp_path: Path, monkeypatch) -> Generator[dict, None, None]:
+    today = datetime.utcnow().date()
+    days = [(today + timedelta(days=offset)).isoformat() for offset in range(7)]
+    state = {"hits": 0, "days": days, "delay": 0.3}
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["hits"] += 1
+            time.sleep(state["delay"])
+            body = _forecast_xml(state["days"])
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(settings, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(
+        db_module,
+        "engine",
+        create_engine(f"sqlite:///{tmp_path / 'weather.db'}", connect_args={"check_same_thread": False}),
+    )
+    monkeypatch.setenv("CPTEC_WEATHER_URL", f"http://127.0.0.1:{server.server_address[1]}/previsao.xml")
+    monkeypatch.setattr(weather, "WEATHER_SERVICE", weather._WeatherService(0, 60))
+    state["data_dir"] = data_dir
+
+    yield state
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_misses_share_a_single_fetch(cptec):
+    target = cptec["days"][2]
+    with TestClient(app_main.app) as client:
+        results = []
+
+        def _call():
+            results.append(client.get("/weather", params={"date": target}).json())
+
+        workers = [threading.Thread(target=_call) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert cptec["hits"] == 1
+        assert all(item["source"] == "snapshot" and item["temp"] == "25" for item in results)
+
+        # Leituras seguintes saem do snapshot sem novo fetch.
+        assert client.get("/weather", params={"date": cptec["days"][5]}).json()["source"] == "snapshot"
+        assert cptec["hits"] == 1
+
+    snapshots = json.loads((cptec["data_dir"] / "weatherSnapshots.json").read_text(encoding="utf-8"))
+    assert sorted(snapshots) == cptec["days"]
+
+
+def test_past_dates_without_snapshot_do_not_fetch(cptec):
+    with TestClient(app_main.app) as client:
+        response = client.get("/weather", params={"date": "2020-01-01"})
+
+    assert response.json()["source"] == "unavailable"
+    assert cptec["hits"] == 0
+
+
+def test_prefetch_fills_snapshots_in_background(cptec, monkeypatch):
+    service = weather._WeatherService(3600, 60)
+    monkeypatch.setattr(weather, "WEATHER_SERVICE", service)
+    cptec["delay"] = 0
+
+    with TestClient(app_main.app):
+        deadline = time.monotonic() + 5
+        while not (cptec["data_dir"] / "weatherSnapshots.json").exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert cptec["hits"] == 1
+    assert len(service.forecast) == 7
+
+
+def test_late_fetch_writes_to_the_engine_bound_at_start(cptec, tmp_path: Path, monkeypatch):
+    service = weather.WEATHER_SERVICE
+    cptec["delay"] = 0.5
+
+    with TestClient(app_main.app):
+        bound_engine = db_module.engine
+        # Troca de engine no meio do fetch (como os testes fazem ao restaurar): o fetch não segue a troca.
+        other_engine = create_engine(f"sqlite:///{tmp_path / 'other.db'}", connect_args={"check_same_thread": False})
+        monkeypatch.setattr(db_module, "engine", other_engine)
+        service.refresh(wait_seconds=0)
+
+    # stop() espera o fetch em andamento terminar.
+    assert cptec["hits"] == 1 and service.fetch_count == 1
+    with Session(bound_engine) as session:
+        assert len(session.exec(select(models.WeatherSnapshot)).all()) == 7
+    assert "weather_snapshots" not in inspect(other_engine).get_table_names()
+
+
+def test_legacy_snapshots_are_migrated_and_purged_by_month(cptec):
+    legacy = {
+        "2026-02-10": {"date": "2026-02-10", "temp": "27", "condition": "Sol", "conditionCode": "cl"},
+        "2026-02-11": {"date": "2026-02-11", "temp": "24", "condition": "Chuva", "conditionCode": "c"},
+        "2026-03-01": {"date": "2026-03-01", "temp": "22", "condition": "Nublado", "conditionCode": "n"},
+    }
+    (cptec["data_dir"] / "weatherSnapshots.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    with TestClient(app_main.app) as client:
+        fetched = client.get("/weather", params={"date": "2026-02-11"}).json()
+        assert fetched == {"temp": "24", "condition": "Chuva", "conditionCode": "c", "source": "snapshot"}
+        assert sorted(client.get("/weather/snapshots", params={"month": "2026-02"}).json()) == ["2026-02-10", "2026-02-11"]
+
+        purge = client.post(
+            "/maintenance/purge-month-data",
+            json={"month": "2026-02", "clear_transfer_overrides": False},
+        ).json()
+        assert purge["weatherSnapshots"] == {"before": 3, "after": 1, "removed": 2}
+        assert client.get("/weather", params={"date": "2026-02-11"}).json()["source"] == "unavailable"
+
+    exported = json.loads((cptec["data_dir"] / "weatherSnapshots.json").read_text(encoding="utf-8"))
+    assert sorted(exported) == ["2026-03-01"]
+    assert cptec["hits"] == 0